@@ -6,6 +6,8 @@ from ._delete import Delete, DeleteAsync
 from ._get import (
     Get,
     GetAsync,
+    GetMany,
+    GetManyAsync,
     GetOptions,
     GetRange,
     GetRangeAsync,
@@ -39,6 +41,8 @@ __all__ = [
     "DeleteAsync",
     "Get",
     "GetAsync",
+    "GetMany",
+    "GetManyAsync",
     "GetOptions",
     "GetRange",
     "GetRangeAsync",
@@ -10,7 +10,7 @@ else:
     from typing_extensions import Buffer
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import AsyncIterator, Iterator, Sequence
     from datetime import datetime
 
     from ._attributes import Attributes
@@ -343,3 +343,56 @@ class GetRangesAsync(Protocol):
         Refer to the documentation for [GetRanges][obspec.GetRanges].
         """
         ...
+
+
+class GetMany(Protocol):
+    def get_many(
+        self,
+        paths: Iterable[str | tuple[str, GetOptions]],
+        *,
+        ordered: bool = False,
+    ) -> Iterator[tuple[str, Buffer | Exception]]:
+        """Return the bytes stored at many locations, as each request completes.
+
+        Requests are made concurrently, with a bounded number in flight, so that
+        fetching many small objects is limited by the network rather than by making
+        one call at a time. `paths` is consumed lazily, only as requests complete and
+        their results are taken from the iterator, so it may be very long.
+
+        The choice of how many requests to make at once is implementation specific.
+
+        Args:
+            paths: The paths within the store to retrieve. Each item is either a path,
+                or a tuple of a path and the [`GetOptions`][obspec.GetOptions] for
+                that request.
+
+        Keyword Args:
+            ordered: If `True`, results are yielded in the order of `paths`.
+                Otherwise, they are yielded in the order requests complete. Defaults
+                to `False`.
+
+        Returns:
+            An iterator of `(path, result)` tuples, one for each item of `paths`,
+            where `result` is a `Buffer` with the object's bytes, or the exception
+            raised by that request. A failed request does not stop the others.
+
+        """
+        ...
+
+
+class GetManyAsync(Protocol):
+    def get_many_async(
+        self,
+        paths: Iterable[str | tuple[str, GetOptions]]
+        | AsyncIterable[str | tuple[str, GetOptions]],
+        *,
+        ordered: bool = False,
+    ) -> AsyncIterator[tuple[str, Buffer | Exception]]:
+        """Call `get_many` asynchronously.
+
+        Note that this method itself is **not async**. It's a synchronous method but
+        returns an **async iterator**. `paths` may also be an async iterable.
+
+        Refer to the documentation for [GetMany][obspec.GetMany].
+        """
+        ...
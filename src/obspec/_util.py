@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+from .exceptions import BaseError, NotSupportedError, map_exception
+
+if TYPE_CHECKING:
+    import sys
+    from collections.abc import AsyncIterator, Awaitable, Iterator, Sequence
+
+    from ._attributes import Attributes
+    from ._meta import ObjectMeta
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+
+def resolve_end(start: int, end: int | None, length: int | None) -> int:
+    """Resolve the exclusive end of a range given either its `end` or its `length`."""
+    if start < 0:
+        msg = f"Range start must be non-negative, got {start}."
+        raise ValueError(msg)
+
+    if end is None and length is None:
+        msg = "Either `end` or `length` must be non-None."
+        raise ValueError(msg)
+
+    if end is not None and length is not None:
+        msg = "Only one of `end` or `length` may be provided."
+        raise ValueError(msg)
+
+    if end is None:
+        assert length is not None  # noqa: S101
+        end = start + length
+
+    if end < start:
+        msg = f"Range end ({end}) must not be less than range start ({start})."
+        raise ValueError(msg)
+
+    return end
+
+
+def resolve_ends(
+    starts: Sequence[int],
+    ends: Sequence[int] | None,
+    lengths: Sequence[int] | None,
+) -> list[int]:
+    """Resolve the exclusive ends of many ranges given either `ends` or `lengths`."""
+    if ends is None and lengths is None:
+        msg = "Either `ends` or `lengths` must be non-None."
+        raise ValueError(msg)
+
+    if ends is not None and lengths is not None:
+        msg = "Only one of `ends` or `lengths` may be provided."
+        raise ValueError(msg)
+
+    other = ends if ends is not None else lengths
+    assert other is not None  # noqa: S101
+    if len(other) != len(starts):
+        msg = (
+            f"Got {len(starts)} range starts but {len(other)} "
+            f"{'ends' if ends is not None else 'lengths'}."
+        )
+        raise ValueError(msg)
+
+    if ends is not None:
+        return [resolve_end(s, e, None) for s, e in zip(starts, ends)]
+
+    return [resolve_end(s, None, n) for s, n in zip(starts, other)]
+
+
+def as_memoryview(buffer: Buffer) -> memoryview:
+    """View any object implementing the buffer protocol as flat unsigned bytes.
+
+    This never copies: the returned memoryview references the original memory.
+    """
+    view = memoryview(buffer)
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    return view
+
+
+STREAM_CHUNK_SIZE = 8 * 1024 * 1024
+"""The size of each buffer yielded when iterating over a get result."""
+
+
+class BufferResult:
+    """A [`GetResult`][obspec.GetResult] and [`GetResultAsync`][obspec.GetResultAsync]
+    over a buffer that is already in memory (or memory-mapped).
+
+    Iterating over the result yields zero-copy slices of the buffer.
+    """  # noqa: D205
+
+    def __init__(
+        self,
+        buffer: Buffer,
+        *,
+        meta: ObjectMeta,
+        range: tuple[int, int],  # noqa: A002
+        attributes: Attributes | None = None,
+    ) -> None:
+        self._buffer = buffer
+        self._meta = meta
+        self._range = range
+        self._attributes = attributes or {}
+
+    @property
+    def attributes(self) -> Attributes:
+        """Additional object attributes."""
+        return self._attributes
+
+    @property
+    def meta(self) -> ObjectMeta:
+        """The ObjectMeta for this object."""
+        return self._meta
+
+    @property
+    def range(self) -> tuple[int, int]:
+        """The range of bytes returned by this request."""
+        return self._range
+
+    def buffer(self) -> Buffer:
+        """Return the data as a `Buffer` object."""
+        return self._buffer
+
+    async def buffer_async(self) -> Buffer:
+        """Return the data as a `Buffer` object."""
+        return self._buffer
+
+    def __iter__(self) -> Iterator[Buffer]:
+        view = as_memoryview(self._buffer)
+        for offset in range(0, len(view), STREAM_CHUNK_SIZE):
+            yield view[offset : offset + STREAM_CHUNK_SIZE]
+
+    async def __aiter__(self) -> AsyncIterator[Buffer]:
+        for chunk in self:
+            yield chunk
+
+
+def fetch_range(client: object, path: str, start: int, end: int) -> Buffer:
+    """Fetch a byte range with `get_range`, falling back to a `get` with a range."""
+    if hasattr(client, "get_range"):
+        return client.get_range(path, start=start, end=end)
+    if hasattr(client, "get"):
+        return client.get(path, options={"range": (start, end)}).buffer()
+
+    msg = f"{type(client).__name__} implements neither `get_range` nor `get`."
+    raise NotSupportedError(msg)
+
+
+async def fetch_range_async(
+    client: object,
+    path: str,
+    start: int,
+    end: int,
+) -> Buffer:
+    """Call `fetch_range` asynchronously, using `get_range_async` or `get_async`."""
+    if hasattr(client, "get_range_async"):
+        return await client.get_range_async(path, start=start, end=end)
+    if hasattr(client, "get_async"):
+        resp = await client.get_async(path, options={"range": (start, end)})
+        return await resp.buffer_async()
+
+    msg = (
+        f"{type(client).__name__} implements neither `get_range_async` nor `get_async`."
+    )
+    raise NotSupportedError(msg)
+
+
+def fetch_meta(client: object, path: str) -> ObjectMeta:
+    """Fetch object metadata with `head`, falling back to a `get` with `head=True`."""
+    if hasattr(client, "head"):
+        return client.head(path)
+    if hasattr(client, "get"):
+        return client.get(path, options={"head": True}).meta
+
+    msg = f"{type(client).__name__} implements neither `head` nor `get`."
+    raise NotSupportedError(msg)
+
+
+async def fetch_meta_async(client: object, path: str) -> ObjectMeta:
+    """Call `fetch_meta` asynchronously, using `head_async` or `get_async`."""
+    if hasattr(client, "head_async"):
+        return await client.head_async(path)
+    if hasattr(client, "get_async"):
+        return (await client.get_async(path, options={"head": True})).meta
+
+    msg = f"{type(client).__name__} implements neither `head_async` nor `get_async`."
+    raise NotSupportedError(msg)
+
+
+async def gather_or_cancel(*aws: Awaitable[Any]) -> list[Any]:
+    """Run awaitables concurrently, cancelling the rest as soon as one fails.
+
+    Unlike `asyncio.gather`, this does not return until every awaitable has finished,
+    so resources shared by them can be released safely afterwards.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def is_error(exception: BaseException, error: type[BaseError]) -> bool:
+    """Return whether `exception` is, or maps to, the obspec exception `error`.
+
+    Implementations raise their own exception classes, so these are classified with
+    [`map_exception`][obspec.exceptions.map_exception].
+    """
+    if isinstance(exception, error):
+        return True
+    return isinstance(exception, Exception) and isinstance(
+        map_exception(exception),
+        error,
+    )
+
+
+_TRANSIENT_ERRORS = (OSError, asyncio.TimeoutError)
+"""`ConnectionError` and `TimeoutError` are subclasses of `OSError`."""
+
+_PERMANENT_OS_ERRORS = (
+    FileExistsError,
+    FileNotFoundError,
+    IsADirectoryError,
+    NotADirectoryError,
+    PermissionError,
+)
+
+
+def is_transient(exception: BaseException) -> bool:
+    """Return whether a failed request may succeed if it is retried.
+
+    Only connection errors, timeouts and other `OSError`s are transient. Exceptions
+    that map to a well-known obspec exception, such as `NotFoundError` or
+    `PreconditionError`, describe the state of the store, and `OSError`s for missing
+    files, permissions and directories describe the local file system. Any other
+    exception, such as an `AttributeError`, is a bug that a retry would only delay.
+    """
+    if not isinstance(exception, _TRANSIENT_ERRORS) or isinstance(
+        exception,
+        _PERMANENT_OS_ERRORS,
+    ):
+        return False
+    return not isinstance(map_exception(exception), BaseError)
@@ -0,0 +1,470 @@
+"""A benchmark harness for comparing obspec implementations.
+
+[`run_benchmarks`][obspec.benchmark.run_benchmarks] runs a standard set of workloads
+against any store implementing the obspec protocols and reports latency percentiles,
+throughput and peak memory use for each in a machine-readable form. Workloads that
+need a protocol the store does not implement are skipped.
+
+| Workload | Protocols | Description |
+| --- | --- | --- |
+| `get` | `Put`, `Get` | Stream a large object by iterating over `GetResult` |
+| `get_range` | `Put`, `GetRange` | Random `get_range` reads from a large object |
+| `get_ranges` | `Put`, `GetRanges` | Batches of random ranges with `get_ranges` |
+| `put_small` | `Put` | A concurrent storm of small-object puts |
+| `put_multipart` | `Put` | Multipart puts for each `chunk_size` and `max_concurrency` |
+| `list` | `Put`, `List` | Full recursive listings of a nested prefix |
+
+```py
+from obspec.benchmark import run_benchmarks
+
+for result in run_benchmarks(store, workloads=["get_range", "list"]):
+    print(result["workload"], result["p50_seconds"], result["mb_per_second"])
+```
+
+The benchmarks can also be run from the command line, given an importable factory
+that returns the store to test. Results are printed as JSON:
+
+```sh
+python -m obspec.benchmark my_package.stores:make_store --workload get_range
+```
+
+!!! note
+    Peak RSS is the high-water mark of the whole process, so it can only grow from
+    one workload to the next. Run workloads in separate processes to compare their
+    memory use in isolation.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, TypedDict
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # Windows
+    resource = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+WORKLOADS = ("get", "get_range", "get_ranges", "put_small", "put_multipart", "list")
+"""The names of all available workloads, in the order they are run."""
+
+MB = 1_000_000
+
+
+class BenchmarkResult(TypedDict):
+    """The result of running one workload."""
+
+    workload: str
+    """The name of the workload."""
+
+    parameters: dict[str, Any]
+    """The parameters of this run of the workload, such as `chunk_size`."""
+
+    operations: int
+    """The number of timed operations."""
+
+    bytes: int
+    """The total number of bytes read or written."""
+
+    seconds: float
+    """The wall-clock duration of the workload."""
+
+    p50_seconds: float
+    """The median latency of one operation."""
+
+    p99_seconds: float
+    """The 99th percentile latency of one operation."""
+
+    operations_per_second: float
+    """The number of operations completed per second of wall-clock time."""
+
+    mb_per_second: float
+    """Throughput in megabytes (10^6 bytes) per second of wall-clock time."""
+
+    peak_rss_bytes: int | None
+    """The peak resident set size of this process after the workload, if known."""
+
+
+def _peak_rss() -> int | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux but in bytes on macOS.
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _percentile(sorted_samples: Sequence[float], q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    pos = (len(sorted_samples) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_samples) - 1)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (pos - lo)
+
+
+def _result(
+    workload: str,
+    parameters: dict[str, Any],
+    latencies: list[float],
+    n_bytes: int,
+    seconds: float,
+) -> BenchmarkResult:
+    latencies.sort()
+    return {
+        "workload": workload,
+        "parameters": parameters,
+        "operations": len(latencies),
+        "bytes": n_bytes,
+        "seconds": seconds,
+        "p50_seconds": _percentile(latencies, 0.5),
+        "p99_seconds": _percentile(latencies, 0.99),
+        "operations_per_second": len(latencies) / seconds if seconds else 0.0,
+        "mb_per_second": n_bytes / MB / seconds if seconds else 0.0,
+        "peak_rss_bytes": _peak_rss(),
+    }
+
+
+def _timed(
+    operations: Sequence[Callable[[], int]],
+    concurrency: int,
+) -> tuple[list[float], int, float]:
+    """Run each operation, returning per-operation latencies, total bytes and time."""
+
+    def run(op: Callable[[], int]) -> tuple[float, int]:
+        start = time.perf_counter()
+        n = op()
+        return time.perf_counter() - start, n
+
+    start = time.perf_counter()
+    if concurrency <= 1:
+        samples = [run(op) for op in operations]
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            samples = list(pool.map(run, operations))
+    seconds = time.perf_counter() - start
+    return [s for s, _ in samples], sum(n for _, n in samples), seconds
+
+
+class _Runner:
+    def __init__(  # noqa: PLR0913
+        self,
+        store: Any,  # noqa: ANN401
+        *,
+        prefix: str,
+        iterations: int,
+        concurrency: int,
+        object_size: int,
+        range_size: int,
+        batch_size: int,
+        small_object_size: int,
+        list_objects: int,
+        chunk_sizes: Sequence[int],
+        max_concurrencies: Sequence[int],
+        seed: int,
+    ) -> None:
+        self.store = store
+        self.prefix = prefix.rstrip("/")
+        self.iterations = iterations
+        self.concurrency = concurrency
+        self.object_size = object_size
+        self.range_size = min(range_size, object_size)
+        self.batch_size = batch_size
+        self.small_object_size = small_object_size
+        self.list_objects = list_objects
+        self.chunk_sizes = chunk_sizes
+        self.max_concurrencies = max_concurrencies
+        self.random = random.Random(seed)  # noqa: S311
+        self.data = memoryview(self.random.randbytes(object_size))
+        self.written: list[str] = []
+        self._large: str | None = None
+
+    def supports(self, *methods: str) -> bool:
+        return all(hasattr(self.store, method) for method in methods)
+
+    def put(self, path: str, data: Any, **kwargs: Any) -> int:  # noqa: ANN401
+        self.store.put(path, data, **kwargs)
+        self.written.append(path)
+        return len(data) if hasattr(data, "__len__") else self.object_size
+
+    def large_object(self) -> str:
+        if self._large is None:
+            self._large = f"{self.prefix}/large"
+            self.put(self._large, self.data)
+        return self._large
+
+    def random_start(self) -> int:
+        return self.random.randrange(0, self.object_size - self.range_size + 1)
+
+    def get(self) -> Iterator[BenchmarkResult]:
+        if not self.supports("put", "get"):
+            return
+        path = self.large_object()
+
+        def op() -> int:
+            return sum(len(memoryview(chunk)) for chunk in self.store.get(path))
+
+        ops = [op] * self.iterations
+        yield _result(
+            "get",
+            {"object_size": self.object_size},
+            *_timed(ops, 1),
+        )
+
+    def get_range(self) -> Iterator[BenchmarkResult]:
+        if not self.supports("put", "get_range"):
+            return
+        path = self.large_object()
+
+        def op(start: int) -> Callable[[], int]:
+            end = start + self.range_size
+            return lambda: len(
+                memoryview(self.store.get_range(path, start=start, end=end)),
+            )
+
+        ops = [op(self.random_start()) for _ in range(self.iterations * 10)]
+        yield _result(
+            "get_range",
+            {"range_size": self.range_size, "concurrency": self.concurrency},
+            *_timed(ops, self.concurrency),
+        )
+
+    def get_ranges(self) -> Iterator[BenchmarkResult]:
+        if not self.supports("put", "get_ranges"):
+            return
+        path = self.large_object()
+
+        def op(starts: list[int]) -> Callable[[], int]:
+            lengths = [self.range_size] * len(starts)
+            return lambda: sum(
+                len(memoryview(buffer))
+                for buffer in self.store.get_ranges(
+                    path,
+                    starts=starts,
+                    lengths=lengths,
+                )
+            )
+
+        ops = [
+            op([self.random_start() for _ in range(self.batch_size)])
+            for _ in range(self.iterations)
+        ]
+        yield _result(
+            "get_ranges",
+            {"range_size": self.range_size, "batch_size": self.batch_size},
+            *_timed(ops, 1),
+        )
+
+    def put_small(self) -> Iterator[BenchmarkResult]:
+        if not self.supports("put"):
+            return
+        data = self.data[: self.small_object_size]
+
+        def op(i: int) -> Callable[[], int]:
+            return lambda: self.put(f"{self.prefix}/small/{i:08}", data)
+
+        ops = [op(i) for i in range(self.iterations * 10)]
+        yield _result(
+            "put_small",
+            {
+                "object_size": self.small_object_size,
+                "concurrency": self.concurrency,
+            },
+            *_timed(ops, self.concurrency),
+        )
+
+    def put_multipart(self) -> Iterator[BenchmarkResult]:
+        if not self.supports("put"):
+            return
+
+        for chunk_size in self.chunk_sizes:
+            for max_concurrency in self.max_concurrencies:
+                path = f"{self.prefix}/multipart/{chunk_size}-{max_concurrency}"
+
+                def op(
+                    path: str = path,
+                    chunk_size: int = chunk_size,
+                    max_concurrency: int = max_concurrency,
+                ) -> int:
+                    chunks = (
+                        self.data[i : i + chunk_size]
+                        for i in range(0, self.object_size, chunk_size)
+                    )
+                    self.put(
+                        path,
+                        chunks,
+                        use_multipart=True,
+                        chunk_size=chunk_size,
+                        max_concurrency=max_concurrency,
+                    )
+                    return self.object_size
+
+                ops = [op] * max(self.iterations // 2, 1)
+                yield _result(
+                    "put_multipart",
+                    {
+                        "object_size": self.object_size,
+                        "chunk_size": chunk_size,
+                        "max_concurrency": max_concurrency,
+                    },
+                    *_timed(ops, 1),
+                )
+
+    def list(self) -> Iterator[BenchmarkResult]:
+        if not self.supports("put", "list"):
+            return
+        prefix = f"{self.prefix}/list"
+        for i in range(self.list_objects):
+            self.put(f"{prefix}/{i % 10}/{i % 100}/{i:08}", b"")
+
+        def op() -> int:
+            return sum(len(chunk) for chunk in self.store.list(prefix))
+
+        latencies, _, seconds = _timed([op] * self.iterations, 1)
+        yield _result(
+            "list",
+            {"objects": self.list_objects},
+            latencies,
+            0,
+            seconds,
+        )
+
+    def cleanup(self) -> None:
+        if self.written and self.supports("delete"):
+            self.store.delete(sorted(set(self.written)))
+
+
+def run_benchmarks(  # noqa: PLR0913
+    store: Any,  # noqa: ANN401
+    *,
+    workloads: Sequence[str] | None = None,
+    prefix: str = "obspec-benchmark",
+    iterations: int = 10,
+    concurrency: int = 8,
+    object_size: int = 64 * 1024 * 1024,
+    range_size: int = 64 * 1024,
+    batch_size: int = 100,
+    small_object_size: int = 4 * 1024,
+    list_objects: int = 10_000,
+    chunk_sizes: Sequence[int] = (5 * 1024 * 1024, 16 * 1024 * 1024),
+    max_concurrencies: Sequence[int] = (1, 8),
+    seed: int = 0,
+    cleanup: bool = True,
+) -> list[BenchmarkResult]:
+    """Run benchmark workloads against a store.
+
+    All objects are written beneath `prefix`, and are deleted afterwards if `cleanup`
+    is `True` and the store implements [`Delete`][obspec.Delete].
+
+    Args:
+        store: Any object implementing some of the obspec protocols. Workloads that
+            need a method the store does not have are skipped.
+
+    Keyword Args:
+        workloads: The names of the workloads to run, from
+            [`WORKLOADS`][obspec.benchmark.WORKLOADS]. Defaults to all of them.
+        prefix: The prefix beneath which to write benchmark objects.
+        iterations: The base number of timed operations per workload. Cheap
+            operations (`get_range`, `put_small`) run ten times as many.
+        concurrency: The number of threads issuing `get_range` and `put_small`
+            requests.
+        object_size: The size in bytes of the large object used by the `get`,
+            `get_range`, `get_ranges` and `put_multipart` workloads.
+        range_size: The size in bytes of each random range.
+        batch_size: The number of ranges in each `get_ranges` call.
+        small_object_size: The size in bytes of each object in `put_small`.
+        list_objects: The number of objects to create and list in `list`.
+        chunk_sizes: The `chunk_size` values for `put_multipart`.
+        max_concurrencies: The `max_concurrency` values for `put_multipart`.
+        seed: The seed for generated data and random ranges.
+        cleanup: Whether to delete the benchmark objects afterwards.
+
+    Returns:
+        One result per workload, or per parameter combination for `put_multipart`.
+
+    """
+    names = WORKLOADS if workloads is None else workloads
+    unknown = set(names) - set(WORKLOADS)
+    if unknown:
+        msg = f"Unknown workloads: {sorted(unknown)}. Expected any of {WORKLOADS}."
+        raise ValueError(msg)
+
+    runner = _Runner(
+        store,
+        prefix=prefix,
+        iterations=iterations,
+        concurrency=concurrency,
+        object_size=object_size,
+        range_size=range_size,
+        batch_size=batch_size,
+        small_object_size=small_object_size,
+        list_objects=list_objects,
+        chunk_sizes=chunk_sizes,
+        max_concurrencies=max_concurrencies,
+        seed=seed,
+    )
+    results: list[BenchmarkResult] = []
+    try:
+        for name in WORKLOADS:
+            if name in names:
+                results.extend(getattr(runner, name)())
+    finally:
+        if cleanup:
+            runner.cleanup()
+
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run benchmarks from the command line and print the results as JSON."""
+    parser = argparse.ArgumentParser(
+        prog="python -m obspec.benchmark",
+        description="Benchmark an obspec implementation.",
+    )
+    parser.add_argument(
+        "factory",
+        help="An importable callable returning the store, as `module:callable`.",
+    )
+    parser.add_argument(
+        "--workload",
+        action="append",
+        choices=WORKLOADS,
+        help="A workload to run. May be given more than once. Defaults to all.",
+    )
+    parser.add_argument("--prefix", default="obspec-benchmark")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--object-size", type=int, default=64 * 1024 * 1024)
+    parser.add_argument("--list-objects", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    module_name, _, attr = args.factory.partition(":")
+    if not attr:
+        parser.error("factory must be given as `module:callable`")
+    sys.path.insert(0, str(Path.cwd()))
+    factory = getattr(importlib.import_module(module_name), attr)
+
+    results = run_benchmarks(
+        factory(),
+        workloads=args.workload,
+        prefix=args.prefix,
+        iterations=args.iterations,
+        concurrency=args.concurrency,
+        object_size=args.object_size,
+        list_objects=args.list_objects,
+    )
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
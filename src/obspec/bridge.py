@@ -0,0 +1,468 @@
+"""Adapters between synchronous and asynchronous obspec stores.
+
+Many stores implement only the synchronous protocols, such as [`Get`][obspec.Get], or
+only the asynchronous ones, such as [`GetAsync`][obspec.GetAsync]. Calling
+`asyncio.run` for every request is slow, and calling a synchronous method from a
+coroutine blocks the event loop. The adapters in this module derive the missing half
+instead:
+
+- [`async_from_sync`][obspec.bridge.async_from_sync] adds every `*_async` method,
+  running the synchronous method on a shared thread pool.
+- [`sync_from_async`][obspec.bridge.sync_from_async] adds every synchronous method,
+  running the `*_async` method on one long-lived background event loop.
+
+```py
+from obspec.bridge import async_from_sync, sync_from_async
+
+store = async_from_sync(sync_only_store)
+await store.get_range_async("data.parquet", start=0, end=8)
+
+store = sync_from_async(async_only_store)
+store.get_range("data.parquet", start=0, end=8)
+```
+
+Streaming results are bridged chunk by chunk: iterating a bridged
+[`GetResult`][obspec.GetResult] or `list` result requests one chunk at a time from
+the other side, so whole objects or listings are never buffered. Likewise, an async
+iterable passed to a bridged `put_async` is consumed lazily by the synchronous `put`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Coroutine, Iterator
+
+    from obspec import Attributes, ObjectMeta
+
+T = TypeVar("T")
+
+_DONE = object()
+
+DEFAULT_MAX_WORKERS = 64
+"""The number of threads in the shared pool used by
+[`async_from_sync`][obspec.bridge.async_from_sync].
+
+Object store requests spend almost all their time waiting on the network, so the pool
+is much larger than the standard library's default, which is sized for CPU-bound work.
+"""
+
+_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """Return the thread pool shared by stores from
+    [`async_from_sync`][obspec.bridge.async_from_sync].
+
+    The pool is created on first use with
+    [`DEFAULT_MAX_WORKERS`][obspec.bridge.DEFAULT_MAX_WORKERS] threads.
+    """  # noqa: D205
+    global _executor  # noqa: PLW0603
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=DEFAULT_MAX_WORKERS,
+                thread_name_prefix="obspec-bridge",
+            )
+        return _executor
+
+
+def shared_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop shared by stores from
+    [`sync_from_async`][obspec.bridge.sync_from_async].
+
+    The loop is created on first use and runs forever in a daemon thread.
+    """  # noqa: D205
+    global _loop  # noqa: PLW0603
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever,
+                name="obspec-bridge-loop",
+                daemon=True,
+            ).start()
+            _loop = loop
+        return _loop
+
+
+async def _anext(it: AsyncIterator[T]) -> T | object:
+    """Return the next item of `it`, or `_DONE` when it is exhausted."""
+    try:
+        return await it.__anext__()
+    except StopAsyncIteration:
+        return _DONE
+
+
+def _is_streamed(file: Any) -> bool:  # noqa: ANN401
+    """Return whether `file` is an iterator that must be consumed chunk by chunk."""
+    if isinstance(file, (Path, list, tuple)) or hasattr(file, "read"):
+        return False
+    try:
+        memoryview(file)
+    except TypeError:
+        return hasattr(file, "__iter__")
+    return False
+
+
+class _ToAsync:
+    """Runs synchronous calls on a thread pool."""
+
+    def __init__(self, executor: ThreadPoolExecutor | None) -> None:
+        self._executor = executor
+
+    async def _call(self, fn: Callable[..., T], *args: Any) -> T:  # noqa: ANN401
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor or shared_executor(),
+            fn,
+            *args,
+        )
+
+    async def _iterate(self, start: Callable[[], Iterator[T]]) -> AsyncIterator[T]:
+        it = await self._call(start)
+        while True:
+            chunk = await self._call(next, it, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+
+
+class _ToSync:
+    """Runs coroutines on a background event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop | None) -> None:
+        self._loop = loop
+
+    def _call(self, coro: Coroutine[Any, Any, T]) -> T:
+        loop = self._loop or shared_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            msg = "Cannot call a synchronous bridged method from its own event loop."
+            raise RuntimeError(msg)
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def _iterate(self, start: Callable[[], AsyncIterator[T]]) -> Iterator[T]:
+        async def open_() -> AsyncIterator[T]:
+            return start().__aiter__()
+
+        it = self._call(open_())
+        try:
+            while True:
+                chunk = self._call(_anext(it))
+                if chunk is _DONE:
+                    return
+                yield chunk  # type: ignore[misc]
+        finally:
+            aclose = getattr(it, "aclose", None)
+            if aclose is not None:
+                self._call(aclose())
+
+
+class _AsyncGetResult(_ToAsync):
+    """A `GetResultAsync` over a synchronous `GetResult`."""
+
+    def __init__(self, result: Any, executor: ThreadPoolExecutor | None) -> None:  # noqa: ANN401
+        super().__init__(executor)
+        self._result = result
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        return getattr(self._result, name)
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate(lambda: iter(self._result))
+
+    @property
+    def attributes(self) -> Attributes:
+        """Refer to the documentation for [GetResultAsync][obspec.GetResultAsync]."""
+        return self._result.attributes
+
+    async def buffer_async(self) -> Any:  # noqa: ANN401
+        """Refer to the documentation for [GetResultAsync][obspec.GetResultAsync]."""
+        return await self._call(self._result.buffer)
+
+    @property
+    def meta(self) -> ObjectMeta:
+        """Refer to the documentation for [GetResultAsync][obspec.GetResultAsync]."""
+        return self._result.meta
+
+    @property
+    def range(self) -> tuple[int, int]:
+        """Refer to the documentation for [GetResultAsync][obspec.GetResultAsync]."""
+        return self._result.range
+
+
+class _SyncGetResult(_ToSync):
+    """A `GetResult` over an asynchronous `GetResultAsync`."""
+
+    def __init__(self, result: Any, loop: asyncio.AbstractEventLoop | None) -> None:  # noqa: ANN401
+        super().__init__(loop)
+        self._result = result
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        return getattr(self._result, name)
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._iterate(lambda: self._result)
+
+    @property
+    def attributes(self) -> Attributes:
+        """Refer to the documentation for [GetResult][obspec.GetResult]."""
+        return self._result.attributes
+
+    def buffer(self) -> Any:  # noqa: ANN401
+        """Refer to the documentation for [GetResult][obspec.GetResult]."""
+        return self._call(self._result.buffer_async())
+
+    @property
+    def meta(self) -> ObjectMeta:
+        """Refer to the documentation for [GetResult][obspec.GetResult]."""
+        return self._result.meta
+
+    @property
+    def range(self) -> tuple[int, int]:
+        """Refer to the documentation for [GetResult][obspec.GetResult]."""
+        return self._result.range
+
+
+class _Bridge:
+    """A transparent proxy adding the methods derived from the other half."""
+
+    _derives_async: bool
+
+    def __init__(self, store: Any) -> None:  # noqa: ANN401
+        self._store = store
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        try:
+            return getattr(self._store, name)
+        except AttributeError:
+            factory = _WRAPPERS.get(name)
+            if factory is None or name.endswith("_async") != self._derives_async:
+                raise
+            source = getattr(self._store, _counterpart(name), None)
+            if not callable(source):
+                raise
+
+        wrapped = functools.wraps(source)(factory(self, source))
+        # Cache on the instance so later lookups bypass __getattr__ entirely.
+        self.__dict__[name] = wrapped
+        return wrapped
+
+
+class _AsyncFromSync(_Bridge, _ToAsync):
+    _derives_async = True
+
+    def __init__(self, store: Any, executor: ThreadPoolExecutor | None) -> None:  # noqa: ANN401
+        _Bridge.__init__(self, store)
+        _ToAsync.__init__(self, executor)
+
+    def __repr__(self) -> str:
+        return f"async_from_sync({self._store!r})"
+
+
+class _SyncFromAsync(_Bridge, _ToSync):
+    _derives_async = False
+
+    def __init__(self, store: Any, loop: asyncio.AbstractEventLoop | None) -> None:  # noqa: ANN401
+        _Bridge.__init__(self, store)
+        _ToSync.__init__(self, loop)
+
+    def __repr__(self) -> str:
+        return f"sync_from_async({self._store!r})"
+
+
+def _counterpart(name: str) -> str:
+    if name.endswith("_async"):
+        return name[: -len("_async")]
+    return f"{name}_async"
+
+
+def _call_async(bridge: Any, fn: Callable[..., Any]) -> Callable[..., Any]:  # noqa: ANN401
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        return await bridge._call(functools.partial(fn, *args, **kwargs))  # noqa: SLF001
+
+    return wrapper
+
+
+def _call_sync(bridge: Any, fn: Callable[..., Any]) -> Callable[..., Any]:  # noqa: ANN401
+    def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        return bridge._call(fn(*args, **kwargs))  # noqa: SLF001
+
+    return wrapper
+
+
+def _get_async(bridge: Any, fn: Callable[..., Any]) -> Callable[..., Any]:  # noqa: ANN401
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        result = await bridge._call(functools.partial(fn, *args, **kwargs))  # noqa: SLF001
+        return _AsyncGetResult(result, bridge._executor)  # noqa: SLF001
+
+    return wrapper
+
+
+def _get_sync(bridge: Any, fn: Callable[..., Any]) -> Callable[..., Any]:  # noqa: ANN401
+    def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        return _SyncGetResult(bridge._call(fn(*args, **kwargs)), bridge._loop)  # noqa: SLF001
+
+    return wrapper
+
+
+def _list_async(bridge: Any, fn: Callable[..., Any]) -> Callable[..., Any]:  # noqa: ANN401
+    def wrapper(*args: Any, **kwargs: Any) -> AsyncIterator[Any]:  # noqa: ANN401
+        return bridge._iterate(lambda: iter(fn(*args, **kwargs)))  # noqa: SLF001
+
+    return wrapper
+
+
+def _list_sync(bridge: Any, fn: Callable[..., Any]) -> Callable[..., Any]:  # noqa: ANN401
+    def wrapper(*args: Any, **kwargs: Any) -> Iterator[Any]:  # noqa: ANN401
+        return bridge._iterate(lambda: fn(*args, **kwargs))  # noqa: SLF001
+
+    return wrapper
+
+
+def _blocking_iter(
+    iterable: Any,  # noqa: ANN401
+    loop: asyncio.AbstractEventLoop,
+) -> Iterator[Any]:
+    """Iterate an async iterable owned by `loop` from another thread."""
+    it = iterable.__aiter__()
+    while True:
+        chunk = asyncio.run_coroutine_threadsafe(_anext(it), loop).result()
+        if chunk is _DONE:
+            return
+        yield chunk
+
+
+async def _async_iter(iterable: Any) -> AsyncIterator[Any]:  # noqa: ANN401
+    """Iterate a blocking iterable without blocking the running event loop."""
+    loop = asyncio.get_running_loop()
+    it = iter(iterable)
+    while True:
+        chunk = await loop.run_in_executor(None, next, it, _DONE)
+        if chunk is _DONE:
+            return
+        yield chunk
+
+
+def _put_async(bridge: Any, fn: Callable[..., Any]) -> Callable[..., Any]:  # noqa: ANN401
+    async def wrapper(path: str, file: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        if hasattr(file, "__aiter__"):
+            # The caller's loop is free while it awaits the thread pool, so the
+            # synchronous put can pull each chunk from it in turn.
+            file = _blocking_iter(file, asyncio.get_running_loop())
+        return await bridge._call(functools.partial(fn, path, file, **kwargs))  # noqa: SLF001
+
+    return wrapper
+
+
+def _put_sync(bridge: Any, fn: Callable[..., Any]) -> Callable[..., Any]:  # noqa: ANN401
+    def wrapper(path: str, file: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        if _is_streamed(file):
+            file = _async_iter(file)
+        return bridge._call(fn(path, file, **kwargs))  # noqa: SLF001
+
+    return wrapper
+
+
+_WRAPPERS: dict[str, Callable[[Any, Callable[..., Any]], Callable[..., Any]]] = {
+    "get": _get_sync,
+    "get_async": _get_async,
+    "get_range": _call_sync,
+    "get_range_async": _call_async,
+    "get_ranges": _call_sync,
+    "get_ranges_async": _call_async,
+    "head": _call_sync,
+    "head_async": _call_async,
+    "list": _list_sync,
+    "list_async": _list_async,
+    "list_with_delimiter": _call_sync,
+    "list_with_delimiter_async": _call_async,
+    "put": _put_sync,
+    "put_async": _put_async,
+    "copy": _call_sync,
+    "copy_async": _call_async,
+    "rename": _call_sync,
+    "rename_async": _call_async,
+    "delete": _call_sync,
+    "delete_async": _call_async,
+}
+
+
+def async_from_sync(
+    store: Any,  # noqa: ANN401
+    executor: ThreadPoolExecutor | None = None,
+) -> Any:  # noqa: ANN401
+    """Wrap a store to add the asynchronous counterpart of each synchronous method.
+
+    The returned object proxies all attribute access to `store`. For every obspec
+    method that `store` has, such as `get_range`, the wrapper also has the `*_async`
+    method, such as `get_range_async`, which runs the synchronous call on a thread pool
+    without blocking the event loop. Methods that `store` implements natively are used
+    as-is, so the wrapper is safe to apply to any store.
+
+    `get_async` returns a [`GetResultAsync`][obspec.GetResultAsync] whose chunks are
+    each read on the thread pool as they are iterated, and `list_async` fetches each
+    chunk of the listing the same way. An async iterable passed to `put_async` is
+    consumed one chunk at a time by the synchronous `put`.
+
+    Args:
+        store: The store to wrap.
+        executor: The thread pool to run calls on. Defaults to
+            [`shared_executor()`][obspec.bridge.shared_executor].
+
+    Returns:
+        A wrapper around `store`.
+
+    """
+    return _AsyncFromSync(store, executor)
+
+
+def sync_from_async(
+    store: Any,  # noqa: ANN401
+    loop: asyncio.AbstractEventLoop | None = None,
+) -> Any:  # noqa: ANN401
+    """Wrap a store to add the synchronous counterpart of each asynchronous method.
+
+    The returned object proxies all attribute access to `store`. For every obspec
+    method that `store` has, such as `get_range_async`, the wrapper also has the
+    synchronous method, such as `get_range`, which runs the coroutine on a long-lived
+    background event loop and blocks until it completes. Methods that `store`
+    implements natively are used as-is.
+
+    `get` returns a [`GetResult`][obspec.GetResult] whose chunks are each awaited on
+    the background loop as they are iterated, and `list` fetches each chunk of the
+    listing the same way. Closing a partially consumed iterator closes the underlying
+    async iterator. An iterator passed to `put` is consumed one chunk at a time, in a
+    worker thread, by the asynchronous `put_async`.
+
+    The derived methods must not be called from a coroutine running on the background
+    loop itself, as that would deadlock; they raise `RuntimeError` instead.
+
+    Args:
+        store: The store to wrap.
+        loop: A running event loop, owned by another thread, to run coroutines on.
+            Defaults to [`shared_loop()`][obspec.bridge.shared_loop].
+
+    Returns:
+        A wrapper around `store`.
+
+    """
+    return _SyncFromAsync(store, loop)
@@ -0,0 +1,26 @@
+"""Caching wrappers around obspec clients.
+
+These wrappers implement the same protocols as the clients they wrap, so they can be
+used anywhere the underlying client could be used.
+
+- [`BlockCache`][obspec.cache.BlockCache] keeps recently read blocks in memory.
+- [`DiskCache`][obspec.cache.DiskCache] persists read blocks to local disk, where they
+  can be shared between processes and survive restarts.
+- [`HeadCache`][obspec.cache.HeadCache] keeps object metadata, so that repeated
+  `head` calls are answered locally.
+"""
+
+from ._block import BlockCache, BlockCacheSource, CacheStats
+from ._disk import DiskCache, DiskCacheSource
+from ._head import HeadCache, HeadCacheSource, HeadCacheStats
+
+__all__ = [
+    "BlockCache",
+    "BlockCacheSource",
+    "CacheStats",
+    "DiskCache",
+    "DiskCacheSource",
+    "HeadCache",
+    "HeadCacheSource",
+    "HeadCacheStats",
+]
@@ -0,0 +1,502 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, TypedDict, Union
+
+from obspec._util import as_memoryview, resolve_end, resolve_ends
+from obspec.exceptions import NotSupportedError
+
+if sys.version_info >= (3, 10):
+    from typing import TypeAlias
+else:
+    from typing_extensions import TypeAlias
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+    from obspec import GetRange, GetRangeAsync
+
+DEFAULT_BLOCK_SIZE = 256 * 1024
+"""The default size, in bytes, of each cached block."""
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+"""The default byte budget of a [`BlockCache`][obspec.cache.BlockCache]."""
+
+BlockCacheSource: TypeAlias = Union["GetRange", "GetRangeAsync"]
+"""A client that can be wrapped by a [`BlockCache`][obspec.cache.BlockCache]."""
+
+
+class CacheStats(TypedDict):
+    """Counters describing the effectiveness of a cache."""
+
+    hits: int
+    """The number of blocks served from the cache."""
+
+    misses: int
+    """The number of blocks that had to be fetched from the underlying client."""
+
+    evictions: int
+    """The number of blocks evicted to stay within the byte budget."""
+
+    invalidations: int
+    """The number of times cached data was dropped because the object changed."""
+
+    size: int
+    """The number of bytes currently held in the cache."""
+
+
+class _Object:
+    """What the cache knows about the current version of one object."""
+
+    __slots__ = ("blocks", "checked_at", "e_tag", "size", "version")
+
+    def __init__(
+        self,
+        e_tag: str | None,
+        version: str | None,
+        size: int | None,
+        checked_at: float,
+    ) -> None:
+        self.e_tag = e_tag
+        self.version = version
+        self.size = size
+        self.checked_at = checked_at
+        self.blocks: set[int] = set()
+
+
+class BlockCache:
+    """A read-through, block-aligned LRU cache of byte ranges.
+
+    Objects are divided into fixed-size blocks aligned to multiples of `block_size`.
+    Reads through [`get_range`][obspec.GetRange] and
+    [`get_ranges`][obspec.GetRanges] are served from cached blocks where possible, and
+    only the missing blocks are fetched from the underlying client, with consecutive
+    missing blocks fetched in one request. Blocks are evicted least-recently-used
+    first once the cache holds more than `max_bytes`.
+
+    If the underlying client implements [`Head`][obspec.Head] (or
+    [`HeadAsync`][obspec.HeadAsync] for async reads), the `e_tag` and `version` of
+    each object are recorded on first access, and rechecked after
+    `revalidate_after` seconds. Cached blocks of an object are dropped as soon as a
+    new `e_tag` or `version` is observed.
+
+    The cache is safe to use from multiple threads and from multiple tasks on an event
+    loop.
+
+    ```py
+    from obspec.cache import BlockCache
+
+    cache = BlockCache(client, block_size=64 * 1024, max_bytes=512 * 1024 * 1024)
+    header = cache.get_range("data.parquet", start=0, end=8)
+    print(cache.stats())
+    ```
+    """
+
+    def __init__(
+        self,
+        client: BlockCacheSource,
+        *,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        revalidate_after: float | None = None,
+    ) -> None:
+        """Create a new BlockCache.
+
+        Args:
+            client: The underlying client. Synchronous reads require
+                [`GetRange`][obspec.GetRange] and async reads require
+                [`GetRangeAsync`][obspec.GetRangeAsync]. If the client also implements
+                [`GetRanges`][obspec.GetRanges] or
+                [`GetRangesAsync`][obspec.GetRangesAsync], missing blocks for one call
+                are fetched with a single `get_ranges` request.
+
+        Keyword Args:
+            block_size: The size in bytes of each cached block. Defaults to 256 KiB.
+            max_bytes: The maximum number of bytes to keep cached. Defaults to 256 MiB.
+            revalidate_after: The number of seconds after which the `e_tag` and
+                `version` of an object are checked again with `head`. If `None`, each
+                object is checked only when first read. Has no effect if the client
+                does not implement `Head`. Defaults to `None`.
+
+        """
+        if block_size < 1:
+            msg = f"block_size must be at least 1, got {block_size}."
+            raise ValueError(msg)
+        if max_bytes < 0:
+            msg = f"max_bytes must be non-negative, got {max_bytes}."
+            raise ValueError(msg)
+
+        self.client = client
+        self.block_size = block_size
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+
+        self._lock = threading.Lock()
+        self._blocks: OrderedDict[tuple[str, int], bytes] = OrderedDict()
+        self._objects: dict[str, _Object] = {}
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def stats(self) -> CacheStats:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "size": self._size,
+            }
+
+    def invalidate(self, path: str | None = None) -> None:
+        """Drop cached data for `path`, or for all objects if `path` is `None`."""
+        with self._lock:
+            if path is None:
+                self._blocks.clear()
+                self._objects.clear()
+                self._size = 0
+            elif path in self._objects:
+                self._drop_object(path)
+
+    # Bookkeeping. All of these must be called with the lock held.
+
+    def _drop_object(self, path: str) -> None:
+        obj = self._objects.pop(path)
+        for index in obj.blocks:
+            self._size -= len(self._blocks.pop((path, index)))
+
+    def _needs_check(self, path: str) -> bool:
+        obj = self._objects.get(path)
+        if obj is None:
+            return True
+        if self.revalidate_after is None:
+            return False
+        return time.monotonic() - obj.checked_at >= self.revalidate_after
+
+    def _record_check(
+        self,
+        path: str,
+        e_tag: str | None,
+        version: str | None,
+        size: int | None,
+    ) -> _Object:
+        obj = self._objects.get(path)
+        now = time.monotonic()
+        if obj is not None and (obj.e_tag, obj.version) == (e_tag, version):
+            obj.checked_at = now
+            if size is not None:
+                obj.size = size
+            return obj
+
+        if obj is not None:
+            self._drop_object(path)
+            self._invalidations += 1
+
+        obj = _Object(e_tag, version, size, now)
+        self._objects[path] = obj
+        return obj
+
+    def _lookup(
+        self,
+        path: str,
+        indices: Iterable[int],
+    ) -> tuple[dict[int, bytes], list[int]]:
+        found: dict[int, bytes] = {}
+        missing: list[int] = []
+        for index in sorted(indices):
+            block = self._blocks.get((path, index))
+            if block is None:
+                missing.append(index)
+            else:
+                self._blocks.move_to_end((path, index))
+                found[index] = block
+
+        self._hits += len(found)
+        self._misses += len(missing)
+        return found, missing
+
+    def _insert(self, path: str, obj: _Object, index: int, block: bytes) -> None:
+        # Another caller may have seen a new version of the object while this block
+        # was being fetched, in which case the block is stale.
+        if self._objects.get(path) is not obj or (path, index) in self._blocks:
+            return
+        if len(block) > self.max_bytes:
+            return
+
+        self._blocks[(path, index)] = block
+        obj.blocks.add(index)
+        self._size += len(block)
+        while self._size > self.max_bytes:
+            (evict_path, evict_index), evicted = self._blocks.popitem(last=False)
+            self._size -= len(evicted)
+            self._evictions += 1
+            evict_obj = self._objects[evict_path]
+            evict_obj.blocks.discard(evict_index)
+            if not evict_obj.blocks and evict_obj is not obj:
+                del self._objects[evict_path]
+
+    # Planning and assembly
+
+    def _block_indices(
+        self,
+        obj: _Object,
+        ranges: Sequence[tuple[int, int]],
+    ) -> set[int]:
+        bs = self.block_size
+        indices: set[int] = set()
+        for start, end in ranges:
+            clamped_end = end if obj.size is None else min(end, obj.size)
+            if start < clamped_end:
+                indices.update(range(start // bs, (clamped_end - 1) // bs + 1))
+        return indices
+
+    def _runs(self, missing: Sequence[int]) -> list[tuple[int, int]]:
+        """Group sorted block indices into `(start, end)` byte ranges of runs."""
+        bs = self.block_size
+        runs: list[tuple[int, int]] = []
+        for index in missing:
+            if runs and runs[-1][1] == index * bs:
+                runs[-1] = (runs[-1][0], (index + 1) * bs)
+            else:
+                runs.append((index * bs, (index + 1) * bs))
+        return runs
+
+    def _store_runs(
+        self,
+        path: str,
+        obj: _Object,
+        runs: Sequence[tuple[int, int]],
+        buffers: Sequence[Buffer],
+        found: dict[int, bytes],
+    ) -> None:
+        bs = self.block_size
+        with self._lock:
+            for (run_start, run_end), buffer in zip(runs, buffers):
+                view = as_memoryview(buffer)
+                for index in range(run_start // bs, run_end // bs):
+                    offset = index * bs - run_start
+                    block = bytes(view[offset : offset + bs])
+                    if block:
+                        found[index] = block
+                        self._insert(path, obj, index, block)
+                    if len(block) < bs:
+                        # A short block marks the end of the object.
+                        if self._objects.get(path) is obj:
+                            obj.size = index * bs + len(block)
+                        break
+
+    def _assemble(self, start: int, end: int, blocks: dict[int, bytes]) -> Buffer:
+        bs = self.block_size
+        first = start // bs
+        last = (end - 1) // bs
+        if first == last:
+            offset = start - first * bs
+            return memoryview(blocks.get(first, b""))[offset : offset + end - start]
+
+        pieces: list[memoryview] = []
+        for index in range(first, last + 1):
+            block = blocks.get(index)
+            if block is None:
+                break
+            lo = max(start - index * bs, 0)
+            hi = min(end - index * bs, len(block))
+            pieces.append(memoryview(block)[lo:hi])
+            if len(block) < bs:
+                break
+
+        return b"".join(pieces)
+
+    def _invalid(self, obj: _Object, ranges: Sequence[tuple[int, int]]) -> bool:
+        return any(
+            start == end or (obj.size is not None and start >= obj.size)
+            for start, end in ranges
+        )
+
+    # Sync API
+
+    def _object(self, path: str) -> _Object:
+        with self._lock:
+            needs_check = self._needs_check(path)
+            if not needs_check or not hasattr(self.client, "head"):
+                obj = self._objects.get(path)
+                if obj is None:
+                    obj = self._record_check(path, None, None, None)
+                return obj
+
+        meta = self.client.head(path)
+        with self._lock:
+            return self._record_check(
+                path,
+                meta["e_tag"],
+                meta["version"],
+                meta["size"],
+            )
+
+    def _read(self, path: str, ranges: Sequence[tuple[int, int]]) -> list[Buffer]:
+        client = self.client
+        if not hasattr(client, "get_range"):
+            msg = f"{type(client).__name__} does not implement `get_range`."
+            raise NotSupportedError(msg)
+
+        obj = self._object(path)
+        if not self._invalid(obj, ranges):
+            with self._lock:
+                found, missing = self._lookup(path, self._block_indices(obj, ranges))
+
+            if missing:
+                runs = self._runs(missing)
+                if len(runs) > 1 and hasattr(client, "get_ranges"):
+                    buffers: Sequence[Buffer] = client.get_ranges(
+                        path,
+                        starts=[start for start, _ in runs],
+                        ends=[end for _, end in runs],
+                    )
+                else:
+                    buffers = [
+                        client.get_range(path, start=start, end=end)
+                        for start, end in runs
+                    ]
+                self._store_runs(path, obj, runs, buffers, found)
+
+            # A short block may have revealed that a range starts past the end.
+            if not self._invalid(obj, ranges):
+                return [self._assemble(start, end, found) for start, end in ranges]
+
+        # Let the underlying store raise its own error for an invalid range.
+        return [client.get_range(path, start=start, end=end) for start, end in ranges]
+
+    def get_range(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> Buffer:
+        """Return the bytes stored at the specified location in the given byte range.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        end = resolve_end(start, end, length)
+        return self._read(path, [(start, end)])[0]
+
+    def get_ranges(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> Sequence[Buffer]:
+        """Return the bytes stored at the specified location in the given byte ranges.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        resolved_ends = resolve_ends(starts, ends, lengths)
+        return self._read(path, list(zip(starts, resolved_ends)))
+
+    # Async API
+
+    async def _object_async(self, path: str) -> _Object:
+        with self._lock:
+            needs_check = self._needs_check(path)
+            if not needs_check or not hasattr(self.client, "head_async"):
+                obj = self._objects.get(path)
+                if obj is None:
+                    obj = self._record_check(path, None, None, None)
+                return obj
+
+        meta = await self.client.head_async(path)
+        with self._lock:
+            return self._record_check(
+                path,
+                meta["e_tag"],
+                meta["version"],
+                meta["size"],
+            )
+
+    async def _read_async(
+        self,
+        path: str,
+        ranges: Sequence[tuple[int, int]],
+    ) -> list[Buffer]:
+        client = self.client
+        if not hasattr(client, "get_range_async"):
+            msg = f"{type(client).__name__} does not implement `get_range_async`."
+            raise NotSupportedError(msg)
+
+        obj = await self._object_async(path)
+        if not self._invalid(obj, ranges):
+            with self._lock:
+                found, missing = self._lookup(path, self._block_indices(obj, ranges))
+
+            if missing:
+                runs = self._runs(missing)
+                if len(runs) > 1 and hasattr(client, "get_ranges_async"):
+                    buffers: Sequence[Buffer] = await client.get_ranges_async(
+                        path,
+                        starts=[start for start, _ in runs],
+                        ends=[end for _, end in runs],
+                    )
+                else:
+                    buffers = await asyncio.gather(
+                        *(
+                            client.get_range_async(path, start=start, end=end)
+                            for start, end in runs
+                        ),
+                    )
+                self._store_runs(path, obj, runs, buffers, found)
+
+            if not self._invalid(obj, ranges):
+                return [self._assemble(start, end, found) for start, end in ranges]
+
+        return list(
+            await asyncio.gather(
+                *(
+                    client.get_range_async(path, start=start, end=end)
+                    for start, end in ranges
+                ),
+            ),
+        )
+
+    async def get_range_async(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> Buffer:
+        """Call `get_range` asynchronously.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        end = resolve_end(start, end, length)
+        return (await self._read_async(path, [(start, end)]))[0]
+
+    async def get_ranges_async(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> Sequence[Buffer]:
+        """Call `get_ranges` asynchronously.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        resolved_ends = resolve_ends(starts, ends, lengths)
+        return await self._read_async(path, list(zip(starts, resolved_ends)))
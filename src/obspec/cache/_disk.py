@@ -0,0 +1,591 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Union
+
+from obspec._util import (
+    as_memoryview,
+    fetch_meta,
+    fetch_meta_async,
+    fetch_range,
+    fetch_range_async,
+    is_error,
+    resolve_end,
+    resolve_ends,
+)
+from obspec.exceptions import PreconditionError
+
+if sys.version_info >= (3, 10):
+    from typing import TypeAlias
+else:
+    from typing_extensions import TypeAlias
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # Windows. Cross-process locking is not available, but a single process can still
+    # use the cache safely.
+    fcntl = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+    from obspec import (
+        Get,
+        GetAsync,
+        GetOptions,
+        GetRange,
+        GetRangeAsync,
+        ObjectMeta,
+    )
+
+    from ._block import CacheStats
+
+DEFAULT_DISK_BLOCK_SIZE = 4 * 1024 * 1024
+"""The default size, in bytes, of each block of a [`DiskCache`][obspec.cache.DiskCache].
+"""
+
+DEFAULT_MAX_DISK_BYTES = 10 * 1024 * 1024 * 1024
+"""The default byte budget of a [`DiskCache`][obspec.cache.DiskCache]."""
+
+DiskCacheSource: TypeAlias = Union["Get", "GetRange", "GetAsync", "GetRangeAsync"]
+"""A client that can be wrapped by a [`DiskCache`][obspec.cache.DiskCache]."""
+
+_LOCKS_DIR = "locks"
+_EVICT_LOCK = "evict.lock"
+
+
+@contextlib.contextmanager
+def _flock(
+    path: Path,
+    *,
+    shared: bool = False,
+    blocking: bool = True,
+) -> Iterator[bool]:
+    """Hold an advisory lock on `path`, creating it if necessary.
+
+    Yields whether the lock was acquired, which is always `True` when `blocking`.
+    """
+    with path.open("a+b") as f:
+        if fcntl is None:
+            yield True
+            return
+
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(f, flags)
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _disk_usage(stat: os.stat_result) -> int:
+    # Data files are sparse, so count allocated blocks where the platform reports them.
+    blocks = getattr(stat, "st_blocks", None)
+    return stat.st_size if blocks is None else blocks * 512
+
+
+class _Entry:
+    """One version of one object, as stored in the cache directory."""
+
+    __slots__ = ("checked_at", "e_tag", "key", "size", "version")
+
+    def __init__(self, key: str, meta: ObjectMeta, checked_at: float) -> None:
+        self.key = key
+        self.size = meta["size"]
+        self.e_tag = meta["e_tag"]
+        self.version = meta["version"]
+        self.checked_at = checked_at
+
+    def options(self, start: int, end: int) -> GetOptions:
+        """Return options for a `get` of a range pinned to this version."""
+        options: GetOptions = {"range": (start, end)}
+        if self.e_tag is not None:
+            options["if_match"] = self.e_tag
+        if self.version is not None:
+            options["version"] = self.version
+        return options
+
+
+class DiskCache:
+    """A persistent read-through cache of byte ranges, stored on local disk.
+
+    Each version of an object is stored as a sparse local file the size of the object,
+    into which fetched blocks are written at their own offsets, alongside a small JSON
+    index recording which blocks are present. Files are keyed by the object's path
+    plus its `e_tag` and `version`, so a changed object is never served from stale
+    data, and the cache survives process restarts.
+
+    Reads return [`memoryview`][]s of a read-only memory map of the cached file, so
+    cached data is never copied into Python memory.
+
+    Once the cache directory holds more than `max_bytes`, the least recently used
+    objects are deleted. Several processes may share one cache directory: updates and
+    evictions are serialized with advisory file locks and index files are replaced
+    atomically.
+
+    If the client implements [`Get`][obspec.Get], missing blocks are fetched with
+    `if_match` and `version` set from the object's cached metadata. A
+    [`PreconditionError`][obspec.exceptions.PreconditionError] means the object
+    changed since, and is treated as a cache miss: the metadata is fetched again and
+    the read retried once against the new version.
+
+    !!! note
+        Metadata for each object is fetched with [`Head`][obspec.Head] if the client
+        implements it, otherwise with a [`Get`][obspec.Get] request with `head=True`.
+        Async methods perform local file I/O synchronously.
+    """
+
+    def __init__(
+        self,
+        client: DiskCacheSource,
+        cache_dir: str | os.PathLike[str],
+        *,
+        block_size: int = DEFAULT_DISK_BLOCK_SIZE,
+        max_bytes: int = DEFAULT_MAX_DISK_BYTES,
+        revalidate_after: float | None = None,
+    ) -> None:
+        """Create a new DiskCache.
+
+        Args:
+            client: The underlying client. Byte ranges are fetched with `get_range` if
+                available, falling back to `get` with a `range` option, and likewise
+                for the async variants.
+            cache_dir: The directory in which to store cached data. It will be created
+                if it does not exist.
+
+        Keyword Args:
+            block_size: The size in bytes of each cached block. Defaults to 4 MiB.
+            max_bytes: The maximum number of bytes to keep on disk. Defaults to 10 GiB.
+            revalidate_after: The number of seconds after which the `e_tag` and
+                `version` of an object are checked again. If `None`, each object is
+                checked only once per process. Defaults to `None`.
+
+        """
+        if block_size < 1:
+            msg = f"block_size must be at least 1, got {block_size}."
+            raise ValueError(msg)
+        if max_bytes < 0:
+            msg = f"max_bytes must be non-negative, got {max_bytes}."
+            raise ValueError(msg)
+
+        self.client = client
+        self.cache_dir = Path(cache_dir)
+        (self.cache_dir / _LOCKS_DIR).mkdir(parents=True, exist_ok=True)
+        self.block_size = block_size
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+
+        self._lock = threading.Lock()
+        self._entries: dict[str, _Entry] = {}
+        self._size: int | None = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def stats(self) -> CacheStats:
+        """Return a snapshot of the cache counters.
+
+        `size` is this process's most recent estimate of the bytes on disk.
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "size": self._size or 0,
+            }
+
+    def clear(self) -> None:
+        """Delete all cached data from the cache directory."""
+        for index_path in self.cache_dir.glob("*.json"):
+            self._delete(index_path.stem, blocking=True)
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    # Files
+
+    def _files(self, key: str) -> tuple[Path, Path, Path]:
+        # Lock files are striped by key prefix rather than created per entry, so they
+        # never need to be deleted, which would race with processes waiting on them.
+        base = self.cache_dir / key
+        return (
+            base.with_suffix(".data"),
+            base.with_suffix(".json"),
+            self.cache_dir / _LOCKS_DIR / f"{key[:2]}.lock",
+        )
+
+    def _key(self, path: str, meta: ObjectMeta) -> str:
+        identity: list[object] = [path, meta["e_tag"], meta["version"], meta["size"]]
+        if meta["e_tag"] is None and meta["version"] is None:
+            identity.append(meta["last_modified"].isoformat())
+        identity.append(self.block_size)
+        return hashlib.sha256(json.dumps(identity).encode()).hexdigest()
+
+    def _read_index(self, key: str) -> set[int]:
+        _, index_path, _ = self._files(key)
+        try:
+            with index_path.open("rb") as f:
+                return set(json.load(f)["blocks"])
+        except FileNotFoundError:
+            return set()
+
+    def _delete(self, key: str, *, blocking: bool = False) -> int | None:
+        """Delete an entry, returning the bytes freed or `None` if it was locked."""
+        data_path, index_path, lock_path = self._files(key)
+        with _flock(lock_path, blocking=blocking) as acquired:
+            if not acquired:
+                return None
+            freed = 0
+            with contextlib.suppress(FileNotFoundError):
+                freed = _disk_usage(data_path.stat())
+            index_path.unlink(missing_ok=True)
+            data_path.unlink(missing_ok=True)
+        return freed
+
+    def _evict(self) -> None:
+        with _flock(
+            self.cache_dir / _LOCKS_DIR / _EVICT_LOCK,
+            blocking=False,
+        ) as acquired:
+            if not acquired:
+                # Another process is already evicting.
+                return
+
+            entries: list[tuple[float, int, str]] = []
+            total = 0
+            for index_path in self.cache_dir.glob("*.json"):
+                key = index_path.stem
+                data_path, _, _ = self._files(key)
+                try:
+                    used_at = index_path.stat().st_mtime
+                    usage = _disk_usage(data_path.stat())
+                except FileNotFoundError:
+                    continue
+                entries.append((used_at, usage, key))
+                total += usage
+
+            entries.sort()
+            evicted = 0
+            for _, usage, key in entries:
+                if total <= self.max_bytes:
+                    break
+                if self._delete(key) is not None:
+                    total -= usage
+                    evicted += 1
+
+        with self._lock:
+            self._size = total
+            self._evictions += evicted
+
+    # Reads
+
+    def _record_meta(self, path: str, meta: ObjectMeta) -> _Entry:
+        key = self._key(path, meta)
+        with self._lock:
+            previous = self._entries.get(path)
+            entry = _Entry(key, meta, time.monotonic())
+            self._entries[path] = entry
+            if previous is not None and previous.key != key:
+                self._invalidations += 1
+
+        if previous is not None and previous.key != key:
+            self._delete(previous.key)
+        return entry
+
+    def _cached_entry(self, path: str) -> _Entry | None:
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None:
+            return None
+        if (
+            self.revalidate_after is not None
+            and time.monotonic() - entry.checked_at >= self.revalidate_after
+        ):
+            return None
+        return entry
+
+    def _plan(
+        self,
+        entry: _Entry,
+        ranges: Sequence[tuple[int, int]],
+    ) -> tuple[set[int], list[tuple[int, int]]]:
+        """Return the blocks needed for `ranges` and the byte runs missing on disk."""
+        bs = self.block_size
+        needed: set[int] = set()
+        for start, end in ranges:
+            end = min(end, entry.size)  # noqa: PLW2901
+            if start < end:
+                needed.update(range(start // bs, (end - 1) // bs + 1))
+
+        _, _, lock_path = self._files(entry.key)
+        with _flock(lock_path, shared=True):
+            present = self._read_index(entry.key)
+        missing = sorted(needed - present)
+
+        with self._lock:
+            self._hits += len(needed) - len(missing)
+            self._misses += len(missing)
+
+        runs: list[tuple[int, int]] = []
+        for index in missing:
+            block_end = min((index + 1) * bs, entry.size)
+            if runs and runs[-1][1] == index * bs:
+                runs[-1] = (runs[-1][0], block_end)
+            else:
+                runs.append((index * bs, block_end))
+        return needed, runs
+
+    def _store(
+        self,
+        path: str,
+        entry: _Entry,
+        runs: Sequence[tuple[int, int]],
+        buffers: Sequence[Buffer],
+    ) -> None:
+        bs = self.block_size
+        data_path, index_path, lock_path = self._files(entry.key)
+        written = 0
+        with _flock(lock_path):
+            present = self._read_index(entry.key) if data_path.exists() else set()
+            # Never truncate an existing file: other blocks may already be written.
+            fd = os.open(data_path, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, "r+b") as f:
+                if os.fstat(fd).st_size != entry.size:
+                    f.truncate(entry.size)
+                for (run_start, run_end), buffer in zip(runs, buffers):
+                    view = as_memoryview(buffer)[: run_end - run_start]
+                    if len(view) != run_end - run_start:
+                        # The object changed underneath us; don't cache a partial run.
+                        continue
+                    f.seek(run_start)
+                    f.write(view)
+                    written += len(view)
+                    present.update(range(run_start // bs, (run_end - 1) // bs + 1))
+
+            tmp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+            with tmp_path.open("w") as f:
+                json.dump(
+                    {"path": path, "size": entry.size, "blocks": sorted(present)},
+                    f,
+                )
+            tmp_path.replace(index_path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self.max_bytes + 1
+            else:
+                self._size += written
+            needs_eviction = self._size > self.max_bytes
+
+        if needs_eviction:
+            self._evict()
+
+    def _open(self, entry: _Entry, needed: set[int]) -> memoryview | None:
+        """Map the cached data for `entry`, if every needed block is present."""
+        data_path, index_path, lock_path = self._files(entry.key)
+        with _flock(lock_path, shared=True):
+            if not needed <= self._read_index(entry.key):
+                return None
+            try:
+                with data_path.open("rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                # Mark the entry as recently used for eviction.
+                os.utime(index_path)
+            except FileNotFoundError:
+                return None
+        return memoryview(mapped)
+
+    def _invalid(self, entry: _Entry, ranges: Sequence[tuple[int, int]]) -> bool:
+        """Return whether any range is zero-length or starts past the end."""
+        return any(start == end or start >= entry.size for start, end in ranges)
+
+    def _fetch(
+        self,
+        path: str,
+        entry: _Entry,
+        runs: Sequence[tuple[int, int]],
+    ) -> list[Buffer]:
+        """Fetch `runs` of the version of the object described by `entry`."""
+        get = getattr(self.client, "get", None)
+        if get is None:
+            return [fetch_range(self.client, path, s, e) for s, e in runs]
+        return [get(path, options=entry.options(s, e)).buffer() for s, e in runs]
+
+    async def _fetch_async(
+        self,
+        path: str,
+        entry: _Entry,
+        runs: Sequence[tuple[int, int]],
+    ) -> list[Buffer]:
+        get_async = getattr(self.client, "get_async", None)
+        if get_async is None:
+            return list(
+                await asyncio.gather(
+                    *(fetch_range_async(self.client, path, s, e) for s, e in runs),
+                ),
+            )
+
+        async def fetch(start: int, end: int) -> Buffer:
+            result = await get_async(path, options=entry.options(start, end))
+            return await result.buffer_async()
+
+        return list(await asyncio.gather(*(fetch(s, e) for s, e in runs)))
+
+    def _read(
+        self,
+        path: str,
+        ranges: Sequence[tuple[int, int]],
+        *,
+        refresh: bool = False,
+    ) -> list[Buffer]:
+        entry = None if refresh else self._cached_entry(path)
+        if entry is None:
+            entry = self._record_meta(path, fetch_meta(self.client, path))
+        if self._invalid(entry, ranges):
+            # Let the underlying store raise its own error for an invalid range.
+            return [fetch_range(self.client, path, s, e) for s, e in ranges]
+
+        needed, runs = self._plan(entry, ranges)
+        if not needed:
+            return []
+        if runs:
+            try:
+                buffers = self._fetch(path, entry, runs)
+            except Exception as e:
+                if refresh or not is_error(e, PreconditionError):
+                    raise
+                # The object changed since its metadata was cached.
+                return self._read(path, ranges, refresh=True)
+            self._store(path, entry, runs, buffers)
+
+        view = self._open(entry, needed)
+        if view is None:
+            # Evicted by another process in the meantime.
+            return [fetch_range(self.client, path, s, e) for s, e in ranges]
+        return [view[start : min(end, entry.size)] for start, end in ranges]
+
+    async def _read_async(
+        self,
+        path: str,
+        ranges: Sequence[tuple[int, int]],
+        *,
+        refresh: bool = False,
+    ) -> list[Buffer]:
+        entry = None if refresh else self._cached_entry(path)
+        if entry is None:
+            meta = await fetch_meta_async(self.client, path)
+            entry = self._record_meta(path, meta)
+        if self._invalid(entry, ranges):
+            return list(
+                await asyncio.gather(
+                    *(fetch_range_async(self.client, path, s, e) for s, e in ranges),
+                ),
+            )
+
+        needed, runs = self._plan(entry, ranges)
+        if not needed:
+            return []
+        if runs:
+            try:
+                buffers = await self._fetch_async(path, entry, runs)
+            except Exception as e:
+                if refresh or not is_error(e, PreconditionError):
+                    raise
+                return await self._read_async(path, ranges, refresh=True)
+            self._store(path, entry, runs, buffers)
+
+        view = self._open(entry, needed)
+        if view is None:
+            return list(
+                await asyncio.gather(
+                    *(fetch_range_async(self.client, path, s, e) for s, e in ranges),
+                ),
+            )
+        return [view[start : min(end, entry.size)] for start, end in ranges]
+
+    # Public API
+
+    def get_range(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> Buffer:
+        """Return the bytes stored at the specified location in the given byte range.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        end = resolve_end(start, end, length)
+        return self._read(path, [(start, end)])[0]
+
+    def get_ranges(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> Sequence[Buffer]:
+        """Return the bytes stored at the specified location in the given byte ranges.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        resolved_ends = resolve_ends(starts, ends, lengths)
+        return self._read(path, list(zip(starts, resolved_ends)))
+
+    async def get_range_async(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> Buffer:
+        """Call `get_range` asynchronously.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        end = resolve_end(start, end, length)
+        return (await self._read_async(path, [(start, end)]))[0]
+
+    async def get_ranges_async(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> Sequence[Buffer]:
+        """Call `get_ranges` asynchronously.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        resolved_ends = resolve_ends(starts, ends, lengths)
+        return await self._read_async(path, list(zip(starts, resolved_ends)))
@@ -0,0 +1,481 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, TypedDict, Union
+
+from obspec._util import is_error
+from obspec.exceptions import NotModifiedError, NotSupportedError
+
+if sys.version_info >= (3, 10):
+    from typing import TypeAlias
+else:
+    from typing_extensions import TypeAlias
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+
+    from obspec import (
+        GetOptions,
+        GetResult,
+        GetResultAsync,
+        Head,
+        HeadAsync,
+        ListResult,
+        ObjectMeta,
+        PutResult,
+    )
+
+DEFAULT_TTL = 60.0
+"""The default number of seconds a cached `ObjectMeta` is used without revalidation."""
+
+DEFAULT_MAX_ENTRIES = 100_000
+"""The default maximum number of entries in a [`HeadCache`][obspec.cache.HeadCache]."""
+
+_MAX_INVALIDATIONS = 10_000
+"""The number of recent invalidations remembered to discard the results of requests
+that were already in flight."""
+
+HeadCacheSource: TypeAlias = Union["Head", "HeadAsync"]
+"""A client that can be wrapped by a [`HeadCache`][obspec.cache.HeadCache]."""
+
+
+class HeadCacheStats(TypedDict):
+    """Counters describing the effectiveness of a
+    [`HeadCache`][obspec.cache.HeadCache].
+    """  # noqa: D205
+
+    hits: int
+    """The number of `head` calls answered from the cache without a request."""
+
+    misses: int
+    """The number of `head` calls that required a full metadata request."""
+
+    revalidations: int
+    """The number of expired entries confirmed unchanged by a conditional request."""
+
+    evictions: int
+    """The number of entries evicted to stay within `max_entries`."""
+
+    invalidations: int
+    """The number of entries dropped by writes made through the cache."""
+
+    entries: int
+    """The number of entries currently cached."""
+
+
+class _Entry:
+    __slots__ = ("checked_at", "meta")
+
+    def __init__(self, meta: ObjectMeta, checked_at: float) -> None:
+        self.meta = meta
+        self.checked_at = checked_at
+
+
+class HeadCache:
+    """A cache of object metadata with a TTL and conditional revalidation.
+
+    [`head`][obspec.Head] results are cached for `ttl` seconds, up to `max_entries`
+    entries, evicting the least recently used first. The cache also fills itself
+    from the metadata returned by `list`, `list_with_delimiter` and `get` calls made
+    through it, and drops entries for paths written by `put`, `copy`, `rename` and
+    `delete` calls made through it. Results of requests that were already in flight
+    when a path was written are not cached for that path.
+
+    When an entry with an `e_tag` expires and the client implements
+    [`Get`][obspec.Get] (or [`GetAsync`][obspec.GetAsync]), it is revalidated with
+    a `get` request with `head=True` and `if_none_match` set to the cached `e_tag`.
+    A [`NotModifiedError`][obspec.exceptions.NotModifiedError] confirms the entry,
+    which is then kept for another `ttl` seconds.
+
+    Writes made to the store other than through this wrapper are only observed once
+    entries expire.
+
+    ```py
+    from obspec.cache import HeadCache
+
+    store = HeadCache(store, ttl=300)
+    size = store.head("data.parquet")["size"]
+    ```
+    """
+
+    def __init__(
+        self,
+        client: HeadCacheSource,
+        *,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        """Create a new HeadCache.
+
+        Args:
+            client: The underlying client. Other methods, such as `list` and `put`,
+                are available if the client implements them.
+
+        Keyword Args:
+            ttl: The number of seconds an entry is used before it is revalidated.
+                Defaults to 60.
+            max_entries: The maximum number of entries to keep. Defaults to 100,000.
+
+        """
+        if ttl < 0:
+            msg = f"ttl must be non-negative, got {ttl}."
+            raise ValueError(msg)
+        if max_entries < 0:
+            msg = f"max_entries must be non-negative, got {max_entries}."
+            raise ValueError(msg)
+
+        self.client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # Each invalidation bumps the generation. Results of requests started at an
+        # earlier generation are not recorded for paths invalidated since.
+        self._generation = 0
+        self._invalidated: OrderedDict[str, int] = OrderedDict()
+        self._forgotten = 0
+        self._stats: HeadCacheStats = {
+            "hits": 0,
+            "misses": 0,
+            "revalidations": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "entries": 0,
+        }
+
+    def stats(self) -> HeadCacheStats:
+        """Return the cache's counters."""
+        with self._lock:
+            stats = self._stats.copy()
+            stats["entries"] = len(self._entries)
+            return stats
+
+    def invalidate(self, paths: str | Iterable[str] | None = None) -> None:
+        """Drop cached entries.
+
+        Args:
+            paths: The path or paths to drop. If `None`, the whole cache is cleared.
+
+        """
+        with self._lock:
+            self._generation += 1
+            if paths is None:
+                self._stats["invalidations"] += len(self._entries)
+                self._entries.clear()
+                self._invalidated.clear()
+                self._forgotten = self._generation
+                return
+            for path in [paths] if isinstance(paths, str) else paths:
+                if self._entries.pop(path, None) is not None:
+                    self._stats["invalidations"] += 1
+                self._invalidated[path] = self._generation
+                self._invalidated.move_to_end(path)
+            while len(self._invalidated) > _MAX_INVALIDATIONS:
+                _, self._forgotten = self._invalidated.popitem(last=False)
+
+    def _method(self, name: str) -> Any:  # noqa: ANN401
+        method = getattr(self.client, name, None)
+        if method is None:
+            msg = f"{type(self.client).__name__} does not implement `{name}`."
+            raise NotSupportedError(msg)
+        return method
+
+    def _begin(self) -> int:
+        """Return the generation to pass to `_record` for a request about to start."""
+        with self._lock:
+            return self._generation
+
+    def _record(self, metas: Iterable[ObjectMeta], since: int) -> None:
+        """Cache `metas`, skipping paths invalidated after generation `since`."""
+        if self.max_entries == 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for meta in metas:
+                path = meta["path"]
+                if (
+                    self._forgotten > since
+                    or self._invalidated.get(path, since) > since
+                ):
+                    # A write made while the request was in flight may be newer
+                    continue
+                self._entries[path] = _Entry(meta, now)
+                self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _lookup(self, path: str) -> tuple[ObjectMeta | None, bool]:
+        """Return the cached meta for `path`, if any, and whether it is still fresh."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None, False
+            self._entries.move_to_end(path)
+            if time.monotonic() - entry.checked_at < self.ttl:
+                self._stats["hits"] += 1
+                return entry.meta, True
+            return entry.meta, False
+
+    def _confirm(self, path: str) -> None:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                entry.checked_at = time.monotonic()
+            self._stats["revalidations"] += 1
+
+    def _miss(self) -> None:
+        with self._lock:
+            self._stats["misses"] += 1
+
+    # Head
+
+    def head(self, path: str) -> ObjectMeta:
+        """Return the metadata for the specified location.
+
+        Refer to the documentation for [Head][obspec.Head].
+        """
+        head = self._method("head")
+        cached, fresh = self._lookup(path)
+        if cached is not None and fresh:
+            return cached
+
+        if cached is not None and cached["e_tag"] is not None:
+            get = getattr(self.client, "get", None)
+            if get is not None:
+                options: GetOptions = {"head": True, "if_none_match": cached["e_tag"]}
+                since = self._begin()
+                try:
+                    meta = get(path, options=options).meta
+                except Exception as e:
+                    if not is_error(e, NotModifiedError):
+                        raise
+                    self._confirm(path)
+                    return cached
+                self._miss()
+                self._record([meta], since)
+                return meta
+
+        self._miss()
+        since = self._begin()
+        meta = head(path)
+        self._record([meta], since)
+        return meta
+
+    async def head_async(self, path: str) -> ObjectMeta:
+        """Call `head` asynchronously.
+
+        Refer to the documentation for [HeadAsync][obspec.HeadAsync].
+        """
+        head_async = self._method("head_async")
+        cached, fresh = self._lookup(path)
+        if cached is not None and fresh:
+            return cached
+
+        if cached is not None and cached["e_tag"] is not None:
+            get_async = getattr(self.client, "get_async", None)
+            if get_async is not None:
+                options: GetOptions = {"head": True, "if_none_match": cached["e_tag"]}
+                since = self._begin()
+                try:
+                    meta = (await get_async(path, options=options)).meta
+                except Exception as e:
+                    if not is_error(e, NotModifiedError):
+                        raise
+                    self._confirm(path)
+                    return cached
+                self._miss()
+                self._record([meta], since)
+                return meta
+
+        self._miss()
+        since = self._begin()
+        meta = await head_async(path)
+        self._record([meta], since)
+        return meta
+
+    # Reads that fill the cache
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> GetResult:
+        """Return the bytes that are stored at the specified location.
+
+        Refer to the documentation for [Get][obspec.Get].
+        """
+        since = self._begin()
+        result = self._method("get")(path, options=options)
+        if not (options and options.get("version")):
+            # A specific version is not necessarily the current one.
+            self._record([result.meta], since)
+        return result
+
+    async def get_async(
+        self,
+        path: str,
+        *,
+        options: GetOptions | None = None,
+    ) -> GetResultAsync:
+        """Call `get` asynchronously.
+
+        Refer to the documentation for [GetAsync][obspec.GetAsync].
+        """
+        since = self._begin()
+        result = await self._method("get_async")(path, options=options)
+        if not (options and options.get("version")):
+            self._record([result.meta], since)
+        return result
+
+    def list(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Refer to the documentation for [List][obspec.List].
+        """
+        since = self._begin()
+        for chunk in self._method("list")(prefix, offset=offset):
+            self._record(chunk, since)
+            yield chunk
+
+    async def list_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> AsyncIterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Refer to the documentation for [ListAsync][obspec.ListAsync].
+        """
+        since = self._begin()
+        async for chunk in self._method("list_async")(prefix, offset=offset):
+            self._record(chunk, since)
+            yield chunk
+
+    def list_with_delimiter(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """List objects with the given prefix and a `/` delimiter.
+
+        Refer to the documentation for [ListWithDelimiter][obspec.ListWithDelimiter].
+        """
+        since = self._begin()
+        result = self._method("list_with_delimiter")(prefix)
+        self._record(result["objects"], since)
+        return result
+
+    async def list_with_delimiter_async(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """Call `list_with_delimiter` asynchronously.
+
+        Refer to the documentation for
+        [ListWithDelimiterAsync][obspec.ListWithDelimiterAsync].
+        """
+        since = self._begin()
+        result = await self._method("list_with_delimiter_async")(prefix)
+        self._record(result["objects"], since)
+        return result
+
+    # Writes that invalidate the cache
+
+    def put(self, path: str, file: Any, **kwargs: Any) -> PutResult:  # noqa: ANN401
+        """Save the provided bytes to the specified location.
+
+        Refer to the documentation for [Put][obspec.Put].
+        """
+        put = self._method("put")
+        try:
+            return put(path, file, **kwargs)
+        finally:
+            self.invalidate(path)
+
+    async def put_async(self, path: str, file: Any, **kwargs: Any) -> PutResult:  # noqa: ANN401
+        """Call `put` asynchronously.
+
+        Refer to the documentation for [PutAsync][obspec.PutAsync].
+        """
+        put_async = self._method("put_async")
+        try:
+            return await put_async(path, file, **kwargs)
+        finally:
+            self.invalidate(path)
+
+    def copy(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Copy an object from one path to another in the same object store.
+
+        Refer to the documentation for [Copy][obspec.Copy].
+        """
+        copy = self._method("copy")
+        try:
+            copy(from_, to, overwrite=overwrite)
+        finally:
+            self.invalidate(to)
+
+    async def copy_async(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Call `copy` asynchronously.
+
+        Refer to the documentation for [CopyAsync][obspec.CopyAsync].
+        """
+        copy_async = self._method("copy_async")
+        try:
+            await copy_async(from_, to, overwrite=overwrite)
+        finally:
+            self.invalidate(to)
+
+    def rename(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Move an object from one path to another in the same object store.
+
+        Refer to the documentation for [Rename][obspec.Rename].
+        """
+        rename = self._method("rename")
+        try:
+            rename(from_, to, overwrite=overwrite)
+        finally:
+            self.invalidate([from_, to])
+
+    async def rename_async(
+        self,
+        from_: str,
+        to: str,
+        *,
+        overwrite: bool = True,
+    ) -> None:
+        """Call `rename` asynchronously.
+
+        Refer to the documentation for [RenameAsync][obspec.RenameAsync].
+        """
+        rename_async = self._method("rename_async")
+        try:
+            await rename_async(from_, to, overwrite=overwrite)
+        finally:
+            self.invalidate([from_, to])
+
+    def delete(self, paths: str | Sequence[str]) -> None:
+        """Delete the object at the specified location(s).
+
+        Refer to the documentation for [Delete][obspec.Delete].
+        """
+        delete = self._method("delete")
+        try:
+            delete(paths)
+        finally:
+            self.invalidate(paths)
+
+    async def delete_async(self, paths: str | Sequence[str]) -> None:
+        """Call `delete` asynchronously.
+
+        Refer to the documentation for [DeleteAsync][obspec.DeleteAsync].
+        """
+        delete_async = self._method("delete_async")
+        try:
+            await delete_async(paths)
+        finally:
+            self.invalidate(paths)
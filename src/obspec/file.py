@@ -0,0 +1,919 @@
+"""File-like objects over obspec clients.
+
+Many libraries, such as `zipfile`, PIL, h5py and Parquet readers, expect a seekable
+binary file object. Wrapping [`GetRange`][obspec.GetRange] naively, with one request per
+`read()` call, makes them issue thousands of tiny requests.
+
+- [`ObjectReader`][obspec.file.ObjectReader] is a read-only, seekable
+  [`io.BufferedIOBase`][] over [`GetRange`][obspec.GetRange] and
+  [`Head`][obspec.Head], with adaptive readahead and a small block cache.
+- [`AsyncObjectReader`][obspec.file.AsyncObjectReader] is its async twin over
+  [`GetRangeAsync`][obspec.GetRangeAsync] and [`HeadAsync`][obspec.HeadAsync].
+- [`ObjectWriter`][obspec.file.ObjectWriter] is a write-only
+  [`io.BufferedIOBase`][] that streams into a single [`put`][obspec.Put] and
+  commits on close, and [`AsyncObjectWriter`][obspec.file.AsyncObjectWriter] is its
+  async twin over [`PutAsync`][obspec.PutAsync].
+
+```py
+import zipfile
+
+from obspec.file import ObjectReader
+
+with ObjectReader(store, "archive.zip") as f, zipfile.ZipFile(f) as archive:
+    print(archive.namelist())
+```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import queue
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Union
+
+from ._util import (
+    as_memoryview,
+    fetch_meta,
+    fetch_meta_async,
+    fetch_range,
+    fetch_range_async,
+)
+from .exceptions import PreconditionError
+from .store._common import DEFAULT_CHUNK_SIZE
+
+if sys.version_info >= (3, 10):
+    from typing import TypeAlias
+else:
+    from typing_extensions import TypeAlias
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterator
+    from types import TracebackType
+
+    if sys.version_info >= (3, 11):
+        from typing import Self
+    else:
+        from typing_extensions import Self
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+    from ._attributes import Attributes
+    from ._get import Get, GetAsync, GetRange, GetRangeAsync
+    from ._meta import ObjectMeta
+    from ._put import Put, PutAsync, PutMode, PutResult
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+"""The default size, in bytes, of the blocks an
+[`ObjectReader`][obspec.file.ObjectReader] reads and caches."""
+
+DEFAULT_MAX_READAHEAD = 8 * 1024 * 1024
+"""The default maximum number of bytes an [`ObjectReader`][obspec.file.ObjectReader]
+fetches in one request while reading sequentially."""
+
+DEFAULT_CACHE_BLOCKS = 16
+"""The default number of blocks an [`ObjectReader`][obspec.file.ObjectReader] keeps
+for backward seeks, in addition to the current readahead window."""
+
+DEFAULT_MAX_PENDING = 2
+"""The default number of written chunks an [`ObjectWriter`][obspec.file.ObjectWriter]
+lets wait for `put` before `write` blocks."""
+
+_DONE = object()
+_ABORT = object()
+
+ReaderSource: TypeAlias = Union["GetRange", "Get", "GetRangeAsync", "GetAsync"]
+"""A client that an [`ObjectReader`][obspec.file.ObjectReader] or
+[`AsyncObjectReader`][obspec.file.AsyncObjectReader] can read from.
+
+[`GetRange`][obspec.GetRange] is preferred, falling back to [`Get`][obspec.Get] with
+a range. Unless `size` is given, the client should also implement
+[`Head`][obspec.Head]; otherwise a `get` request with `head=True` is used.
+"""
+
+
+def _resolve_seek(offset: int, whence: int, position: int, size: int) -> int:
+    if whence == io.SEEK_SET:
+        target = offset
+    elif whence == io.SEEK_CUR:
+        target = position + offset
+    elif whence == io.SEEK_END:
+        target = size + offset
+    else:
+        msg = f"Invalid whence ({whence}, should be 0, 1 or 2)."
+        raise ValueError(msg)
+    if target < 0:
+        msg = f"Negative seek position {target}."
+        raise ValueError(msg)
+    return target
+
+
+class _Readahead:
+    """The block cache and readahead window shared by both readers.
+
+    The window is the number of blocks fetched on a cache miss. It doubles with each
+    miss while reads are sequential, up to `max_blocks`, and collapses to one block
+    as soon as a read does not continue from where the previous read ended.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        block_size: int,
+        max_readahead: int,
+        cache_blocks: int,
+    ) -> None:
+        if block_size < 1:
+            msg = f"block_size must be at least 1, got {block_size}."
+            raise ValueError(msg)
+        if cache_blocks < 0:
+            msg = f"cache_blocks must not be negative, got {cache_blocks}."
+            raise ValueError(msg)
+
+        self.path = path
+        self.size = size
+        self.block_size = block_size
+        self.max_blocks = max(1, max_readahead // block_size)
+        self.capacity = self.max_blocks + cache_blocks
+        self.blocks: OrderedDict[int, memoryview] = OrderedDict()
+        self.window = 1
+        self.last_end = 0
+
+    def start(self, position: int) -> None:
+        """Adapt the window to a read starting at `position`."""
+        if position != self.last_end:
+            self.window = 1
+
+    def copy(self, position: int, out: memoryview) -> int:
+        """Copy cached bytes starting at `position` into `out`; return the count."""
+        n = 0
+        while n < len(out):
+            index, offset = divmod(position + n, self.block_size)
+            block = self.blocks.get(index)
+            if block is None or offset >= len(block):
+                break
+            self.blocks.move_to_end(index)
+            take = min(len(block) - offset, len(out) - n)
+            out[n : n + take] = block[offset : offset + take]
+            n += take
+        return n
+
+    def plan(self, position: int, end: int) -> tuple[int, int]:
+        """Return the block-aligned range to fetch for a miss at `position`."""
+        start = position - position % self.block_size
+        stop = max(end, start + self.window * self.block_size)
+        stop = -(-stop // self.block_size) * self.block_size
+        self.window = min(2 * self.window, self.max_blocks)
+        return start, min(stop, self.size)
+
+    def check(self, start: int, end: int, buffer: Buffer) -> memoryview:
+        """View a fetched range, raising if it is shorter than requested."""
+        view = as_memoryview(buffer)
+        if len(view) != end - start:
+            msg = (
+                f"{self.path}: expected {end - start} bytes at offset {start}, got "
+                f"{len(view)}. The object was modified while it was being read."
+            )
+            raise PreconditionError(msg)
+        return view
+
+    def insert(self, start: int, end: int, buffer: Buffer) -> None:
+        view = self.check(start, end, buffer)
+        index = start // self.block_size
+        for offset in range(0, len(view), self.block_size):
+            self.blocks[index] = view[offset : offset + self.block_size]
+            self.blocks.move_to_end(index)
+            index += 1
+        while len(self.blocks) > self.capacity:
+            self.blocks.popitem(last=False)
+
+    def bypass(self, n: int) -> bool:
+        """Whether a read of `n` bytes should skip the cache."""
+        return n >= self.max_blocks * self.block_size
+
+
+class ObjectReader(io.BufferedIOBase):
+    """A read-only, seekable binary file over one object.
+
+    Reads are served from a cache of fixed-size blocks. On a miss, the reader fetches
+    a readahead window of blocks in one request. The window starts at one block,
+    doubles on every miss while reads are sequential, up to `max_readahead` bytes,
+    and shrinks back to one block after a seek elsewhere. The most recent blocks are
+    kept, so short backward seeks, such as re-reading a footer, are served locally.
+
+    Reads of at least `max_readahead` bytes bypass the cache and are fetched in
+    one request, with [`readinto`][io.BufferedIOBase.readinto] copying the response
+    directly into the caller's buffer.
+
+    The object's size is taken from a `head` request when the reader is created.
+    If the object is modified while it is being read, a read may raise
+    [`PreconditionError`][obspec.exceptions.PreconditionError].
+
+    Memory use is bounded by `max_readahead` plus `cache_blocks * block_size`.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        client: ReaderSource,
+        path: str,
+        *,
+        size: int | None = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_readahead: int = DEFAULT_MAX_READAHEAD,
+        cache_blocks: int = DEFAULT_CACHE_BLOCKS,
+    ) -> None:
+        """Open an object for reading.
+
+        Args:
+            client: The client to read from.
+            path: The path of the object.
+
+        Keyword Args:
+            size: The size of the object, if known. Otherwise it is fetched with a
+                `head` request.
+            block_size: The size of each cached block. Defaults to 64 KiB.
+            max_readahead: The largest readahead window. Defaults to 8 MiB.
+            cache_blocks: The number of blocks kept for backward seeks beyond the
+                readahead window. Defaults to 16.
+
+        """
+        super().__init__()
+        meta: ObjectMeta | None = None
+        if size is None:
+            meta = fetch_meta(client, path)
+            size = meta["size"]
+        self.client = client
+        self.name = path
+        self.meta = meta
+        self._state = _Readahead(path, size, block_size, max_readahead, cache_blocks)
+        self._position = 0
+
+    def __repr__(self) -> str:  # noqa: D105
+        return f"ObjectReader({self.name!r})"
+
+    @property
+    def size(self) -> int:
+        """The size of the object in bytes."""
+        return self._state.size
+
+    def readable(self) -> bool:
+        """Return `True`: the reader is readable."""
+        return True
+
+    def seekable(self) -> bool:
+        """Return `True`: the reader supports random access."""
+        return True
+
+    def tell(self) -> int:
+        """Return the current position."""
+        self._checkClosed()  # type: ignore[attr-defined]
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Change the position, as with [`io.IOBase.seek`][]."""
+        self._checkClosed()  # type: ignore[attr-defined]
+        self._position = _resolve_seek(offset, whence, self._position, self.size)
+        return self._position
+
+    def readinto(self, buffer: Buffer) -> int:  # type: ignore[override]
+        """Read bytes into `buffer` and return the number of bytes read."""
+        self._checkClosed()  # type: ignore[attr-defined]
+        state = self._state
+        out = as_memoryview(buffer)
+        position = self._position
+        n = max(0, min(len(out), state.size - position))
+        if not n:
+            return 0
+
+        state.start(position)
+        if state.bypass(n):
+            data = fetch_range(self.client, self.name, position, position + n)
+            out[:n] = state.check(position, position + n, data)
+        else:
+            copied = state.copy(position, out[:n])
+            while copied < n:
+                start, end = state.plan(position + copied, position + n)
+                data = fetch_range(self.client, self.name, start, end)
+                state.insert(start, end, data)
+                copied += state.copy(position + copied, out[copied:n])
+
+        self._position = state.last_end = position + n
+        return n
+
+    def readinto1(self, buffer: Buffer) -> int:  # type: ignore[override]
+        """Read bytes into `buffer`; the same as `readinto`."""
+        return self.readinto(buffer)
+
+    def read(self, size: int | None = -1) -> bytes:
+        """Read up to `size` bytes, or to the end if `size` is negative."""
+        self._checkClosed()  # type: ignore[attr-defined]
+        remaining = max(0, self.size - self._position)
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        out = bytearray(size)
+        n = self.readinto(out)
+        del out[n:]
+        return bytes(out)
+
+    def read1(self, size: int = -1) -> bytes:
+        """Read up to `size` bytes; the same as `read`."""
+        return self.read(size)
+
+    def close(self) -> None:
+        """Close the reader and release its cached blocks."""
+        self._state.blocks.clear()
+        super().close()
+
+
+class AsyncObjectReader:
+    """An async, read-only, seekable binary file over one object.
+
+    This is the async twin of [`ObjectReader`][obspec.file.ObjectReader], reading
+    with [`GetRangeAsync`][obspec.GetRangeAsync], and with the same readahead and
+    caching behaviour. Create it with [`open`][obspec.file.AsyncObjectReader.open],
+    which fetches the object's size:
+
+    ```py
+    from obspec.file import AsyncObjectReader
+
+    async with await AsyncObjectReader.open(store, "data.bin") as f:
+        await f.seek(-8, 2)
+        footer = await f.read(8)
+    ```
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        client: ReaderSource,
+        path: str,
+        *,
+        size: int,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_readahead: int = DEFAULT_MAX_READAHEAD,
+        cache_blocks: int = DEFAULT_CACHE_BLOCKS,
+    ) -> None:
+        """Create a reader for an object of known size.
+
+        Refer to the documentation for [`ObjectReader`][obspec.file.ObjectReader].
+        """
+        self.client = client
+        self.name = path
+        self.meta: ObjectMeta | None = None
+        self.closed = False
+        self._state = _Readahead(path, size, block_size, max_readahead, cache_blocks)
+        self._position = 0
+
+    @classmethod
+    async def open(  # noqa: PLR0913
+        cls,
+        client: ReaderSource,
+        path: str,
+        *,
+        size: int | None = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_readahead: int = DEFAULT_MAX_READAHEAD,
+        cache_blocks: int = DEFAULT_CACHE_BLOCKS,
+    ) -> Self:
+        """Open an object for reading, fetching its size unless `size` is given.
+
+        Refer to the documentation for [`ObjectReader`][obspec.file.ObjectReader].
+        """
+        meta: ObjectMeta | None = None
+        if size is None:
+            meta = await fetch_meta_async(client, path)
+            size = meta["size"]
+        reader = cls(
+            client,
+            path,
+            size=size,
+            block_size=block_size,
+            max_readahead=max_readahead,
+            cache_blocks=cache_blocks,
+        )
+        reader.meta = meta
+        return reader
+
+    def __repr__(self) -> str:  # noqa: D105
+        return f"AsyncObjectReader({self.name!r})"
+
+    async def __aenter__(self) -> Self:  # noqa: D105
+        return self
+
+    async def __aexit__(  # noqa: D105
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    def _check_closed(self) -> None:
+        if self.closed:
+            msg = "I/O operation on closed file."
+            raise ValueError(msg)
+
+    @property
+    def size(self) -> int:
+        """The size of the object in bytes."""
+        return self._state.size
+
+    def tell(self) -> int:
+        """Return the current position."""
+        self._check_closed()
+        return self._position
+
+    async def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Change the position, as with [`io.IOBase.seek`][]."""
+        self._check_closed()
+        self._position = _resolve_seek(offset, whence, self._position, self.size)
+        return self._position
+
+    async def readinto(self, buffer: Buffer) -> int:
+        """Read bytes into `buffer` and return the number of bytes read."""
+        self._check_closed()
+        state = self._state
+        out = as_memoryview(buffer)
+        position = self._position
+        n = max(0, min(len(out), state.size - position))
+        if not n:
+            return 0
+
+        state.start(position)
+        if state.bypass(n):
+            end = position + n
+            data = await fetch_range_async(self.client, self.name, position, end)
+            out[:n] = state.check(position, end, data)
+        else:
+            copied = state.copy(position, out[:n])
+            while copied < n:
+                start, end = state.plan(position + copied, position + n)
+                data = await fetch_range_async(self.client, self.name, start, end)
+                state.insert(start, end, data)
+                copied += state.copy(position + copied, out[copied:n])
+
+        self._position = state.last_end = position + n
+        return n
+
+    async def read(self, size: int = -1) -> bytes:
+        """Read up to `size` bytes, or to the end if `size` is negative."""
+        self._check_closed()
+        remaining = max(0, self.size - self._position)
+        if size < 0 or size > remaining:
+            size = remaining
+        out = bytearray(size)
+        n = await self.readinto(out)
+        del out[n:]
+        return bytes(out)
+
+    async def close(self) -> None:
+        """Close the reader and release its cached blocks."""
+        self._state.blocks.clear()
+        self.closed = True
+
+
+class _Aborted(Exception):  # noqa: N818
+    """Raised inside `put` to abandon an upload without committing it."""
+
+
+def _put_kwargs(  # noqa: PLR0913
+    *,
+    mode: PutMode | None,
+    attributes: Attributes | None,
+    tags: dict[str, str] | None,
+    use_multipart: bool | None,
+    chunk_size: int,
+    max_concurrency: int | None,
+) -> dict[str, Any]:
+    if chunk_size < 1:
+        msg = f"chunk_size must be at least 1, got {chunk_size}."
+        raise ValueError(msg)
+    kwargs: dict[str, Any] = {"chunk_size": chunk_size}
+    if mode is not None:
+        kwargs["mode"] = mode
+    if attributes is not None:
+        kwargs["attributes"] = attributes
+    if tags is not None:
+        kwargs["tags"] = tags
+    if use_multipart is not None:
+        kwargs["use_multipart"] = use_multipart
+    if max_concurrency is not None:
+        kwargs["max_concurrency"] = max_concurrency
+    return kwargs
+
+
+class _PutState:
+    """The outcome of a background `put`, shared without referencing the writer."""
+
+    __slots__ = ("error", "finished", "result")
+
+    def __init__(self) -> None:
+        self.result: PutResult | None = None
+        self.error: BaseException | None = None
+        self.finished = threading.Event()
+
+
+def _queued_chunks(chunks: queue.Queue[Any]) -> Iterator[Buffer]:
+    while True:
+        item = chunks.get()
+        if item is _DONE:
+            return
+        if item is _ABORT:
+            raise _Aborted
+        yield item
+
+
+def _run_put(
+    client: Put,
+    path: str,
+    chunks: queue.Queue[Any],
+    kwargs: dict[str, Any],
+    state: _PutState,
+) -> None:
+    # Runs on the writer's thread, which must not reference the writer, so that an
+    # abandoned writer can be garbage collected and its upload aborted.
+    try:
+        state.result = client.put(path, _queued_chunks(chunks), **kwargs)
+    except BaseException as e:  # noqa: BLE001
+        state.error = e
+    finally:
+        state.finished.set()
+
+
+def _send_chunk(chunks: queue.Queue[Any], state: _PutState, item: object) -> None:
+    """Queue an item for the `put`, unless it has stopped consuming them."""
+    while not state.finished.is_set():
+        try:
+            chunks.put(item, timeout=0.1)
+        except queue.Full:
+            continue
+        return
+
+
+class ObjectWriter(io.BufferedIOBase):
+    """A write-only binary file that streams into one [`put`][obspec.Put] call.
+
+    Written data is collected into chunks of `chunk_size` bytes, which are passed to
+    `put` as an iterable of buffers while the writer is still being written to. The
+    `put` call runs on a background thread. At most `max_pending` chunks wait for it
+    to consume them; once that many are waiting, `write` blocks, so memory use stays
+    bounded however much is written.
+
+    The object is committed atomically when the writer is closed, and not before.
+    Errors raised by `put`, such as
+    [`AlreadyExistsError`][obspec.exceptions.AlreadyExistsError] for `mode="create"`
+    or [`PreconditionError`][obspec.exceptions.PreconditionError] for an
+    [`UpdateVersion`][obspec.UpdateVersion] mode, are raised from
+    [`close`][obspec.file.ObjectWriter.close], or from `write` if the upload has
+    already failed. The result of the `put` is then available as
+    [`result`][obspec.file.ObjectWriter.result].
+
+    If the `with` block exits with an exception, or the writer is garbage collected
+    without being closed, the upload is [aborted][obspec.file.ObjectWriter.abort] and
+    nothing is written.
+
+    ```py
+    import gzip
+
+    from obspec.file import ObjectWriter
+
+    with ObjectWriter(store, "logs.gz", mode="create") as f:
+        with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+            gz.write(b"...")
+    print(f.result)
+    ```
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        client: Put,
+        path: str,
+        *,
+        mode: PutMode | None = None,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        use_multipart: bool | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int | None = None,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ) -> None:
+        """Open an object for writing.
+
+        Args:
+            client: The client to write with.
+            path: The path of the object.
+
+        Keyword Args:
+            mode: The [`PutMode`][obspec.PutMode] of the `put`. Defaults to the
+                client's default, `"overwrite"`.
+            attributes: The attributes of the object, passed to `put`.
+            tags: The tags of the object, passed to `put`.
+            use_multipart: Passed to `put`.
+            chunk_size: The size of the chunks passed to `put`, which is also passed
+                as its `chunk_size`. Defaults to 5 MiB.
+            max_concurrency: Passed to `put`, if given.
+            max_pending: The number of chunks that may wait for `put` before
+                `write` blocks. Defaults to 2.
+
+        """
+        super().__init__()
+        if max_pending < 1:
+            msg = f"max_pending must be at least 1, got {max_pending}."
+            raise ValueError(msg)
+
+        self.client = client
+        self.name = path
+        self.result: PutResult | None = None
+        """The result of the `put`, once the writer has been closed."""
+
+        self._kwargs = _put_kwargs(
+            mode=mode,
+            attributes=attributes,
+            tags=tags,
+            use_multipart=use_multipart,
+            chunk_size=chunk_size,
+            max_concurrency=max_concurrency,
+        )
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._written = 0
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_pending)
+        self._state = _PutState()
+        self._thread = threading.Thread(
+            target=_run_put,
+            args=(client, path, self._queue, self._kwargs, self._state),
+            name=f"obspec-put-{path}",
+            daemon=True,
+        )
+        self._thread.start()
+        self._finalizer = weakref.finalize(
+            self,
+            _send_chunk,
+            self._queue,
+            self._state,
+            _ABORT,
+        )
+
+    def __repr__(self) -> str:  # noqa: D105
+        return f"ObjectWriter({self.name!r})"
+
+    def __exit__(  # noqa: D105
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def __del__(self) -> None:  # noqa: D105
+        # IOBase.__del__ would close, and so commit, an abandoned writer. Its
+        # finalizer aborts the upload instead.
+        return
+
+    def _raise_error(self) -> None:
+        error = self._state.error
+        if error is not None and not isinstance(error, _Aborted):
+            raise error
+
+    def _send(self, item: object) -> None:
+        _send_chunk(self._queue, self._state, item)
+        # The put stops consuming chunks early only if it failed.
+        self._raise_error()
+
+    def writable(self) -> bool:
+        """Return `True`: the writer is writable."""
+        return True
+
+    def tell(self) -> int:
+        """Return the number of bytes written so far."""
+        self._checkClosed()  # type: ignore[attr-defined]
+        return self._written
+
+    def write(self, buffer: Buffer) -> int:  # type: ignore[override]
+        """Write the bytes in `buffer`, blocking while too many chunks are pending.
+
+        The bytes are copied, so `buffer` can be reused as soon as this returns.
+        """
+        self._checkClosed()  # type: ignore[attr-defined]
+        self._raise_error()
+        view = as_memoryview(buffer)
+        n = len(view)
+        while view:
+            take = min(len(view), self._chunk_size - len(self._buffer))
+            self._buffer += view[:take]
+            view = view[take:]
+            if len(self._buffer) == self._chunk_size:
+                self._send(self._buffer)
+                self._buffer = bytearray()
+        self._written += n
+        return n
+
+    def close(self) -> None:
+        """Send the remaining data and commit the object.
+
+        Raises:
+            Exception: Any exception raised by `put`.
+
+        """
+        if self.closed:
+            return
+        try:
+            if self._buffer:
+                self._send(self._buffer)
+                self._buffer = bytearray()
+            self._send(_DONE)
+            self._finalizer.detach()
+            self._thread.join()
+            self._raise_error()
+            self.result = self._state.result
+        finally:
+            super().close()
+
+    def abort(self) -> None:
+        """Abandon the upload, so that nothing is written, and close the writer."""
+        if self.closed:
+            return
+        try:
+            self._finalizer()
+            self._thread.join()
+        finally:
+            self._buffer = bytearray()
+            super().close()
+
+
+class AsyncObjectWriter:
+    """An async, write-only binary file that streams into one
+    [`put_async`][obspec.PutAsync] call.
+
+    This is the async twin of [`ObjectWriter`][obspec.file.ObjectWriter], with the
+    `put_async` call running as a task on the event loop, and the same bounded
+    memory use and atomic commit on [`close`][obspec.file.AsyncObjectWriter.close].
+
+    ```py
+    from obspec.file import AsyncObjectWriter
+
+    async with AsyncObjectWriter(store, "out.bin") as f:
+        await f.write(b"...")
+    ```
+    """  # noqa: D205
+
+    def __init__(  # noqa: PLR0913
+        self,
+        client: PutAsync,
+        path: str,
+        *,
+        mode: PutMode | None = None,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        use_multipart: bool | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int | None = None,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ) -> None:
+        """Create a writer. The upload starts with the first write.
+
+        Refer to the documentation for [`ObjectWriter`][obspec.file.ObjectWriter].
+        """
+        if max_pending < 1:
+            msg = f"max_pending must be at least 1, got {max_pending}."
+            raise ValueError(msg)
+
+        self.client = client
+        self.name = path
+        self.closed = False
+        self.result: PutResult | None = None
+        """The result of the `put_async`, once the writer has been closed."""
+
+        self._kwargs = _put_kwargs(
+            mode=mode,
+            attributes=attributes,
+            tags=tags,
+            use_multipart=use_multipart,
+            chunk_size=chunk_size,
+            max_concurrency=max_concurrency,
+        )
+        self._chunk_size = chunk_size
+        self._max_pending = max_pending
+        self._buffer = bytearray()
+        self._written = 0
+        self._queue: asyncio.Queue[Any] | None = None
+        self._task: asyncio.Task[PutResult] | None = None
+
+    def __repr__(self) -> str:  # noqa: D105
+        return f"AsyncObjectWriter({self.name!r})"
+
+    async def __aenter__(self) -> Self:  # noqa: D105
+        return self
+
+    async def __aexit__(  # noqa: D105
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            await self.close()
+        else:
+            await self.abort()
+
+    def _check_closed(self) -> None:
+        if self.closed:
+            msg = "I/O operation on closed file."
+            raise ValueError(msg)
+
+    async def _chunks(self, chunks: asyncio.Queue[Any]) -> AsyncIterator[Buffer]:
+        while True:
+            item = await chunks.get()
+            if item is _DONE:
+                return
+            if item is _ABORT:
+                raise _Aborted
+            yield item
+
+    def _start(self) -> asyncio.Task[PutResult]:
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self._max_pending)
+            put = self.client.put_async(
+                self.name,
+                self._chunks(self._queue),
+                **self._kwargs,
+            )
+            self._task = asyncio.ensure_future(put)
+        return self._task
+
+    async def _send(self, item: object) -> None:
+        task = self._start()
+        assert self._queue is not None  # noqa: S101
+        if not task.done():
+            put = asyncio.ensure_future(self._queue.put(item))
+            await asyncio.wait([put, task], return_when=asyncio.FIRST_COMPLETED)
+            if put.done():
+                return
+            put.cancel()
+        # The put stopped consuming chunks, which only happens if it failed.
+        if not task.cancelled() and not isinstance(task.exception(), _Aborted):
+            task.result()
+
+    def tell(self) -> int:
+        """Return the number of bytes written so far."""
+        self._check_closed()
+        return self._written
+
+    async def write(self, buffer: Buffer) -> int:
+        """Write the bytes in `buffer`, waiting while too many chunks are pending.
+
+        Refer to the documentation for
+        [`ObjectWriter.write`][obspec.file.ObjectWriter.write].
+        """
+        self._check_closed()
+        view = as_memoryview(buffer)
+        n = len(view)
+        while view:
+            take = min(len(view), self._chunk_size - len(self._buffer))
+            self._buffer += view[:take]
+            view = view[take:]
+            if len(self._buffer) == self._chunk_size:
+                await self._send(self._buffer)
+                self._buffer = bytearray()
+        self._written += n
+        return n
+
+    async def close(self) -> None:
+        """Send the remaining data and commit the object.
+
+        Raises:
+            Exception: Any exception raised by `put_async`.
+
+        """
+        if self.closed:
+            return
+        try:
+            if self._buffer:
+                await self._send(self._buffer)
+                self._buffer = bytearray()
+            await self._send(_DONE)
+            self.result = await self._start()
+        finally:
+            self.closed = True
+
+    async def abort(self) -> None:
+        """Abandon the upload, so that nothing is written, and close the writer."""
+        if self.closed:
+            return
+        self.closed = True
+        self._buffer = bytearray()
+        if self._task is None:
+            return
+        with contextlib.suppress(Exception):
+            await self._send(_ABORT)
+            await self._task
@@ -0,0 +1,39 @@
+"""Utilities for listing very large numbers of objects.
+
+- [`ParallelLister`][obspec.listing.ParallelLister] splits a listing into shards
+  along common prefixes and lists them concurrently.
+- [`ObjectMetaColumns`][obspec.listing.ObjectMetaColumns] stores a chunk of list
+  results column-wise, and [`ColumnarLister`][obspec.listing.ColumnarLister] yields
+  them from any `List` client.
+- [`ListingIndex`][obspec.listing.ListingIndex] keeps a persistent local index of a
+  listing that can be queried like the store and refreshed incrementally.
+"""
+
+from ._columnar import (
+    DEFAULT_COLUMNAR_CHUNK_SIZE,
+    ColumnarLister,
+    ListColumnar,
+    ListColumnarAsync,
+    ObjectMetaColumns,
+)
+from ._index import INDEX_CHUNK_SIZE, ListingIndex
+from ._parallel import (
+    DEFAULT_LIST_CONCURRENCY,
+    DEFAULT_MAX_DEPTH,
+    ListSource,
+    ParallelLister,
+)
+
+__all__ = [
+    "DEFAULT_COLUMNAR_CHUNK_SIZE",
+    "DEFAULT_LIST_CONCURRENCY",
+    "DEFAULT_MAX_DEPTH",
+    "INDEX_CHUNK_SIZE",
+    "ColumnarLister",
+    "ListColumnar",
+    "ListColumnarAsync",
+    "ListSource",
+    "ListingIndex",
+    "ObjectMetaColumns",
+    "ParallelLister",
+]
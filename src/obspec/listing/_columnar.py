@@ -0,0 +1,531 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Protocol, overload
+
+from obspec.exceptions import NotSupportedError
+
+if TYPE_CHECKING:
+    import sys
+    from collections.abc import AsyncIterator, Iterable, Iterator
+
+    from obspec import ObjectMeta
+
+    if sys.version_info >= (3, 11):
+        from typing import Self
+    else:
+        from typing_extensions import Self
+
+    from ._parallel import ListSource
+
+DEFAULT_COLUMNAR_CHUNK_SIZE = 100_000
+"""The default number of objects in each chunk yielded by a
+[`ColumnarLister`][obspec.listing.ColumnarLister]."""
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_micros(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _MICROSECOND
+
+
+class _StringColumn:
+    """Nullable strings stored as one UTF-8 buffer with int64 offsets."""
+
+    __slots__ = ("data", "nulls", "offsets")
+
+    def __init__(
+        self,
+        data: bytes,
+        offsets: array[int],
+        nulls: bytes | None = None,
+    ) -> None:
+        self.data = data
+        self.offsets = offsets
+        self.nulls = nulls
+
+    def __getitem__(self, index: int) -> str | None:
+        if self.nulls is not None and self.nulls[index]:
+            return None
+        return self.data[self.offsets[index] : self.offsets[index + 1]].decode()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def take(self, indices: Sequence[int]) -> _StringColumn:
+        data = bytearray()
+        offsets = array("q", [0])
+        for i in indices:
+            data += self.data[self.offsets[i] : self.offsets[i + 1]]
+            offsets.append(len(data))
+        nulls = None
+        if self.nulls is not None:
+            nulls = bytes(self.nulls[i] for i in indices)
+        return _StringColumn(bytes(data), offsets, nulls)
+
+    @classmethod
+    def concat(cls, columns: Sequence[_StringColumn]) -> _StringColumn:
+        offsets = array("q", [0])
+        for column in columns:
+            base = offsets[-1]
+            offsets.extend(offset + base for offset in column.offsets[1:])
+        nulls = None
+        if any(column.nulls is not None for column in columns):
+            nulls = b"".join(
+                column.nulls if column.nulls is not None else bytes(len(column))
+                for column in columns
+            )
+        return cls(b"".join(column.data for column in columns), offsets, nulls)
+
+
+class _StringBuilder:
+    __slots__ = ("data", "has_nulls", "nulls", "offsets")
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+        self.nulls = bytearray()
+        self.has_nulls = False
+
+    def append(self, value: str | None) -> None:
+        if value is None:
+            self.has_nulls = True
+            self.nulls.append(1)
+        else:
+            self.data += value.encode()
+            self.nulls.append(0)
+        self.offsets.append(len(self.data))
+
+    def finish(self) -> _StringColumn:
+        nulls = bytes(self.nulls) if self.has_nulls else None
+        return _StringColumn(bytes(self.data), self.offsets, nulls)
+
+
+class ObjectMetaColumns(Sequence["ObjectMeta"]):
+    """A chunk of list results stored column-wise.
+
+    Instead of one [`ObjectMeta`][obspec.ObjectMeta] dict and one `datetime` per
+    object, each field is stored in a single contiguous buffer:
+
+    - `paths` (and `e_tags`, `versions`) as UTF-8 data with int64 offsets, in the same
+      layout as an Arrow `large_string` array.
+    - `sizes` as an int64 [`array`][array.array].
+    - `last_modified` as an int64 `array` of microseconds since the Unix epoch, UTC.
+
+    The columns can be passed to NumPy or Arrow without copying with
+    [`to_numpy`][obspec.listing.ObjectMetaColumns.to_numpy] and
+    [`to_arrow`][obspec.listing.ObjectMetaColumns.to_arrow], so filtering and
+    aggregating a large listing becomes a vectorized operation.
+
+    `ObjectMetaColumns` is also a `Sequence[ObjectMeta]`, so it can be used wherever
+    a list chunk is expected. Indexing it builds an `ObjectMeta` dict on demand.
+    """
+
+    def __init__(
+        self,
+        *,
+        paths: _StringColumn,
+        sizes: array[int],
+        last_modified: array[int],
+        e_tags: _StringColumn,
+        versions: _StringColumn,
+    ) -> None:
+        self._paths = paths
+        self._e_tags = e_tags
+        self._versions = versions
+        self.sizes = sizes
+        """The size in bytes of each object."""
+        self.last_modified = last_modified
+        """The last modified time of each object, in microseconds since the epoch."""
+
+    @classmethod
+    def from_metas(cls, metas: Iterable[ObjectMeta]) -> Self:
+        """Build columns from `ObjectMeta` dicts."""
+        paths = _StringBuilder()
+        e_tags = _StringBuilder()
+        versions = _StringBuilder()
+        sizes = array("q")
+        last_modified = array("q")
+        for meta in metas:
+            paths.append(meta["path"])
+            e_tags.append(meta["e_tag"])
+            versions.append(meta["version"])
+            sizes.append(meta["size"])
+            last_modified.append(_to_micros(meta["last_modified"]))
+        return cls(
+            paths=paths.finish(),
+            sizes=sizes,
+            last_modified=last_modified,
+            e_tags=e_tags.finish(),
+            versions=versions.finish(),
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        *,
+        paths: Iterable[str],
+        sizes: Iterable[int],
+        last_modified: Iterable[int],
+        e_tags: Iterable[str | None],
+        versions: Iterable[str | None],
+    ) -> Self:
+        """Build columns from one iterable of values per field.
+
+        `last_modified` is in microseconds since the Unix epoch, UTC. Stores that do
+        not hold `ObjectMeta` dicts use this to build chunks without creating them.
+        """
+        columns = []
+        for values in (paths, e_tags, versions):
+            builder = _StringBuilder()
+            for value in values:
+                builder.append(value)
+            columns.append(builder.finish())
+        return cls(
+            paths=columns[0],
+            sizes=array("q", sizes),
+            last_modified=array("q", last_modified),
+            e_tags=columns[1],
+            versions=columns[2],
+        )
+
+    @classmethod
+    def concat(cls, chunks: Iterable[ObjectMetaColumns]) -> Self:
+        """Concatenate many chunks into one."""
+        chunks = list(chunks)
+        sizes = array("q")
+        last_modified = array("q")
+        for chunk in chunks:
+            sizes.extend(chunk.sizes)
+            last_modified.extend(chunk.last_modified)
+        return cls(
+            paths=_StringColumn.concat([chunk._paths for chunk in chunks]),  # noqa: SLF001
+            sizes=sizes,
+            last_modified=last_modified,
+            e_tags=_StringColumn.concat([chunk._e_tags for chunk in chunks]),  # noqa: SLF001
+            versions=_StringColumn.concat([chunk._versions for chunk in chunks]),  # noqa: SLF001
+        )
+
+    def to_metas(self) -> list[ObjectMeta]:
+        """Convert the columns to a list of `ObjectMeta` dicts."""
+        return [self[i] for i in range(len(self))]
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    @overload
+    def __getitem__(self, index: int) -> ObjectMeta: ...
+    @overload
+    def __getitem__(self, index: slice) -> ObjectMetaColumns: ...
+    def __getitem__(self, index: int | slice) -> ObjectMeta | ObjectMetaColumns:
+        if isinstance(index, slice):
+            return self.take(range(len(self))[index])
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            msg = f"Index {index} out of range for {len(self)} objects."
+            raise IndexError(msg)
+
+        path = self._paths[index]
+        assert path is not None  # noqa: S101
+        return {
+            "path": path,
+            "last_modified": _EPOCH + self.last_modified[index] * _MICROSECOND,
+            "size": self.sizes[index],
+            "e_tag": self._e_tags[index],
+            "version": self._versions[index],
+        }
+
+    def __repr__(self) -> str:
+        return f"ObjectMetaColumns(<{len(self)} objects>)"
+
+    @property
+    def path_data(self) -> bytes:
+        """The UTF-8 encoded paths of all objects, concatenated."""
+        return self._paths.data
+
+    @property
+    def path_offsets(self) -> array[int]:
+        """The int64 offsets into `path_data` of each path, with one extra offset at
+        the end.
+        """  # noqa: D205
+        return self._paths.offsets
+
+    def paths(self) -> list[str]:
+        """Return the path of every object."""
+        data = self._paths.data
+        offsets = self._paths.offsets
+        if data.isascii():
+            # Byte offsets are also character offsets, so decode only once.
+            text = data.decode()
+            return [text[offsets[i] : offsets[i + 1]] for i in range(len(self))]
+        return [data[offsets[i] : offsets[i + 1]].decode() for i in range(len(self))]
+
+    def take(self, indices: Sequence[int]) -> ObjectMetaColumns:
+        """Return the objects at `indices`, in order, as new columns."""
+        return ObjectMetaColumns(
+            paths=self._paths.take(indices),
+            sizes=array("q", (self.sizes[i] for i in indices)),
+            last_modified=array("q", (self.last_modified[i] for i in indices)),
+            e_tags=self._e_tags.take(indices),
+            versions=self._versions.take(indices),
+        )
+
+    def filter(self, mask: Iterable[Any]) -> ObjectMetaColumns:
+        """Return the objects for which `mask` is truthy, such as a NumPy bool array."""
+        return self.take([i for i, keep in enumerate(mask) if keep])
+
+    def to_numpy(self) -> dict[str, Any]:
+        """Return the columns as NumPy arrays.
+
+        `size` and `last_modified` (as `datetime64[us]`) share memory with these
+        columns. `path`, `e_tag` and `version` are object arrays of `str` or `None`.
+
+        Requires `numpy` to be installed.
+        """
+        import numpy as np  # type: ignore[import-not-found]  # noqa: PLC0415
+
+        return {
+            "path": np.array(self.paths(), dtype=object),
+            "size": np.frombuffer(self.sizes, dtype=np.int64),
+            "last_modified": np.frombuffer(
+                self.last_modified,
+                dtype=np.int64,
+            ).view("datetime64[us]"),
+            "e_tag": np.array(
+                [self._e_tags[i] for i in range(len(self))],
+                dtype=object,
+            ),
+            "version": np.array(
+                [self._versions[i] for i in range(len(self))],
+                dtype=object,
+            ),
+        }
+
+    def to_arrow(self) -> Any:  # noqa: ANN401
+        """Return the columns as a `pyarrow.Table`, without copying.
+
+        Requires `pyarrow` to be installed.
+        """
+        import pyarrow as pa  # type: ignore[import-not-found]  # noqa: PLC0415
+
+        def strings(column: _StringColumn) -> Any:  # noqa: ANN401
+            validity = None
+            null_count = 0
+            if column.nulls is not None:
+                bits = bytearray((len(column.nulls) + 7) // 8)
+                for i, is_null in enumerate(column.nulls):
+                    if is_null:
+                        null_count += 1
+                    else:
+                        bits[i // 8] |= 1 << (i % 8)
+                validity = pa.py_buffer(bits)
+            return pa.Array.from_buffers(
+                pa.large_string(),
+                len(self),
+                [validity, pa.py_buffer(column.offsets), pa.py_buffer(column.data)],
+                null_count=null_count,
+            )
+
+        def int64s(values: array[int], type_: Any) -> Any:  # noqa: ANN401
+            return pa.Array.from_buffers(
+                type_,
+                len(self),
+                [None, pa.py_buffer(values)],
+            )
+
+        return pa.table(
+            {
+                "path": strings(self._paths),
+                "size": int64s(self.sizes, pa.int64()),
+                "last_modified": int64s(self.last_modified, pa.timestamp("us", "UTC")),
+                "e_tag": strings(self._e_tags),
+                "version": strings(self._versions),
+            },
+        )
+
+
+class ListColumnar(Protocol):
+    def list_columnar(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[ObjectMetaColumns]:
+        """List all the objects with the given prefix as columnar chunks.
+
+        Behaves like [`List.list`][obspec.List.list], but each chunk is an
+        [`ObjectMetaColumns`][obspec.listing.ObjectMetaColumns].
+        """
+        ...
+
+
+class ListColumnarAsync(Protocol):
+    def list_columnar_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> AsyncIterator[ObjectMetaColumns]:
+        """List all the objects with the given prefix as columnar chunks.
+
+        Behaves like [`ListAsync.list_async`][obspec.ListAsync.list_async], but each
+        chunk is an [`ObjectMetaColumns`][obspec.listing.ObjectMetaColumns].
+        """
+        ...
+
+
+class _Regrouper:
+    """Regroups a stream of columnar chunks into chunks of `chunk_size` objects."""
+
+    def __init__(self, chunk_size: int) -> None:
+        self.chunk_size = chunk_size
+        self._pending: list[ObjectMetaColumns] = []
+        self._count = 0
+
+    def add(self, chunk: ObjectMetaColumns) -> Iterator[ObjectMetaColumns]:
+        self._pending.append(chunk)
+        self._count += len(chunk)
+        if self._count < self.chunk_size:
+            return
+        merged = self._merge()
+        if self._count == self.chunk_size:
+            self._pending = []
+            self._count = 0
+            yield merged
+            return
+        start = 0
+        while self._count - start >= self.chunk_size:
+            yield merged.take(range(start, start + self.chunk_size))
+            start += self.chunk_size
+        rest = merged.take(range(start, self._count))
+        self._pending = [rest] if len(rest) else []
+        self._count = len(rest)
+
+    def flush(self) -> Iterator[ObjectMetaColumns]:
+        if self._count:
+            yield self._merge()
+        self._pending = []
+        self._count = 0
+
+    def _merge(self) -> ObjectMetaColumns:
+        if len(self._pending) == 1:
+            return self._pending[0]
+        return ObjectMetaColumns.concat(self._pending)
+
+
+class ColumnarLister:
+    """Implement [`ListColumnar`][obspec.listing.ListColumnar] and
+    [`ListColumnarAsync`][obspec.listing.ListColumnarAsync] on top of any
+    [`List`][obspec.List] or [`ListAsync`][obspec.ListAsync] client.
+
+    Chunks from the client are converted and regrouped into chunks of `chunk_size`
+    objects. The client can itself be a
+    [`ParallelLister`][obspec.listing.ParallelLister]. If the client implements
+    [`ListColumnar`][obspec.listing.ListColumnar] (or
+    [`ListColumnarAsync`][obspec.listing.ListColumnarAsync]) itself, as
+    [`MemoryStore`][obspec.store.MemoryStore],
+    [`LocalStore`][obspec.store.LocalStore] and
+    [`ListingIndex`][obspec.listing.ListingIndex] do, its columnar chunks are only
+    regrouped.
+
+    ```py
+    from obspec.listing import ColumnarLister
+
+    lister = ColumnarLister(store)
+    total = sum(sum(chunk.sizes) for chunk in lister.list_columnar("logs"))
+    ```
+    """  # noqa: D205
+
+    def __init__(
+        self,
+        client: ListSource,
+        *,
+        chunk_size: int = DEFAULT_COLUMNAR_CHUNK_SIZE,
+    ) -> None:
+        """Create a new ColumnarLister.
+
+        Args:
+            client: The client to list.
+
+        Keyword Args:
+            chunk_size: The number of objects in each chunk. Defaults to 100,000.
+
+        """
+        if chunk_size < 1:
+            msg = f"chunk_size must be at least 1, got {chunk_size}."
+            raise ValueError(msg)
+
+        self.client = client
+        self.chunk_size = chunk_size
+
+    def list_columnar(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[ObjectMetaColumns]:
+        """List all the objects with the given prefix as columnar chunks.
+
+        Refer to the documentation for [ListColumnar][obspec.listing.ListColumnar].
+        """
+        client: Any = self.client
+        kwargs = {} if offset is None else {"offset": offset}
+        if hasattr(client, "list_columnar"):
+            regrouper = _Regrouper(self.chunk_size)
+            for columns in client.list_columnar(prefix, **kwargs):
+                yield from regrouper.add(columns)
+            yield from regrouper.flush()
+            return
+        if not hasattr(client, "list"):
+            msg = f"{type(client).__name__} does not implement `list`."
+            raise NotSupportedError(msg)
+
+        buffer: list[ObjectMeta] = []
+        for chunk in client.list(prefix, **kwargs):
+            buffer.extend(chunk)
+            while len(buffer) >= self.chunk_size:
+                yield ObjectMetaColumns.from_metas(buffer[: self.chunk_size])
+                del buffer[: self.chunk_size]
+        if buffer:
+            yield ObjectMetaColumns.from_metas(buffer)
+
+    async def list_columnar_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> AsyncIterator[ObjectMetaColumns]:
+        """List all the objects with the given prefix as columnar chunks.
+
+        Refer to the documentation for
+        [ListColumnarAsync][obspec.listing.ListColumnarAsync].
+        """
+        client: Any = self.client
+        kwargs = {} if offset is None else {"offset": offset}
+        if hasattr(client, "list_columnar_async"):
+            regrouper = _Regrouper(self.chunk_size)
+            async for columns in client.list_columnar_async(prefix, **kwargs):
+                for chunk in regrouper.add(columns):
+                    yield chunk
+            for chunk in regrouper.flush():
+                yield chunk
+            return
+        if not hasattr(client, "list_async"):
+            msg = f"{type(client).__name__} does not implement `list_async`."
+            raise NotSupportedError(msg)
+
+        buffer: list[ObjectMeta] = []
+        async for chunk in client.list_async(prefix, **kwargs):
+            buffer.extend(chunk)
+            while len(buffer) >= self.chunk_size:
+                yield ObjectMetaColumns.from_metas(buffer[: self.chunk_size])
+                del buffer[: self.chunk_size]
+        if buffer:
+            yield ObjectMetaColumns.from_metas(buffer)
@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from obspec.exceptions import NotSupportedError
+
+from ._columnar import _EPOCH, _MICROSECOND, ObjectMetaColumns, _to_micros
+
+if TYPE_CHECKING:
+    import os
+    import sys
+    from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+    from types import TracebackType
+
+    from obspec import ListResult, ObjectMeta
+
+    if sys.version_info >= (3, 11):
+        from typing import Self
+    else:
+        from typing_extensions import Self
+
+    from ._parallel import ListSource
+
+INDEX_CHUNK_SIZE = 1000
+"""The number of objects in each chunk yielded from
+[`ListingIndex.list`][obspec.listing.ListingIndex.list]."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_modified INTEGER NOT NULL,
+    e_tag TEXT,
+    version TEXT,
+    generation INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS refreshes (
+    prefix TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _bounds(prefix: str | None) -> tuple[str, str | None]:
+    """Return the half-open range of keys beneath `prefix`, evaluated per segment."""
+    if prefix is None or not prefix.strip("/"):
+        return ("", None)
+    start = prefix.rstrip("/") + "/"
+    # "0" sorts immediately after "/".
+    return (start, start[:-1] + "0")
+
+
+def _row(meta: ObjectMeta, generation: int) -> tuple[Any, ...]:
+    return (
+        meta["path"],
+        meta["size"],
+        _to_micros(meta["last_modified"]),
+        meta["e_tag"],
+        meta["version"],
+        generation,
+    )
+
+
+def _meta(row: tuple[Any, ...]) -> ObjectMeta:
+    path, size, last_modified, e_tag, version = row
+    return {
+        "path": path,
+        "last_modified": _EPOCH + last_modified * _MICROSECOND,
+        "size": size,
+        "e_tag": e_tag,
+        "version": version,
+    }
+
+
+class ListingIndex:
+    """A persistent local index of the objects in a store.
+
+    The index is a SQLite database populated by listing a store with
+    [`refresh`][obspec.listing.ListingIndex.refresh]. It implements
+    [`List`][obspec.List], [`ListWithDelimiter`][obspec.ListWithDelimiter] and their
+    async variants by querying the database, so repeated discovery of the same large
+    prefix does not touch the remote store.
+
+    Refreshes are incremental: refreshing a prefix only replaces that part of the
+    index, and refreshing with an `offset` only adds objects after that key, which
+    suits append-only layouts such as time-ordered logs.
+
+    ```py
+    from obspec.listing import ListingIndex, ParallelLister
+
+    with ListingIndex("bucket-index.sqlite") as index:
+        if index.refreshed_at("datasets") is None:
+            index.refresh(ParallelLister(store), "datasets")
+        partitions = index.list_with_delimiter("datasets/2024")["common_prefixes"]
+    ```
+
+    The index can be shared between threads, but refreshes of overlapping prefixes
+    should not run concurrently. Listings from the index are consistent with the
+    store as of the last refresh of each prefix.
+    """
+
+    def __init__(self, database: str | os.PathLike[str]) -> None:
+        """Open or create a ListingIndex.
+
+        Args:
+            database: The path of the SQLite database file. Use `":memory:"` for an
+                index that is not persisted.
+
+        """
+        self.database = database
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+    def __repr__(self) -> str:
+        return f"ListingIndex({self.database!r})"
+
+    # Refresh
+
+    def _begin_refresh(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(generation), 0) + 1 FROM objects",
+            ).fetchone()
+        return row[0]
+
+    def _insert(self, chunk: Iterable[ObjectMeta], generation: int) -> int:
+        rows = [_row(meta, generation) for meta in chunk]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def _finish_refresh(
+        self,
+        prefix: str | None,
+        offset: str | None,
+        generation: int,
+    ) -> None:
+        start, end = _bounds(prefix)
+        if offset is not None:
+            start = max(start, offset + "\0")
+        query = "DELETE FROM objects WHERE path >= ? AND generation != ?"
+        params: list[Any] = [start, generation]
+        if end is not None:
+            query += " AND path < ?"
+            params.append(end)
+        with self._lock, self._conn:
+            self._conn.execute(query, params)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO refreshes VALUES (?, ?)",
+                ((prefix or "").strip("/"), time.time()),
+            )
+
+    def refresh(
+        self,
+        client: ListSource,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> int:
+        """Update the index from a listing of `prefix` in `client`.
+
+        Objects under `prefix` (and after `offset`, if given) that are no longer
+        listed are removed from the index; the rest of the index is unchanged.
+
+        Args:
+            client: The client to list, which must implement [`List`][obspec.List].
+                This can be a [`ParallelLister`][obspec.listing.ParallelLister].
+            prefix: The prefix to refresh. Defaults to the whole store.
+
+        Keyword Args:
+            offset: Only list and replace objects with a path greater than `offset`.
+                Pass [`last_path`][obspec.listing.ListingIndex.last_path] to only add
+                objects after the last one already indexed.
+
+        Returns:
+            The number of objects listed.
+
+        """
+        if not hasattr(client, "list"):
+            msg = f"{type(client).__name__} does not implement `list`."
+            raise NotSupportedError(msg)
+
+        generation = self._begin_refresh()
+        kwargs = {} if offset is None else {"offset": offset}
+        n = 0
+        for chunk in client.list(prefix, **kwargs):
+            n += self._insert(chunk, generation)
+        self._finish_refresh(prefix, offset, generation)
+        return n
+
+    async def refresh_async(
+        self,
+        client: ListSource,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> int:
+        """Call `refresh` asynchronously, with a [`ListAsync`][obspec.ListAsync] client.
+
+        Refer to the documentation for
+        [`refresh`][obspec.listing.ListingIndex.refresh].
+        """
+        if not hasattr(client, "list_async"):
+            msg = f"{type(client).__name__} does not implement `list_async`."
+            raise NotSupportedError(msg)
+
+        generation = self._begin_refresh()
+        kwargs = {} if offset is None else {"offset": offset}
+        n = 0
+        async for chunk in client.list_async(prefix, **kwargs):
+            n += self._insert(chunk, generation)
+        self._finish_refresh(prefix, offset, generation)
+        return n
+
+    def refreshed_at(self, prefix: str | None = None) -> float | None:
+        """Return when `prefix` was last refreshed, as a Unix timestamp.
+
+        Only refreshes of exactly this prefix are considered. Returns `None` if the
+        prefix has never been refreshed.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT refreshed_at FROM refreshes WHERE prefix = ?",
+                ((prefix or "").strip("/"),),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def last_path(self, prefix: str | None = None) -> str | None:
+        """Return the greatest indexed path under `prefix`, or `None` if it is empty."""
+        start, end = _bounds(prefix)
+        query = "SELECT MAX(path) FROM objects WHERE path >= ?"
+        params = [start]
+        if end is not None:
+            query += " AND path < ?"
+            params.append(end)
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    # List
+
+    def _list_rows(self, start: str, end: str | None) -> list[tuple[Any, ...]]:
+        query = (
+            "SELECT path, size, last_modified, e_tag, version FROM objects "
+            "WHERE path >= ?"
+        )
+        params: list[Any] = [start]
+        if end is not None:
+            query += " AND path < ?"
+            params.append(end)
+        query += " ORDER BY path LIMIT ?"
+        params.append(INDEX_CHUNK_SIZE)
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def _list_pages(
+        self,
+        prefix: str | None,
+        offset: str | None,
+    ) -> Iterator[list[tuple[Any, ...]]]:
+        start, end = _bounds(prefix)
+        if offset is not None:
+            start = max(start, offset + "\0")
+        while True:
+            rows = self._list_rows(start, end)
+            if not rows:
+                return
+            yield rows
+            if len(rows) < INDEX_CHUNK_SIZE:
+                return
+            start = rows[-1][0] + "\0"
+
+    def list(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[Sequence[ObjectMeta]]:
+        """List all the indexed objects with the given prefix, ordered by path.
+
+        Refer to the documentation for [List][obspec.List].
+        """
+        for rows in self._list_pages(prefix, offset):
+            yield [_meta(row) for row in rows]
+
+    async def list_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> AsyncIterator[Sequence[ObjectMeta]]:
+        """List all the indexed objects with the given prefix, ordered by path.
+
+        Refer to the documentation for [ListAsync][obspec.ListAsync].
+        """
+        for chunk in self.list(prefix, offset=offset):
+            yield chunk
+
+    def list_columnar(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[ObjectMetaColumns]:
+        """List all the indexed objects with the given prefix as columnar chunks.
+
+        Rows are copied straight into the columns, without building an `ObjectMeta`
+        dict or `datetime` for each object.
+
+        Refer to the documentation for [ListColumnar][obspec.listing.ListColumnar].
+        """
+        for rows in self._list_pages(prefix, offset):
+            paths, sizes, last_modified, e_tags, versions = zip(*rows)
+            yield ObjectMetaColumns.from_columns(
+                paths=paths,
+                sizes=sizes,
+                last_modified=last_modified,
+                e_tags=e_tags,
+                versions=versions,
+            )
+
+    async def list_columnar_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> AsyncIterator[ObjectMetaColumns]:
+        """List all the indexed objects with the given prefix as columnar chunks.
+
+        Refer to the documentation for
+        [ListColumnarAsync][obspec.listing.ListColumnarAsync].
+        """
+        for chunk in self.list_columnar(prefix, offset=offset):
+            yield chunk
+
+    def list_with_delimiter(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """List the indexed objects with the given prefix and a `/` delimiter.
+
+        Each common prefix is skipped with a single indexed lookup, so the cost
+        depends on the number of results rather than the number of objects beneath
+        `prefix`.
+
+        Refer to the documentation for [ListWithDelimiter][obspec.ListWithDelimiter].
+        """
+        start, end = _bounds(prefix)
+        query = (
+            "SELECT path, size, last_modified, e_tag, version FROM objects "
+            "WHERE path >= ?"
+        )
+        if end is not None:
+            query += " AND path < ?"
+        query += " ORDER BY path LIMIT 1"
+
+        common_prefixes: list[str] = []
+        objects: list[ObjectMeta] = []
+        cursor = start
+        with self._lock:
+            while True:
+                params = (cursor, end) if end is not None else (cursor,)
+                row = self._conn.execute(query, params).fetchone()
+                if row is None:
+                    break
+                path = row[0]
+                sep = path.find("/", len(start))
+                if sep == -1:
+                    objects.append(_meta(row))
+                    cursor = path + "\0"
+                else:
+                    common_prefix = path[:sep]
+                    common_prefixes.append(common_prefix)
+                    cursor = common_prefix + "0"
+
+        return {"common_prefixes": common_prefixes, "objects": objects}
+
+    async def list_with_delimiter_async(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """Call `list_with_delimiter` asynchronously.
+
+        Refer to the documentation for [ListWithDelimiter][obspec.ListWithDelimiter].
+        """
+        return self.list_with_delimiter(prefix)
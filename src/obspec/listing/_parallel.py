@@ -0,0 +1,434 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Union
+
+from obspec.exceptions import NotSupportedError
+
+if sys.version_info >= (3, 10):
+    from typing import TypeAlias
+else:
+    from typing_extensions import TypeAlias
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+    from concurrent.futures import Future
+
+    from obspec import ObjectMeta
+    from obspec._list import List, ListAsync
+
+DEFAULT_LIST_CONCURRENCY = 16
+"""The default number of shards listed concurrently."""
+
+DEFAULT_MAX_DEPTH = 3
+"""The default number of levels of common prefixes explored to find shards."""
+
+CHUNK_SIZE = 1000
+"""The number of objects in each chunk yielded by an ordered listing."""
+
+ListSource: TypeAlias = Union["List", "ListAsync"]
+"""A client that a [`ParallelLister`][obspec.listing.ParallelLister] can list.
+
+To list in parallel, the client should also implement
+[`ListWithDelimiter`][obspec.ListWithDelimiter] (for `list`) or
+[`ListWithDelimiterAsync`][obspec.ListWithDelimiterAsync] (for `list_async`), which
+is used to discover shards. Otherwise the listing is not sharded.
+"""
+
+_DONE = object()
+
+
+def _path(meta: ObjectMeta) -> str:
+    return meta["path"]
+
+
+def _filter(objects: Iterable[ObjectMeta], offset: str | None) -> list[ObjectMeta]:
+    if offset is None:
+        return list(objects)
+    return [meta for meta in objects if meta["path"] > offset]
+
+
+def _after(shard: str | None, offset: str | None) -> bool:
+    """Return whether any key beneath `shard` may sort after `offset`."""
+    if shard is None or offset is None:
+        return True
+    return offset < shard + "/" or offset.startswith(shard + "/")
+
+
+def _ordered_units(
+    objects: Sequence[ObjectMeta],
+    shards: Sequence[str | None],
+) -> list[tuple[ObjectMeta | None, str | None]]:
+    """Interleave objects found during discovery with shards in global path order.
+
+    Every key beneath a shard `s` sorts after `s + "/"` and before any key that does
+    not start with it, so sorting shards by `s + "/"` alongside individual objects
+    gives the order in which their contents must be yielded. Each unit is an
+    `(object, None)` or a `(None, shard)` pair.
+    """
+    units: list[tuple[str, ObjectMeta | None, str | None]] = [
+        (meta["path"], meta, None) for meta in objects
+    ]
+    units.extend(
+        ("" if shard is None else shard + "/", None, shard) for shard in shards
+    )
+    units.sort(key=lambda unit: unit[0])
+    return [(meta, shard) for _, meta, shard in units]
+
+
+class _Chunker:
+    """Re-chunks a stream of objects into chunks of `CHUNK_SIZE`."""
+
+    def __init__(self) -> None:
+        self._buffer: list[ObjectMeta] = []
+
+    def add(self, objects: Iterable[ObjectMeta]) -> Iterator[list[ObjectMeta]]:
+        self._buffer.extend(objects)
+        while len(self._buffer) >= CHUNK_SIZE:
+            yield self._buffer[:CHUNK_SIZE]
+            del self._buffer[:CHUNK_SIZE]
+
+    def flush(self) -> Iterator[list[ObjectMeta]]:
+        if self._buffer:
+            yield self._buffer
+            self._buffer = []
+
+
+class ParallelLister:
+    """List a very large prefix as many concurrent listings of smaller prefixes.
+
+    `list` is a single sequential stream of pages. This lister first explores the
+    prefix with `list_with_delimiter`, breadth-first, until it has found at least
+    `min_shards` common prefixes or explored `max_depth` levels. Objects found along
+    the way are returned directly; every common prefix in the last level explored
+    becomes a shard, and all shards are listed concurrently with `list`.
+
+    Synchronous listings use a thread pool; asynchronous listings use the event loop.
+
+    By default chunks are yielded as soon as any shard produces them, in no particular
+    order. With `ordered=True`, objects are yielded sorted by path; each shard is then
+    collected and sorted in memory before it is yielded, and at most `max_concurrency`
+    shards are collected ahead of the one being yielded.
+
+    ```py
+    from obspec.listing import ParallelLister
+
+    lister = ParallelLister(store, max_concurrency=32)
+    total = sum(meta["size"] for chunk in lister.list("logs") for meta in chunk)
+    ```
+    """
+
+    def __init__(
+        self,
+        client: ListSource,
+        *,
+        max_concurrency: int = DEFAULT_LIST_CONCURRENCY,
+        min_shards: int | None = None,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+    ) -> None:
+        """Create a new ParallelLister.
+
+        Args:
+            client: The client to list.
+
+        Keyword Args:
+            max_concurrency: The maximum number of requests in flight at once.
+                Defaults to 16.
+            min_shards: Stop exploring once at least this many shards have been
+                found. Defaults to `4 * max_concurrency`.
+            max_depth: The maximum number of levels of common prefixes to explore.
+                `0` disables sharding. Defaults to 3.
+
+        """
+        if max_concurrency < 1:
+            msg = f"max_concurrency must be at least 1, got {max_concurrency}."
+            raise ValueError(msg)
+        if max_depth < 0:
+            msg = f"max_depth must not be negative, got {max_depth}."
+            raise ValueError(msg)
+
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.min_shards = 4 * max_concurrency if min_shards is None else min_shards
+        self.max_depth = max_depth
+
+    def _discover(
+        self,
+        prefix: str | None,
+        offset: str | None,
+        executor: ThreadPoolExecutor,
+    ) -> tuple[list[ObjectMeta], list[str | None]]:
+        client: Any = self.client
+        frontier: list[str | None] = [prefix]
+        if not hasattr(client, "list_with_delimiter"):
+            return [], frontier
+
+        objects: list[ObjectMeta] = []
+        for _ in range(self.max_depth):
+            results = list(executor.map(client.list_with_delimiter, frontier))
+            frontier = []
+            for result in results:
+                objects.extend(_filter(result["objects"], offset))
+                frontier.extend(
+                    shard
+                    for shard in result["common_prefixes"]
+                    if _after(shard, offset)
+                )
+            if len(frontier) >= self.min_shards:
+                break
+        return objects, frontier
+
+    async def _discover_async(
+        self,
+        prefix: str | None,
+        offset: str | None,
+        semaphore: asyncio.Semaphore,
+    ) -> tuple[list[ObjectMeta], list[str | None]]:
+        client: Any = self.client
+        frontier: list[str | None] = [prefix]
+        if not hasattr(client, "list_with_delimiter_async"):
+            return [], frontier
+
+        async def expand(shard: str | None) -> Any:  # noqa: ANN401
+            async with semaphore:
+                return await client.list_with_delimiter_async(shard)
+
+        objects: list[ObjectMeta] = []
+        for _ in range(self.max_depth):
+            results = await asyncio.gather(*(expand(shard) for shard in frontier))
+            frontier = []
+            for result in results:
+                objects.extend(_filter(result["objects"], offset))
+                frontier.extend(
+                    shard
+                    for shard in result["common_prefixes"]
+                    if _after(shard, offset)
+                )
+            if len(frontier) >= self.min_shards:
+                break
+        return objects, frontier
+
+    def list(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+        ordered: bool = False,
+    ) -> Iterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Refer to the documentation for [List][obspec.List].
+
+        Args:
+            prefix: The prefix to list. Defaults to the whole store.
+
+        Keyword Args:
+            offset: If provided, list all the objects with the given prefix and a
+                location greater than `offset`. Shards that lie entirely before
+                `offset` are skipped, and every other shard is listed from it.
+                Defaults to `None`.
+            ordered: Whether to yield objects sorted by path. Defaults to `False`.
+
+        """
+        if not hasattr(self.client, "list"):
+            msg = f"{type(self.client).__name__} does not implement `list`."
+            raise NotSupportedError(msg)
+
+        executor = ThreadPoolExecutor(self.max_concurrency)
+        try:
+            objects, shards = self._discover(prefix, offset, executor)
+            if ordered:
+                yield from self._list_ordered(objects, shards, offset, executor)
+            else:
+                if objects:
+                    yield objects
+                yield from self._list_unordered(shards, offset, executor)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _list_ordered(
+        self,
+        objects: Sequence[ObjectMeta],
+        shards: Sequence[str | None],
+        offset: str | None,
+        executor: ThreadPoolExecutor,
+    ) -> Iterator[Sequence[ObjectMeta]]:
+        client: Any = self.client
+
+        def collect(shard: str | None) -> list[ObjectMeta]:
+            chunks = client.list(shard, offset=offset)
+            return sorted(chain.from_iterable(chunks), key=_path)
+
+        units = _ordered_units(objects, shards)
+        pending = deque(shard for meta, shard in units if meta is None)
+        # Shards are collected at most `max_concurrency` ahead of the one being
+        # yielded, so a slow consumer does not hold the whole listing in memory.
+        window: deque[Future[list[ObjectMeta]]] = deque()
+
+        def fill() -> None:
+            while pending and len(window) < self.max_concurrency:
+                window.append(executor.submit(collect, pending.popleft()))
+
+        fill()
+        chunker = _Chunker()
+        for meta, _ in units:
+            if meta is None:
+                shard_objects = window.popleft().result()
+                fill()
+                yield from chunker.add(shard_objects)
+            else:
+                yield from chunker.add([meta])
+        yield from chunker.flush()
+
+    def _list_unordered(  # noqa: C901
+        self,
+        shards: Sequence[str | None],
+        offset: str | None,
+        executor: ThreadPoolExecutor,
+    ) -> Iterator[Sequence[ObjectMeta]]:
+        client: Any = self.client
+        results: queue.Queue[Any] = queue.Queue(maxsize=2 * self.max_concurrency)
+        stop = threading.Event()
+
+        def put(item: object) -> bool:
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                except queue.Full:
+                    continue
+                return True
+            return False
+
+        def work(shard: str | None) -> None:
+            try:
+                for chunk in client.list(shard, offset=offset):
+                    if not put(chunk):
+                        return
+            except Exception as e:  # noqa: BLE001
+                put(e)
+            put(_DONE)
+
+        for shard in shards:
+            executor.submit(work, shard)
+
+        try:
+            remaining = len(shards)
+            while remaining:
+                item = results.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            # Unblock workers if the caller stopped iterating early.
+            stop.set()
+
+    async def list_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+        ordered: bool = False,
+    ) -> AsyncIterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Refer to the documentation for [`list`][obspec.listing.ParallelLister.list].
+        """
+        if not hasattr(self.client, "list_async"):
+            msg = f"{type(self.client).__name__} does not implement `list_async`."
+            raise NotSupportedError(msg)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        objects, shards = await self._discover_async(prefix, offset, semaphore)
+        if ordered:
+            chunks = self._list_ordered_async(objects, shards, offset, semaphore)
+        else:
+            if objects:
+                yield objects
+            chunks = self._list_unordered_async(shards, offset, semaphore)
+        async for chunk in chunks:
+            yield chunk
+
+    async def _list_ordered_async(  # noqa: C901
+        self,
+        objects: Sequence[ObjectMeta],
+        shards: Sequence[str | None],
+        offset: str | None,
+        semaphore: asyncio.Semaphore,
+    ) -> AsyncIterator[Sequence[ObjectMeta]]:
+        client: Any = self.client
+
+        async def collect(shard: str | None) -> list[ObjectMeta]:
+            async with semaphore:
+                out: list[ObjectMeta] = []
+                async for chunk in client.list_async(shard, offset=offset):
+                    out.extend(chunk)
+            out.sort(key=_path)
+            return out
+
+        units = _ordered_units(objects, shards)
+        pending = deque(shard for meta, shard in units if meta is None)
+        window: deque[asyncio.Future[list[ObjectMeta]]] = deque()
+
+        def fill() -> None:
+            while pending and len(window) < self.max_concurrency:
+                window.append(asyncio.ensure_future(collect(pending.popleft())))
+
+        try:
+            fill()
+            chunker = _Chunker()
+            for meta, _ in units:
+                if meta is None:
+                    shard_objects = await window.popleft()
+                    fill()
+                    for chunk in chunker.add(shard_objects):
+                        yield chunk
+                else:
+                    for chunk in chunker.add([meta]):
+                        yield chunk
+            for chunk in chunker.flush():
+                yield chunk
+        finally:
+            for task in window:
+                task.cancel()
+
+    async def _list_unordered_async(
+        self,
+        shards: Sequence[str | None],
+        offset: str | None,
+        semaphore: asyncio.Semaphore,
+    ) -> AsyncIterator[Sequence[ObjectMeta]]:
+        client: Any = self.client
+        results: asyncio.Queue[Any] = asyncio.Queue(maxsize=2 * self.max_concurrency)
+
+        async def work(shard: str | None) -> None:
+            try:
+                async with semaphore:
+                    async for chunk in client.list_async(shard, offset=offset):
+                        await results.put(chunk)
+            except Exception as e:  # noqa: BLE001
+                await results.put(e)
+            await results.put(_DONE)
+
+        tasks = [asyncio.ensure_future(work(shard)) for shard in shards]
+        try:
+            remaining = len(shards)
+            while remaining:
+                item = await results.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
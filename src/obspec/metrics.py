@@ -0,0 +1,646 @@
+"""Per-operation metrics for any obspec store.
+
+[`instrument`][obspec.metrics.instrument] wraps a store so that every call to an obspec
+protocol method, sync or async, reports a [`MetricEvent`][obspec.metrics.MetricEvent]
+to a sink. The wrapper has exactly the methods of the wrapped store, so it can be used
+anywhere the store could be used.
+
+A sink is any callable accepting a `MetricEvent`. The bundled
+[`MetricsRegistry`][obspec.metrics.MetricsRegistry] aggregates events in-process into
+call counts, latency histograms, bytes transferred and errors, and can render them in
+the [OpenMetrics](https://openmetrics.io/) text format.
+
+```py
+from obspec.metrics import MetricsRegistry, instrument
+
+registry = MetricsRegistry()
+store = instrument(store, registry)
+
+store.get_range("data.parquet", start=0, end=8)
+print(registry.snapshot()["get_range"]["count"])
+print(registry.openmetrics())
+```
+
+Exceptions are classified with [`map_exception`][obspec.exceptions.map_exception], so
+an implementation-specific `NotFoundError` is reported under the same name as obspec's.
+"""
+
+from __future__ import annotations
+
+import functools
+import io
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, TypedDict, TypeVar, cast
+
+from .exceptions import map_exception
+
+if TYPE_CHECKING:
+    import sys
+    from collections.abc import AsyncIterator, Iterator, Sequence
+
+    from ._attributes import Attributes
+    from ._meta import ObjectMeta
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+StoreT = TypeVar("StoreT")
+"""The type of the store being instrumented."""
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+"""The default upper bounds, in seconds, of the latency histogram buckets."""
+
+
+class MetricEvent(TypedDict):
+    """One measurement reported to a metrics sink."""
+
+    operation: str
+    """The name of the store method, such as `"get"` or `"put_async"`."""
+
+    seconds: float | None
+    """The latency of the call.
+
+    For `get` and `get_async`, this is the time until the result is returned, not
+    including streaming the body. For `list` and `list_async` it is the time until
+    the listing is exhausted, fails or is closed by the consumer.
+
+    `None` for events that only report bytes streamed through a `GetResult` after the
+    call returned. These should not be counted as calls.
+    """
+
+    bytes: int
+    """The number of bytes transferred."""
+
+    error: str | None
+    """The name of the exception raised, if any, after
+    [`map_exception`][obspec.exceptions.map_exception]."""
+
+
+MetricsSink = Callable[[MetricEvent], None]
+"""A callable that receives every [`MetricEvent`][obspec.metrics.MetricEvent]."""
+
+
+class OperationStats(TypedDict):
+    """Aggregated metrics for one operation."""
+
+    count: int
+    """The number of calls."""
+
+    errors: dict[str, int]
+    """The number of calls that raised, by exception name."""
+
+    bytes: int
+    """The total number of bytes transferred."""
+
+    latency_sum: float
+    """The total latency of all calls, in seconds."""
+
+    latency_buckets: list[tuple[float, int]]
+    """Cumulative histogram of latencies as `(upper_bound, count)` pairs.
+
+    The last bucket has an upper bound of `inf`.
+    """
+
+
+class _Stats:
+    __slots__ = ("bucket_counts", "bytes", "count", "errors", "latency_sum")
+
+    def __init__(self, n_buckets: int) -> None:
+        self.count = 0
+        self.errors: dict[str, int] = {}
+        self.bytes = 0
+        self.latency_sum = 0.0
+        self.bucket_counts = [0] * n_buckets
+
+
+class MetricsRegistry:
+    """An in-process metrics sink aggregating events by operation.
+
+    Pass an instance as the sink to [`instrument`][obspec.metrics.instrument]. It is
+    safe to share one registry between many instrumented stores and threads.
+    """
+
+    def __init__(self, *, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """Create a new MetricsRegistry.
+
+        Keyword Args:
+            buckets: The upper bounds, in seconds, of the latency histogram buckets.
+                An unbounded bucket is always added. Defaults to
+                [`DEFAULT_BUCKETS`][obspec.metrics.DEFAULT_BUCKETS].
+
+        """
+        self.buckets = (*sorted(buckets), float("inf"))
+        self._lock = threading.Lock()
+        self._stats: dict[str, _Stats] = {}
+
+    def __call__(self, event: MetricEvent) -> None:
+        """Record one event."""
+        operation = event["operation"]
+        seconds = event["seconds"]
+        with self._lock:
+            stats = self._stats.get(operation)
+            if stats is None:
+                stats = self._stats[operation] = _Stats(len(self.buckets))
+            stats.bytes += event["bytes"]
+            if seconds is None:
+                return
+            stats.count += 1
+            stats.latency_sum += seconds
+            stats.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+            error = event["error"]
+            if error is not None:
+                stats.errors[error] = stats.errors.get(error, 0) + 1
+
+    def reset(self) -> None:
+        """Discard all recorded metrics."""
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> dict[str, OperationStats]:
+        """Return the aggregated metrics for each operation seen so far."""
+        with self._lock:
+            out: dict[str, OperationStats] = {}
+            for operation, stats in self._stats.items():
+                cumulative = 0
+                buckets = []
+                for bound, count in zip(self.buckets, stats.bucket_counts):
+                    cumulative += count
+                    buckets.append((bound, cumulative))
+                out[operation] = {
+                    "count": stats.count,
+                    "errors": dict(stats.errors),
+                    "bytes": stats.bytes,
+                    "latency_sum": stats.latency_sum,
+                    "latency_buckets": buckets,
+                }
+            return out
+
+    def openmetrics(self, *, prefix: str = "obspec") -> str:
+        """Render the metrics in the OpenMetrics text exposition format.
+
+        Keyword Args:
+            prefix: The prefix of every metric name. Defaults to `"obspec"`.
+
+        """
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {prefix}_operations counter"]
+        lines.extend(
+            f'{prefix}_operations_total{{operation="{op}"}} {stats["count"]}'
+            for op, stats in snapshot.items()
+        )
+        lines.append(f"# TYPE {prefix}_errors counter")
+        lines.extend(
+            f'{prefix}_errors_total{{operation="{op}",error="{error}"}} {count}'
+            for op, stats in snapshot.items()
+            for error, count in sorted(stats["errors"].items())
+        )
+        lines.append(f"# TYPE {prefix}_bytes counter")
+        lines.append(f"# UNIT {prefix}_bytes bytes")
+        lines.extend(
+            f'{prefix}_bytes_total{{operation="{op}"}} {stats["bytes"]}'
+            for op, stats in snapshot.items()
+        )
+        lines.append(f"# TYPE {prefix}_latency_seconds histogram")
+        lines.append(f"# UNIT {prefix}_latency_seconds seconds")
+        for op, stats in snapshot.items():
+            for bound, count in stats["latency_buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f'{prefix}_latency_seconds_bucket{{operation="{op}",le="{le}"}} '
+                    f"{count}",
+                )
+            lines.append(
+                f'{prefix}_latency_seconds_count{{operation="{op}"}} {stats["count"]}',
+            )
+            lines.append(
+                f'{prefix}_latency_seconds_sum{{operation="{op}"}} '
+                f"{stats['latency_sum']}",
+            )
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _error_name(exc: Exception) -> str:
+    return type(map_exception(exc)).__name__
+
+
+def _nbytes(buffer: Buffer) -> int:
+    return memoryview(buffer).nbytes
+
+
+def _input_size(file: Any) -> int | None:  # noqa: ANN401
+    """Return the size of a put input, or `None` if it must be counted as consumed."""
+    if isinstance(file, Path):
+        return file.stat().st_size
+    if hasattr(file, "read"):
+        return _stream_size(file)
+    if hasattr(file, "__aiter__"):
+        return None
+    try:
+        return _nbytes(file)
+    except TypeError:
+        return None
+
+
+def _stream_size(file: Any) -> int | None:  # noqa: ANN401
+    """Return the number of bytes left in a file object, or `None` if it is unknown."""
+    try:
+        return os.fstat(file.fileno()).st_size - file.tell()
+    except (AttributeError, OSError, ValueError):
+        pass
+    try:
+        if not file.seekable():
+            return None
+        position = file.tell()
+        end = file.seek(0, os.SEEK_END)
+        file.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return max(end - position, 0)
+
+
+class _Counter:
+    __slots__ = ("n",)
+
+    def __init__(self) -> None:
+        self.n = 0
+
+
+def _counting(chunks: Any, counter: _Counter) -> Iterator[Buffer]:  # noqa: ANN401
+    for chunk in chunks:
+        counter.n += _nbytes(chunk)
+        yield chunk
+
+
+async def _counting_async(
+    chunks: Any,  # noqa: ANN401
+    counter: _Counter,
+) -> AsyncIterator[Buffer]:
+    async for chunk in chunks:
+        counter.n += _nbytes(chunk)
+        yield chunk
+
+
+class _CountingReader:
+    """Wraps a file object of unknown size, counting bytes as they are read.
+
+    `fileno` is hidden so that the store reads through the wrapper rather than
+    copying from the file descriptor directly.
+    """
+
+    def __init__(self, file: Any, counter: _Counter) -> None:  # noqa: ANN401
+        self._file = file
+        self._counter = counter
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        self._counter.n += len(data)
+        return data
+
+    def readinto(self, buffer: Buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        data = self.read(len(view))
+        view[: len(data)] = data
+        return len(data)
+
+    def fileno(self) -> int:
+        msg = "fileno"
+        raise io.UnsupportedOperation(msg)
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        return getattr(self._file, name)
+
+
+def _wrap_input(file: Any, counter: _Counter) -> Any:  # noqa: ANN401
+    """Wrap a put input of unknown size to count its bytes as they are consumed."""
+    if hasattr(file, "read"):
+        return _CountingReader(file, counter)
+    if hasattr(file, "__aiter__"):
+        return _counting_async(file, counter)
+    return _counting(file, counter)
+
+
+class _InstrumentedGetResult:
+    """Wraps a `GetResult` or `GetResultAsync`, reporting bytes as they are read."""
+
+    def __init__(self, result: Any, operation: str, sink: MetricsSink) -> None:  # noqa: ANN401
+        self._result = result
+        self._operation = operation
+        self._sink = sink
+
+    def _report(self, n: int) -> None:
+        self._sink(
+            {"operation": self._operation, "seconds": None, "bytes": n, "error": None},
+        )
+
+    @property
+    def attributes(self) -> Attributes:
+        return self._result.attributes
+
+    @property
+    def meta(self) -> ObjectMeta:
+        return self._result.meta
+
+    @property
+    def range(self) -> tuple[int, int]:
+        return self._result.range
+
+    def buffer(self) -> Buffer:
+        buffer = self._result.buffer()
+        self._report(_nbytes(buffer))
+        return buffer
+
+    async def buffer_async(self) -> Buffer:
+        buffer = await self._result.buffer_async()
+        self._report(_nbytes(buffer))
+        return buffer
+
+    def __iter__(self) -> Iterator[Buffer]:
+        counter = _Counter()
+        try:
+            yield from _counting(self._result, counter)
+        finally:
+            self._report(counter.n)
+
+    async def __aiter__(self) -> AsyncIterator[Buffer]:
+        counter = _Counter()
+        try:
+            async for chunk in _counting_async(self._result, counter):
+                yield chunk
+        finally:
+            self._report(counter.n)
+
+
+class _Instrumented:
+    """A transparent proxy reporting metrics for every obspec method of a store."""
+
+    def __init__(self, store: Any, sink: MetricsSink) -> None:  # noqa: ANN401
+        self._store = store
+        self._sink = sink
+
+    def __repr__(self) -> str:
+        return f"instrument({self._store!r})"
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        attr = getattr(self._store, name)
+        factory = _WRAPPERS.get(name)
+        if factory is None or not callable(attr):
+            return attr
+
+        wrapped = functools.wraps(attr)(factory(name, attr, self._sink))
+        # Cache on the instance so later lookups bypass __getattr__ entirely.
+        self.__dict__[name] = wrapped
+        return wrapped
+
+
+def _report(
+    sink: MetricsSink,
+    operation: str,
+    start: float,
+    n_bytes: int,
+    error: Exception | None = None,
+) -> None:
+    sink(
+        {
+            "operation": operation,
+            "seconds": time.perf_counter() - start,
+            "bytes": n_bytes,
+            "error": None if error is None else _error_name(error),
+        },
+    )
+
+
+def _call(
+    measure: Callable[[Any], int],
+) -> Callable[[str, Callable[..., Any], MetricsSink], Callable[..., Any]]:
+    def factory(
+        operation: str,
+        fn: Callable[..., Any],
+        sink: MetricsSink,
+    ) -> Callable[..., Any]:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                _report(sink, operation, start, 0, e)
+                raise
+            _report(sink, operation, start, measure(result))
+            return result
+
+        return wrapper
+
+    return factory
+
+
+def _call_async(
+    measure: Callable[[Any], int],
+) -> Callable[[str, Callable[..., Any], MetricsSink], Callable[..., Any]]:
+    def factory(
+        operation: str,
+        fn: Callable[..., Any],
+        sink: MetricsSink,
+    ) -> Callable[..., Any]:
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            start = time.perf_counter()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                _report(sink, operation, start, 0, e)
+                raise
+            _report(sink, operation, start, measure(result))
+            return result
+
+        return wrapper
+
+    return factory
+
+
+def _list(
+    operation: str,
+    fn: Callable[..., Any],
+    sink: MetricsSink,
+) -> Callable[..., Any]:
+    def wrapper(*args: Any, **kwargs: Any) -> Iterator[Any]:  # noqa: ANN401
+        start = time.perf_counter()
+        error = None
+        try:
+            yield from fn(*args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # Also reached when the consumer stops early, which is not an error.
+            _report(sink, operation, start, 0, error)
+
+    return wrapper
+
+
+def _list_async(
+    operation: str,
+    fn: Callable[..., Any],
+    sink: MetricsSink,
+) -> Callable[..., Any]:
+    async def wrapper(*args: Any, **kwargs: Any) -> AsyncIterator[Any]:  # noqa: ANN401
+        start = time.perf_counter()
+        error = None
+        try:
+            async for chunk in fn(*args, **kwargs):
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            _report(sink, operation, start, 0, error)
+
+    return wrapper
+
+
+def _put(
+    operation: str,
+    fn: Callable[..., Any],
+    sink: MetricsSink,
+) -> Callable[..., Any]:
+    def wrapper(path: str, file: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        size = _input_size(file)
+        counter = _Counter()
+        if size is None:
+            file = _wrap_input(file, counter)
+        start = time.perf_counter()
+        try:
+            result = fn(path, file, **kwargs)
+        except Exception as e:
+            _report(sink, operation, start, counter.n, e)
+            raise
+        _report(sink, operation, start, counter.n if size is None else size)
+        return result
+
+    return wrapper
+
+
+def _put_async(
+    operation: str,
+    fn: Callable[..., Any],
+    sink: MetricsSink,
+) -> Callable[..., Any]:
+    async def wrapper(path: str, file: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        size = _input_size(file)
+        counter = _Counter()
+        if size is None:
+            file = _wrap_input(file, counter)
+        start = time.perf_counter()
+        try:
+            result = await fn(path, file, **kwargs)
+        except Exception as e:
+            _report(sink, operation, start, counter.n, e)
+            raise
+        _report(sink, operation, start, counter.n if size is None else size)
+        return result
+
+    return wrapper
+
+
+def _get(
+    operation: str,
+    fn: Callable[..., Any],
+    sink: MetricsSink,
+) -> Callable[..., Any]:
+    inner = _call(lambda _: 0)(operation, fn, sink)
+
+    def wrapper(*args: Any, **kwargs: Any) -> _InstrumentedGetResult:  # noqa: ANN401
+        return _InstrumentedGetResult(inner(*args, **kwargs), operation, sink)
+
+    return wrapper
+
+
+def _get_async(
+    operation: str,
+    fn: Callable[..., Any],
+    sink: MetricsSink,
+) -> Callable[..., Any]:
+    inner = _call_async(lambda _: 0)(operation, fn, sink)
+
+    async def wrapper(*args: Any, **kwargs: Any) -> _InstrumentedGetResult:  # noqa: ANN401
+        return _InstrumentedGetResult(await inner(*args, **kwargs), operation, sink)
+
+    return wrapper
+
+
+def _no_bytes(_: object) -> int:
+    return 0
+
+
+def _sum_bytes(buffers: Sequence[Buffer]) -> int:
+    return sum(_nbytes(buffer) for buffer in buffers)
+
+
+_WRAPPERS: dict[
+    str,
+    Callable[[str, Callable[..., Any], MetricsSink], Callable[..., Any]],
+] = {
+    "get": _get,
+    "get_async": _get_async,
+    "get_range": _call(_nbytes),
+    "get_range_async": _call_async(_nbytes),
+    "get_ranges": _call(_sum_bytes),
+    "get_ranges_async": _call_async(_sum_bytes),
+    "head": _call(_no_bytes),
+    "head_async": _call_async(_no_bytes),
+    "list": _list,
+    "list_async": _list_async,
+    "list_with_delimiter": _call(_no_bytes),
+    "list_with_delimiter_async": _call_async(_no_bytes),
+    "put": _put,
+    "put_async": _put_async,
+    "copy": _call(_no_bytes),
+    "copy_async": _call_async(_no_bytes),
+    "rename": _call(_no_bytes),
+    "rename_async": _call_async(_no_bytes),
+    "delete": _call(_no_bytes),
+    "delete_async": _call_async(_no_bytes),
+}
+
+
+def instrument(store: StoreT, sink: MetricsSink) -> StoreT:
+    """Wrap a store to report metrics for every obspec method call.
+
+    The returned object proxies all attribute access to `store`. Methods of the
+    obspec protocols (`get`, `get_range_async`, `list`, `put`, ...) are wrapped to
+    report a [`MetricEvent`][obspec.metrics.MetricEvent] to `sink` when they complete
+    or raise; anything else is returned unchanged. The wrapper only has the methods
+    that `store` has, so capability checks with `hasattr` behave the same.
+
+    Bytes are counted for reads as buffers are returned, including bytes streamed by
+    iterating over a `GetResult`, and for puts from the size of the input, or as an
+    iterable input is consumed.
+
+    Args:
+        store: The store to instrument.
+        sink: A callable receiving every event, such as a
+            [`MetricsRegistry`][obspec.metrics.MetricsRegistry].
+
+    Returns:
+        A wrapper around `store`, typed as the same type as `store`.
+
+    """
+    return cast("StoreT", _Instrumented(store, sink))
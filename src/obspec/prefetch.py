@@ -0,0 +1,379 @@
+"""Fetching declared future reads ahead of time.
+
+Pipelines often know which byte ranges they will read next, such as the next chunks
+of a Zarr array or the next row groups of a Parquet file. A
+[`Prefetcher`][obspec.prefetch.Prefetcher] takes an ordered list of such hints,
+fetches them in the background within a byte budget and a concurrency limit, and
+serves later reads from the prefetched buffers, hiding the latency of a remote store
+behind compute.
+
+```py
+from obspec.prefetch import Prefetcher
+
+async with Prefetcher(store, max_bytes=512 * 2**20) as prefetcher:
+    prefetcher.schedule([(path, chunk.start, chunk.end) for chunk in chunks])
+    for chunk in chunks:
+        data = await prefetcher.get_range_async(path, start=chunk.start, end=chunk.end)
+        process(data)
+```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from typing import TYPE_CHECKING, Any, TypedDict, Union
+
+from ._util import as_memoryview, fetch_range_async, resolve_end, resolve_ends
+from .ranges import DEFAULT_MAX_CONCURRENCY, DEFAULT_MAX_GAP, DEFAULT_PART_SIZE
+
+if sys.version_info >= (3, 10):
+    from typing import TypeAlias
+else:
+    from typing_extensions import TypeAlias
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    if sys.version_info >= (3, 11):
+        from typing import Self
+    else:
+        from typing_extensions import Self
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+    from ._get import GetAsync, GetRangeAsync
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+"""The default maximum number of bytes prefetched and not yet read."""
+
+PrefetchSource: TypeAlias = Union["GetRangeAsync", "GetAsync"]
+"""A client that can be wrapped by a [`Prefetcher`][obspec.prefetch.Prefetcher]."""
+
+Hint: TypeAlias = "tuple[str, int, int]"
+"""A declared future read: the `path`, `start` and exclusive `end` of a byte range."""
+
+
+class PrefetchStats(TypedDict):
+    """Counters describing the effectiveness of a
+    [`Prefetcher`][obspec.prefetch.Prefetcher].
+    """  # noqa: D205
+
+    hits: int
+    """The number of reads served by a prefetch, whether complete or in flight."""
+
+    misses: int
+    """The number of reads not covered by a scheduled hint."""
+
+    requests: int
+    """The number of prefetch requests made to the underlying client."""
+
+    cancelled: int
+    """The number of prefetches dropped before all of their hints were read."""
+
+    wasted_bytes: int
+    """The number of bytes requested by prefetches that were dropped."""
+
+
+class _Span:
+    """A run of coalesced hints, fetched with one request."""
+
+    __slots__ = ("end", "hints", "path", "readers", "start", "task")
+
+    def __init__(self, path: str, start: int, end: int) -> None:
+        self.path = path
+        self.start = start
+        self.end = end
+        self.hints = [(start, end)]
+        """The hints not read yet."""
+        self.readers = 0
+        """The number of reads waiting for the span."""
+        self.task: asyncio.Future[Buffer] | None = None
+
+
+def _plan(
+    hints: Iterable[Hint],
+    max_gap: int,
+    max_size: int | None,
+) -> list[_Span]:
+    """Coalesce consecutive hints for nearby ranges of the same object."""
+    spans: list[_Span] = []
+    for path, start, end in hints:
+        if start < 0 or end <= start:
+            msg = f"Hint ({path!r}, {start}, {end}) is negative or zero-length."
+            raise ValueError(msg)
+        if spans:
+            last = spans[-1]
+            merged_end = max(last.end, end)
+            if (
+                last.path == path
+                and last.start <= start
+                and start - last.end <= max_gap
+                and (max_size is None or merged_end - last.start <= max_size)
+            ):
+                last.end = merged_end
+                last.hints.append((start, end))
+                continue
+        spans.append(_Span(path, start, end))
+    return spans
+
+
+class Prefetcher:
+    """Fetch declared future reads ahead of consumption.
+
+    [`schedule`][obspec.prefetch.Prefetcher.schedule] takes hints in the order they
+    will be read. Consecutive hints for ranges of the same object at most `max_gap`
+    bytes apart are coalesced into one request of up to `max_size` bytes. Requests
+    are then started in order, with at most `max_concurrency` in flight and at most
+    `max_bytes` prefetched and not yet read.
+
+    [`get_range_async`][obspec.prefetch.Prefetcher.get_range_async] serves a read
+    contained in a scheduled hint from its prefetch, waiting for it if it is still in
+    flight, or starting it at once if it has not started yet. Other reads are passed
+    through to the client.
+
+    Hints are expected to be read roughly in order. A prefetch is released once each
+    of its hints has been read, and when a read is served by a prefetch, earlier
+    prefetches are treated as stale and dropped, unless a read of them is in
+    progress. Dropped prefetches that are still in flight are cancelled.
+
+    A Prefetcher must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        client: PrefetchSource,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_gap: int = DEFAULT_MAX_GAP,
+        max_size: int | None = DEFAULT_PART_SIZE,
+    ) -> None:
+        """Create a new Prefetcher.
+
+        Args:
+            client: The underlying client. Ranges are fetched with
+                `get_range_async` if available, falling back to `get_async` with a
+                `range` option.
+
+        Keyword Args:
+            max_bytes: The maximum number of bytes prefetched and not yet read. A
+                single prefetch larger than this is still made when no other bytes
+                are held. Defaults to 256 MiB.
+            max_concurrency: The maximum number of prefetch requests in flight at
+                once. Defaults to 10.
+            max_gap: The largest gap, in bytes, between two consecutive hints that
+                will be coalesced into one request. Defaults to 1 MiB.
+            max_size: If provided, do not coalesce hints into a request larger than
+                this many bytes. Defaults to 8 MiB.
+
+        """
+        if max_bytes < 0:
+            msg = f"max_bytes must be non-negative, got {max_bytes}."
+            raise ValueError(msg)
+        if max_concurrency < 1:
+            msg = f"max_concurrency must be at least 1, got {max_concurrency}."
+            raise ValueError(msg)
+        if max_gap < 0:
+            msg = f"max_gap must be non-negative, got {max_gap}."
+            raise ValueError(msg)
+
+        self.client = client
+        self.max_bytes = max_bytes
+        self.max_concurrency = max_concurrency
+        self.max_gap = max_gap
+        self.max_size = max_size
+        self._spans: list[_Span] = []
+        self._reserved = 0
+        self._in_flight = 0
+        self._tasks: set[asyncio.Future[Buffer]] = set()
+        self._stats: PrefetchStats = {
+            "hits": 0,
+            "misses": 0,
+            "requests": 0,
+            "cancelled": 0,
+            "wasted_bytes": 0,
+        }
+
+    def stats(self) -> PrefetchStats:
+        """Return the prefetcher's counters."""
+        return self._stats.copy()
+
+    def schedule(self, hints: Iterable[Hint], *, replace: bool = True) -> None:
+        """Declare future reads, and start prefetching them.
+
+        Must be called from the event loop the reads are made in.
+
+        Args:
+            hints: `(path, start, end)` byte ranges, in the order they will be read.
+
+        Keyword Args:
+            replace: Whether the hints replace those scheduled before. Prefetches of
+                earlier hints that are not scheduled again are dropped. If `False`,
+                the hints are read after those scheduled before. Defaults to `True`.
+
+        """
+        spans = _plan(hints, self.max_gap, self.max_size)
+        if replace:
+            current = {(span.path, span.start, span.end): span for span in self._spans}
+            for i, span in enumerate(spans):
+                existing = current.pop((span.path, span.start, span.end), None)
+                if existing is not None:
+                    # Keep the prefetch, which may already be in flight.
+                    existing.hints = span.hints
+                    spans[i] = existing
+            for span in current.values():
+                self._drop(span)
+            self._spans = spans
+        else:
+            self._spans.extend(spans)
+        self._pump()
+
+    def cancel(self) -> None:
+        """Drop every scheduled hint, cancelling prefetches in flight."""
+        for span in self._spans:
+            self._drop(span)
+        self._spans = []
+
+    async def __aenter__(self) -> Self:  # noqa: D105
+        return self
+
+    async def __aexit__(self, *args: object) -> None:  # noqa: D105
+        self.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _launch(self, span: _Span) -> None:
+        task = asyncio.ensure_future(
+            fetch_range_async(self.client, span.path, span.start, span.end),
+        )
+        span.task = task
+        self._tasks.add(task)
+        self._reserved += span.end - span.start
+        self._in_flight += 1
+        self._stats["requests"] += 1
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Future[Buffer]) -> None:
+        self._tasks.discard(task)
+        self._in_flight -= 1
+        if not task.cancelled():
+            # Mark the exception as retrieved; a read of the span raises it again.
+            task.exception()
+        self._pump()
+
+    def _pump(self) -> None:
+        """Start prefetches in order, within the concurrency limit and byte budget."""
+        for span in self._spans:
+            if span.task is not None:
+                continue
+            if self._in_flight >= self.max_concurrency:
+                return
+            size = span.end - span.start
+            if self._reserved and self._reserved + size > self.max_bytes:
+                return
+            self._launch(span)
+
+    def _release(self, span: _Span) -> None:
+        if span.task is not None:
+            self._reserved -= span.end - span.start
+
+    def _drop(self, span: _Span) -> None:
+        """Forget a span that is no longer in `_spans`."""
+        self._release(span)
+        if span.hints:
+            self._stats["cancelled"] += 1
+            if span.task is not None:
+                self._stats["wasted_bytes"] += span.end - span.start
+        if span.task is not None and span.readers == 0:
+            span.task.cancel()
+
+    def _find(self, path: str, start: int, end: int) -> int | None:
+        for i, span in enumerate(self._spans):
+            if span.path == path and span.start <= start and end <= span.end:
+                return i
+        return None
+
+    async def get_range_async(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> Buffer:
+        """Return the bytes stored at the specified location in the given byte range.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        end = resolve_end(start, end, length)
+        index = self._find(path, start, end)
+        if index is None:
+            self._stats["misses"] += 1
+            return await fetch_range_async(self.client, path, start, end)
+
+        self._stats["hits"] += 1
+        span = self._spans[index]
+        if index:
+            # The reader has moved past the earlier spans.
+            busy = []
+            for stale in self._spans[:index]:
+                if stale.readers:
+                    busy.append(stale)
+                else:
+                    self._drop(stale)
+            self._spans = busy + self._spans[index:]
+        if span.task is None:
+            self._launch(span)
+        task: Any = span.task
+
+        span.readers += 1
+        try:
+            buffer = as_memoryview(await asyncio.shield(task))
+        except Exception:
+            self._remove(span)
+            raise
+        finally:
+            span.readers -= 1
+
+        offset = start - span.start
+        if offset >= len(buffer):
+            # The range starts past the end of the object; let the client raise.
+            return await fetch_range_async(self.client, path, start, end)
+
+        if (start, end) in span.hints:
+            span.hints.remove((start, end))
+        if not span.hints and not span.readers:
+            self._remove(span)
+        return buffer[offset : end - span.start]
+
+    def _remove(self, span: _Span) -> None:
+        if span in self._spans:
+            self._spans.remove(span)
+            self._release(span)
+            self._pump()
+
+    async def get_ranges_async(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> Sequence[Buffer]:
+        """Return the bytes stored at the specified location in the given byte ranges.
+
+        Each range is read as by `get_range_async`.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        resolved_ends = resolve_ends(starts, ends, lengths)
+        return await asyncio.gather(
+            *(
+                self.get_range_async(path, start=start, end=end)
+                for start, end in zip(starts, resolved_ends)
+            ),
+        )
@@ -0,0 +1,577 @@
+"""Retries, backoff and hedged requests for any obspec store.
+
+[`retrying`][obspec.retry.retrying] wraps a store so that every call to an obspec
+protocol method, sync or async, is retried with exponential backoff and jitter when it
+fails with a transient error, such as a connection error or a timeout. Errors that
+describe the state of the store rather than a failed request, such as
+[`NotFoundError`][obspec.exceptions.NotFoundError] or
+[`PreconditionError`][obspec.exceptions.PreconditionError], and any other exception,
+such as a bug, are raised immediately. Exceptions are classified with
+[`map_exception`][obspec.exceptions.map_exception], so implementation-specific
+exceptions with a well-known name also fail fast.
+
+To cut tail latency, idempotent reads (`get_range` and `head`) can also be hedged: once
+a request has taken longer than a chosen percentile of recent latencies, a second,
+identical request is sent, and whichever completes first is used.
+
+```py
+from obspec.retry import RetryPolicy, retrying
+
+policy = RetryPolicy(max_attempts=5, hedge_percentile=0.95)
+store = retrying(store, policy)
+
+store.get_range("data.parquet", start=0, end=8)
+print(policy.stats())
+```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import random
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, TypedDict, TypeVar, cast
+
+from ._util import is_transient
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Awaitable, Iterator
+    from concurrent.futures import Future
+
+StoreT = TypeVar("StoreT")
+"""The type of the store being wrapped."""
+
+T = TypeVar("T")
+
+_DONE = object()
+
+DEFAULT_MAX_ATTEMPTS = 3
+"""The default number of times a call is attempted before its error is raised."""
+
+DEFAULT_BACKOFF = 0.1
+"""The default maximum delay, in seconds, before the first retry."""
+
+DEFAULT_MAX_BACKOFF = 10.0
+"""The default cap, in seconds, on the delay before any retry."""
+
+DEFAULT_HEDGE_WINDOW = 1000
+"""The default number of recent latencies used to compute the hedging threshold."""
+
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+"""The default number of latencies recorded before requests are hedged."""
+
+
+def is_retryable(exception: Exception) -> bool:
+    """Return whether a failed call should be retried.
+
+    This is the default classifier used by [`RetryPolicy`][obspec.retry.RetryPolicy].
+    Only [`ConnectionError`][]s, [`TimeoutError`][]s and other [`OSError`][]s are
+    retried. Exceptions that [`map_exception`][obspec.exceptions.map_exception] maps
+    to a well-known obspec exception, such as `NotFoundError`, `PreconditionError`,
+    `PermissionDeniedError` or `UnauthenticatedError`, are not, and neither are
+    [`FileNotFoundError`][], [`PermissionError`][] and other `OSError`s describing the
+    local file system. Any other exception, such as an `AttributeError`, is a bug and
+    is not retried either.
+    """
+    return is_transient(exception)
+
+
+class RetryStats(TypedDict):
+    """Counters describing the work done by a [`RetryPolicy`][obspec.retry.RetryPolicy]."""  # noqa: E501
+
+    calls: int
+    """The number of calls made through wrapped stores."""
+
+    retries: int
+    """The number of times a failed call was retried."""
+
+    hedges: int
+    """The number of hedged requests sent."""
+
+    hedge_wins: int
+    """The number of hedged requests that completed before the original request."""
+
+
+class _Latencies:
+    """A sliding window of latencies that answers percentile queries."""
+
+    def __init__(self, size: int) -> None:
+        self._window: deque[float] = deque()
+        self._sorted: list[float] = []
+        self._size = size
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    def add(self, seconds: float) -> None:
+        if len(self._window) == self._size:
+            del self._sorted[bisect_left(self._sorted, self._window.popleft())]
+        self._window.append(seconds)
+        insort(self._sorted, seconds)
+
+    def percentile(self, q: float) -> float:
+        return self._sorted[int(q * (len(self._sorted) - 1))]
+
+
+class RetryPolicy:
+    """How calls through [`retrying`][obspec.retry.retrying] stores are retried and
+    hedged.
+
+    A policy can be shared between several wrapped stores; its counters and latency
+    windows are then shared too.
+    """  # noqa: D205
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff: float = DEFAULT_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        retryable: Callable[[Exception], bool] = is_retryable,
+        hedge_percentile: float | None = None,
+        hedge_min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES,
+        hedge_window: int = DEFAULT_HEDGE_WINDOW,
+    ) -> None:
+        """Create a new RetryPolicy.
+
+        Keyword Args:
+            max_attempts: The number of times a call is attempted. `1` disables
+                retries. Defaults to 3.
+            backoff: The maximum delay, in seconds, before the first retry. The
+                maximum doubles with every further retry, and each delay is drawn
+                uniformly between zero and the maximum ("full jitter"). Defaults to
+                0.1.
+            max_backoff: The cap, in seconds, on the maximum delay. Defaults to 10.
+            retryable: Whether an exception should be retried. Defaults to
+                [`is_retryable`][obspec.retry.is_retryable].
+            hedge_percentile: The percentile of recent latencies, between 0 and 1,
+                after which a `get_range` or `head` request is hedged. For example,
+                `0.95` sends a second request for the slowest 5% of requests. `None`
+                disables hedging. Defaults to `None`.
+            hedge_min_samples: The number of latencies recorded for an operation
+                before its requests are hedged. Defaults to 20.
+            hedge_window: The number of recent latencies of each operation used to
+                compute the percentile. Defaults to 1000.
+
+        """
+        if max_attempts < 1:
+            msg = f"max_attempts must be at least 1, got {max_attempts}."
+            raise ValueError(msg)
+        if backoff < 0 or max_backoff < 0:
+            msg = "backoff and max_backoff must not be negative."
+            raise ValueError(msg)
+        if hedge_percentile is not None and not 0 <= hedge_percentile <= 1:
+            msg = f"hedge_percentile must be between 0 and 1, got {hedge_percentile}."
+            raise ValueError(msg)
+        if hedge_window < 1:
+            msg = f"hedge_window must be at least 1, got {hedge_window}."
+            raise ValueError(msg)
+
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retryable = retryable
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = max(hedge_min_samples, 1)
+        self.hedge_window = hedge_window
+        self._lock = threading.Lock()
+        self._latencies: dict[str, _Latencies] = {}
+        self._stats: RetryStats = {
+            "calls": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+        }
+
+    def stats(self) -> RetryStats:
+        """Return the policy's counters."""
+        with self._lock:
+            return self._stats.copy()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1  # type: ignore[literal-required]
+
+    def _delay(self, attempt: int, error: Exception) -> float:
+        """Return how long to wait before retrying, or re-raise `error`."""
+        if attempt + 1 >= self.max_attempts or not self.retryable(error):
+            raise error
+        self._count("retries")
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))  # noqa: S311
+
+    def _hedge_delay(self, operation: str) -> float | None:
+        """Return how long to wait before hedging `operation`, if it is hedged."""
+        if self.hedge_percentile is None:
+            return None
+        with self._lock:
+            latencies = self._latencies.get(operation)
+            if latencies is None or len(latencies) < self.hedge_min_samples:
+                return None
+            return latencies.percentile(self.hedge_percentile)
+
+    def _record(self, operation: str, seconds: float) -> None:
+        if self.hedge_percentile is None:
+            return
+        with self._lock:
+            latencies = self._latencies.get(operation)
+            if latencies is None:
+                latencies = self._latencies[operation] = _Latencies(self.hedge_window)
+            latencies.add(seconds)
+
+
+def _first_success(futures: list[Future[T]]) -> tuple[T, int]:
+    """Return the first successful result and its index, or raise the first error."""
+    pending = set(futures)
+    error: BaseException | None = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in futures:
+            if future not in done:
+                continue
+            exc = future.exception()
+            if exc is None:
+                for other in pending:
+                    other.cancel()
+                return future.result(), futures.index(future)
+            error = error or exc
+    assert error is not None  # noqa: S101
+    raise error
+
+
+async def _first_success_async(tasks: list[asyncio.Task[T]]) -> tuple[T, int]:
+    """Return the first successful result and its index, or raise the first error."""
+    pending = set(tasks)
+    error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in tasks:
+                if task not in done:
+                    continue
+                exc = task.exception()
+                if exc is None:
+                    return task.result(), tasks.index(task)
+                error = error or exc
+    finally:
+        for task in pending:
+            task.cancel()
+    assert error is not None  # noqa: S101
+    raise error
+
+
+def _replayable(file: Any) -> Callable[[], Any] | None:  # noqa: ANN401
+    """Return a function giving `file` ready to be put again, if it can be."""
+    if isinstance(file, (Path, list, tuple)):
+        return lambda: file
+    if hasattr(file, "read"):
+        if not (hasattr(file, "seekable") and file.seekable()):
+            return None
+        position = file.tell()
+
+        def rewind() -> Any:  # noqa: ANN401
+            file.seek(position)
+            return file
+
+        return rewind
+    if hasattr(file, "__aiter__"):
+        return None
+    try:
+        memoryview(file)
+    except TypeError:
+        return None
+    return lambda: file
+
+
+class _Retrying:
+    """A transparent proxy retrying every obspec method of a store."""
+
+    def __init__(self, store: Any, policy: RetryPolicy) -> None:  # noqa: ANN401
+        self._store = store
+        self._policy = policy
+        self._count = policy._count  # noqa: SLF001
+        self._delay = policy._delay  # noqa: SLF001
+        self._hedge_delay = policy._hedge_delay  # noqa: SLF001
+        self._record = policy._record  # noqa: SLF001
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"retrying({self._store!r})"
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        attr = getattr(self._store, name)
+        factory = _WRAPPERS.get(name)
+        if factory is None or not callable(attr):
+            return attr
+
+        wrapped = functools.wraps(attr)(factory(self, name, attr))
+        # Cache on the instance so later lookups bypass __getattr__ entirely.
+        self.__dict__[name] = wrapped
+        return wrapped
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    thread_name_prefix="obspec-hedge",
+                )
+            return self._executor
+
+    def _retry(self, fn: Callable[[], T]) -> T:
+        self._count("calls")
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as e:  # noqa: BLE001, PERF203
+                time.sleep(self._delay(attempt, e))
+                attempt += 1
+
+    async def _retry_async(self, fn: Callable[[], Awaitable[T]]) -> T:
+        self._count("calls")
+        attempt = 0
+        while True:
+            try:
+                return await fn()
+            except Exception as e:  # noqa: BLE001, PERF203
+                await asyncio.sleep(self._delay(attempt, e))
+                attempt += 1
+
+    def _hedged(self, operation: str, fn: Callable[[], T]) -> T:
+        delay = self._hedge_delay(operation)
+        start = time.perf_counter()
+        if delay is None:
+            result = fn()
+        else:
+            pool = self._pool()
+            first = pool.submit(fn)
+            done, _ = wait([first], timeout=delay)
+            if done:
+                result = first.result()
+            else:
+                self._count("hedges")
+                result, index = _first_success([first, pool.submit(fn)])
+                if index:
+                    self._count("hedge_wins")
+        self._record(operation, time.perf_counter() - start)
+        return result
+
+    async def _hedged_async(
+        self,
+        operation: str,
+        fn: Callable[[], Awaitable[T]],
+    ) -> T:
+        delay = self._hedge_delay(operation)
+        start = time.perf_counter()
+        if delay is None:
+            result = await fn()
+        else:
+            first = asyncio.ensure_future(fn())
+            try:
+                done, _ = await asyncio.wait([first], timeout=delay)
+            except BaseException:
+                first.cancel()
+                raise
+            if done:
+                result = first.result()
+            else:
+                self._count("hedges")
+                second = asyncio.ensure_future(fn())
+                result, index = await _first_success_async([first, second])
+                if index:
+                    self._count("hedge_wins")
+        self._record(operation, time.perf_counter() - start)
+        return result
+
+
+def _call(
+    proxy: _Retrying,
+    operation: str,  # noqa: ARG001
+    fn: Callable[..., Any],
+) -> Callable[..., Any]:
+    def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        return proxy._retry(lambda: fn(*args, **kwargs))  # noqa: SLF001
+
+    return wrapper
+
+
+def _call_async(
+    proxy: _Retrying,
+    operation: str,  # noqa: ARG001
+    fn: Callable[..., Any],
+) -> Callable[..., Any]:
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        return await proxy._retry_async(lambda: fn(*args, **kwargs))  # noqa: SLF001
+
+    return wrapper
+
+
+def _hedged(
+    proxy: _Retrying,
+    operation: str,
+    fn: Callable[..., Any],
+) -> Callable[..., Any]:
+    def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        return proxy._retry(  # noqa: SLF001
+            lambda: proxy._hedged(operation, lambda: fn(*args, **kwargs)),  # noqa: SLF001
+        )
+
+    return wrapper
+
+
+def _hedged_async(
+    proxy: _Retrying,
+    operation: str,
+    fn: Callable[..., Any],
+) -> Callable[..., Any]:
+    operation = operation.removesuffix("_async")
+
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        return await proxy._retry_async(  # noqa: SLF001
+            lambda: proxy._hedged_async(operation, lambda: fn(*args, **kwargs)),  # noqa: SLF001
+        )
+
+    return wrapper
+
+
+def _list(
+    proxy: _Retrying,
+    operation: str,  # noqa: ARG001
+    fn: Callable[..., Any],
+) -> Callable[..., Any]:
+    def wrapper(*args: Any, **kwargs: Any) -> Iterator[Any]:  # noqa: ANN401
+        # Only failures before the first chunk are retried, as chunks already
+        # yielded cannot be taken back.
+        def first() -> tuple[Iterator[Any], Any]:
+            it = iter(fn(*args, **kwargs))
+            return it, next(it, _DONE)
+
+        it, chunk = proxy._retry(first)  # noqa: SLF001
+        if chunk is _DONE:
+            return
+        yield chunk
+        yield from it
+
+    return wrapper
+
+
+def _list_async(
+    proxy: _Retrying,
+    operation: str,  # noqa: ARG001
+    fn: Callable[..., Any],
+) -> Callable[..., Any]:
+    async def wrapper(*args: Any, **kwargs: Any) -> AsyncIterator[Any]:  # noqa: ANN401
+        async def first() -> tuple[AsyncIterator[Any], Any]:
+            it = fn(*args, **kwargs).__aiter__()
+            try:
+                return it, await it.__anext__()
+            except StopAsyncIteration:
+                return it, _DONE
+
+        it, chunk = await proxy._retry_async(first)  # noqa: SLF001
+        if chunk is _DONE:
+            return
+        yield chunk
+        async for chunk in it:
+            yield chunk
+
+    return wrapper
+
+
+def _put(
+    proxy: _Retrying,
+    operation: str,  # noqa: ARG001
+    fn: Callable[..., Any],
+) -> Callable[..., Any]:
+    def wrapper(path: str, file: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        replay = _replayable(file)
+        if replay is None:
+            proxy._count("calls")  # noqa: SLF001
+            return fn(path, file, **kwargs)
+        return proxy._retry(lambda: fn(path, replay(), **kwargs))  # noqa: SLF001
+
+    return wrapper
+
+
+def _put_async(
+    proxy: _Retrying,
+    operation: str,  # noqa: ARG001
+    fn: Callable[..., Any],
+) -> Callable[..., Any]:
+    async def wrapper(path: str, file: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        replay = _replayable(file)
+        if replay is None:
+            proxy._count("calls")  # noqa: SLF001
+            return await fn(path, file, **kwargs)
+        return await proxy._retry_async(lambda: fn(path, replay(), **kwargs))  # noqa: SLF001
+
+    return wrapper
+
+
+_WRAPPERS: dict[
+    str,
+    Callable[[_Retrying, str, Callable[..., Any]], Callable[..., Any]],
+] = {
+    "get": _call,
+    "get_async": _call_async,
+    "get_range": _hedged,
+    "get_range_async": _hedged_async,
+    "get_ranges": _call,
+    "get_ranges_async": _call_async,
+    "head": _hedged,
+    "head_async": _hedged_async,
+    "list": _list,
+    "list_async": _list_async,
+    "list_with_delimiter": _call,
+    "list_with_delimiter_async": _call_async,
+    "put": _put,
+    "put_async": _put_async,
+    "copy": _call,
+    "copy_async": _call_async,
+    "rename": _call,
+    "rename_async": _call_async,
+    "delete": _call,
+    "delete_async": _call_async,
+}
+
+
+def retrying(store: StoreT, policy: RetryPolicy | None = None) -> StoreT:
+    """Wrap a store to retry, and optionally hedge, every obspec method call.
+
+    The returned object proxies all attribute access to `store`. Methods of the
+    obspec protocols are wrapped according to `policy`; anything else is returned
+    unchanged. The wrapper only has the methods that `store` has, so capability
+    checks with `hasattr` behave the same.
+
+    Some calls are only retried when it is safe to repeat them:
+
+    - `get` and `get_async` retry the request, but not reading the returned stream.
+    - `list` and `list_async` retry failures before the first chunk is returned.
+    - `put` and `put_async` retry when `file` can be replayed: a buffer, a `Path`, a
+      list or tuple of buffers, or a seekable file. Iterators are put once.
+    - A retried `rename` or a conditional `put` can fail with `NotFoundError` or
+      `AlreadyExistsError` if the first attempt succeeded but its response was lost.
+
+    Synchronous hedged requests run on a thread pool owned by the wrapper, and a
+    losing request that is already running is left to complete in the background.
+    Asynchronous losing requests are cancelled.
+
+    Args:
+        store: The store to wrap.
+        policy: The retry and hedging policy. Defaults to a new
+            [`RetryPolicy`][obspec.retry.RetryPolicy] with default settings.
+
+    Returns:
+        A wrapper around `store`, typed as the same type as `store`.
+
+    """
+    return cast("StoreT", _Retrying(store, policy or RetryPolicy()))
@@ -0,0 +1,323 @@
+"""De-duplication of concurrent identical reads.
+
+When many threads or tasks read the same hot object at the same moment, such as when a
+fleet of workers starts up, each would otherwise issue its own request.
+[`SingleFlight`][obspec.singleflight.SingleFlight] wraps a client so that identical
+calls made while one is already in flight wait for it and share its result instead.
+
+```py
+import asyncio
+
+from obspec.singleflight import SingleFlight
+
+client = SingleFlight(store)
+# One request is made; all ten tasks receive the same buffer.
+reads = [client.get_range_async("hot.bin", start=0, end=1024) for _ in range(10)]
+await asyncio.gather(*reads)
+```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, Callable, TypedDict, TypeVar, Union
+
+from ._util import BufferResult, resolve_end, resolve_ends
+from .exceptions import NotSupportedError
+
+if sys.version_info >= (3, 10):
+    from typing import TypeAlias
+else:
+    from typing_extensions import TypeAlias
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Hashable, Sequence
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+    from ._get import (
+        Get,
+        GetAsync,
+        GetOptions,
+        GetRange,
+        GetRangeAsync,
+        GetRanges,
+        GetRangesAsync,
+    )
+    from ._head import Head, HeadAsync
+    from ._meta import ObjectMeta
+
+T = TypeVar("T")
+
+SingleFlightSource: TypeAlias = Union[
+    "Get",
+    "GetAsync",
+    "GetRange",
+    "GetRangeAsync",
+    "GetRanges",
+    "GetRangesAsync",
+    "Head",
+    "HeadAsync",
+]
+"""A client that can be wrapped by a [`SingleFlight`][obspec.singleflight.SingleFlight].
+"""
+
+
+class SingleFlightStats(TypedDict):
+    """Counters describing how many calls were de-duplicated."""
+
+    calls: int
+    """The number of calls made to the underlying client."""
+
+    shared: int
+    """The number of calls that received the result of a call already in flight."""
+
+
+def _freeze(value: Any) -> Hashable:  # noqa: ANN401
+    """Convert `GetOptions` values into a hashable key."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class _Call:
+    __slots__ = ("done", "error", "result")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Share one underlying call between concurrent identical reads.
+
+    Calls to `get`, `get_range`, `get_ranges` and `head` (and their async variants)
+    with the same path and the same arguments, made while an identical call is in
+    flight, wait for that call and receive its result rather than making their own
+    request. Calls made after it completes start a new request; nothing is cached.
+
+    Synchronous calls are shared between threads; async calls are shared between
+    tasks on the same event loop. Cancelling one waiting task does not cancel the
+    shared request for the others.
+
+    All callers receive the same buffer object, which should not be mutated. `get`
+    results are read into memory in full so that they can be shared, and returned as
+    results backed by that buffer.
+    """
+
+    def __init__(self, client: SingleFlightSource) -> None:
+        """Create a new SingleFlight.
+
+        Args:
+            client: The underlying client. Each method is available if the client
+                implements the corresponding protocol.
+
+        """
+        self.client = client
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._tasks: dict[tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = {}
+        self._stats: SingleFlightStats = {"calls": 0, "shared": 0}
+
+    def stats(self) -> SingleFlightStats:
+        """Return how many calls have been made and shared so far."""
+        with self._lock:
+            return self._stats.copy()
+
+    def _method(self, name: str) -> Any:  # noqa: ANN401
+        method = getattr(self.client, name, None)
+        if method is None:
+            msg = f"{type(self.client).__name__} does not implement `{name}`."
+            raise NotSupportedError(msg)
+        return method
+
+    def _do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+                self._stats["calls"] += 1
+            else:
+                self._stats["shared"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def _do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = self._tasks[task_key] = asyncio.ensure_future(fn())
+                self._stats["calls"] += 1
+
+                def forget(task: asyncio.Task) -> None:
+                    with self._lock:
+                        self._tasks.pop(task_key, None)
+                    # Mark any exception as retrieved, in case every caller was
+                    # cancelled while waiting.
+                    if not task.cancelled():
+                        task.exception()
+
+                task.add_done_callback(forget)
+            else:
+                self._stats["shared"] += 1
+
+        return await asyncio.shield(task)
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> BufferResult:
+        """Return the bytes that are stored at the specified location.
+
+        Refer to the documentation for [Get][obspec.Get].
+        """
+        get = self._method("get")
+
+        def fetch() -> BufferResult:
+            result = get(path, options=options)
+            return BufferResult(
+                result.buffer(),
+                meta=result.meta,
+                range=result.range,
+                attributes=result.attributes,
+            )
+
+        return self._do(("get", path, _freeze(options or {})), fetch)
+
+    async def get_async(
+        self,
+        path: str,
+        *,
+        options: GetOptions | None = None,
+    ) -> BufferResult:
+        """Call `get` asynchronously.
+
+        Refer to the documentation for [GetAsync][obspec.GetAsync].
+        """
+        get_async = self._method("get_async")
+
+        async def fetch() -> BufferResult:
+            result = await get_async(path, options=options)
+            return BufferResult(
+                await result.buffer_async(),
+                meta=result.meta,
+                range=result.range,
+                attributes=result.attributes,
+            )
+
+        return await self._do_async(("get", path, _freeze(options or {})), fetch)
+
+    def get_range(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> Buffer:
+        """Return the bytes stored at the specified location in the given byte range.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        get_range = self._method("get_range")
+        end = resolve_end(start, end, length)
+        return self._do(
+            ("get_range", path, start, end),
+            lambda: get_range(path, start=start, end=end),
+        )
+
+    async def get_range_async(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> Buffer:
+        """Call `get_range` asynchronously.
+
+        Refer to the documentation for [GetRangeAsync][obspec.GetRangeAsync].
+        """
+        get_range_async = self._method("get_range_async")
+        end = resolve_end(start, end, length)
+        return await self._do_async(
+            ("get_range", path, start, end),
+            lambda: get_range_async(path, start=start, end=end),
+        )
+
+    def get_ranges(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> Sequence[Buffer]:
+        """Return the bytes stored at the specified location in the given byte ranges.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        get_ranges = self._method("get_ranges")
+        resolved_ends = resolve_ends(starts, ends, lengths)
+        return self._do(
+            ("get_ranges", path, tuple(starts), tuple(resolved_ends)),
+            lambda: get_ranges(path, starts=starts, ends=resolved_ends),
+        )
+
+    async def get_ranges_async(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> Sequence[Buffer]:
+        """Call `get_ranges` asynchronously.
+
+        Refer to the documentation for [GetRangesAsync][obspec.GetRangesAsync].
+        """
+        get_ranges_async = self._method("get_ranges_async")
+        resolved_ends = resolve_ends(starts, ends, lengths)
+        return await self._do_async(
+            ("get_ranges", path, tuple(starts), tuple(resolved_ends)),
+            lambda: get_ranges_async(path, starts=starts, ends=resolved_ends),
+        )
+
+    def head(self, path: str) -> ObjectMeta:
+        """Return the metadata for the specified location.
+
+        Refer to the documentation for [Head][obspec.Head].
+        """
+        head = self._method("head")
+        return self._do(("head", path), lambda: head(path))
+
+    async def head_async(self, path: str) -> ObjectMeta:
+        """Call `head` asynchronously.
+
+        Refer to the documentation for [HeadAsync][obspec.HeadAsync].
+        """
+        head_async = self._method("head_async")
+        return await self._do_async(("head", path), lambda: head_async(path))
@@ -0,0 +1,24 @@
+"""Reference implementations of the obspec protocols.
+
+- [`HTTPStore`][obspec.store.HTTPStore] talks to a
+  [`StoreServer`][obspec.testing.server.StoreServer] over HTTP.
+- [`LocalStore`][obspec.store.LocalStore] stores objects in a directory on the local
+  filesystem.
+- [`MemoryStore`][obspec.store.MemoryStore] stores objects in memory.
+- [`TieredStore`][obspec.store.TieredStore] serves hot objects from a fast tier in
+  front of a slow tier, with write-through or write-back writes.
+"""
+
+from ._http import HTTPGetResult, HTTPStore
+from ._local import LocalStore
+from ._memory import MemoryStore
+from ._tiered import TieredStats, TieredStore
+
+__all__ = [
+    "HTTPGetResult",
+    "HTTPStore",
+    "LocalStore",
+    "MemoryStore",
+    "TieredStats",
+    "TieredStore",
+]
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from obspec.exceptions import NotModifiedError, PreconditionError
+
+if TYPE_CHECKING:
+    from obspec import GetOptions, ObjectMeta
+
+DEFAULT_CHUNK_SIZE = 5 * 1024 * 1024
+"""The default `chunk_size` for put requests, matching obstore."""
+
+DEFAULT_MAX_CONCURRENCY = 12
+"""The default `max_concurrency` for put requests, matching obstore."""
+
+LIST_CHUNK_SIZE = 1000
+"""The number of objects in each chunk yielded from `list`."""
+
+
+def e_tag_matches(condition: str, e_tag: str | None) -> bool:
+    """Whether an `If-Match`/`If-None-Match` style condition matches `e_tag`."""
+    if e_tag is None:
+        return False
+
+    for candidate in condition.split(","):
+        tag = candidate.strip()
+        if tag == "*":
+            return True
+        tag = tag.removeprefix("W/").strip('"')
+        if tag == e_tag.strip('"'):
+            return True
+
+    return False
+
+
+def check_preconditions(meta: ObjectMeta, options: GetOptions) -> None:
+    """Raise if the conditional options of a get request are not satisfied.
+
+    Raises:
+        PreconditionError: If `if_match` or `if_unmodified_since` fails.
+        NotModifiedError: If `if_none_match` or `if_modified_since` fails.
+
+    """
+    path = meta["path"]
+    if_match = options.get("if_match")
+    if if_match is not None and not e_tag_matches(if_match, meta["e_tag"]):
+        msg = f"{path}: e_tag {meta['e_tag']!r} does not match {if_match!r}."
+        raise PreconditionError(msg)
+
+    if_none_match = options.get("if_none_match")
+    if if_none_match is not None and e_tag_matches(if_none_match, meta["e_tag"]):
+        msg = f"{path}: e_tag {meta['e_tag']!r} matches {if_none_match!r}."
+        raise NotModifiedError(msg)
+
+    if_unmodified_since = options.get("if_unmodified_since")
+    if if_unmodified_since is not None and meta["last_modified"] > if_unmodified_since:
+        msg = f"{path}: modified at {meta['last_modified']}."
+        raise PreconditionError(msg)
+
+    if_modified_since = options.get("if_modified_since")
+    if if_modified_since is not None and meta["last_modified"] <= if_modified_since:
+        msg = f"{path}: not modified since {if_modified_since}."
+        raise NotModifiedError(msg)
+
+
+def resolve_get_range(options: GetOptions, size: int) -> tuple[int, int]:
+    """Resolve the `range` option of a get request against an object of `size` bytes.
+
+    Returns:
+        The `(start, end)` of the bytes to return.
+
+    """
+    range_ = options.get("range")
+    if range_ is None:
+        return (0, size)
+
+    if isinstance(range_, dict):
+        if "offset" in range_:
+            start = range_["offset"]  # type: ignore[typeddict-item]
+            end = size
+        else:
+            start = max(size - range_["suffix"], 0)
+            end = size
+    else:
+        start, end = range_
+        if end <= start:
+            msg = f"Range ({start}, {end}) is zero-length or negative."
+            raise ValueError(msg)
+        end = min(end, size)
+
+    if start < 0 or (start >= size > 0) or (size == 0 and start > 0):
+        msg = f"Range start {start} is out of bounds for an object of {size} bytes."
+        raise ValueError(msg)
+
+    return (start, end)
+
+
+def check_get_range(start: int, end: int, size: int) -> tuple[int, int]:
+    """Validate a `get_range` request against an object of `size` bytes.
+
+    Returns:
+        The `(start, end)` of the bytes to return, with `end` clamped to `size`.
+
+    """
+    if start == end:
+        msg = f"Range ({start}, {end}) is zero-length."
+        raise ValueError(msg)
+    if start >= size:
+        msg = f"Range start {start} is out of bounds for an object of {size} bytes."
+        raise ValueError(msg)
+    return (start, min(end, size))
@@ -0,0 +1,917 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import http.client
+import json
+import queue
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import IO, TYPE_CHECKING, Any
+from urllib.parse import quote, urlencode, urlsplit
+
+from obspec import exceptions
+from obspec._util import STREAM_CHUNK_SIZE, resolve_ends
+from obspec.exceptions import BaseError
+from obspec.transfer import MultipartUploader
+
+from ._common import DEFAULT_CHUNK_SIZE, DEFAULT_MAX_CONCURRENCY
+
+if TYPE_CHECKING:
+    import ssl
+    import sys
+    from collections.abc import (
+        AsyncIterable,
+        AsyncIterator,
+        Iterable,
+        Iterator,
+        Mapping,
+        Sequence,
+    )
+    from pathlib import Path
+
+    from obspec import (
+        Attributes,
+        GetOptions,
+        ListResult,
+        ObjectMeta,
+        PutMode,
+        PutResult,
+    )
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+ERROR_HEADER = "x-obspec-error"
+"""The response header naming the exception behind an error response."""
+
+VERSION_HEADER = "x-obspec-version"
+"""The header carrying an object's version, in responses and conditional puts."""
+
+LAST_MODIFIED_HEADER = "x-obspec-last-modified"
+"""The response header carrying an object's full-precision ISO 8601 timestamp."""
+
+ATTRIBUTES_HEADER = "x-obspec-attributes"
+"""The header carrying an object's attributes as JSON."""
+
+TAGS_HEADER = "x-obspec-tags"
+"""The request header carrying an object's tags as JSON."""
+
+LIST_PAGE_SIZE = 1000
+"""The number of objects requested per page when listing."""
+
+ERROR_STATUS = {
+    "NotModifiedError": 304,
+    "InvalidPathError": 400,
+    "ValueError": 400,
+    "UnauthenticatedError": 401,
+    "PermissionDeniedError": 403,
+    "NotFoundError": 404,
+    "AlreadyExistsError": 409,
+    "PreconditionError": 412,
+    "InternalError": 500,
+    "NotImplementedError": 501,
+    "NotSupportedError": 501,
+    "SlowDown": 503,
+}
+"""The HTTP status of an error response, by the name in its `x-obspec-error` header.
+
+`InternalError` and `SlowDown` are transient server errors, which the client raises
+as [`ConnectionError`][]s.
+"""
+
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE"})
+
+
+def format_http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def meta_to_json(meta: ObjectMeta) -> dict[str, Any]:
+    return {**meta, "last_modified": meta["last_modified"].isoformat()}
+
+
+def meta_from_json(data: dict[str, Any]) -> ObjectMeta:
+    return {
+        "path": data["path"],
+        "last_modified": datetime.fromisoformat(data["last_modified"]),
+        "size": data["size"],
+        "e_tag": data.get("e_tag"),
+        "version": data.get("version"),
+    }
+
+
+def _raise_for_status(response: http.client.HTTPResponse, body: bytes) -> None:
+    if response.status < 300:  # noqa: PLR2004
+        return
+    name = response.getheader(ERROR_HEADER, "")
+    try:
+        message = json.loads(body)["message"] if body else name
+    except (ValueError, KeyError):
+        message = body.decode(errors="replace")
+    message = f"{response.status} {response.reason}: {message}"
+
+    error = getattr(exceptions, name, None)
+    if isinstance(error, type) and issubclass(error, BaseError):
+        raise error(message)
+    if name == "ValueError":
+        raise ValueError(message)
+    if response.status >= 500:  # noqa: PLR2004
+        raise ConnectionError(message)
+    raise BaseError(message)
+
+
+class _Response:
+    """A response whose connection returns to the pool once its body is read."""
+
+    def __init__(
+        self,
+        store: HTTPStore,
+        connection: http.client.HTTPConnection,
+        response: http.client.HTTPResponse,
+    ) -> None:
+        self._store = store
+        self._connection: http.client.HTTPConnection | None = connection
+        self.response = response
+        self.body = b""
+
+    def read(self, n: int = -1) -> bytes:
+        data = self.response.read(n if n >= 0 else None)
+        if self._connection is not None and self.response.isclosed():
+            self._store._release(self._connection)  # noqa: SLF001
+            self._connection = None
+        return data
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class HTTPGetResult:
+    """The result of a get request to an [`HTTPStore`][obspec.store.HTTPStore].
+
+    The body is streamed from the open response as it is iterated. Once `buffer` has
+    been called, the body is kept in memory and iterating yields slices of it.
+    """
+
+    def __init__(
+        self,
+        response: _Response,
+        *,
+        meta: ObjectMeta,
+        range: tuple[int, int],  # noqa: A002
+        attributes: Attributes,
+    ) -> None:
+        """Create a new HTTPGetResult."""
+        self._response = response
+        self._meta = meta
+        self._range = range
+        self._attributes = attributes
+        self._buffer: memoryview | None = None
+
+    @property
+    def attributes(self) -> Attributes:
+        """Refer to the documentation for [GetResult][obspec.GetResult]."""
+        return self._attributes
+
+    @property
+    def meta(self) -> ObjectMeta:
+        """Refer to the documentation for [GetResult][obspec.GetResult]."""
+        return self._meta
+
+    @property
+    def range(self) -> tuple[int, int]:
+        """Refer to the documentation for [GetResult][obspec.GetResult]."""
+        return self._range
+
+    def buffer(self) -> memoryview:
+        """Refer to the documentation for [GetResult][obspec.GetResult]."""
+        if self._buffer is None:
+            self._buffer = memoryview(self._response.read())
+        return self._buffer
+
+    async def buffer_async(self) -> memoryview:
+        """Refer to the documentation for [GetResultAsync][obspec.GetResultAsync]."""
+        return await asyncio.to_thread(self.buffer)
+
+    def __iter__(self) -> Iterator[memoryview]:
+        if self._buffer is not None:
+            for i in range(0, len(self._buffer), STREAM_CHUNK_SIZE):
+                yield self._buffer[i : i + STREAM_CHUNK_SIZE]
+            return
+        while chunk := self._response.read(STREAM_CHUNK_SIZE):
+            yield memoryview(chunk)
+
+    async def __aiter__(self) -> AsyncIterator[memoryview]:
+        if self._buffer is not None:
+            for part in self:
+                yield part
+            return
+        while chunk := await asyncio.to_thread(self._response.read, STREAM_CHUNK_SIZE):
+            yield memoryview(chunk)
+
+
+class HTTPStore:
+    """An obspec store talking to a
+    [`StoreServer`][obspec.testing.server.StoreServer] over HTTP or HTTPS.
+
+    Implements every obspec protocol, including the async variants, which run the
+    synchronous implementation on a worker thread. Requests reuse keep-alive
+    connections from a pool, and `put` uploads large inputs as parallel multipart
+    parts with a [`MultipartUploader`][obspec.transfer.MultipartUploader].
+
+    `get_ranges` sends one request per range, so coalescing and concurrency
+    strategies, such as [`RangeCoalescer`][obspec.ranges.RangeCoalescer], can be
+    measured on top of it.
+
+    Error responses are raised as the obspec exception named by the server. Transient
+    server errors are raised as [`ConnectionError`][]s, which
+    [`retrying`][obspec.retry.retrying] retries.
+    """  # noqa: D205
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        timeout: float = 60.0,
+        max_connections: int = DEFAULT_MAX_CONCURRENCY,
+        ssl_context: ssl.SSLContext | None = None,
+    ) -> None:
+        """Create a new HTTPStore.
+
+        Args:
+            url: The base URL of the server, such as `http://127.0.0.1:8000`.
+
+        Keyword Args:
+            timeout: The socket timeout, in seconds, of each request. Defaults to 60.
+            max_connections: The number of idle keep-alive connections kept open.
+                Defaults to 12.
+            ssl_context: The SSL context for `https` URLs. Defaults to the system
+                default context.
+
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            msg = f"url must be an http or https URL, got {url!r}."
+            raise ValueError(msg)
+        self.url = url.rstrip("/")
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._base = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._ssl_context = ssl_context
+        self._pool: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue(
+            max_connections,
+        )
+
+    def __repr__(self) -> str:
+        return f"HTTPStore({self.url!r})"
+
+    # Connections
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(
+                self._host,
+                self._port,
+                timeout=self._timeout,
+                context=self._ssl_context,
+            )
+        return http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+
+    def _release(self, connection: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: Buffer | None,
+    ) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        connection = None
+        # A pooled connection may have been closed by the server while idle, and a
+        # request failing on it may or may not have been processed. Only idempotent
+        # requests are sent on one, so that they can be resent. A conditional PUT is
+        # not idempotent: if the first attempt was processed, a resent one would fail
+        # its own precondition.
+        conditional = "If-Match" in headers or "If-None-Match" in headers
+        if method in _IDEMPOTENT_METHODS and not (method == "PUT" and conditional):
+            with contextlib.suppress(queue.Empty):
+                connection = self._pool.get_nowait()
+        if connection is not None:
+            try:
+                connection.request(method, url, body=body, headers=dict(headers))  # type: ignore[arg-type]
+                return connection, connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                # Retry once on a new connection.
+                connection.close()
+        connection = self._connect()
+        try:
+            connection.request(method, url, body=body, headers=dict(headers))  # type: ignore[arg-type]
+            return connection, connection.getresponse()
+        except BaseException:
+            connection.close()
+            raise
+
+    def _request(  # noqa: PLR0913
+        self,
+        method: str,
+        path: str,
+        *,
+        query: Mapping[str, str] | None = None,
+        headers: Mapping[str, str] | None = None,
+        body: Buffer | None = None,
+        stream: bool = False,
+    ) -> _Response:
+        url = f"{self._base}/{quote(path)}"
+        if query:
+            url = f"{url}?{urlencode(query)}"
+        connection, response = self._send(method, url, headers or {}, body)
+        result = _Response(self, connection, response)
+        # A HEAD response has no body, so it is read, and its connection released,
+        # at once.
+        if stream and response.status < 300 and method != "HEAD":  # noqa: PLR2004
+            return result
+        try:
+            result.body = result.read()
+        except BaseException:
+            result.close()
+            raise
+        _raise_for_status(response, result.body)
+        return result
+
+    def _json(self, method: str, path: str, **kwargs: Any) -> Any:  # noqa: ANN401
+        response = self._request(method, path, **kwargs)
+        return json.loads(response.body)
+
+    def _meta(self, path: str, response: http.client.HTTPResponse) -> ObjectMeta:
+        size = response.getheader("Content-Length", "0")
+        content_range = response.getheader("Content-Range")
+        if content_range is not None:
+            size = content_range.rsplit("/", 1)[1]
+        modified = response.getheader(LAST_MODIFIED_HEADER)
+        return {
+            "path": path,
+            "last_modified": datetime.fromisoformat(modified)
+            if modified
+            else parsedate_to_datetime(response.getheader("Last-Modified", "")),
+            "size": int(size),
+            "e_tag": response.getheader("ETag"),
+            "version": response.getheader(VERSION_HEADER),
+        }
+
+    # Get
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> HTTPGetResult:
+        """Return the bytes that are stored at the specified location.
+
+        Refer to the documentation for [Get][obspec.Get].
+        """
+        options = options or {}
+        headers: dict[str, str] = {}
+        range_ = options.get("range")
+        if isinstance(range_, dict):
+            if "offset" in range_:
+                headers["Range"] = f"bytes={range_['offset']}-"  # type: ignore[typeddict-item]
+            else:
+                headers["Range"] = f"bytes=-{range_['suffix']}"  # type: ignore[typeddict-item]
+        elif range_ is not None:
+            start, end = range_
+            headers["Range"] = f"bytes={start}-{end - 1}"
+        for option, header in [
+            ("if_match", "If-Match"),
+            ("if_none_match", "If-None-Match"),
+        ]:
+            if options.get(option) is not None:
+                headers[header] = options[option]  # type: ignore[literal-required]
+        for option, header in [
+            ("if_modified_since", "If-Modified-Since"),
+            ("if_unmodified_since", "If-Unmodified-Since"),
+        ]:
+            if options.get(option) is not None:
+                headers[header] = format_http_date(options[option])  # type: ignore[literal-required]
+        version = options.get("version")
+        query = {"version": version} if version is not None else None
+
+        method = "HEAD" if options.get("head") else "GET"
+        response = self._request(
+            method,
+            path,
+            query=query,
+            headers=headers,
+            stream=True,
+        )
+        meta = self._meta(path, response.response)
+        content_range = response.response.getheader("Content-Range")
+        if content_range is None:
+            resolved = (0, meta["size"])
+        else:
+            first, last = content_range.split(" ", 1)[1].split("/")[0].split("-")
+            resolved = (int(first), int(last) + 1)
+        attributes = json.loads(response.response.getheader(ATTRIBUTES_HEADER, "{}"))
+        return HTTPGetResult(
+            response,
+            meta=meta,
+            range=resolved,
+            attributes=attributes,
+        )
+
+    async def get_async(
+        self,
+        path: str,
+        *,
+        options: GetOptions | None = None,
+    ) -> HTTPGetResult:
+        """Call `get` asynchronously.
+
+        Refer to the documentation for [Get][obspec.Get].
+        """
+        return await asyncio.to_thread(self.get, path, options=options)
+
+    def get_range(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> memoryview:
+        """Return the bytes stored at the specified location in the given byte range.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        if end is None:
+            if length is None:
+                msg = "Either end or length must be provided."
+                raise ValueError(msg)
+            end = start + length
+        response = self._request(
+            "GET",
+            path,
+            headers={"Range": f"bytes={start}-{end - 1}"},
+        )
+        return memoryview(response.body)
+
+    async def get_range_async(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> memoryview:
+        """Call `get_range` asynchronously.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        return await asyncio.to_thread(
+            self.get_range,
+            path,
+            start=start,
+            end=end,
+            length=length,
+        )
+
+    def get_ranges(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> Sequence[memoryview]:
+        """Return the bytes stored at the specified location in the given byte ranges.
+
+        Each range is fetched with its own request.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        resolved_ends = resolve_ends(starts, ends, lengths)
+        return [
+            self.get_range(path, start=start, end=end)
+            for start, end in zip(starts, resolved_ends)
+        ]
+
+    async def get_ranges_async(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> Sequence[memoryview]:
+        """Call `get_ranges` asynchronously.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        return await asyncio.to_thread(
+            self.get_ranges,
+            path,
+            starts=starts,
+            ends=ends,
+            lengths=lengths,
+        )
+
+    # Head
+
+    def head(self, path: str) -> ObjectMeta:
+        """Return the metadata for the specified location.
+
+        Refer to the documentation for [Head][obspec.Head].
+        """
+        return self._meta(path, self._request("HEAD", path).response)
+
+    async def head_async(self, path: str) -> ObjectMeta:
+        """Call `head` asynchronously.
+
+        Refer to the documentation for [Head][obspec.Head].
+        """
+        return await asyncio.to_thread(self.head, path)
+
+    # List
+
+    def list(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Objects are fetched in pages of 1000, in lexicographic order of their paths.
+
+        Refer to the documentation for [List][obspec.List].
+        """
+        while True:
+            query = {"list": "", "max_keys": str(LIST_PAGE_SIZE)}
+            if prefix is not None:
+                query["prefix"] = prefix
+            if offset is not None:
+                query["offset"] = offset
+            page = self._json("GET", "", query=query)["objects"]
+            if not page:
+                return
+            yield [meta_from_json(meta) for meta in page]
+            if len(page) < LIST_PAGE_SIZE:
+                return
+            offset = page[-1]["path"]
+
+    async def list_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> AsyncIterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Refer to the documentation for [ListAsync][obspec.ListAsync].
+        """
+        chunks = self.list(prefix, offset=offset)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    def list_with_delimiter(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """List objects with the given prefix and a `/` delimiter.
+
+        Refer to the documentation for [ListWithDelimiter][obspec.ListWithDelimiter].
+        """
+        query = {"list": "", "delimiter": "/"}
+        if prefix is not None:
+            query["prefix"] = prefix
+        result = self._json("GET", "", query=query)
+        return {
+            "common_prefixes": result["common_prefixes"],
+            "objects": [meta_from_json(meta) for meta in result["objects"]],
+        }
+
+    async def list_with_delimiter_async(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """Call `list_with_delimiter` asynchronously.
+
+        Refer to the documentation for [ListWithDelimiter][obspec.ListWithDelimiter].
+        """
+        return await asyncio.to_thread(self.list_with_delimiter, prefix)
+
+    # Put
+
+    @staticmethod
+    def _put_headers(
+        attributes: Attributes | None,
+        tags: dict[str, str] | None,
+        mode: PutMode | None = None,
+    ) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if attributes:
+            headers[ATTRIBUTES_HEADER] = json.dumps(attributes)
+        if tags:
+            headers[TAGS_HEADER] = json.dumps(tags)
+        if mode == "create":
+            headers["If-None-Match"] = "*"
+        elif isinstance(mode, dict):
+            if mode.get("e_tag") is not None:
+                headers["If-Match"] = mode["e_tag"]  # type: ignore[assignment]
+            if mode.get("version") is not None:
+                headers[VERSION_HEADER] = mode["version"]  # type: ignore[assignment]
+        return headers
+
+    @staticmethod
+    def _put_result(response: _Response) -> PutResult:
+        return {
+            "e_tag": response.response.getheader("ETag"),
+            "version": response.response.getheader(VERSION_HEADER),
+        }
+
+    def put_single(
+        self,
+        path: str,
+        data: memoryview,
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+    ) -> PutResult:
+        """Save `data` to `path` in a single request.
+
+        Refer to the documentation for
+        [PutMultipart][obspec.transfer.PutMultipart].
+        """
+        headers = self._put_headers(attributes, tags, mode)
+        return self._put_result(self._request("PUT", path, headers=headers, body=data))
+
+    async def put_single_async(
+        self,
+        path: str,
+        data: memoryview,
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+    ) -> PutResult:
+        """Call `put_single` asynchronously.
+
+        Refer to the documentation for
+        [PutMultipartAsync][obspec.transfer.PutMultipartAsync].
+        """
+        return await asyncio.to_thread(
+            self.put_single,
+            path,
+            data,
+            attributes=attributes,
+            tags=tags,
+            mode=mode,
+        )
+
+    def create_multipart(
+        self,
+        path: str,
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+    ) -> str:
+        """Start a multipart upload to `path` and return its upload ID.
+
+        Refer to the documentation for
+        [PutMultipart][obspec.transfer.PutMultipart].
+        """
+        headers = self._put_headers(attributes, tags)
+        result = self._json("POST", path, query={"uploads": ""}, headers=headers)
+        return result["upload_id"]
+
+    async def create_multipart_async(
+        self,
+        path: str,
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+    ) -> str:
+        """Call `create_multipart` asynchronously.
+
+        Refer to the documentation for
+        [PutMultipartAsync][obspec.transfer.PutMultipartAsync].
+        """
+        return await asyncio.to_thread(
+            self.create_multipart,
+            path,
+            attributes=attributes,
+            tags=tags,
+        )
+
+    def put_part(
+        self,
+        path: str,
+        upload_id: str,
+        part_number: int,
+        data: memoryview,
+    ) -> str:
+        """Upload one part and return its ETag.
+
+        Refer to the documentation for
+        [PutMultipart][obspec.transfer.PutMultipart].
+        """
+        query = {"upload_id": upload_id, "part_number": str(part_number)}
+        response = self._request("PUT", path, query=query, body=data)
+        return response.response.getheader("ETag", "")
+
+    async def put_part_async(
+        self,
+        path: str,
+        upload_id: str,
+        part_number: int,
+        data: memoryview,
+    ) -> str:
+        """Call `put_part` asynchronously.
+
+        Refer to the documentation for
+        [PutMultipartAsync][obspec.transfer.PutMultipartAsync].
+        """
+        return await asyncio.to_thread(
+            self.put_part,
+            path,
+            upload_id,
+            part_number,
+            data,
+        )
+
+    def complete_multipart(
+        self,
+        path: str,
+        upload_id: str,
+        parts: Sequence[str],
+    ) -> PutResult:
+        """Complete the upload from the ETags of every part, in order.
+
+        Refer to the documentation for
+        [PutMultipart][obspec.transfer.PutMultipart].
+        """
+        body = json.dumps({"parts": list(parts)}).encode()
+        response = self._request(
+            "POST",
+            path,
+            query={"upload_id": upload_id},
+            body=body,
+        )
+        return self._put_result(response)
+
+    async def complete_multipart_async(
+        self,
+        path: str,
+        upload_id: str,
+        parts: Sequence[str],
+    ) -> PutResult:
+        """Call `complete_multipart` asynchronously.
+
+        Refer to the documentation for
+        [PutMultipartAsync][obspec.transfer.PutMultipartAsync].
+        """
+        return await asyncio.to_thread(self.complete_multipart, path, upload_id, parts)
+
+    def abort_multipart(self, path: str, upload_id: str) -> None:
+        """Abort the upload, discarding any parts uploaded so far.
+
+        Refer to the documentation for
+        [PutMultipart][obspec.transfer.PutMultipart].
+        """
+        self._request("DELETE", path, query={"upload_id": upload_id})
+
+    async def abort_multipart_async(self, path: str, upload_id: str) -> None:
+        """Call `abort_multipart` asynchronously.
+
+        Refer to the documentation for
+        [PutMultipartAsync][obspec.transfer.PutMultipartAsync].
+        """
+        await asyncio.to_thread(self.abort_multipart, path, upload_id)
+
+    def put(  # noqa: PLR0913
+        self,
+        path: str,
+        file: IO[bytes] | Path | bytes | Buffer | Iterator[Buffer] | Iterable[Buffer],
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+        use_multipart: bool | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> PutResult:
+        """Save the provided bytes to the specified location.
+
+        Refer to the documentation for [Put][obspec.Put].
+        """
+        return MultipartUploader(self).put(
+            path,
+            file,
+            attributes=attributes,
+            tags=tags,
+            mode=mode,
+            use_multipart=use_multipart,
+            chunk_size=chunk_size,
+            max_concurrency=max_concurrency,
+        )
+
+    async def put_async(  # noqa: PLR0913
+        self,
+        path: str,
+        file: IO[bytes]
+        | Path
+        | bytes
+        | Buffer
+        | AsyncIterator[Buffer]
+        | AsyncIterable[Buffer]
+        | Iterator[Buffer]
+        | Iterable[Buffer],
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+        use_multipart: bool | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> PutResult:
+        """Call `put` asynchronously.
+
+        Refer to the documentation for [PutAsync][obspec.PutAsync].
+        """
+        return await MultipartUploader(self).put_async(
+            path,
+            file,
+            attributes=attributes,
+            tags=tags,
+            mode=mode,
+            use_multipart=use_multipart,
+            chunk_size=chunk_size,
+            max_concurrency=max_concurrency,
+        )
+
+    # Copy, rename and delete
+
+    def copy(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Copy an object from one path to another in the same object store.
+
+        Refer to the documentation for [Copy][obspec.Copy].
+        """
+        query = {"copy_to": to, "overwrite": "true" if overwrite else "false"}
+        self._request("POST", from_, query=query)
+
+    async def copy_async(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Call `copy` asynchronously.
+
+        Refer to the documentation for [Copy][obspec.Copy].
+        """
+        await asyncio.to_thread(self.copy, from_, to, overwrite=overwrite)
+
+    def rename(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Move an object from one path to another in the same object store.
+
+        Refer to the documentation for [Rename][obspec.Rename].
+        """
+        query = {"rename_to": to, "overwrite": "true" if overwrite else "false"}
+        self._request("POST", from_, query=query)
+
+    async def rename_async(
+        self,
+        from_: str,
+        to: str,
+        *,
+        overwrite: bool = True,
+    ) -> None:
+        """Call `rename` asynchronously.
+
+        Refer to the documentation for [Rename][obspec.Rename].
+        """
+        await asyncio.to_thread(self.rename, from_, to, overwrite=overwrite)
+
+    def delete(self, paths: str | Sequence[str]) -> None:
+        """Delete the object at the specified location(s).
+
+        A sequence of paths is deleted with a single bulk request.
+
+        Refer to the documentation for [Delete][obspec.Delete].
+        """
+        if isinstance(paths, str):
+            self._request("DELETE", paths)
+            return
+        body = json.dumps({"paths": list(paths)}).encode()
+        self._request("POST", "", query={"delete": ""}, body=body)
+
+    async def delete_async(self, paths: str | Sequence[str]) -> None:
+        """Call `delete` asynchronously.
+
+        Refer to the documentation for [Delete][obspec.Delete].
+        """
+        await asyncio.to_thread(self.delete, paths)
@@ -0,0 +1,693 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import errno
+import mmap
+import os
+import shutil
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, cast
+
+from obspec._util import BufferResult, as_memoryview, resolve_end, resolve_ends
+from obspec.exceptions import (
+    AlreadyExistsError,
+    InvalidPathError,
+    NotFoundError,
+    NotSupportedError,
+)
+from obspec.listing import ObjectMetaColumns
+
+from ._common import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MAX_CONCURRENCY,
+    LIST_CHUNK_SIZE,
+    check_get_range,
+    check_preconditions,
+    resolve_get_range,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import (
+        AsyncIterable,
+        AsyncIterator,
+        Iterable,
+        Iterator,
+        Sequence,
+    )
+
+    from obspec import (
+        Attributes,
+        GetOptions,
+        ListResult,
+        ObjectMeta,
+        PutMode,
+        PutResult,
+    )
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+_TMP_PREFIX = ".obspec-tmp-"
+"""Prefix of the staging files used for atomic writes, which are hidden from listing.
+"""
+
+_COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _mtime_micros(stat: os.stat_result) -> int:
+    return stat.st_mtime_ns // 1000
+
+
+def _e_tag(stat: os.stat_result) -> str:
+    # The same scheme as the Rust object_store LocalFileSystem.
+    return f"{stat.st_ino:x}-{_mtime_micros(stat):x}-{stat.st_size:x}"
+
+
+def _copy_fd(src: int, dst: int, size: int) -> None:
+    """Copy `size` bytes between file descriptors, in the kernel where possible."""
+    offset = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < size:
+                n = os.copy_file_range(src, dst, min(size - offset, _COPY_CHUNK_SIZE))
+                if n == 0:
+                    break
+                offset += n
+        except OSError as e:
+            if e.errno not in (
+                errno.EXDEV,
+                errno.ENOSYS,
+                errno.EINVAL,
+                errno.EOPNOTSUPP,
+            ):
+                raise
+        else:
+            return
+
+    if sys.platform == "linux":
+        while offset < size:
+            n = os.sendfile(dst, src, offset, min(size - offset, _COPY_CHUNK_SIZE))
+            if n == 0:
+                break
+            offset += n
+        return
+
+    os.lseek(src, offset, os.SEEK_SET)
+    os.lseek(dst, offset, os.SEEK_SET)
+    with os.fdopen(os.dup(src), "rb") as fsrc, os.fdopen(os.dup(dst), "wb") as fdst:
+        shutil.copyfileobj(fsrc, fdst)
+
+
+class LocalStore:
+    """An obspec store backed by a directory on the local filesystem.
+
+    Implements every obspec protocol, including the async variants, which run the
+    synchronous implementation on a worker thread.
+
+    - Reads are served from memory maps of the underlying files, so
+      [`GetResult.buffer`][obspec.GetResult.buffer], iteration over a `GetResult`,
+      `get_range` and `get_ranges` all return zero-copy [`memoryview`][]s.
+    - Writes are atomic: data is staged in a temporary file that is then renamed (or,
+      for `mode="create"`, hard-linked) into place.
+    - Copies use `copy_file_range` or `sendfile` where the platform supports them, so
+      data does not pass through Python.
+
+    Paths use `/` as a separator regardless of platform and may not contain `.` or
+    `..` segments.
+
+    !!! note
+        Objects on a local filesystem have no version, so requests for a specific
+        `version` and [`UpdateVersion`][obspec.UpdateVersion] put modes raise
+        [`NotSupportedError`][obspec.exceptions.NotSupportedError]. Attributes are
+        not stored and tags are ignored.
+    """
+
+    def __init__(self, root: str | os.PathLike[str], *, mkdir: bool = False) -> None:
+        """Create a new LocalStore.
+
+        Args:
+            root: The directory under which all objects are stored.
+
+        Keyword Args:
+            mkdir: If `True`, create `root` if it does not exist. Defaults to `False`.
+
+        """
+        root = Path(root).absolute()
+        if mkdir:
+            root.mkdir(parents=True, exist_ok=True)
+        if not root.is_dir():
+            msg = f"{root} is not a directory."
+            raise NotFoundError(msg)
+
+        self.root = root
+
+    def __repr__(self) -> str:
+        return f"LocalStore({str(self.root)!r})"
+
+    # Paths and metadata
+
+    def _path(self, path: str) -> Path:
+        parts = path.strip("/").split("/")
+        if not path.strip("/") or any(part in ("", ".", "..") for part in parts):
+            msg = f"Invalid path: {path!r}."
+            raise InvalidPathError(msg)
+        if any(part.startswith(_TMP_PREFIX) for part in parts):
+            msg = f"Path segments may not start with {_TMP_PREFIX!r}: {path!r}."
+            raise InvalidPathError(msg)
+        return self.root.joinpath(*parts)
+
+    def _prefix_dir(self, prefix: str | None) -> Path:
+        if prefix is None or not prefix.strip("/"):
+            return self.root
+        return self._path(prefix)
+
+    def _key(self, file: Path) -> str:
+        return file.relative_to(self.root).as_posix()
+
+    def _meta(self, path: str, stat: os.stat_result) -> ObjectMeta:
+        return {
+            "path": path,
+            "last_modified": _EPOCH + timedelta(microseconds=_mtime_micros(stat)),
+            "size": stat.st_size,
+            "e_tag": _e_tag(stat),
+            "version": None,
+        }
+
+    @contextlib.contextmanager
+    def _open(self, path: str) -> Iterator[tuple[IO[bytes], os.stat_result]]:
+        file = self._path(path)
+        try:
+            f = file.open("rb")
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError) as e:
+            msg = f"Object not found: {path!r}."
+            raise NotFoundError(msg) from e
+
+        with f:
+            stat = os.fstat(f.fileno())
+            yield f, stat
+
+    @staticmethod
+    def _map(f: IO[bytes], size: int) -> memoryview:
+        if size == 0:
+            return memoryview(b"")
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    # Get
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> BufferResult:
+        """Return the bytes that are stored at the specified location.
+
+        Refer to the documentation for [Get][obspec.Get].
+        """
+        options = options or {}
+        if options.get("version") is not None:
+            msg = "LocalStore does not support object versions."
+            raise NotSupportedError(msg)
+
+        with self._open(path) as (f, stat):
+            meta = self._meta(path, stat)
+            check_preconditions(meta, options)
+            start, end = resolve_get_range(options, stat.st_size)
+            if options.get("head"):
+                return BufferResult(b"", meta=meta, range=(start, end))
+
+            view = self._map(f, stat.st_size)
+            return BufferResult(view[start:end], meta=meta, range=(start, end))
+
+    async def get_async(
+        self,
+        path: str,
+        *,
+        options: GetOptions | None = None,
+    ) -> BufferResult:
+        """Call `get` asynchronously.
+
+        Refer to the documentation for [Get][obspec.Get].
+        """
+        return await asyncio.to_thread(self.get, path, options=options)
+
+    def get_range(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> memoryview:
+        """Return the bytes stored at the specified location in the given byte range.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        end = resolve_end(start, end, length)
+        with self._open(path) as (f, stat):
+            start, end = check_get_range(start, end, stat.st_size)
+            return self._map(f, stat.st_size)[start:end]
+
+    async def get_range_async(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> memoryview:
+        """Call `get_range` asynchronously.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        return await asyncio.to_thread(
+            self.get_range,
+            path,
+            start=start,
+            end=end,
+            length=length,
+        )
+
+    def get_ranges(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> list[memoryview]:
+        """Return the bytes stored at the specified location in the given byte ranges.
+
+        All ranges are sliced from a single memory map of the file.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        resolved_ends = resolve_ends(starts, ends, lengths)
+        with self._open(path) as (f, stat):
+            ranges = [
+                check_get_range(start, end, stat.st_size)
+                for start, end in zip(starts, resolved_ends)
+            ]
+            view = self._map(f, stat.st_size)
+            return [view[start:end] for start, end in ranges]
+
+    async def get_ranges_async(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> list[memoryview]:
+        """Call `get_ranges` asynchronously.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        return await asyncio.to_thread(
+            self.get_ranges,
+            path,
+            starts=starts,
+            ends=ends,
+            lengths=lengths,
+        )
+
+    # Head
+
+    def head(self, path: str) -> ObjectMeta:
+        """Return the metadata for the specified location.
+
+        Refer to the documentation for [Head][obspec.Head].
+        """
+        with self._open(path) as (_, stat):
+            return self._meta(path, stat)
+
+    async def head_async(self, path: str) -> ObjectMeta:
+        """Call `head` asynchronously.
+
+        Refer to the documentation for [Head][obspec.Head].
+        """
+        return await asyncio.to_thread(self.head, path)
+
+    # List
+
+    def _walk(
+        self,
+        prefix: str | None,
+        offset: str | None,
+    ) -> Iterator[tuple[str, os.stat_result]]:
+        top = self._prefix_dir(prefix)
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith(_TMP_PREFIX))
+            for name in sorted(filenames):
+                if name.startswith(_TMP_PREFIX):
+                    continue
+                file = Path(dirpath, name)
+                key = self._key(file)
+                if offset is not None and key <= offset:
+                    continue
+                try:
+                    stat = file.stat()
+                except FileNotFoundError:
+                    # Deleted while listing
+                    continue
+                yield key, stat
+
+    def list(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Refer to the documentation for [List][obspec.List].
+        """
+        chunk: list[ObjectMeta] = []
+        for key, stat in self._walk(prefix, offset):
+            chunk.append(self._meta(key, stat))
+            if len(chunk) >= LIST_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def list_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> AsyncIterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Refer to the documentation for [ListAsync][obspec.ListAsync].
+        """
+        chunks = self.list(prefix, offset=offset)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    def list_columnar(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[ObjectMetaColumns]:
+        """List all the objects with the given prefix as columnar chunks.
+
+        File metadata is copied straight into the columns, without building an
+        `ObjectMeta` dict or `datetime` for each object.
+
+        Refer to the documentation for [ListColumnar][obspec.listing.ListColumnar].
+        """
+        stats: list[tuple[str, os.stat_result]] = []
+        for item in self._walk(prefix, offset):
+            stats.append(item)
+            if len(stats) >= LIST_CHUNK_SIZE:
+                yield self._columns(stats)
+                stats = []
+        if stats:
+            yield self._columns(stats)
+
+    async def list_columnar_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> AsyncIterator[ObjectMetaColumns]:
+        """List all the objects with the given prefix as columnar chunks.
+
+        Refer to the documentation for
+        [ListColumnarAsync][obspec.listing.ListColumnarAsync].
+        """
+        chunks = self.list_columnar(prefix, offset=offset)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    @staticmethod
+    def _columns(stats: Sequence[tuple[str, os.stat_result]]) -> ObjectMetaColumns:
+        return ObjectMetaColumns.from_columns(
+            paths=[key for key, _ in stats],
+            sizes=[stat.st_size for _, stat in stats],
+            last_modified=[_mtime_micros(stat) for _, stat in stats],
+            e_tags=[_e_tag(stat) for _, stat in stats],
+            versions=[None] * len(stats),
+        )
+
+    def list_with_delimiter(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """List objects with the given prefix and a `/` delimiter.
+
+        Refer to the documentation for [ListWithDelimiter][obspec.ListWithDelimiter].
+        """
+        top = self._prefix_dir(prefix)
+        common_prefixes: list[str] = []
+        objects: list[ObjectMeta] = []
+        try:
+            entries = sorted(os.scandir(top), key=lambda entry: entry.name)
+        except (FileNotFoundError, NotADirectoryError):
+            entries = []
+
+        for entry in entries:
+            if entry.name.startswith(_TMP_PREFIX):
+                continue
+            key = self._key(Path(entry.path))
+            try:
+                if entry.is_dir():
+                    common_prefixes.append(key)
+                else:
+                    objects.append(self._meta(key, entry.stat()))
+            except FileNotFoundError:
+                continue
+
+        return {"common_prefixes": common_prefixes, "objects": objects}
+
+    async def list_with_delimiter_async(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """Call `list_with_delimiter` asynchronously.
+
+        Refer to the documentation for [ListWithDelimiter][obspec.ListWithDelimiter].
+        """
+        return await asyncio.to_thread(self.list_with_delimiter, prefix)
+
+    # Put
+
+    @contextlib.contextmanager
+    def _staging(self, path: str) -> Iterator[tuple[Path, IO[bytes]]]:
+        """Open a temporary file next to `path`, removing it unless it is committed."""
+        dest = self._path(path)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f"{_TMP_PREFIX}{dest.name}.{uuid.uuid4().hex}")
+        try:
+            with tmp.open("xb") as f:
+                yield tmp, f
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def _commit(self, path: str, tmp: Path, mode: PutMode | None) -> PutResult:
+        dest = self._path(path)
+        if mode is None or mode == "overwrite":
+            tmp.replace(dest)
+        elif mode == "create":
+            self._link_no_clobber(path, tmp, dest)
+        else:
+            msg = "LocalStore does not support conditional updates."
+            raise NotSupportedError(msg)
+
+        return {"e_tag": _e_tag(dest.stat()), "version": None}
+
+    @staticmethod
+    def _link_no_clobber(path: str, src: Path, dest: Path) -> None:
+        try:
+            os.link(src, dest)
+        except FileExistsError as e:
+            msg = f"Object already exists: {path!r}."
+            raise AlreadyExistsError(msg) from e
+
+    @staticmethod
+    def _check_put_args(attributes: Attributes | None, mode: PutMode | None) -> None:
+        if attributes:
+            msg = "LocalStore does not support attributes."
+            raise NotSupportedError(msg)
+        if mode is not None and mode not in ("create", "overwrite"):
+            msg = "LocalStore does not support conditional updates."
+            raise NotSupportedError(msg)
+
+    @staticmethod
+    def _write(
+        f: IO[bytes],
+        file: IO[bytes] | Path | bytes | Buffer | Iterator[Buffer] | Iterable[Buffer],
+    ) -> None:
+        if isinstance(file, Path):
+            with file.open("rb") as src:
+                size = os.fstat(src.fileno()).st_size
+                f.flush()
+                _copy_fd(src.fileno(), f.fileno(), size)
+                f.seek(0, os.SEEK_END)
+        elif hasattr(file, "read"):
+            shutil.copyfileobj(cast("IO[bytes]", file), f, DEFAULT_CHUNK_SIZE)
+        else:
+            try:
+                view = as_memoryview(file)  # type: ignore[arg-type]
+            except TypeError:
+                for chunk in file:  # type: ignore[union-attr]
+                    f.write(chunk)
+            else:
+                f.write(view)
+
+    def put(  # noqa: PLR0913
+        self,
+        path: str,
+        file: IO[bytes] | Path | bytes | Buffer | Iterator[Buffer] | Iterable[Buffer],
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,  # noqa: ARG002
+        mode: PutMode | None = None,
+        use_multipart: bool | None = None,  # noqa: ARG002
+        chunk_size: int = DEFAULT_CHUNK_SIZE,  # noqa: ARG002
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,  # noqa: ARG002
+    ) -> PutResult:
+        """Save the provided bytes to the specified location.
+
+        Refer to the documentation for [Put][obspec.Put].
+        """
+        self._check_put_args(attributes, mode)
+        with self._staging(path) as (tmp, f):
+            self._write(f, file)
+            f.flush()
+            f.close()
+            return self._commit(path, tmp, mode)
+
+    async def put_async(  # noqa: PLR0913
+        self,
+        path: str,
+        file: IO[bytes]
+        | Path
+        | bytes
+        | Buffer
+        | AsyncIterator[Buffer]
+        | AsyncIterable[Buffer]
+        | Iterator[Buffer]
+        | Iterable[Buffer],
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+        use_multipart: bool | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> PutResult:
+        """Call `put` asynchronously.
+
+        Refer to the documentation for [PutAsync][obspec.PutAsync].
+        """
+        if not hasattr(file, "__aiter__"):
+            return await asyncio.to_thread(
+                self.put,
+                path,
+                file,  # type: ignore[arg-type]
+                attributes=attributes,
+                tags=tags,
+                mode=mode,
+                use_multipart=use_multipart,
+                chunk_size=chunk_size,
+                max_concurrency=max_concurrency,
+            )
+
+        self._check_put_args(attributes, mode)
+        with self._staging(path) as (tmp, f):
+            async for chunk in file:  # type: ignore[union-attr]
+                await asyncio.to_thread(f.write, chunk)
+            f.close()
+            return await asyncio.to_thread(self._commit, path, tmp, mode)
+
+    # Copy, rename and delete
+
+    def copy(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Copy an object from one path to another in the same object store.
+
+        Refer to the documentation for [Copy][obspec.Copy].
+        """
+        with self._open(from_) as (src, stat), self._staging(to) as (tmp, f):
+            _copy_fd(src.fileno(), f.fileno(), stat.st_size)
+            f.close()
+            self._commit(to, tmp, "overwrite" if overwrite else "create")
+
+    async def copy_async(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Call `copy` asynchronously.
+
+        Refer to the documentation for [Copy][obspec.Copy].
+        """
+        await asyncio.to_thread(self.copy, from_, to, overwrite=overwrite)
+
+    def rename(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Move an object from one path to another in the same object store.
+
+        Refer to the documentation for [Rename][obspec.Rename].
+        """
+        src = self._path(from_)
+        dest = self._path(to)
+        if not src.is_file():
+            msg = f"Object not found: {from_!r}."
+            raise NotFoundError(msg)
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if overwrite:
+                src.replace(dest)
+            else:
+                self._link_no_clobber(to, src, dest)
+                src.unlink()
+        except FileNotFoundError as e:
+            msg = f"Object not found: {from_!r}."
+            raise NotFoundError(msg) from e
+
+    async def rename_async(
+        self,
+        from_: str,
+        to: str,
+        *,
+        overwrite: bool = True,
+    ) -> None:
+        """Call `rename` asynchronously.
+
+        Refer to the documentation for [Rename][obspec.Rename].
+        """
+        await asyncio.to_thread(self.rename, from_, to, overwrite=overwrite)
+
+    def delete(self, paths: str | Sequence[str]) -> None:
+        """Delete the object at the specified location(s).
+
+        Deleting an object that does not exist raises
+        [`NotFoundError`][obspec.exceptions.NotFoundError].
+
+        Refer to the documentation for [Delete][obspec.Delete].
+        """
+        for path in [paths] if isinstance(paths, str) else paths:
+            try:
+                self._path(path).unlink()
+            except (  # noqa: PERF203
+                FileNotFoundError,
+                IsADirectoryError,
+                NotADirectoryError,
+            ) as e:
+                msg = f"Object not found: {path!r}."
+                raise NotFoundError(msg) from e
+
+    async def delete_async(self, paths: str | Sequence[str]) -> None:
+        """Call `delete` asynchronously.
+
+        Refer to the documentation for [Delete][obspec.Delete].
+        """
+        await asyncio.to_thread(self.delete, paths)
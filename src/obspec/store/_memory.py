@@ -0,0 +1,577 @@
+from __future__ import annotations
+
+import contextlib
+import itertools
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, NamedTuple
+
+from obspec._util import BufferResult, resolve_end, resolve_ends
+from obspec.exceptions import (
+    AlreadyExistsError,
+    NotFoundError,
+    NotSupportedError,
+    PreconditionError,
+)
+from obspec.listing import ObjectMetaColumns
+
+from ._common import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MAX_CONCURRENCY,
+    LIST_CHUNK_SIZE,
+    check_get_range,
+    check_preconditions,
+    resolve_get_range,
+)
+
+if TYPE_CHECKING:
+    import sys
+    from collections.abc import (
+        AsyncIterable,
+        AsyncIterator,
+        Iterable,
+        Iterator,
+        Sequence,
+    )
+
+    from obspec import (
+        Attributes,
+        GetOptions,
+        ListResult,
+        ObjectMeta,
+        PutMode,
+        PutResult,
+    )
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+_LOCK_STRIPES = 64
+
+
+class _Object(NamedTuple):
+    """An immutable stored object. Entries are replaced, never mutated."""
+
+    data: bytes
+    meta: ObjectMeta
+    attributes: Attributes
+    tags: dict[str, str]
+
+
+def _to_bytes(
+    file: IO[bytes] | Path | bytes | Buffer | Iterator[Buffer] | Iterable[Buffer],
+) -> bytes:
+    if isinstance(file, bytes):
+        return file
+    if isinstance(file, Path):
+        return file.read_bytes()
+    if hasattr(file, "read"):
+        return file.read()
+    try:
+        return bytes(memoryview(file))  # type: ignore[arg-type]
+    except TypeError:
+        return b"".join(file)  # type: ignore[arg-type]
+
+
+def _prefix_bounds(prefix: str | None) -> str:
+    """Return the string every key under `prefix` starts with."""
+    if prefix is None or not prefix.strip("/"):
+        return ""
+    return prefix.rstrip("/") + "/"
+
+
+class MemoryStore:
+    """An obspec store that keeps objects in memory.
+
+    Implements every obspec protocol, including the async variants, and is designed
+    for tests, benchmarks and as a hot tier in front of slower stores.
+
+    - Objects are stored as immutable `bytes`, so `get`, `get_range` and `get_ranges`
+      return zero-copy [`memoryview`][]s and never take a lock.
+    - Writes to the same path are serialized with striped locks, which makes
+      conditional puts ([`PutMode`][obspec.PutMode] `"create"` and
+      [`UpdateVersion`][obspec.UpdateVersion]) atomic while writes to different paths
+      proceed independently.
+    - Keys are kept in a sorted index, so `list` and `list_with_delimiter` seek
+      directly to `prefix`/`offset` and only visit the keys they return.
+
+    Each object is assigned a new, store-wide unique `e_tag` whenever it is written.
+    Objects have no version.
+    """
+
+    def __init__(self) -> None:
+        """Create a new, empty MemoryStore."""
+        self._objects: dict[str, _Object] = {}
+        self._keys: list[str] = []
+        self._index_lock = threading.Lock()
+        self._path_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self._e_tags = itertools.count()
+
+    def __repr__(self) -> str:
+        return f"MemoryStore(<{len(self._objects)} objects>)"
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def _lock_for(self, path: str) -> threading.Lock:
+        return self._path_locks[hash(path) % _LOCK_STRIPES]
+
+    @contextlib.contextmanager
+    def _locks_for(self, *paths: str) -> Iterator[None]:
+        # Acquired in stripe order, so that concurrent callers cannot deadlock.
+        stripes = sorted({hash(path) % _LOCK_STRIPES for path in paths})
+        with contextlib.ExitStack() as stack:
+            for stripe in stripes:
+                stack.enter_context(self._path_locks[stripe])
+            yield
+
+    def _lookup(self, path: str) -> _Object:
+        obj = self._objects.get(path)
+        if obj is None:
+            msg = f"Object not found: {path!r}."
+            raise NotFoundError(msg)
+        return obj
+
+    # Mutation. Callers must hold the lock for `path`.
+
+    def _store(
+        self,
+        path: str,
+        data: bytes,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+    ) -> PutResult:
+        e_tag = str(next(self._e_tags))
+        meta: ObjectMeta = {
+            "path": path,
+            "last_modified": datetime.now(timezone.utc),
+            "size": len(data),
+            "e_tag": e_tag,
+            "version": None,
+        }
+        existed = path in self._objects
+        self._objects[path] = _Object(data, meta, dict(attributes or {}), tags or {})
+        if not existed:
+            with self._index_lock:
+                insort(self._keys, path)
+        return {"e_tag": e_tag, "version": None}
+
+    def _remove(self, path: str) -> None:
+        if self._objects.pop(path, None) is None:
+            return
+        with self._index_lock:
+            idx = bisect_left(self._keys, path)
+            if idx < len(self._keys) and self._keys[idx] == path:
+                del self._keys[idx]
+
+    # Get
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> BufferResult:
+        """Return the bytes that are stored at the specified location.
+
+        Refer to the documentation for [Get][obspec.Get].
+        """
+        options = options or {}
+        if options.get("version") is not None:
+            msg = "MemoryStore does not support object versions."
+            raise NotSupportedError(msg)
+
+        obj = self._lookup(path)
+        check_preconditions(obj.meta, options)
+        start, end = resolve_get_range(options, len(obj.data))
+        data = b"" if options.get("head") else memoryview(obj.data)[start:end]
+        return BufferResult(
+            data,
+            meta=obj.meta,
+            range=(start, end),
+            attributes=obj.attributes,
+        )
+
+    async def get_async(
+        self,
+        path: str,
+        *,
+        options: GetOptions | None = None,
+    ) -> BufferResult:
+        """Call `get` asynchronously.
+
+        Refer to the documentation for [Get][obspec.Get].
+        """
+        return self.get(path, options=options)
+
+    def get_range(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> memoryview:
+        """Return the bytes stored at the specified location in the given byte range.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        end = resolve_end(start, end, length)
+        data = self._lookup(path).data
+        start, end = check_get_range(start, end, len(data))
+        return memoryview(data)[start:end]
+
+    async def get_range_async(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> memoryview:
+        """Call `get_range` asynchronously.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        return self.get_range(path, start=start, end=end, length=length)
+
+    def get_ranges(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> list[memoryview]:
+        """Return the bytes stored at the specified location in the given byte ranges.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        resolved_ends = resolve_ends(starts, ends, lengths)
+        data = self._lookup(path).data
+        view = memoryview(data)
+        out = []
+        for start, end in zip(starts, resolved_ends):
+            clamped_start, clamped_end = check_get_range(start, end, len(data))
+            out.append(view[clamped_start:clamped_end])
+        return out
+
+    async def get_ranges_async(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> list[memoryview]:
+        """Call `get_ranges` asynchronously.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        return self.get_ranges(path, starts=starts, ends=ends, lengths=lengths)
+
+    # Head
+
+    def head(self, path: str) -> ObjectMeta:
+        """Return the metadata for the specified location.
+
+        Refer to the documentation for [Head][obspec.Head].
+        """
+        return self._lookup(path).meta
+
+    async def head_async(self, path: str) -> ObjectMeta:
+        """Call `head` asynchronously.
+
+        Refer to the documentation for [Head][obspec.Head].
+        """
+        return self.head(path)
+
+    # List
+
+    def list(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Objects are returned in lexicographic order of their paths. Each chunk is
+        located with a binary search of the sorted key index, so listing costs
+        `O(log n + k)` for `k` results, and objects written or deleted during
+        iteration are reflected in subsequent chunks.
+
+        Refer to the documentation for [List][obspec.List].
+        """
+        start = _prefix_bounds(prefix)
+        last = offset
+        while True:
+            with self._index_lock:
+                if last is None:
+                    idx = bisect_left(self._keys, start)
+                else:
+                    idx = max(
+                        bisect_left(self._keys, start),
+                        bisect_right(self._keys, last),
+                    )
+                keys = self._keys[idx : idx + LIST_CHUNK_SIZE]
+
+            chunk: list[ObjectMeta] = []
+            for key in keys:
+                if not key.startswith(start):
+                    break
+                obj = self._objects.get(key)
+                if obj is not None:
+                    chunk.append(obj.meta)
+
+            if chunk:
+                yield chunk
+            if len(keys) < LIST_CHUNK_SIZE or not keys[-1].startswith(start):
+                return
+            last = keys[-1]
+
+    async def list_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> AsyncIterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Refer to the documentation for [ListAsync][obspec.ListAsync].
+        """
+        for chunk in self.list(prefix, offset=offset):
+            yield chunk
+
+    def list_columnar(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[ObjectMetaColumns]:
+        """List all the objects with the given prefix as columnar chunks.
+
+        Each chunk of [`list`][obspec.store.MemoryStore.list] is converted from the
+        stored `ObjectMeta` dicts.
+
+        Refer to the documentation for [ListColumnar][obspec.listing.ListColumnar].
+        """
+        for chunk in self.list(prefix, offset=offset):
+            yield ObjectMetaColumns.from_metas(chunk)
+
+    async def list_columnar_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> AsyncIterator[ObjectMetaColumns]:
+        """List all the objects with the given prefix as columnar chunks.
+
+        Refer to the documentation for
+        [ListColumnarAsync][obspec.listing.ListColumnarAsync].
+        """
+        for chunk in self.list_columnar(prefix, offset=offset):
+            yield chunk
+
+    def list_with_delimiter(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """List objects with the given prefix and a `/` delimiter.
+
+        Each common prefix is skipped over with a single binary search, so the cost
+        depends on the number of results rather than the number of keys beneath
+        `prefix`.
+
+        Refer to the documentation for [ListWithDelimiter][obspec.ListWithDelimiter].
+        """
+        start = _prefix_bounds(prefix)
+        common_prefixes: list[str] = []
+        objects: list[ObjectMeta] = []
+        with self._index_lock:
+            keys = self._keys
+            idx = bisect_left(keys, start)
+            while idx < len(keys) and keys[idx].startswith(start):
+                key = keys[idx]
+                sep = key.find("/", len(start))
+                if sep == -1:
+                    obj = self._objects.get(key)
+                    if obj is not None:
+                        objects.append(obj.meta)
+                    idx += 1
+                else:
+                    common_prefix = key[:sep]
+                    common_prefixes.append(common_prefix)
+                    # "0" sorts immediately after "/", so this skips every key beneath
+                    # the common prefix.
+                    idx = bisect_left(keys, common_prefix + "0", idx)
+
+        return {"common_prefixes": common_prefixes, "objects": objects}
+
+    async def list_with_delimiter_async(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """Call `list_with_delimiter` asynchronously.
+
+        Refer to the documentation for [ListWithDelimiter][obspec.ListWithDelimiter].
+        """
+        return self.list_with_delimiter(prefix)
+
+    # Put
+
+    def _put_bytes(
+        self,
+        path: str,
+        data: bytes,
+        *,
+        attributes: Attributes | None,
+        tags: dict[str, str] | None,
+        mode: PutMode | None,
+    ) -> PutResult:
+        with self._lock_for(path):
+            current = self._objects.get(path)
+            if mode == "create":
+                if current is not None:
+                    msg = f"Object already exists: {path!r}."
+                    raise AlreadyExistsError(msg)
+            elif mode is not None and mode != "overwrite":
+                if current is None:
+                    msg = f"Object not found for conditional update: {path!r}."
+                    raise PreconditionError(msg)
+                expected = (mode.get("e_tag"), mode.get("version"))
+                actual = (current.meta["e_tag"], current.meta["version"])
+                if any(e is not None and e != a for e, a in zip(expected, actual)):
+                    msg = f"{path}: expected {expected}, found {actual}."
+                    raise PreconditionError(msg)
+
+            return self._store(path, data, attributes, tags)
+
+    def put(  # noqa: PLR0913
+        self,
+        path: str,
+        file: IO[bytes] | Path | bytes | Buffer | Iterator[Buffer] | Iterable[Buffer],
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+        use_multipart: bool | None = None,  # noqa: ARG002
+        chunk_size: int = DEFAULT_CHUNK_SIZE,  # noqa: ARG002
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,  # noqa: ARG002
+    ) -> PutResult:
+        """Save the provided bytes to the specified location.
+
+        Refer to the documentation for [Put][obspec.Put].
+        """
+        return self._put_bytes(
+            path,
+            _to_bytes(file),
+            attributes=attributes,
+            tags=tags,
+            mode=mode,
+        )
+
+    async def put_async(  # noqa: PLR0913
+        self,
+        path: str,
+        file: IO[bytes]
+        | Path
+        | bytes
+        | Buffer
+        | AsyncIterator[Buffer]
+        | AsyncIterable[Buffer]
+        | Iterator[Buffer]
+        | Iterable[Buffer],
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+        use_multipart: bool | None = None,  # noqa: ARG002
+        chunk_size: int = DEFAULT_CHUNK_SIZE,  # noqa: ARG002
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,  # noqa: ARG002
+    ) -> PutResult:
+        """Call `put` asynchronously.
+
+        Refer to the documentation for [PutAsync][obspec.PutAsync].
+        """
+        if hasattr(file, "__aiter__"):
+            data = b"".join([bytes(chunk) async for chunk in file])  # type: ignore[union-attr]
+        else:
+            data = _to_bytes(file)  # type: ignore[arg-type]
+        return self._put_bytes(
+            path,
+            data,
+            attributes=attributes,
+            tags=tags,
+            mode=mode,
+        )
+
+    # Copy, rename and delete
+
+    def copy(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Copy an object from one path to another in the same object store.
+
+        The data is shared between both objects rather than copied.
+
+        Refer to the documentation for [Copy][obspec.Copy].
+        """
+        obj = self._lookup(from_)
+        self._put_bytes(
+            to,
+            obj.data,
+            attributes=obj.attributes,
+            tags=obj.tags,
+            mode="overwrite" if overwrite else "create",
+        )
+
+    async def copy_async(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Call `copy` asynchronously.
+
+        Refer to the documentation for [Copy][obspec.Copy].
+        """
+        self.copy(from_, to, overwrite=overwrite)
+
+    def rename(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Move an object from one path to another in the same object store.
+
+        Refer to the documentation for [Rename][obspec.Rename].
+        """
+        with self._locks_for(from_, to):
+            obj = self._lookup(from_)
+            if not overwrite and to in self._objects:
+                msg = f"Object already exists: {to!r}."
+                raise AlreadyExistsError(msg)
+            if from_ == to:
+                return
+            self._store(to, obj.data, obj.attributes, obj.tags)
+            self._remove(from_)
+
+    async def rename_async(
+        self,
+        from_: str,
+        to: str,
+        *,
+        overwrite: bool = True,
+    ) -> None:
+        """Call `rename` asynchronously.
+
+        Refer to the documentation for [Rename][obspec.Rename].
+        """
+        self.rename(from_, to, overwrite=overwrite)
+
+    def delete(self, paths: str | Sequence[str]) -> None:
+        """Delete the object at the specified location(s).
+
+        Deleting an object that does not exist is not an error.
+
+        Refer to the documentation for [Delete][obspec.Delete].
+        """
+        for path in [paths] if isinstance(paths, str) else paths:
+            with self._lock_for(path):
+                self._remove(path)
+
+    async def delete_async(self, paths: str | Sequence[str]) -> None:
+        """Call `delete` asynchronously.
+
+        Refer to the documentation for [Delete][obspec.Delete].
+        """
+        self.delete(paths)
@@ -0,0 +1,1007 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, TYPE_CHECKING, Any, TypedDict
+
+from obspec._util import BufferResult, is_error
+from obspec.exceptions import AlreadyExistsError, NotFoundError, PreconditionError
+
+from ._common import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MAX_CONCURRENCY,
+    check_preconditions,
+)
+from ._memory import _prefix_bounds
+
+if TYPE_CHECKING:
+    import sys
+    from collections.abc import (
+        AsyncIterable,
+        AsyncIterator,
+        Callable,
+        Iterable,
+        Iterator,
+        Sequence,
+    )
+    from pathlib import Path
+
+    from obspec import (
+        Attributes,
+        GetOptions,
+        ListResult,
+        ObjectMeta,
+        PutMode,
+        PutResult,
+        UpdateVersion,
+    )
+
+    if sys.version_info >= (3, 11):
+        from typing import Self
+    else:
+        from typing_extensions import Self
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+DEFAULT_PROMOTE_AFTER = 2
+"""The default number of slow-tier reads of an object after which it is promoted."""
+
+DEFAULT_MAX_TRACKED = 100_000
+"""The default number of objects whose slow-tier reads are counted for promotion."""
+
+DEFAULT_MAX_WORKERS = 4
+"""The default number of threads flushing and promoting objects in the background."""
+
+_LOCK_STRIPES = 64
+
+_E_TAG_PREFIX = "tiered:"
+
+
+class TieredStats(TypedDict):
+    """Counters describing a [`TieredStore`][obspec.store.TieredStore]."""
+
+    fast_hits: int
+    """The number of reads served by the fast tier."""
+
+    slow_reads: int
+    """The number of reads served by the slow tier."""
+
+    promotions: int
+    """The number of objects copied into the fast tier after repeated reads."""
+
+    evictions: int
+    """The number of objects evicted from the fast tier to stay within `max_size`."""
+
+    flushes: int
+    """The number of write-back objects written to the slow tier."""
+
+    flush_errors: int
+    """The number of failed attempts to flush a write-back object."""
+
+    entries: int
+    """The number of objects currently in the fast tier."""
+
+    dirty: int
+    """The number of write-back objects not yet written to the slow tier."""
+
+    size: int
+    """The total size, in bytes, of the objects currently in the fast tier."""
+
+
+class _Entry:
+    """An object held in the fast tier."""
+
+    __slots__ = ("attributes", "dirty", "hits", "meta", "slow", "tags")
+
+    def __init__(
+        self,
+        meta: ObjectMeta,
+        attributes: Attributes | None,
+        *,
+        tags: dict[str, str] | None = None,
+        dirty: bool = False,
+        hits: int = 0,
+    ) -> None:
+        self.meta = meta
+        """The metadata reported for the object."""
+        self.attributes = attributes or {}
+        self.tags = tags
+        self.dirty = dirty
+        """Whether the object is yet to be written to the slow tier."""
+        self.hits = hits
+        self.slow: UpdateVersion | None = None
+        """The slow tier's e_tag and version of the object, if not those of `meta`."""
+
+
+class _TieredGetResult:
+    """A fast-tier get result reporting the tiered store's metadata."""
+
+    def __init__(self, result: Any, entry: _Entry) -> None:  # noqa: ANN401
+        self._result = result
+        self._meta = entry.meta
+        self._attributes = entry.attributes
+
+    @property
+    def attributes(self) -> Attributes:
+        return self._attributes
+
+    @property
+    def meta(self) -> ObjectMeta:
+        return self._meta
+
+    @property
+    def range(self) -> tuple[int, int]:
+        return self._result.range
+
+    def buffer(self) -> Buffer:
+        return self._result.buffer()
+
+    async def buffer_async(self) -> Buffer:
+        return await asyncio.to_thread(self._result.buffer)
+
+    def __iter__(self) -> Iterator[Buffer]:
+        return iter(self._result)
+
+    async def __aiter__(self) -> AsyncIterator[Buffer]:
+        chunks = iter(self._result)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+
+def _same_object(a: ObjectMeta, b: ObjectMeta) -> bool:
+    if a["e_tag"] is None and a["version"] is None:
+        return (a["size"], a["last_modified"]) == (b["size"], b["last_modified"])
+    return (a["e_tag"], a["version"]) == (b["e_tag"], b["version"])
+
+
+class TieredStore:
+    """An obspec store serving hot objects from a fast tier in front of a slow tier.
+
+    The slow tier, typically a remote object store, holds every object. The fast
+    tier, typically a [`MemoryStore`][obspec.store.MemoryStore] or a
+    [`LocalStore`][obspec.store.LocalStore] on local disk, holds copies of recently
+    written objects and of objects read at least `promote_after` times, up to
+    `max_size` bytes. When the fast tier is full, the objects read least often are
+    evicted first.
+
+    - Reads are served by the fast tier when it holds the object, and otherwise by
+      the slow tier. Whole-object `get`s promote the object inline, while range reads
+      promote it on a background thread.
+    - Writes are write-through by default: the data is staged in the fast tier,
+      uploaded to the slow tier, and only then made visible. With `write_back=True`,
+      `put` returns as soon as the data is in the fast tier, and a background thread
+      flushes it to the slow tier. Conditional puts are always written through, after
+      flushing any pending write of the same path.
+    - `head`, `list` and `list_with_delimiter` merge both tiers, so write-back objects
+      are listed before they are flushed.
+
+    Objects in the fast tier keep the `e_tag` and `version` they were written or
+    promoted with, and conditional requests are checked against those. Write-back
+    objects have no version, and the fast tier's `e_tag` prefixed with `tiered:`,
+    until they are evicted, after which the slow tier's are reported. A conditional
+    request made with the earlier `e_tag` then fails safely, with a
+    [`PreconditionError`][obspec.exceptions.PreconditionError] or by returning the
+    data rather than raising [`NotModifiedError`][obspec.exceptions.NotModifiedError].
+
+    Only writes made through the TieredStore are observed. Both tiers must implement
+    the synchronous obspec protocols; the async methods run them on a worker thread.
+
+    ```py
+    from obspec.store import LocalStore, TieredStore
+
+    cache = LocalStore("/mnt/nvme/cache")
+    with TieredStore(cache, remote, max_size=50 * 2**30) as store:
+        data = store.get("data.parquet").buffer()
+    ```
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        fast: Any,  # noqa: ANN401
+        slow: Any,  # noqa: ANN401
+        *,
+        write_back: bool = False,
+        promote_after: int | None = DEFAULT_PROMOTE_AFTER,
+        max_size: int | None = None,
+        max_tracked: int = DEFAULT_MAX_TRACKED,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> None:
+        """Create a new TieredStore.
+
+        Args:
+            fast: The fast tier. Its contents are managed by the TieredStore, and
+                should not be written to directly.
+            slow: The slow tier, which holds every object.
+
+        Keyword Args:
+            write_back: Whether `put` returns before the data is written to the slow
+                tier. Defaults to `False`.
+            promote_after: The number of slow-tier reads of an object after which it
+                is copied into the fast tier. `None` only keeps written objects in the
+                fast tier. Defaults to 2.
+            max_size: The maximum total size, in bytes, of the objects in the fast
+                tier. Objects yet to be flushed are never evicted, so the limit can be
+                exceeded while they are pending. `None` is unlimited. Defaults to
+                `None`.
+            max_tracked: The maximum number of objects whose reads are counted for
+                promotion. Defaults to 100,000.
+            max_workers: The number of threads flushing and promoting objects in the
+                background. Defaults to 4.
+
+        """
+        if promote_after is not None and promote_after < 1:
+            msg = f"promote_after must be at least 1, got {promote_after}."
+            raise ValueError(msg)
+        if max_size is not None and max_size < 0:
+            msg = f"max_size must be non-negative, got {max_size}."
+            raise ValueError(msg)
+        if max_workers < 1:
+            msg = f"max_workers must be at least 1, got {max_workers}."
+            raise ValueError(msg)
+
+        self.fast = fast
+        self.slow = slow
+        self.write_back = write_back
+        self.promote_after = promote_after
+        self.max_size = max_size
+        self.max_tracked = max_tracked
+
+        # Lock order: a path's write lock, then its read lock, then `_lock`. Write
+        # locks serialize writes, flushes and promotions of a path and are held
+        # across slow-tier requests. Read locks are held while the fast tier is read
+        # or written, so that readers never see a partial replacement.
+        self._write_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self._read_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self._lock = threading.Lock()
+        self._entries: dict[str, _Entry] = {}
+        self._counts: OrderedDict[str, int] = OrderedDict()
+        self._promoting: set[str] = set()
+        self._size = 0
+        self._stats: TieredStats = {
+            "fast_hits": 0,
+            "slow_reads": 0,
+            "promotions": 0,
+            "evictions": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "entries": 0,
+            "dirty": 0,
+            "size": 0,
+        }
+        self._executor = ThreadPoolExecutor(
+            max_workers,
+            thread_name_prefix="obspec-tiered",
+        )
+
+    def __repr__(self) -> str:
+        return f"TieredStore(fast={self.fast!r}, slow={self.slow!r})"
+
+    def stats(self) -> TieredStats:
+        """Return the store's counters."""
+        with self._lock:
+            stats = self._stats.copy()
+            stats["entries"] = len(self._entries)
+            stats["dirty"] = sum(entry.dirty for entry in self._entries.values())
+            stats["size"] = self._size
+            return stats
+
+    def flush(self) -> None:
+        """Write every pending write-back object to the slow tier.
+
+        Raises:
+            Exception: The first error raised by the slow tier. Objects that could
+                not be flushed stay pending.
+
+        """
+        with self._lock:
+            dirty = [path for path, entry in self._entries.items() if entry.dirty]
+        errors = []
+        for path in dirty:
+            try:
+                with self._write_lock(path):
+                    self._flush_locked(path)
+            except Exception as e:  # noqa: BLE001, PERF203
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+    def close(self) -> None:
+        """Wait for background work, then flush every pending write-back object."""
+        self._executor.shutdown(wait=True)
+        self.flush()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    # Bookkeeping
+
+    def _write_lock(self, path: str) -> threading.Lock:
+        return self._write_locks[hash(path) % _LOCK_STRIPES]
+
+    def _read_lock(self, path: str) -> threading.Lock:
+        return self._read_locks[hash(path) % _LOCK_STRIPES]
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n  # type: ignore[literal-required]
+
+    def _set_entry(self, path: str, entry: _Entry) -> None:
+        """Record `entry`. Callers must hold the read lock for `path`."""
+        with self._lock:
+            old = self._entries.pop(path, None)
+            self._size += entry.meta["size"] - (old.meta["size"] if old else 0)
+            self._entries[path] = entry
+            self._counts.pop(path, None)
+
+    def _drop(self, path: str, *, delete: bool = True) -> _Entry | None:
+        """Forget the fast tier's copy of `path`, and optionally delete it."""
+        with self._read_lock(path):
+            with self._lock:
+                entry = self._entries.pop(path, None)
+                if entry is not None:
+                    self._size -= entry.meta["size"]
+            if delete and entry is not None:
+                self._discard(path)
+        return entry
+
+    def _discard(self, path: str) -> None:
+        try:
+            self.fast.delete(path)
+        except Exception as e:
+            if not is_error(e, NotFoundError):
+                raise
+
+    def _evict(self) -> None:
+        """Evict the least often read clean objects until within `max_size`.
+
+        Ties are broken by evicting the object that entered the fast tier first.
+        """
+        with self._lock:
+            if self.max_size is None or self._size <= self.max_size:
+                return
+            candidates = sorted(
+                (entry.hits, i, path)
+                for i, (path, entry) in enumerate(self._entries.items())
+                if not entry.dirty
+            )
+        for _, _, path in candidates:
+            with self._lock:
+                if self._size <= self.max_size:
+                    return
+            # Objects being written, flushed or promoted are skipped rather than
+            # waited for.
+            lock = self._write_lock(path)
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                with self._lock:
+                    entry = self._entries.get(path)
+                if entry is not None and not entry.dirty:
+                    self._drop(path)
+                    self._count("evictions")
+            finally:
+                lock.release()
+
+    def _touch(self, path: str) -> bool:
+        """Count a slow-tier read of `path`. Return whether to promote it now."""
+        with self._lock:
+            self._stats["slow_reads"] += 1
+            if self.promote_after is None:
+                return False
+            count = self._counts.pop(path, 0) + 1
+            if count >= self.promote_after:
+                return True
+            self._counts[path] = count
+            while len(self._counts) > self.max_tracked:
+                self._counts.popitem(last=False)
+            return False
+
+    def _read_fast(self, path: str, read: Callable[[_Entry], Any]) -> Any:  # noqa: ANN401
+        """Call `read` under the read lock if the fast tier holds `path`.
+
+        Returns:
+            A tuple of the entry and the result of `read`, or `None` on a miss.
+
+        """
+        with self._read_lock(path):
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is None:
+                    return None
+                entry.hits += 1
+                self._stats["fast_hits"] += 1
+            try:
+                return entry, read(entry)
+            except Exception as e:
+                if not is_error(e, NotFoundError):
+                    raise
+                # The fast tier lost its copy; fall through to the slow tier.
+        self._drop(path, delete=False)
+        return None
+
+    # Promotion
+
+    def _promote(
+        self,
+        path: str,
+        data: Buffer,
+        meta: ObjectMeta,
+        attributes: Attributes,
+    ) -> None:
+        """Copy an object read from the slow tier into the fast tier."""
+        with self._write_lock(path):
+            with self._lock:
+                if path in self._entries:
+                    return
+            # Check that the object was not changed since it was read.
+            if not _same_object(meta, self.slow.head(path)):
+                return
+            with self._read_lock(path):
+                self.fast.put(path, data)
+                entry = _Entry(meta, attributes, hits=self.promote_after or 0)
+                self._set_entry(path, entry)
+            self._count("promotions")
+        self._evict()
+
+    def _promote_later(self, path: str) -> None:
+        with self._lock:
+            if path in self._promoting:
+                return
+            self._promoting.add(path)
+        self._executor.submit(self._promote_in_background, path)
+
+    def _promote_in_background(self, path: str) -> None:
+        try:
+            result = self.slow.get(path)
+            self._promote(path, result.buffer(), result.meta, result.attributes)
+        except Exception:  # noqa: BLE001, S110
+            # Promotion is only an optimization.
+            pass
+        finally:
+            with self._lock:
+                self._promoting.discard(path)
+
+    # Flushing
+
+    def _flush_locked(self, path: str) -> None:
+        """Write `path` to the slow tier if pending.
+
+        Callers must hold the write lock for `path`.
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or not entry.dirty:
+                return
+        try:
+            with self._read_lock(path):
+                data = self.fast.get(path)
+            result = self.slow.put(
+                path,
+                data,
+                **({"attributes": entry.attributes} if entry.attributes else {}),
+                **({"tags": entry.tags} if entry.tags else {}),
+            )
+        except Exception:
+            self._count("flush_errors")
+            raise
+        with self._lock:
+            entry.dirty = False
+            entry.tags = None
+            entry.slow = {"e_tag": result["e_tag"], "version": result["version"]}
+            self._stats["flushes"] += 1
+
+    def _flush_in_background(self, path: str) -> None:
+        try:
+            with self._write_lock(path):
+                self._flush_locked(path)
+        except Exception:  # noqa: BLE001, S110
+            # The object stays pending, and is retried by `flush`.
+            pass
+        self._evict()
+
+    # Get
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> Any:  # noqa: ANN401
+        """Return the bytes that are stored at the specified location.
+
+        Refer to the documentation for [Get][obspec.Get].
+        """
+        options = options or {}
+        if options.get("version") is None:
+
+            def read(entry: _Entry) -> _TieredGetResult:
+                check_preconditions(entry.meta, options)
+                fast_options: GetOptions = {}
+                if "range" in options:
+                    fast_options["range"] = options["range"]
+                if options.get("head"):
+                    fast_options["head"] = True
+                result = self.fast.get(path, options=fast_options)
+                return _TieredGetResult(result, entry)
+
+            hit = self._read_fast(path, read)
+            if hit is not None:
+                return hit[1]
+
+        result = self.slow.get(path, options=options)
+        if not self._touch(path) or options.get("version") is not None:
+            return result
+        if options.get("range") is not None or options.get("head"):
+            self._promote_later(path)
+            return result
+
+        data = result.buffer()
+        self._promote(path, data, result.meta, result.attributes)
+        return BufferResult(
+            data,
+            meta=result.meta,
+            range=result.range,
+            attributes=result.attributes,
+        )
+
+    async def get_async(
+        self,
+        path: str,
+        *,
+        options: GetOptions | None = None,
+    ) -> Any:  # noqa: ANN401
+        """Call `get` asynchronously.
+
+        Refer to the documentation for [Get][obspec.Get].
+        """
+        return await asyncio.to_thread(self.get, path, options=options)
+
+    def get_range(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> Buffer:
+        """Return the bytes stored at the specified location in the given byte range.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        hit = self._read_fast(
+            path,
+            lambda _: self.fast.get_range(path, start=start, end=end, length=length),
+        )
+        if hit is not None:
+            return hit[1]
+
+        data = self.slow.get_range(path, start=start, end=end, length=length)
+        if self._touch(path):
+            self._promote_later(path)
+        return data
+
+    async def get_range_async(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> Buffer:
+        """Call `get_range` asynchronously.
+
+        Refer to the documentation for [GetRange][obspec.GetRange].
+        """
+        return await asyncio.to_thread(
+            self.get_range,
+            path,
+            start=start,
+            end=end,
+            length=length,
+        )
+
+    def get_ranges(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> Sequence[Buffer]:
+        """Return the bytes stored at the specified location in the given byte ranges.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        hit = self._read_fast(
+            path,
+            lambda _: self.fast.get_ranges(
+                path,
+                starts=starts,
+                ends=ends,
+                lengths=lengths,
+            ),
+        )
+        if hit is not None:
+            return hit[1]
+
+        data = self.slow.get_ranges(path, starts=starts, ends=ends, lengths=lengths)
+        if self._touch(path):
+            self._promote_later(path)
+        return data
+
+    async def get_ranges_async(
+        self,
+        path: str,
+        *,
+        starts: Sequence[int],
+        ends: Sequence[int] | None = None,
+        lengths: Sequence[int] | None = None,
+    ) -> Sequence[Buffer]:
+        """Call `get_ranges` asynchronously.
+
+        Refer to the documentation for [GetRanges][obspec.GetRanges].
+        """
+        return await asyncio.to_thread(
+            self.get_ranges,
+            path,
+            starts=starts,
+            ends=ends,
+            lengths=lengths,
+        )
+
+    # Head
+
+    def head(self, path: str) -> ObjectMeta:
+        """Return the metadata for the specified location.
+
+        Refer to the documentation for [Head][obspec.Head].
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                return entry.meta
+        return self.slow.head(path)
+
+    async def head_async(self, path: str) -> ObjectMeta:
+        """Call `head` asynchronously.
+
+        Refer to the documentation for [Head][obspec.Head].
+        """
+        return await asyncio.to_thread(self.head, path)
+
+    # List
+
+    def _local_metas(self, prefix: str | None) -> dict[str, tuple[ObjectMeta, bool]]:
+        start = _prefix_bounds(prefix)
+        with self._lock:
+            return {
+                path: (entry.meta, entry.dirty)
+                for path, entry in self._entries.items()
+                if path.startswith(start)
+            }
+
+    def list(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Objects in the fast tier are reported with their metadata there, and objects
+        yet to be flushed are yielded in a final chunk.
+
+        Refer to the documentation for [List][obspec.List].
+        """
+        local = self._local_metas(prefix)
+        for chunk in self.slow.list(prefix, offset=offset):
+            yield [local.pop(meta["path"], (meta, False))[0] for meta in chunk]
+        pending = [
+            meta
+            for path, (meta, dirty) in sorted(local.items())
+            if dirty and (offset is None or path > offset)
+        ]
+        if pending:
+            yield pending
+
+    async def list_async(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> AsyncIterator[Sequence[ObjectMeta]]:
+        """List all the objects with the given prefix.
+
+        Refer to the documentation for [ListAsync][obspec.ListAsync].
+        """
+        chunks = self.list(prefix, offset=offset)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    def list_with_delimiter(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """List objects with the given prefix and a `/` delimiter.
+
+        Refer to the documentation for [ListWithDelimiter][obspec.ListWithDelimiter].
+        """
+        result = self.slow.list_with_delimiter(prefix)
+        local = self._local_metas(prefix)
+        if not local:
+            return result
+
+        start = _prefix_bounds(prefix)
+        common_prefixes = set(result["common_prefixes"])
+        objects = {meta["path"]: meta for meta in result["objects"]}
+        for path, (meta, dirty) in local.items():
+            sep = path.find("/", len(start))
+            if sep != -1:
+                if dirty:
+                    common_prefixes.add(path[:sep])
+            elif dirty or path in objects:
+                objects[path] = meta
+        return {
+            "common_prefixes": sorted(common_prefixes),
+            "objects": [objects[path] for path in sorted(objects)],
+        }
+
+    async def list_with_delimiter_async(
+        self,
+        prefix: str | None = None,
+    ) -> ListResult[Sequence[ObjectMeta]]:
+        """Call `list_with_delimiter` asynchronously.
+
+        Refer to the documentation for [ListWithDelimiter][obspec.ListWithDelimiter].
+        """
+        return await asyncio.to_thread(self.list_with_delimiter, prefix)
+
+    # Put
+
+    def _slow_mode(self, path: str, mode: PutMode | None) -> PutMode | None:
+        """Check a conditional put against the fast tier's copy of `path`.
+
+        Callers must hold the write lock for `path`.
+
+        Returns:
+            The mode to send to the slow tier.
+
+        """
+        if mode is None or mode == "overwrite":
+            return mode
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or (not entry.dirty and entry.slow is None):
+            return mode
+        if mode == "create":
+            msg = f"Object already exists: {path!r}."
+            raise AlreadyExistsError(msg)
+
+        expected = (mode.get("e_tag"), mode.get("version"))
+        actual = (entry.meta["e_tag"], entry.meta["version"])
+        if any(e is not None and e != a for e, a in zip(expected, actual)):
+            msg = f"{path}: expected {expected}, found {actual}."
+            raise PreconditionError(msg)
+        self._flush_locked(path)
+        return entry.slow
+
+    def _put_through(
+        self,
+        path: str,
+        file: Any,  # noqa: ANN401
+        attributes: Attributes | None,
+        mode: PutMode | None,
+        kwargs: dict[str, Any],
+    ) -> PutResult:
+        """Stage `file` in the fast tier, then upload it to the slow tier.
+
+        Callers must hold the write lock for `path`.
+        """
+        mode = self._slow_mode(path, mode)
+        # Until the upload succeeds, reads of `path` are served by the slow tier.
+        self._drop(path, delete=False)
+        try:
+            self.fast.put(path, file)
+            result = self.slow.put(
+                path,
+                self.fast.get(path),
+                attributes=attributes,
+                mode=mode,
+                **kwargs,
+            )
+            meta = self.slow.head(path)
+        except BaseException:
+            self._discard(path)
+            raise
+
+        if (meta["e_tag"], meta["version"]) != (result["e_tag"], result["version"]):
+            # The object was overwritten by another writer in the meantime.
+            self._discard(path)
+            return result
+        with self._read_lock(path):
+            self._set_entry(path, _Entry(meta, attributes))
+        return result
+
+    def _put_back(
+        self,
+        path: str,
+        file: Any,  # noqa: ANN401
+        attributes: Attributes | None,
+        tags: dict[str, str] | None,
+    ) -> PutResult:
+        """Write `file` to the fast tier, and queue it to be flushed.
+
+        Callers must hold the write lock for `path`.
+        """
+        with self._read_lock(path):
+            self.fast.put(path, file)
+            head: ObjectMeta = self.fast.head(path)
+            # Keep the fast tier's e_tags apart from the slow tier's.
+            e_tag = None if head["e_tag"] is None else _E_TAG_PREFIX + head["e_tag"]
+            meta: ObjectMeta = {**head, "e_tag": e_tag, "version": None}
+            self._set_entry(path, _Entry(meta, attributes, tags=tags, dirty=True))
+        self._executor.submit(self._flush_in_background, path)
+        return {"e_tag": e_tag, "version": None}
+
+    def put(  # noqa: PLR0913
+        self,
+        path: str,
+        file: IO[bytes] | Path | bytes | Buffer | Iterator[Buffer] | Iterable[Buffer],
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+        use_multipart: bool | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> PutResult:
+        """Save the provided bytes to the specified location.
+
+        Refer to the documentation for [Put][obspec.Put].
+        """
+        with self._write_lock(path):
+            if self.write_back and (mode is None or mode == "overwrite"):
+                result = self._put_back(path, file, attributes, tags)
+            else:
+                kwargs: dict[str, Any] = {
+                    "use_multipart": use_multipart,
+                    "chunk_size": chunk_size,
+                    "max_concurrency": max_concurrency,
+                }
+                if tags:
+                    kwargs["tags"] = tags
+                result = self._put_through(path, file, attributes, mode, kwargs)
+        self._evict()
+        return result
+
+    async def put_async(  # noqa: PLR0913
+        self,
+        path: str,
+        file: IO[bytes]
+        | Path
+        | bytes
+        | Buffer
+        | AsyncIterator[Buffer]
+        | AsyncIterable[Buffer]
+        | Iterator[Buffer]
+        | Iterable[Buffer],
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+        use_multipart: bool | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> PutResult:
+        """Call `put` asynchronously.
+
+        Refer to the documentation for [PutAsync][obspec.PutAsync].
+        """
+        if hasattr(file, "__aiter__"):
+            file = b"".join([bytes(chunk) async for chunk in file])  # type: ignore[union-attr]
+        return await asyncio.to_thread(
+            self.put,
+            path,
+            file,  # type: ignore[arg-type]
+            attributes=attributes,
+            tags=tags,
+            mode=mode,
+            use_multipart=use_multipart,
+            chunk_size=chunk_size,
+            max_concurrency=max_concurrency,
+        )
+
+    # Copy, rename and delete
+
+    def _flush_path(self, path: str) -> None:
+        with self._write_lock(path):
+            self._flush_locked(path)
+
+    def copy(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Copy an object from one path to another in the same object store.
+
+        A pending write of `from_` is flushed first.
+
+        Refer to the documentation for [Copy][obspec.Copy].
+        """
+        self._flush_path(from_)
+        with self._write_lock(to):
+            if not overwrite:
+                self._slow_mode(to, "create")
+            self._drop(to)
+            self.slow.copy(from_, to, overwrite=overwrite)
+
+    async def copy_async(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Call `copy` asynchronously.
+
+        Refer to the documentation for [Copy][obspec.Copy].
+        """
+        await asyncio.to_thread(self.copy, from_, to, overwrite=overwrite)
+
+    def rename(self, from_: str, to: str, *, overwrite: bool = True) -> None:
+        """Move an object from one path to another in the same object store.
+
+        A pending write of `from_` is flushed first.
+
+        Refer to the documentation for [Rename][obspec.Rename].
+        """
+        self._flush_path(from_)
+        with self._write_lock(to):
+            if not overwrite:
+                self._slow_mode(to, "create")
+            self._drop(to)
+            self.slow.rename(from_, to, overwrite=overwrite)
+        with self._write_lock(from_):
+            self._drop(from_)
+
+    async def rename_async(
+        self,
+        from_: str,
+        to: str,
+        *,
+        overwrite: bool = True,
+    ) -> None:
+        """Call `rename` asynchronously.
+
+        Refer to the documentation for [Rename][obspec.Rename].
+        """
+        await asyncio.to_thread(self.rename, from_, to, overwrite=overwrite)
+
+    def delete(self, paths: str | Sequence[str]) -> None:
+        """Delete the object at the specified location(s).
+
+        Pending writes of the deleted paths are discarded.
+
+        Refer to the documentation for [Delete][obspec.Delete].
+        """
+        settled = []
+        for path in [paths] if isinstance(paths, str) else paths:
+            with self._write_lock(path):
+                entry = self._drop(path)
+            if entry is not None and entry.dirty:
+                # A pending write may not have reached the slow tier at all.
+                try:
+                    self.slow.delete(path)
+                except Exception as e:
+                    if not is_error(e, NotFoundError):
+                        raise
+            else:
+                settled.append(path)
+        if settled:
+            self.slow.delete(settled)
+
+    async def delete_async(self, paths: str | Sequence[str]) -> None:
+        """Call `delete` asynchronously.
+
+        Refer to the documentation for [Delete][obspec.Delete].
+        """
+        await asyncio.to_thread(self.delete, paths)
@@ -0,0 +1,63 @@
+"""A conformance and stress test kit for obspec implementations.
+
+- [`run_conformance`][obspec.testing.run_conformance] checks a store against the
+  documented behaviour of every obspec protocol it implements, and reports the result
+  of each check.
+- [`StoreConformance`][obspec.testing.plugin.StoreConformance], in
+  `obspec.testing.plugin`, runs the same checks as pytest tests. It requires
+  [pytest](https://pytest.org).
+
+| Check | Protocols | Description |
+| --- | --- | --- |
+| `put_get` | `Put`, `Get` | Round trips, streaming, metadata and empty objects |
+| `put_inputs` | `Put`, `Get` | Every documented type of `file` argument |
+| `get_options` | `Put`, `Get` | Ranges of each kind, preconditions, versions, `head` |
+| `get_range` | `Put`, `GetRange` | Exclusive `end`, `length` and ranges past the end |
+| `get_ranges` | `Put`, `GetRanges` | Unsorted, overlapping and duplicated ranges |
+| `head` | `Put`, `Head` | Metadata before and after an overwrite |
+| `put_modes` | `Put`, `Get` | `"create"`, `"overwrite"` and conditional updates |
+| `list` | `Put`, `List` | Segment-wise prefixes, recursion and `offset` |
+| `list_with_delimiter` | `Put`, `ListWithDelimiter` | Common prefixes, full paths |
+| `copy` | `Put`, `Get`, `Copy` | Copies, with and without `overwrite` |
+| `rename` | `Put`, `Get`, `Rename` | Moves, with and without `overwrite` |
+| `delete` | `Put`, `Get`, `Delete` | Single and bulk deletes |
+| `async` | `PutAsync`, `GetAsync` | Every `*Async` method the store implements |
+| `stress_create` | `Put`, `Get` | Racing puts with mode `"create"`: exactly one wins |
+| `stress_update` | `Put`, `Get` | Racing conditional updates: none are lost |
+| `stress_overwrite` | `Put`, `Get` | Reads during overwrites see one whole version |
+| `stress_get_ranges` | `Put`, `GetRanges` | Concurrent batches of 1000 random ranges |
+
+```py
+from obspec.testing import run_conformance
+
+for result in run_conformance(lambda: MyStore("my-bucket")):
+    print(result["check"], result["status"], result["message"])
+```
+
+All objects are written beneath a new, unique prefix, so checks can run against a
+store that is not empty, and are deleted afterwards.
+"""
+
+from ._conformance import (
+    CHECKS,
+    DEFAULT_ROUNDS,
+    DEFAULT_WORKERS,
+    STRESS_CHECKS,
+    ConformanceError,
+    ConformanceResult,
+    StoreFactory,
+    run_check,
+    run_conformance,
+)
+
+__all__ = [
+    "CHECKS",
+    "DEFAULT_ROUNDS",
+    "DEFAULT_WORKERS",
+    "STRESS_CHECKS",
+    "ConformanceError",
+    "ConformanceResult",
+    "StoreFactory",
+    "run_check",
+    "run_conformance",
+]
@@ -0,0 +1,899 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import random
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Literal, TypedDict
+
+from obspec.exceptions import (
+    AlreadyExistsError,
+    BaseError,
+    NotFoundError,
+    NotModifiedError,
+    NotSupportedError,
+    PreconditionError,
+    map_exception,
+)
+
+if TYPE_CHECKING:
+    import sys
+    from collections.abc import AsyncIterator, Awaitable, Sequence
+
+    from obspec import GetOptions, ObjectMeta, PutResult
+
+    if sys.version_info >= (3, 10):
+        from typing import TypeAlias
+    else:
+        from typing_extensions import TypeAlias
+
+StoreFactory: TypeAlias = Callable[[], Any]
+"""A callable returning the store to check."""
+
+CHECKS = (
+    "put_get",
+    "put_inputs",
+    "get_options",
+    "get_range",
+    "get_ranges",
+    "head",
+    "put_modes",
+    "list",
+    "list_with_delimiter",
+    "copy",
+    "rename",
+    "delete",
+    "async",
+    "stress_create",
+    "stress_update",
+    "stress_overwrite",
+    "stress_get_ranges",
+)
+"""The names of all conformance checks, in the order they are run."""
+
+STRESS_CHECKS = tuple(name for name in CHECKS if name.startswith("stress_"))
+"""The names of the checks that run concurrent stress phases."""
+
+DEFAULT_WORKERS = 8
+"""The default number of threads used by each stress phase."""
+
+DEFAULT_ROUNDS = 20
+"""The default number of rounds of each stress phase."""
+
+
+class ConformanceError(AssertionError):
+    """A store violated a documented obspec behaviour."""
+
+
+class ConformanceResult(TypedDict):
+    """The result of running one conformance check."""
+
+    check: str
+    """The name of the check."""
+
+    status: Literal["passed", "failed", "skipped"]
+    """Whether the store passed the check, failed it, or lacks the methods it needs."""
+
+    message: str | None
+    """Why the check failed or was skipped."""
+
+    seconds: float
+    """The wall-clock duration of the check."""
+
+
+def _expect(condition: bool, msg: str) -> None:  # noqa: FBT001
+    if not condition:
+        raise ConformanceError(msg)
+
+
+def _is(error: BaseException, *kinds: type[BaseError]) -> bool:
+    return isinstance(error, Exception) and isinstance(map_exception(error), kinds)
+
+
+def _raises(
+    kinds: type[BaseError] | tuple[type[BaseError], ...],
+    call: str,
+    fn: Callable[[], Any],
+) -> None:
+    """Check that `fn` raises one of `kinds`, as classified by `map_exception`."""
+    kinds = kinds if isinstance(kinds, tuple) else (kinds,)
+    names = " or ".join(kind.__name__ for kind in kinds)
+    try:
+        fn()
+    except Exception as e:
+        if _is(e, *kinds):
+            return
+        msg = f"{call} raised {type(e).__name__}: {e}, expected {names}."
+        raise ConformanceError(msg) from e
+    msg = f"{call} succeeded, expected {names}."
+    raise ConformanceError(msg)
+
+
+async def _raises_async(
+    kinds: type[BaseError],
+    call: str,
+    fn: Callable[[], Awaitable[Any]],
+) -> None:
+    """Check that awaiting `fn()` raises `kinds`, as classified by `map_exception`."""
+    try:
+        await fn()
+    except Exception as e:
+        if _is(e, kinds):
+            return
+        msg = f"{call} raised {type(e).__name__}: {e}, expected {kinds.__name__}."
+        raise ConformanceError(msg) from e
+    msg = f"{call} succeeded, expected {kinds.__name__}."
+    raise ConformanceError(msg)
+
+
+def _fails(call: str, fn: Callable[[], Any]) -> None:
+    """Check that `fn` raises an error, of any kind."""
+    try:
+        fn()
+    except Exception:  # noqa: BLE001
+        return
+    msg = f"{call} succeeded, expected an error."
+    raise ConformanceError(msg)
+
+
+def _parallel(workers: int, fn: Callable[[int], Any]) -> list[Any]:
+    """Run `fn(0)` to `fn(workers - 1)` in threads released at the same moment."""
+    barrier = threading.Barrier(workers)
+
+    def run(i: int) -> Any:  # noqa: ANN401
+        barrier.wait()
+        return fn(i)
+
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(run, range(workers)))
+
+
+class _Checker:
+    def __init__(
+        self,
+        store: Any,  # noqa: ANN401
+        *,
+        prefix: str,
+        workers: int,
+        rounds: int,
+        seed: int,
+    ) -> None:
+        self.store = store
+        self.prefix = f"{prefix.rstrip('/')}/{uuid.uuid4().hex}"
+        self.workers = max(workers, 2)
+        self.rounds = rounds
+        self.random = random.Random(seed)  # noqa: S311
+        self.written: set[str] = set()
+
+    def require(self, *methods: str) -> None:
+        missing = [m for m in methods if not callable(getattr(self.store, m, None))]
+        if missing:
+            msg = f"The store does not implement {', '.join(missing)}."
+            raise NotSupportedError(msg)
+
+    def path(self, name: str) -> str:
+        return f"{self.prefix}/{name}"
+
+    def put(self, path: str, data: Any, **kwargs: Any) -> PutResult:  # noqa: ANN401
+        self.written.add(path)
+        return self.store.put(path, data, **kwargs)
+
+    def read(self, path: str, options: GetOptions | None = None) -> bytes:
+        return bytes(self.store.get(path, options=options).buffer())
+
+    def listed(self, prefix: str, **kwargs: Any) -> list[ObjectMeta]:  # noqa: ANN401
+        return [meta for chunk in self.store.list(prefix, **kwargs) for meta in chunk]
+
+    def cleanup(self) -> None:
+        if not hasattr(self.store, "delete"):
+            return
+        for path in sorted(self.written):
+            with contextlib.suppress(Exception):
+                self.store.delete(path)
+
+    def put_get(self) -> None:
+        self.require("put", "get")
+        data = self.random.randbytes(100_000)
+        path = self.path("object")
+        result = self.put(path, data)
+
+        _expect(self.read(path) == data, "get().buffer() differs from the put bytes.")
+        got = self.store.get(path)
+        _expect(
+            b"".join(bytes(chunk) for chunk in got) == data,
+            "Iterating a GetResult differs from the put bytes.",
+        )
+        meta = got.meta
+        _expect(meta["path"] == path, f"meta['path'] is {meta['path']!r}.")
+        _expect(meta["size"] == len(data), f"meta['size'] is {meta['size']}.")
+        _expect(tuple(got.range) == (0, len(data)), f"GetResult.range is {got.range}.")
+        if result["e_tag"] is not None:
+            _expect(
+                meta["e_tag"] == result["e_tag"],
+                "meta['e_tag'] differs from the e_tag returned by put.",
+            )
+
+        empty = self.path("empty")
+        self.put(empty, b"")
+        _expect(self.read(empty) == b"", "An empty object is not empty when read.")
+        _raises(
+            NotFoundError,
+            "get of a missing path",
+            lambda: self.read(self.path("x")),
+        )
+
+    def put_inputs(self) -> None:
+        self.require("put", "get")
+        data = self.random.randbytes(10_000)
+        with tempfile.TemporaryDirectory() as tmp:
+            local = Path(tmp) / "data"
+            local.write_bytes(data)
+            inputs = {
+                "bytes": lambda: data,
+                "bytearray": lambda: bytearray(data),
+                "memoryview": lambda: memoryview(b"xx" + data)[2:],
+                "file": lambda: io.BytesIO(data),
+                "path": lambda: local,
+                "iterable": lambda: [data[:1000], data[1000:5000], data[5000:]],
+                "iterator": lambda: (data[i : i + 999] for i in range(0, 10_000, 999)),
+            }
+            for kind, make in inputs.items():
+                path = self.path(kind)
+                self.put(path, make())
+                _expect(self.read(path) == data, f"put of a {kind} stored other bytes.")
+
+    def get_options(self) -> None:
+        self.require("put", "get")
+        data = bytes(range(256)) * 4
+        path = self.path("object")
+        result = self.put(path, data)
+        e_tag = result["e_tag"]
+
+        def head(options: GetOptions) -> ObjectMeta:
+            head_options: GetOptions = {**options, "head": True}
+            return self.store.get(path, options=head_options).meta
+
+        ranges: list[tuple[Any, tuple[int, int]]] = [
+            ((10, 20), (10, 20)),
+            ([10, 20], (10, 20)),
+            ((1000, 2000), (1000, 1024)),
+            ({"offset": 1000}, (1000, 1024)),
+            ({"suffix": 24}, (1000, 1024)),
+            ({"suffix": 2000}, (0, 1024)),
+        ]
+        for range_, (start, end) in ranges:
+            got = self.store.get(path, options={"range": range_})
+            _expect(
+                bytes(got.buffer()) == data[start:end],
+                f"get with range {range_} did not return bytes {start} to {end}.",
+            )
+            _expect(
+                tuple(got.range) == (start, end),
+                f"get with range {range_} reports a range of {got.range}.",
+            )
+            _expect(got.meta["size"] == len(data), "meta['size'] is the range size.")
+        for range_ in [(5, 5), (2000, 2100)]:
+            _fails(
+                f"get with range {range_}",
+                partial(self.read, path, {"range": range_}),
+            )
+
+        if e_tag is not None:
+            self.read(path, {"if_match": e_tag})
+            self.read(path, {"if_none_match": '"stale"'})
+            _raises(
+                PreconditionError,
+                "get with a stale if_match",
+                lambda: self.read(path, {"if_match": '"stale"'}),
+            )
+            _raises(
+                NotModifiedError,
+                "get with a matching if_none_match",
+                lambda: self.read(path, {"if_none_match": e_tag}),
+            )
+            _expect(
+                head({"if_match": e_tag})["size"] == len(data),
+                "get with head=True and a matching if_match reports the wrong size.",
+            )
+            _raises(
+                PreconditionError,
+                "get with head=True and a stale if_match",
+                lambda: head({"if_match": '"stale"'}),
+            )
+            _raises(
+                NotModifiedError,
+                "get with head=True and a matching if_none_match",
+                lambda: head({"if_none_match": e_tag}),
+            )
+
+        modified = self.store.get(path).meta["last_modified"]
+        if isinstance(modified, datetime):
+            hour = timedelta(hours=1)
+            self.read(path, {"if_modified_since": modified - hour})
+            self.read(path, {"if_unmodified_since": modified + hour})
+            _raises(
+                NotModifiedError,
+                "get with a later if_modified_since",
+                lambda: self.read(path, {"if_modified_since": modified + hour}),
+            )
+            _raises(
+                PreconditionError,
+                "get with an earlier if_unmodified_since",
+                lambda: self.read(path, {"if_unmodified_since": modified - hour}),
+            )
+            _raises(
+                NotModifiedError,
+                "get with head=True and a later if_modified_since",
+                lambda: head({"if_modified_since": modified + hour}),
+            )
+
+        version = result["version"]
+        if version is not None:
+            self.put(path, b"new")
+            _expect(
+                self.read(path, {"version": version}) == data,
+                "get with an old version returned the current bytes.",
+            )
+            _expect(
+                head({"version": version})["size"] == len(data),
+                "get with head=True and an old version reports the current object.",
+            )
+
+    def get_range(self) -> None:
+        self.require("put", "get_range")
+        data = self.random.randbytes(1000)
+        path = self.path("object")
+        self.put(path, data)
+
+        def read(**kwargs: int) -> bytes:
+            return bytes(self.store.get_range(path, **kwargs))
+
+        cases: list[tuple[dict[str, int], bytes]] = [
+            ({"start": 10, "end": 20}, data[10:20]),
+            ({"start": 10, "length": 10}, data[10:20]),
+            ({"start": 0, "end": 1000}, data),
+            ({"start": 990, "end": 2000}, data[990:]),
+            ({"start": 999, "length": 1}, data[999:]),
+        ]
+        for kwargs, expected in cases:
+            got = read(**kwargs)
+            _expect(
+                got == expected,
+                f"get_range({kwargs}) returned {len(got)} bytes, expected "
+                f"{len(expected)}, or the wrong bytes. `end` is exclusive.",
+            )
+        _fails("get_range of a zero-length range", lambda: read(start=10, end=10))
+        _fails("get_range after the end", lambda: read(start=1500, end=1600))
+        _raises(
+            NotFoundError,
+            "get_range of a missing path",
+            lambda: self.store.get_range(self.path("x"), start=0, end=1),
+        )
+
+    def get_ranges(self) -> None:
+        self.require("put", "get_ranges")
+        data = self.random.randbytes(1000)
+        path = self.path("object")
+        self.put(path, data)
+
+        # Unsorted, overlapping and duplicated ranges are returned in request order
+        starts = [500, 0, 550, 990, 500]
+        ends = [600, 5, 560, 2000, 600]
+        expected = [data[s:e] for s, e in zip(starts, ends)]
+        got = [bytes(b) for b in self.store.get_ranges(path, starts=starts, ends=ends)]
+        _expect(got == expected, "get_ranges with `ends` returned the wrong bytes.")
+
+        lengths = [100, 5, 10, 10, 100]
+        got = [
+            bytes(b)
+            for b in self.store.get_ranges(path, starts=starts, lengths=lengths)
+        ]
+        _expect(got == expected, "get_ranges with `lengths` returned the wrong bytes.")
+        _raises(
+            NotFoundError,
+            "get_ranges of a missing path",
+            lambda: self.store.get_ranges(self.path("x"), starts=[0], ends=[1]),
+        )
+
+    def head(self) -> None:
+        self.require("put", "head")
+        path = self.path("object")
+        data = b"x" * 100
+        result = self.put(path, data)
+        meta = self.store.head(path)
+        _expect(meta["path"] == path, f"meta['path'] is {meta['path']!r}.")
+        _expect(meta["size"] == len(data), f"meta['size'] is {meta['size']}.")
+        _expect(
+            isinstance(meta["last_modified"], datetime),
+            "meta['last_modified'] is not a datetime.",
+        )
+        if result["e_tag"] is not None:
+            _expect(meta["e_tag"] == result["e_tag"], "head and put e_tags differ.")
+
+        data = b"y" * 50
+        result = self.put(path, data)
+        meta = self.store.head(path)
+        _expect(meta["size"] == len(data), "head reports a stale size.")
+        if result["e_tag"] is not None:
+            _expect(meta["e_tag"] == result["e_tag"], "head reports a stale e_tag.")
+        missing = self.path("missing")
+        _raises(
+            NotFoundError,
+            "head of a missing path",
+            lambda: self.store.head(missing),
+        )
+
+    def put_modes(self) -> None:
+        self.require("put", "get")
+        path = self.path("object")
+        self.put(path, b"first", mode="create")
+        _raises(
+            AlreadyExistsError,
+            "put with mode 'create' over an existing object",
+            lambda: self.put(path, b"second", mode="create"),
+        )
+        _expect(self.read(path) == b"first", "A failed 'create' modified the object.")
+
+        result = self.put(path, b"second", mode="overwrite")
+        _expect(self.read(path) == b"second", "put with mode 'overwrite' failed.")
+        if result["e_tag"] is None:
+            return
+
+        stale = {"e_tag": result["e_tag"], "version": result["version"]}
+        try:
+            result = self.put(path, b"third", mode=stale)
+        except Exception as e:
+            if _is(e, NotSupportedError):
+                return
+            raise
+        _expect(self.read(path) == b"third", "put with a matching update failed.")
+        _raises(
+            PreconditionError,
+            "put with a stale update version",
+            lambda: self.put(path, b"fourth", mode=stale),
+        )
+        _expect(self.read(path) == b"third", "A failed update modified the object.")
+
+    def _tree(self) -> dict[str, bytes]:
+        tree = {
+            self.path(name): name.encode()
+            for name in ["a/1", "a/2", "a/b/3", "ab/4", "c"]
+        }
+        for path, data in tree.items():
+            self.put(path, data)
+        return tree
+
+    def list(self) -> None:
+        self.require("put", "list")
+        tree = self._tree()
+
+        listed = self.listed(self.prefix)
+        paths = [meta["path"] for meta in listed]
+        _expect(
+            sorted(paths) == sorted(tree),
+            f"list returned {sorted(paths)}, expected {sorted(tree)}.",
+        )
+        for meta in listed:
+            _expect(
+                meta["size"] == len(tree[meta["path"]]),
+                f"list reports the wrong size for {meta['path']!r}.",
+            )
+
+        paths = sorted(meta["path"] for meta in self.listed(self.path("a")))
+        expected = [self.path(name) for name in ["a/1", "a/2", "a/b/3"]]
+        _expect(
+            paths == expected,
+            f"list is not evaluated per path segment: got {paths}.",
+        )
+
+        paths = sorted(
+            meta["path"] for meta in self.listed(self.prefix, offset=self.path("a/2"))
+        )
+        expected = [self.path(name) for name in ["a/b/3", "ab/4", "c"]]
+        _expect(paths == expected, f"list with offset returned {paths}.")
+
+    def list_with_delimiter(self) -> None:
+        self.require("put", "list_with_delimiter")
+        self._tree()
+
+        def check(prefix: str, objects: list[str], prefixes: list[str]) -> None:
+            result = self.store.list_with_delimiter(prefix)
+            got_objects = sorted(meta["path"] for meta in result["objects"])
+            got_prefixes = sorted(p.rstrip("/") for p in result["common_prefixes"])
+            objects = [self.path(name) for name in objects]
+            prefixes = [self.path(name) for name in prefixes]
+            _expect(
+                got_objects == objects,
+                f"list_with_delimiter({prefix!r}) returned objects {got_objects}, "
+                f"expected {objects}.",
+            )
+            _expect(
+                got_prefixes == prefixes,
+                f"list_with_delimiter({prefix!r}) returned prefixes {got_prefixes}, "
+                f"expected {prefixes}.",
+            )
+
+        check(self.prefix, ["c"], ["a", "ab"])
+        check(self.path("a"), ["a/1", "a/2"], ["a/b"])
+        check(self.path("a/b"), ["a/b/3"], [])
+
+    def copy(self) -> None:
+        self.require("put", "get", "copy")
+        src, dst = self.path("src"), self.path("dst")
+        self.put(src, b"source")
+        self.written.add(dst)
+
+        self.store.copy(src, dst)
+        _expect(self.read(dst) == b"source", "copy did not copy the object.")
+        _expect(self.read(src) == b"source", "copy modified the source.")
+        self.put(src, b"changed")
+        self.store.copy(src, dst, overwrite=True)
+        _expect(self.read(dst) == b"changed", "copy did not overwrite.")
+
+        self.put(src, b"again")
+        _raises(
+            (AlreadyExistsError, NotSupportedError),
+            "copy with overwrite=False onto an existing object",
+            lambda: self.store.copy(src, dst, overwrite=False),
+        )
+        _expect(self.read(dst) == b"changed", "A failed copy modified the destination.")
+        _raises(
+            NotFoundError,
+            "copy of a missing path",
+            lambda: self.store.copy(self.path("x"), dst),
+        )
+
+    def rename(self) -> None:
+        self.require("put", "get", "rename")
+        src, dst = self.path("src"), self.path("dst")
+        self.put(src, b"source")
+        self.written.add(dst)
+
+        self.store.rename(src, dst)
+        _expect(self.read(dst) == b"source", "rename did not move the object.")
+        _raises(NotFoundError, "get of a renamed path", lambda: self.read(src))
+
+        self.put(src, b"other")
+        _raises(
+            (AlreadyExistsError, NotSupportedError),
+            "rename with overwrite=False onto an existing object",
+            lambda: self.store.rename(src, dst, overwrite=False),
+        )
+        _expect(self.read(src) == b"other", "A failed rename modified the source.")
+        _expect(self.read(dst) == b"source", "A failed rename modified the target.")
+        self.store.rename(src, dst, overwrite=True)
+        _expect(self.read(dst) == b"other", "rename did not overwrite.")
+
+    def delete(self) -> None:
+        self.require("put", "get", "delete")
+        paths = [self.path(name) for name in ["a", "b", "c"]]
+        for path in paths:
+            self.put(path, b"x")
+
+        self.store.delete(paths[0])
+        self.store.delete(paths[1:])
+        for path in paths:
+            _raises(NotFoundError, "get of a deleted path", partial(self.read, path))
+
+        # Deleting a missing object may succeed or raise NotFoundError
+        try:
+            self.store.delete(self.path("missing"))
+        except Exception as e:
+            if not _is(e, NotFoundError):
+                raise
+
+    def async_(self) -> None:
+        self.require("put_async", "get_async")
+        asyncio.run(self._async())
+
+    async def _async(self) -> None:  # noqa: C901
+        data = self.random.randbytes(10_000)
+        path = self.path("object")
+
+        async def chunks() -> AsyncIterator[bytes]:
+            for i in range(0, len(data), 3000):
+                yield data[i : i + 3000]
+
+        self.written.add(path)
+        await self.store.put_async(path, chunks())
+        got = await self.store.get_async(path)
+        _expect(
+            b"".join([bytes(chunk) async for chunk in got]) == data,
+            "Iterating a GetResultAsync differs from the put bytes.",
+        )
+        got = await self.store.get_async(path)
+        _expect(
+            bytes(await got.buffer_async()) == data,
+            "get_async().buffer_async() differs from the put bytes.",
+        )
+        await _raises_async(
+            NotFoundError,
+            "get_async of a missing path",
+            lambda: self.store.get_async(self.path("x")),
+        )
+
+        store = self.store
+        if hasattr(store, "head_async"):
+            meta = await store.head_async(path)
+            _expect(meta["size"] == len(data), "head_async reports the wrong size.")
+        if hasattr(store, "get_range_async"):
+            buffer = await store.get_range_async(path, start=10, end=20)
+            _expect(bytes(buffer) == data[10:20], "get_range_async is wrong.")
+        if hasattr(store, "get_ranges_async"):
+            buffers = await store.get_ranges_async(path, starts=[5, 0], ends=[10, 5])
+            _expect(
+                [bytes(b) for b in buffers] == [data[5:10], data[:5]],
+                "get_ranges_async is wrong.",
+            )
+        if hasattr(store, "list_async"):
+            stream = store.list_async(self.prefix)
+            paths = [meta["path"] async for chunk in stream for meta in chunk]
+            _expect(paths == [path], f"list_async returned {paths}.")
+        if hasattr(store, "list_with_delimiter_async"):
+            result = await store.list_with_delimiter_async(self.prefix)
+            paths = [meta["path"] for meta in result["objects"]]
+            _expect(paths == [path], f"list_with_delimiter_async returned {paths}.")
+        if hasattr(store, "copy_async"):
+            self.written.add(self.path("copy"))
+            await store.copy_async(path, self.path("copy"))
+            got = await store.get_async(self.path("copy"))
+            _expect(bytes(await got.buffer_async()) == data, "copy_async is wrong.")
+        if hasattr(store, "rename_async"):
+            self.written.add(self.path("renamed"))
+            await store.rename_async(path, self.path("renamed"))
+            got = await store.get_async(self.path("renamed"))
+            _expect(bytes(await got.buffer_async()) == data, "rename_async is wrong.")
+        if hasattr(store, "delete_async"):
+            await store.delete_async(self.path("renamed"))
+            await _raises_async(
+                NotFoundError,
+                "get_async of a deleted path",
+                lambda: store.get_async(self.path("renamed")),
+            )
+
+    def stress_create(self) -> None:
+        self.require("put", "get")
+        for round_ in range(self.rounds):
+            path = self.path(f"create/{round_}")
+
+            def create(i: int, path: str = path) -> int | None:
+                try:
+                    self.put(path, str(i).encode(), mode="create")
+                except Exception as e:
+                    if _is(e, AlreadyExistsError):
+                        return None
+                    raise
+                return i
+
+            winners = [i for i in _parallel(self.workers, create) if i is not None]
+            _expect(
+                len(winners) == 1,
+                f"{len(winners)} concurrent puts with mode 'create' succeeded.",
+            )
+            _expect(
+                self.read(path) == str(winners[0]).encode(),
+                "The object is not the one written by the successful 'create'.",
+            )
+
+    def stress_update(self) -> None:
+        self.require("put", "get")
+        path = self.path("counter")
+        result = self.put(path, b"0")
+        if result["e_tag"] is None:
+            msg = "The store does not return e_tags, so cannot update conditionally."
+            raise NotSupportedError(msg)
+
+        def increment(_: int) -> int:
+            conflicts = 0
+            for _ in range(self.rounds):
+                while True:
+                    got = self.store.get(path)
+                    value = int(bytes(got.buffer()))
+                    mode = {"e_tag": got.meta["e_tag"], "version": got.meta["version"]}
+                    try:
+                        self.put(path, str(value + 1).encode(), mode=mode)
+                    except Exception as e:
+                        if not _is(e, PreconditionError):
+                            raise
+                        conflicts += 1
+                    else:
+                        break
+            return conflicts
+
+        _parallel(self.workers, increment)
+        value = int(self.read(path))
+        _expect(
+            value == self.workers * self.rounds,
+            f"{self.workers * self.rounds - value} of {self.workers * self.rounds} "
+            "concurrent conditional updates were lost.",
+        )
+
+    def stress_overwrite(self) -> None:
+        self.require("put", "get")
+        size = 256 * 1024
+        path = self.path("object")
+        self.put(path, bytes(size))
+        done = threading.Event()
+
+        def check(data: bytes, call: str) -> None:
+            _expect(
+                data.count(data[:1]) == len(data),
+                f"{call} during an overwrite mixed bytes of several versions.",
+            )
+
+        def work(i: int) -> int:
+            if i == 0:
+                try:
+                    for round_ in range(1, self.rounds + 1):
+                        self.put(path, bytes([round_ % 256]) * size)
+                finally:
+                    done.set()
+                return 0
+            reads = 0
+            while not done.is_set() or not reads:
+                got = self.store.get(path)
+                data = b"".join(bytes(chunk) for chunk in got)
+                _expect(len(data) == size, "get during an overwrite was truncated.")
+                check(data, "get")
+                if hasattr(self.store, "get_range"):
+                    start = self.random.randrange(size - 1000)
+                    check(
+                        bytes(self.store.get_range(path, start=start, length=1000)),
+                        "get_range",
+                    )
+                reads += 1
+            return reads
+
+        _parallel(self.workers, work)
+        _expect(
+            self.read(path) == bytes([self.rounds % 256]) * size,
+            "The object is not the last version written.",
+        )
+
+    def stress_get_ranges(self) -> None:
+        self.require("put", "get_ranges")
+        size = 4 * 1024 * 1024
+        data = self.random.randbytes(size)
+        path = self.path("object")
+        self.put(path, data)
+        seeds = [self.random.getrandbits(32) for _ in range(self.workers)]
+
+        def batch(i: int) -> None:
+            rng = random.Random(seeds[i])  # noqa: S311
+            for _ in range(max(self.rounds // self.workers, 1)):
+                starts = [rng.randrange(size) for _ in range(1000)]
+                lengths = [rng.randint(1, 64 * 1024) for _ in range(1000)]
+                got = self.store.get_ranges(path, starts=starts, lengths=lengths)
+                _expect(len(got) == len(starts), "get_ranges dropped ranges.")
+                for start, length, buffer in zip(starts, lengths, got):
+                    _expect(
+                        bytes(buffer) == data[start : start + length],
+                        f"get_ranges returned the wrong bytes for ({start}, "
+                        f"{start + length}) in a batch of 1000.",
+                    )
+
+        _parallel(self.workers, batch)
+
+
+def run_check(  # noqa: PLR0913
+    store: Any,  # noqa: ANN401
+    check: str,
+    *,
+    prefix: str = "obspec-conformance",
+    workers: int = DEFAULT_WORKERS,
+    rounds: int = DEFAULT_ROUNDS,
+    seed: int = 0,
+    cleanup: bool = True,
+) -> None:
+    """Run one conformance check against a store.
+
+    Args:
+        store: Any object implementing some of the obspec protocols.
+        check: The name of the check, from [`CHECKS`][obspec.testing.CHECKS].
+
+    Keyword Args:
+        prefix: The prefix beneath which to write objects. Each run writes beneath a
+            new, unique prefix within it, so the store does not need to be empty.
+        workers: The number of threads used by each stress phase.
+        rounds: The number of rounds of each stress phase.
+        seed: The seed for generated data and random ranges.
+        cleanup: Whether to delete the objects written afterwards.
+
+    Raises:
+        ConformanceError: If the store violated a documented behaviour.
+        NotSupportedError: If the store does not implement a method the check needs.
+
+    """
+    if check not in CHECKS:
+        msg = f"Unknown check: {check!r}. Expected any of {CHECKS}."
+        raise ValueError(msg)
+    checker = _Checker(store, prefix=prefix, workers=workers, rounds=rounds, seed=seed)
+    try:
+        getattr(checker, "async_" if check == "async" else check)()
+    finally:
+        if cleanup:
+            checker.cleanup()
+
+
+def run_conformance(  # noqa: PLR0913
+    factory: StoreFactory,
+    *,
+    checks: Sequence[str] | None = None,
+    stress: bool = True,
+    prefix: str = "obspec-conformance",
+    workers: int = DEFAULT_WORKERS,
+    rounds: int = DEFAULT_ROUNDS,
+    seed: int = 0,
+    cleanup: bool = True,
+) -> list[ConformanceResult]:
+    """Run conformance checks against a store and report the result of each.
+
+    Each check is run against a new store from `factory`. Checks that need a method
+    the store does not have, or that the store reports as unsupported with
+    [`NotSupportedError`][obspec.exceptions.NotSupportedError], are skipped. Any other
+    exception raised by the store fails the check.
+
+    Args:
+        factory: A callable returning the store to check.
+
+    Keyword Args:
+        checks: The names of the checks to run, from
+            [`CHECKS`][obspec.testing.CHECKS]. Defaults to all of them.
+        stress: Whether to run the [`STRESS_CHECKS`][obspec.testing.STRESS_CHECKS].
+            Defaults to `True`.
+        prefix: The prefix beneath which to write objects.
+        workers: The number of threads used by each stress phase.
+        rounds: The number of rounds of each stress phase.
+        seed: The seed for generated data and random ranges.
+        cleanup: Whether to delete the objects written afterwards.
+
+    Returns:
+        One result per check, in the order of [`CHECKS`][obspec.testing.CHECKS].
+
+    """
+    names = CHECKS if checks is None else checks
+    unknown = set(names) - set(CHECKS)
+    if unknown:
+        msg = f"Unknown checks: {sorted(unknown)}. Expected any of {CHECKS}."
+        raise ValueError(msg)
+
+    results: list[ConformanceResult] = []
+    for name in CHECKS:
+        if name not in names or (not stress and name in STRESS_CHECKS):
+            continue
+        start = time.perf_counter()
+        status: Literal["passed", "failed", "skipped"] = "passed"
+        message = None
+        try:
+            run_check(
+                factory(),
+                name,
+                prefix=prefix,
+                workers=workers,
+                rounds=rounds,
+                seed=seed,
+                cleanup=cleanup,
+            )
+        except Exception as e:  # noqa: BLE001
+            if _is(e, NotSupportedError):
+                status, message = "skipped", str(e)
+            else:
+                status = "failed"
+                message = str(e) if isinstance(e, ConformanceError) else repr(e)
+        results.append(
+            {
+                "check": name,
+                "status": status,
+                "message": message,
+                "seconds": time.perf_counter() - start,
+            },
+        )
+    return results
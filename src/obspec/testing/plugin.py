@@ -0,0 +1,76 @@
+"""Run the obspec conformance checks as pytest tests.
+
+Subclass [`StoreConformance`][obspec.testing.plugin.StoreConformance] in a test
+module and override its `store_factory` fixture. Every check in
+[`CHECKS`][obspec.testing.CHECKS] becomes one test, which is skipped when the store
+lacks the methods the check needs:
+
+```py
+import pytest
+from obspec.testing.plugin import StoreConformance
+
+class TestMyStore(StoreConformance):
+    rounds = 5
+
+    @pytest.fixture
+    def store_factory(self, tmp_path):
+        return lambda: MyStore(tmp_path)
+```
+"""
+
+from __future__ import annotations
+
+from typing import ClassVar
+
+import pytest
+
+from obspec.exceptions import NotSupportedError, map_exception
+
+from ._conformance import (
+    CHECKS,
+    DEFAULT_ROUNDS,
+    DEFAULT_WORKERS,
+    STRESS_CHECKS,
+    StoreFactory,
+    run_check,
+)
+
+
+class StoreConformance:
+    """A base class for pytest test classes checking one store implementation."""
+
+    stress: ClassVar[bool] = True
+    """Whether to run the [`STRESS_CHECKS`][obspec.testing.STRESS_CHECKS]."""
+
+    workers: ClassVar[int] = DEFAULT_WORKERS
+    """The number of threads used by each stress phase."""
+
+    rounds: ClassVar[int] = DEFAULT_ROUNDS
+    """The number of rounds of each stress phase."""
+
+    prefix: ClassVar[str] = "obspec-conformance"
+    """The prefix beneath which to write objects."""
+
+    @pytest.fixture
+    def store_factory(self) -> StoreFactory:
+        """Return a callable creating the store to check. Must be overridden."""
+        msg = "Override the `store_factory` fixture to return a store factory."
+        raise NotImplementedError(msg)
+
+    @pytest.mark.parametrize("check", CHECKS)
+    def test_conformance(self, store_factory: StoreFactory, check: str) -> None:
+        """Run one conformance check."""
+        if not self.stress and check in STRESS_CHECKS:
+            pytest.skip("Stress checks are disabled.")
+        try:
+            run_check(
+                store_factory(),
+                check,
+                prefix=self.prefix,
+                workers=self.workers,
+                rounds=self.rounds,
+            )
+        except Exception as e:
+            if isinstance(map_exception(e), NotSupportedError):
+                pytest.skip(str(e))
+            raise
@@ -0,0 +1,704 @@
+r"""A local HTTP server exposing any obspec store, for testing and load-testing clients.
+
+[`StoreServer`][obspec.testing.server.StoreServer] serves a store over HTTP or HTTPS
+with semantics that mirror the obspec protocols, and
+[`HTTPStore`][obspec.store.HTTPStore] is the matching client. Together they put a real
+network path, with injected latency, bandwidth caps and errors, between an
+application and its store on one machine, so that coalescing, concurrency and retry
+strategies can be measured without cloud access.
+
+| Request | Operation |
+| --- | --- |
+| `GET /{path}` | `get`, with `Range`, `If-Match`, `If-None-Match`, `If-Modified-Since`, `If-Unmodified-Since` and `?version=` |
+| `HEAD /{path}` | `get` with `head=True`, with the same conditions as `GET` |
+| `PUT /{path}` | `put`; `If-None-Match: *` for mode `"create"`, `If-Match` and `x-obspec-version` for an update |
+| `POST /{path}?uploads` | Start a multipart upload |
+| `PUT /{path}?upload_id=&part_number=` | Upload one part |
+| `POST /{path}?upload_id=` | Complete a multipart upload from a JSON list of part ETags |
+| `DELETE /{path}?upload_id=` | Abort a multipart upload |
+| `POST /{path}?copy_to=&overwrite=` | `copy` |
+| `POST /{path}?rename_to=&overwrite=` | `rename` |
+| `DELETE /{path}` | `delete` |
+| `POST /?delete` | Bulk `delete` of a JSON list of paths |
+| `GET /?list&prefix=&offset=&max_keys=` | One page of `list`, in lexicographic order; later pages are served from the first page's sorted listing |
+| `GET /?list&delimiter=/&prefix=` | `list_with_delimiter` |
+
+Errors are returned with the HTTP status for, and an `x-obspec-error` header naming,
+the obspec exception raised by the store, such as `NotFoundError` (404) or
+`PreconditionError` (412).
+
+```py
+from obspec.store import HTTPStore, MemoryStore
+from obspec.testing.server import StoreServer
+
+with StoreServer(MemoryStore(), latency=0.02, faults={"SlowDown": 0.01}) as server:
+    store = HTTPStore(server.url)
+    store.put("data", b"hello")
+    print(server.stats())
+```
+
+The server can also be run as its own process, serving a directory with
+[`LocalStore`][obspec.store.LocalStore] or, by default, an empty
+[`MemoryStore`][obspec.store.MemoryStore]:
+
+```sh
+python -m obspec.testing.server --root ./data --port 8000 --latency 0.02 \
+    --bandwidth 50000000 --fault SlowDown=0.01
+```
+"""  # noqa: E501
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, TypedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from obspec.exceptions import BaseError, NotFoundError, map_exception
+from obspec.store import LocalStore, MemoryStore
+from obspec.store._http import (
+    ATTRIBUTES_HEADER,
+    ERROR_HEADER,
+    ERROR_STATUS,
+    LAST_MODIFIED_HEADER,
+    TAGS_HEADER,
+    VERSION_HEADER,
+    format_http_date,
+    meta_to_json,
+)
+
+if TYPE_CHECKING:
+    import ssl
+    from collections.abc import Iterable, Mapping, Sequence
+
+    from obspec import GetOptions, ObjectMeta, PutMode, PutResult
+
+    if sys.version_info >= (3, 11):
+        from typing import Self
+    else:
+        from typing_extensions import Self
+
+_IO_CHUNK_SIZE = 64 * 1024
+
+_MAX_LISTINGS = 64
+"""The number of listings in progress whose sorted objects are kept for their next
+page."""
+
+
+class ServerStats(TypedDict):
+    """Counters describing the traffic handled by a
+    [`StoreServer`][obspec.testing.server.StoreServer].
+    """  # noqa: D205
+
+    requests: int
+    """The number of requests received."""
+
+    faults: int
+    """The number of requests answered with an injected error."""
+
+    bytes_received: int
+    """The number of request body bytes received."""
+
+    bytes_sent: int
+    """The number of response body bytes sent."""
+
+
+class _Fault(Exception):  # noqa: N818
+    def __init__(self, name: str) -> None:
+        super().__init__(f"Injected {name}.")
+        self.name = name
+
+
+class _Upload:
+    def __init__(
+        self,
+        path: str,
+        attributes: dict[str, str] | None,
+        tags: dict[str, str] | None,
+    ) -> None:
+        self.path = path
+        self.attributes = attributes
+        self.tags = tags
+        self.parts: dict[int, tuple[str, bytes]] = {}
+
+
+def _error_name(error: Exception) -> str:
+    if isinstance(error, _Fault):
+        return error.name
+    mapped = map_exception(error)
+    if isinstance(mapped, BaseError):
+        for cls in type(mapped).__mro__:
+            if cls.__name__ in ERROR_STATUS:
+                return cls.__name__
+    if isinstance(error, (ValueError, TypeError)):
+        return "ValueError"
+    return "InternalError"
+
+
+def _parse_range(value: str) -> Any:  # noqa: ANN401
+    unit, _, spec = value.partition("=")
+    first, dash, last = spec.strip().partition("-")
+    if unit.strip() != "bytes" or not dash or "," in spec:
+        msg = f"Unsupported Range header: {value!r}."
+        raise ValueError(msg)
+    if not first:
+        return {"suffix": int(last)}
+    if not last:
+        return {"offset": int(first)}
+    return (int(first), int(last) + 1)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, so without TCP_NODELAY small responses
+    # on a keep-alive connection wait for the client's delayed ACK.
+    disable_nagle_algorithm = True
+    server: _HTTPServer
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002, ANN401
+        pass
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_HEAD(self) -> None:
+        self._handle("HEAD")
+
+    def do_PUT(self) -> None:
+        self._handle("PUT")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
+
+    # Transport
+
+    def _handle(self, method: str) -> None:
+        owner = self.server.owner
+        owner._count("requests", 1)  # noqa: SLF001
+        parts = urlsplit(self.path)
+        self._key = unquote(parts.path).lstrip("/")
+        query = parse_qs(parts.query, keep_blank_values=True)
+        self._query = {name: values[-1] for name, values in query.items()}
+        self._started = False
+        try:
+            self._body = self._receive()
+            owner._delay()  # noqa: SLF001
+            owner._inject()  # noqa: SLF001
+            self._dispatch(method)
+        except Exception as e:  # noqa: BLE001
+            if self._started:
+                # The response is already under way, so the client sees a truncated
+                # body instead.
+                self.close_connection = True
+            else:
+                self._error(e)
+
+    def _receive(self) -> bytes:
+        remaining = int(self.headers.get("Content-Length", 0))
+        chunks = []
+        while remaining:
+            chunk = self.rfile.read(min(remaining, _IO_CHUNK_SIZE))
+            if not chunk:
+                msg = "The request body was truncated."
+                raise ValueError(msg)
+            chunks.append(chunk)
+            remaining -= len(chunk)
+            self.server.owner._throttle(len(chunk), "bytes_received")  # noqa: SLF001
+        return b"".join(chunks)
+
+    def _start(self, status: int, headers: Mapping[str, str | None]) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            if value is not None:
+                self.send_header(name, value)
+        self.end_headers()
+        self._started = True
+
+    def _send(self, chunks: Iterable[Any]) -> None:
+        for chunk in chunks:
+            view = memoryview(chunk).cast("B")
+            for i in range(0, len(view), _IO_CHUNK_SIZE):
+                part = view[i : i + _IO_CHUNK_SIZE]
+                self.wfile.write(part)
+                self.server.owner._throttle(len(part), "bytes_sent")  # noqa: SLF001
+
+    def _reply(
+        self,
+        status: int = 200,
+        body: bytes = b"",
+        headers: Mapping[str, str | None] | None = None,
+    ) -> None:
+        self._start(status, {**(headers or {}), "Content-Length": str(len(body))})
+        self._send([body])
+
+    def _json(self, data: Any) -> None:  # noqa: ANN401
+        body = json.dumps(data).encode()
+        self._reply(body=body, headers={"Content-Type": "application/json"})
+
+    def _error(self, error: Exception) -> None:
+        name = _error_name(error)
+        status = ERROR_STATUS[name]
+        headers = {ERROR_HEADER: name}
+        if status == 304 or self.command == "HEAD":  # noqa: PLR2004
+            self._start(status, {**headers, "Content-Length": "0"})
+            return
+        body = json.dumps({"error": name, "message": str(error)}).encode()
+        self._reply(status, body, {**headers, "Content-Type": "application/json"})
+
+    # Operations
+
+    def _dispatch(self, method: str) -> None:  # noqa: C901, PLR0911, PLR0912
+        query = self._query
+        if method == "GET":
+            if "list" in query:
+                return self._list()
+            return self._get()
+        if method == "HEAD":
+            return self._head()
+        if method == "PUT":
+            if "upload_id" in query:
+                return self._put_part()
+            return self._put()
+        if method == "POST":
+            if "uploads" in query:
+                return self._create_multipart()
+            if "upload_id" in query:
+                return self._complete_multipart()
+            if "copy_to" in query:
+                return self._copy("copy", query["copy_to"])
+            if "rename_to" in query:
+                return self._copy("rename", query["rename_to"])
+            if "delete" in query:
+                paths = json.loads(self._body)["paths"]
+                self.server.owner.store.delete(paths)
+                return self._reply()
+        if method == "DELETE":
+            if "upload_id" in query:
+                self.server.owner._uploads_pop(query["upload_id"])  # noqa: SLF001
+            else:
+                self.server.owner.store.delete(self._key)
+            return self._reply()
+        msg = f"Unsupported request: {method} {self.path}."
+        raise ValueError(msg)
+
+    def _meta_headers(self, meta: ObjectMeta) -> dict[str, str | None]:
+        return {
+            "ETag": meta["e_tag"],
+            VERSION_HEADER: meta["version"],
+            "Last-Modified": format_http_date(meta["last_modified"]),
+            LAST_MODIFIED_HEADER: meta["last_modified"].isoformat(),
+        }
+
+    def _get_options(self) -> GetOptions:
+        options: GetOptions = {}
+        if "Range" in self.headers:
+            options["range"] = _parse_range(self.headers["Range"])
+        for header, option in [
+            ("If-Match", "if_match"),
+            ("If-None-Match", "if_none_match"),
+        ]:
+            if header in self.headers:
+                options[option] = self.headers[header]  # type: ignore[literal-required]
+        for header, option in [
+            ("If-Modified-Since", "if_modified_since"),
+            ("If-Unmodified-Since", "if_unmodified_since"),
+        ]:
+            if header in self.headers:
+                value = parsedate_to_datetime(self.headers[header])
+                options[option] = value  # type: ignore[literal-required]
+        if "version" in self._query:
+            options["version"] = self._query["version"]
+        return options
+
+    def _get(self) -> None:
+        options = self._get_options()
+        result = self.server.owner.store.get(self._key, options=options)
+        meta = result.meta
+        start, end = result.range
+        headers = self._meta_headers(meta)
+        headers["Content-Length"] = str(end - start)
+        headers[ATTRIBUTES_HEADER] = json.dumps(dict(result.attributes))
+        status = 200
+        if "range" in options:
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{meta['size']}"
+        self._start(status, headers)
+        self._send(result)
+
+    def _head(self) -> None:
+        # Served by `get`, like the GET it describes, so that conditions and versions
+        # apply.
+        options: GetOptions = {**self._get_options(), "head": True}
+        options.pop("range", None)
+        result = self.server.owner.store.get(self._key, options=options)
+        headers = self._meta_headers(result.meta)
+        headers["Content-Length"] = str(result.meta["size"])
+        headers[ATTRIBUTES_HEADER] = json.dumps(dict(result.attributes))
+        self._start(200, headers)
+
+    def _put_args(self) -> dict[str, Any]:
+        headers = self.headers
+        return {
+            "attributes": json.loads(headers.get(ATTRIBUTES_HEADER, "null")),
+            "tags": json.loads(headers.get(TAGS_HEADER, "null")),
+        }
+
+    def _put_mode(self) -> PutMode:
+        if self.headers.get("If-None-Match") == "*":
+            return "create"
+        e_tag = self.headers.get("If-Match")
+        version = self.headers.get(VERSION_HEADER)
+        if e_tag is None and version is None:
+            return "overwrite"
+        return {"e_tag": e_tag, "version": version}
+
+    def _put_reply(self, result: PutResult) -> None:
+        headers = {"ETag": result["e_tag"], VERSION_HEADER: result["version"]}
+        self._reply(headers=headers)
+
+    def _put(self) -> None:
+        kwargs = {key: value for key, value in self._put_args().items() if value}
+        result = self.server.owner.store.put(
+            self._key,
+            self._body,
+            mode=self._put_mode(),
+            **kwargs,
+        )
+        self._put_reply(result)
+
+    def _create_multipart(self) -> None:
+        upload = _Upload(self._key, **self._put_args())
+        self._json({"upload_id": self.server.owner._uploads_add(upload)})  # noqa: SLF001
+
+    def _put_part(self) -> None:
+        upload = self.server.owner._uploads_get(self._query["upload_id"])  # noqa: SLF001
+        part_number = int(self._query["part_number"])
+        e_tag = f'"{hashlib.md5(self._body, usedforsecurity=False).hexdigest()}"'
+        upload.parts[part_number] = (e_tag, self._body)
+        self._reply(headers={"ETag": e_tag})
+
+    def _complete_multipart(self) -> None:
+        owner = self.server.owner
+        upload = owner._uploads_get(self._query["upload_id"])  # noqa: SLF001
+        e_tags: Sequence[str] = json.loads(self._body)["parts"]
+        parts = [upload.parts.get(i + 1) for i in range(len(e_tags))]
+        if [part and part[0] for part in parts] != list(e_tags):
+            msg = "The part ETags do not match the uploaded parts."
+            raise ValueError(msg)
+        kwargs = {"attributes": upload.attributes, "tags": upload.tags}
+        result = owner.store.put(
+            upload.path,
+            [part[1] for part in parts if part],
+            **{key: value for key, value in kwargs.items() if value},
+        )
+        owner._uploads_pop(self._query["upload_id"])  # noqa: SLF001
+        self._put_reply(result)
+
+    def _copy(self, operation: str, to: str) -> None:
+        overwrite = self._query.get("overwrite", "true") != "false"
+        getattr(self.server.owner.store, operation)(self._key, to, overwrite=overwrite)
+        self._reply()
+
+    def _list(self) -> None:
+        store = self.server.owner.store
+        prefix = self._query.get("prefix")
+        if self._query.get("delimiter"):
+            result = store.list_with_delimiter(prefix)
+            self._json(
+                {
+                    "common_prefixes": list(result["common_prefixes"]),
+                    "objects": [meta_to_json(meta) for meta in result["objects"]],
+                },
+            )
+            return
+        offset = self._query.get("offset")
+        max_keys = int(self._query.get("max_keys", 1000))
+        owner = self.server.owner
+        listing = owner._listings_pop(prefix, offset)  # noqa: SLF001
+        if listing is None:
+            objects = [
+                meta for chunk in store.list(prefix, offset=offset) for meta in chunk
+            ]
+            objects.sort(key=lambda meta: meta["path"])
+            listing = (objects, 0)
+        objects, start = listing
+        page = objects[start : start + max_keys]
+        if start + max_keys < len(objects):
+            owner._listings_add(  # noqa: SLF001
+                prefix,
+                page[-1]["path"],
+                (objects, start + max_keys),
+            )
+        self._json({"objects": [meta_to_json(meta) for meta in page]})
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+    owner: StoreServer
+
+    def handle_error(self, request: Any, client_address: Any) -> None:  # noqa: ANN401
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            # The client closed the connection, such as a pooled keep-alive
+            # connection being discarded.
+            return
+        super().handle_error(request, client_address)
+
+
+class StoreServer:
+    """An HTTP server exposing an obspec store, with injectable latency, bandwidth
+    caps and errors.
+
+    The server handles each connection on its own thread, and calls the store's
+    synchronous methods: [`Get`][obspec.Get], [`Head`][obspec.Head],
+    [`Put`][obspec.Put], [`List`][obspec.List],
+    [`ListWithDelimiter`][obspec.ListWithDelimiter], [`Copy`][obspec.Copy],
+    [`Rename`][obspec.Rename] and [`Delete`][obspec.Delete]. Multipart uploads are
+    staged in memory and committed with one `put`.
+
+    `latency`, `jitter`, `bandwidth` and `faults` are plain attributes, and may be
+    changed while the server is running.
+    """  # noqa: D205
+
+    def __init__(  # noqa: PLR0913
+        self,
+        store: Any = None,  # noqa: ANN401
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        bandwidth: float | None = None,
+        faults: Mapping[str, float] | None = None,
+        seed: int | None = None,
+        ssl_context: ssl.SSLContext | None = None,
+    ) -> None:
+        """Create a new StoreServer, bound to `host` and `port`.
+
+        Args:
+            store: The store to serve. Defaults to a new, empty
+                [`MemoryStore`][obspec.store.MemoryStore].
+
+        Keyword Args:
+            host: The address to listen on. Defaults to `127.0.0.1`.
+            port: The port to listen on. Defaults to `0`, which picks a free port.
+            latency: The delay, in seconds, added before each response. Defaults to 0.
+            jitter: The maximum extra delay, in seconds, drawn uniformly and added to
+                `latency` for each response. Defaults to 0.
+            bandwidth: The maximum transfer rate, in bytes per second, of each
+                request and response body. `None` is unlimited. Defaults to `None`.
+            faults: The probability, between 0 and 1, of answering a request with
+                each error, by name. Names are keys of `ERROR_STATUS`: obspec
+                exception names such as `NotFoundError` or `PreconditionError`, or the
+                transient `InternalError` (500) and `SlowDown` (503). Defaults to no
+                faults.
+            seed: The seed for jitter and faults. Defaults to `None`.
+            ssl_context: A server-side SSL context. If given, the server speaks
+                HTTPS. Defaults to `None`.
+
+        """
+        self.store: Any = MemoryStore() if store is None else store
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.faults = dict(faults or {})
+        unknown = set(self.faults) - set(ERROR_STATUS)
+        if unknown:
+            msg = f"Unknown faults: {sorted(unknown)}. Expected any of {ERROR_STATUS}."
+            raise ValueError(msg)
+
+        self._random = random.Random(seed)  # noqa: S311
+        self._lock = threading.Lock()
+        self._uploads: dict[str, _Upload] = {}
+        self._listings: OrderedDict[
+            tuple[str | None, str],
+            tuple[list[ObjectMeta], int],
+        ] = OrderedDict()
+        self._stats: ServerStats = {
+            "requests": 0,
+            "faults": 0,
+            "bytes_received": 0,
+            "bytes_sent": 0,
+        }
+        self._thread: threading.Thread | None = None
+        self._httpd = _HTTPServer((host, port), _Handler)
+        self._httpd.owner = self
+        self._scheme = "http"
+        if ssl_context is not None:
+            self._httpd.socket = ssl_context.wrap_socket(
+                self._httpd.socket,
+                server_side=True,
+            )
+            self._scheme = "https"
+
+    def __repr__(self) -> str:  # noqa: D105
+        return f"StoreServer({self.store!r}, url={self.url!r})"
+
+    @property
+    def url(self) -> str:
+        """The base URL of the server, to pass to [`HTTPStore`][obspec.store.HTTPStore]."""  # noqa: E501
+        host, port = self._httpd.socket.getsockname()[:2]
+        return f"{self._scheme}://{host}:{port}"
+
+    def stats(self) -> ServerStats:
+        """Return the server's counters."""
+        with self._lock:
+            return self._stats.copy()
+
+    def start(self) -> Self:
+        """Start serving requests on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._httpd.serve_forever,
+                name="obspec-store-server",
+                daemon=True,
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving requests and close the listening socket."""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def serve_forever(self) -> None:
+        """Serve requests on the calling thread until interrupted."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def __enter__(self) -> Self:  # noqa: D105
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:  # noqa: D105
+        self.stop()
+
+    def _count(self, key: str, n: int) -> None:
+        with self._lock:
+            self._stats[key] += n  # type: ignore[literal-required]
+
+    def _delay(self) -> None:
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _inject(self) -> None:
+        with self._lock:
+            fault = next(
+                (n for n, rate in self.faults.items() if self._random.random() < rate),
+                None,
+            )
+        if fault is not None:
+            self._count("faults", 1)
+            raise _Fault(fault)
+
+    def _throttle(self, n: int, key: str) -> None:
+        self._count(key, n)
+        if self.bandwidth:
+            time.sleep(n / self.bandwidth)
+
+    def _uploads_add(self, upload: _Upload) -> str:
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self._uploads[upload_id] = upload
+        return upload_id
+
+    def _uploads_get(self, upload_id: str) -> _Upload:
+        with self._lock:
+            upload = self._uploads.get(upload_id)
+        if upload is None:
+            msg = f"Upload not found: {upload_id!r}."
+            raise NotFoundError(msg)
+        return upload
+
+    def _listings_add(
+        self,
+        prefix: str | None,
+        offset: str,
+        listing: tuple[list[ObjectMeta], int],
+    ) -> None:
+        with self._lock:
+            self._listings[prefix, offset] = listing
+            while len(self._listings) > _MAX_LISTINGS:
+                self._listings.popitem(last=False)
+
+    def _listings_pop(
+        self,
+        prefix: str | None,
+        offset: str | None,
+    ) -> tuple[list[ObjectMeta], int] | None:
+        if offset is None:
+            return None
+        with self._lock:
+            return self._listings.pop((prefix, offset), None)
+
+    def _uploads_pop(self, upload_id: str) -> None:
+        with self._lock:
+            upload = self._uploads.pop(upload_id, None)
+        if upload is None:
+            msg = f"Upload not found: {upload_id!r}."
+            raise NotFoundError(msg)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run a StoreServer from the command line until interrupted."""
+    parser = argparse.ArgumentParser(
+        prog="python -m obspec.testing.server",
+        description="Serve an obspec store over HTTP.",
+    )
+    parser.add_argument(
+        "--root",
+        help="Serve this directory with LocalStore. Defaults to an empty MemoryStore.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=float, default=None)
+    parser.add_argument(
+        "--fault",
+        action="append",
+        default=[],
+        metavar="NAME=RATE",
+        help="Fail a fraction of requests with an error. May be given more than once.",
+    )
+    args = parser.parse_args(argv)
+
+    faults = {}
+    for fault in args.fault:
+        name, _, rate = fault.partition("=")
+        faults[name] = float(rate)
+    server = StoreServer(
+        LocalStore(args.root, mkdir=True) if args.root else MemoryStore(),
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        bandwidth=args.bandwidth,
+        faults=faults,
+    )
+    print(f"Serving {server.store!r} on {server.url}", flush=True)  # noqa: T201
+    with contextlib.suppress(KeyboardInterrupt):
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
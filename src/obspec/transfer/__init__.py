@@ -0,0 +1,46 @@
+"""Utilities for moving whole objects between stores and the local machine.
+
+- [`ParallelDownloader`][obspec.transfer.ParallelDownloader] downloads one large
+  object as many concurrent range requests.
+- [`MultipartUploader`][obspec.transfer.MultipartUploader] implements `Put` on top
+  of multipart upload primitives, with bounded memory and parallel parts.
+- [`sync_prefix_async`][obspec.transfer.sync_prefix_async] copies or mirrors every
+  object under a prefix, within one store or between stores.
+- [`ParallelGetter`][obspec.transfer.ParallelGetter] implements `GetMany` on top of
+  `Get`, fetching many small objects with bounded concurrency.
+"""
+
+from ._download import DownloadSource, ParallelDownloader
+from ._many import DEFAULT_GET_MANY_CONCURRENCY, GetManySource, ParallelGetter
+from ._sync import (
+    DEFAULT_DELETE_BATCH_SIZE,
+    DEFAULT_SYNC_CONCURRENCY,
+    SyncCompare,
+    SyncStats,
+    sync_prefix_async,
+)
+from ._upload import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_RETRY_BACKOFF,
+    MultipartUploader,
+    PutMultipart,
+    PutMultipartAsync,
+)
+
+__all__ = [
+    "DEFAULT_DELETE_BATCH_SIZE",
+    "DEFAULT_GET_MANY_CONCURRENCY",
+    "DEFAULT_MAX_ATTEMPTS",
+    "DEFAULT_RETRY_BACKOFF",
+    "DEFAULT_SYNC_CONCURRENCY",
+    "DownloadSource",
+    "GetManySource",
+    "MultipartUploader",
+    "ParallelDownloader",
+    "ParallelGetter",
+    "PutMultipart",
+    "PutMultipartAsync",
+    "SyncCompare",
+    "SyncStats",
+    "sync_prefix_async",
+]
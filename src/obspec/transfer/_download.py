@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Union
+
+from obspec._util import (
+    as_memoryview,
+    fetch_meta,
+    fetch_meta_async,
+    gather_or_cancel,
+)
+from obspec.exceptions import NotSupportedError, PreconditionError
+from obspec.ranges import DEFAULT_MAX_CONCURRENCY, DEFAULT_PART_SIZE
+
+if sys.version_info >= (3, 10):
+    from typing import TypeAlias
+else:
+    from typing_extensions import TypeAlias
+
+if TYPE_CHECKING:
+    from obspec import GetOptions, ObjectMeta
+    from obspec._get import Get, GetAsync, GetRange, GetRangeAsync
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+DownloadSource: TypeAlias = Union["Get", "GetRange", "GetAsync", "GetRangeAsync"]
+"""A client that a [`ParallelDownloader`][obspec.transfer.ParallelDownloader] can
+fetch ranges from.
+
+[`Get`][obspec.Get] and [`GetAsync`][obspec.GetAsync] are preferred, as they allow
+every range request to be pinned to one version of the object. The client should also
+implement [`Head`][obspec.Head] or [`HeadAsync`][obspec.HeadAsync]; otherwise a `get`
+request with `head=True` is used to fetch the object's metadata.
+"""
+
+
+def _pin(meta: ObjectMeta) -> GetOptions:
+    options: GetOptions = {}
+    if meta["e_tag"] is not None:
+        options["if_match"] = meta["e_tag"]
+    if meta["version"] is not None:
+        options["version"] = meta["version"]
+    return options
+
+
+def _check_unchanged(before: ObjectMeta, after: ObjectMeta) -> None:
+    if (
+        before["size"] != after["size"]
+        or before["e_tag"] != after["e_tag"]
+        or before["version"] != after["version"]
+        or before["last_modified"] != after["last_modified"]
+    ):
+        msg = f"{before['path']}: object was modified during download."
+        raise PreconditionError(msg)
+
+
+def _short_read(path: str, start: int, end: int, n: int) -> PreconditionError:
+    msg = (
+        f"{path}: expected {end - start} bytes at offset {start}, got {n}. The object "
+        "was modified during download."
+    )
+    return PreconditionError(msg)
+
+
+class _Writer:
+    """Writes parts at arbitrary offsets into a file or a writable buffer."""
+
+    def __init__(self, dest: str | os.PathLike[str] | Buffer, size: int) -> None:
+        self._fd: int | None = None
+        self._view: memoryview | None = None
+        self._lock = threading.Lock()
+
+        if isinstance(dest, (str, os.PathLike)):
+            flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+            self._fd = os.open(dest, flags, 0o666)
+            os.ftruncate(self._fd, size)
+            return
+
+        view = as_memoryview(dest)
+        if view.readonly:
+            msg = "The destination buffer is read-only."
+            raise ValueError(msg)
+        if len(view) < size:
+            msg = f"The destination buffer holds {len(view)} bytes, need {size}."
+            raise ValueError(msg)
+        self._view = view
+
+    def write(self, offset: int, data: memoryview) -> None:
+        if self._view is not None:
+            self._view[offset : offset + len(data)] = data
+            return
+
+        assert self._fd is not None  # noqa: S101
+        if hasattr(os, "pwrite"):
+            while data:
+                n = os.pwrite(self._fd, data, offset)
+                data = data[n:]
+                offset += n
+        else:
+            with self._lock:
+                os.lseek(self._fd, offset, os.SEEK_SET)
+                while data:
+                    data = data[os.write(self._fd, data) :]
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class ParallelDownloader:
+    """Download one object as many concurrent range requests.
+
+    A single streaming `get` is limited by the throughput of one connection. This
+    downloader fetches the object's metadata, splits it into parts of `part_size`
+    bytes and fetches the parts concurrently, writing each directly into its place in
+    the destination: a file, or any writable buffer such as a `bytearray` or a
+    writable `mmap.mmap`.
+
+    At most `max_concurrency` requests are in flight at once, so at most about
+    `max_concurrency * part_size` bytes of response data are held in memory.
+
+    Every part is requested with `if_match` set to the `e_tag` (and `version` set to
+    the version, if any) returned by the initial metadata request, so the result never
+    mixes data from two versions of the object. If the client only implements
+    `get_range`, which cannot be pinned, the metadata is fetched again after all
+    parts have been downloaded and compared instead.
+
+    Synchronous downloads use a thread pool; asynchronous downloads use the event
+    loop.
+
+    ```py
+    from obspec.transfer import ParallelDownloader
+
+    downloader = ParallelDownloader(store, part_size=16 * 1024 * 1024)
+    meta = downloader.download("large.bin", "/tmp/large.bin")
+    ```
+    """
+
+    def __init__(
+        self,
+        client: DownloadSource,
+        *,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        """Create a new ParallelDownloader.
+
+        Args:
+            client: The client to download from.
+
+        Keyword Args:
+            part_size: The size, in bytes, of each range request. Defaults to 8 MiB.
+            max_concurrency: The maximum number of requests in flight at once.
+                Defaults to 10.
+
+        """
+        if part_size < 1:
+            msg = f"part_size must be at least 1, got {part_size}."
+            raise ValueError(msg)
+        if max_concurrency < 1:
+            msg = f"max_concurrency must be at least 1, got {max_concurrency}."
+            raise ValueError(msg)
+
+        self.client = client
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+
+    def _parts(self, size: int) -> list[tuple[int, int]]:
+        return [
+            (start, min(start + self.part_size, size))
+            for start in range(0, size, self.part_size)
+        ]
+
+    def _fetch_part(
+        self,
+        path: str,
+        start: int,
+        end: int,
+        pin: GetOptions,
+        writer: _Writer,
+    ) -> None:
+        client: Any = self.client
+        offset = start
+        if hasattr(client, "get"):
+            options: GetOptions = {**pin, "range": (start, end)}
+            for chunk in client.get(path, options=options):
+                view = as_memoryview(chunk)[: end - offset]
+                writer.write(offset, view)
+                offset += len(view)
+        else:
+            view = as_memoryview(client.get_range(path, start=start, end=end))
+            writer.write(offset, view[: end - offset])
+            offset += min(len(view), end - offset)
+
+        if offset != end:
+            raise _short_read(path, start, end, offset - start)
+
+    async def _fetch_part_async(
+        self,
+        path: str,
+        start: int,
+        end: int,
+        pin: GetOptions,
+        writer: _Writer,
+    ) -> None:
+        client: Any = self.client
+        offset = start
+        if hasattr(client, "get_async"):
+            options: GetOptions = {**pin, "range": (start, end)}
+            async for chunk in await client.get_async(path, options=options):
+                view = as_memoryview(chunk)[: end - offset]
+                writer.write(offset, view)
+                offset += len(view)
+        else:
+            buffer = await client.get_range_async(path, start=start, end=end)
+            view = as_memoryview(buffer)
+            writer.write(offset, view[: end - offset])
+            offset += min(len(view), end - offset)
+
+        if offset != end:
+            raise _short_read(path, start, end, offset - start)
+
+    def _check_capabilities(self, *methods: str) -> None:
+        client = self.client
+        if not any(hasattr(client, method) for method in methods):
+            names = " nor ".join(f"`{method}`" for method in methods)
+            msg = f"{type(client).__name__} implements neither {names}."
+            raise NotSupportedError(msg)
+
+    def _run(self, path: str, meta: ObjectMeta, writer: _Writer) -> None:
+        pin = _pin(meta) if hasattr(self.client, "get") else {}
+        executor = ThreadPoolExecutor(self.max_concurrency)
+        try:
+            futures = [
+                executor.submit(self._fetch_part, path, start, end, pin, writer)
+                for start, end in self._parts(meta["size"])
+            ]
+            for future in futures:
+                future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            writer.close()
+
+        if not pin:
+            _check_unchanged(meta, fetch_meta(self.client, path))
+
+    async def _run_async(self, path: str, meta: ObjectMeta, writer: _Writer) -> None:
+        pin = _pin(meta) if hasattr(self.client, "get_async") else {}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(start: int, end: int) -> None:
+            async with semaphore:
+                await self._fetch_part_async(path, start, end, pin, writer)
+
+        try:
+            await gather_or_cancel(
+                *(fetch(start, end) for start, end in self._parts(meta["size"])),
+            )
+        finally:
+            writer.close()
+
+        if not pin:
+            _check_unchanged(meta, await fetch_meta_async(self.client, path))
+
+    def download(self, path: str, dest: str | os.PathLike[str] | Buffer) -> ObjectMeta:
+        """Download the object at `path` into `dest`.
+
+        Args:
+            path: The path of the object to download.
+            dest: A local file path, which is created or overwritten, or a writable
+                buffer at least as large as the object. If the download fails, `dest`
+                may be left partially written.
+
+        Raises:
+            PreconditionError: If the object was modified during the download.
+
+        Returns:
+            The metadata of the downloaded object.
+
+        """
+        self._check_capabilities("get", "get_range")
+        meta = fetch_meta(self.client, path)
+        self._run(path, meta, _Writer(dest, meta["size"]))
+        return meta
+
+    async def download_async(
+        self,
+        path: str,
+        dest: str | os.PathLike[str] | Buffer,
+    ) -> ObjectMeta:
+        """Call `download` asynchronously.
+
+        Refer to the documentation for
+        [`download`][obspec.transfer.ParallelDownloader.download].
+        """
+        self._check_capabilities("get_async", "get_range_async")
+        meta = await fetch_meta_async(self.client, path)
+        await self._run_async(path, meta, _Writer(dest, meta["size"]))
+        return meta
+
+    def read(self, path: str) -> Buffer:
+        """Download the object at `path` into memory.
+
+        Refer to the documentation for
+        [`download`][obspec.transfer.ParallelDownloader.download].
+
+        Returns:
+            The contents of the object.
+
+        """
+        self._check_capabilities("get", "get_range")
+        meta = fetch_meta(self.client, path)
+        out = bytearray(meta["size"])
+        self._run(path, meta, _Writer(out, meta["size"]))
+        return out
+
+    async def read_async(self, path: str) -> Buffer:
+        """Call `read` asynchronously.
+
+        Refer to the documentation for
+        [`read`][obspec.transfer.ParallelDownloader.read].
+        """
+        self._check_capabilities("get_async", "get_range_async")
+        meta = await fetch_meta_async(self.client, path)
+        out = bytearray(meta["size"])
+        await self._run_async(path, meta, _Writer(out, meta["size"]))
+        return out
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Union
+
+from obspec.exceptions import NotSupportedError
+
+if sys.version_info >= (3, 10):
+    from typing import TypeAlias
+else:
+    from typing_extensions import TypeAlias
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+    from obspec import GetOptions
+    from obspec._get import Get, GetAsync
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+DEFAULT_GET_MANY_CONCURRENCY = 64
+"""The default number of requests in flight at once in a
+[`ParallelGetter`][obspec.transfer.ParallelGetter]."""
+
+GetManySource: TypeAlias = Union["Get", "GetAsync"]
+"""A client that a [`ParallelGetter`][obspec.transfer.ParallelGetter] can fetch
+objects from."""
+
+_DONE = object()
+
+
+def _split(item: str | tuple[str, GetOptions]) -> tuple[str, GetOptions | None]:
+    if isinstance(item, str):
+        return item, None
+    return item
+
+
+async def _aiter(
+    items: Iterable[str | tuple[str, GetOptions]]
+    | AsyncIterable[str | tuple[str, GetOptions]],
+) -> AsyncIterator[str | tuple[str, GetOptions]]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:  # type: ignore[union-attr]
+            yield item
+    else:
+        for item in items:  # type: ignore[union-attr]
+            yield item
+
+
+def _outcome(future: Future[Buffer] | asyncio.Future[Buffer]) -> Buffer | Exception:
+    exception = future.exception()
+    if exception is None:
+        return future.result()
+    if not isinstance(exception, Exception):
+        raise exception
+    return exception
+
+
+class ParallelGetter:
+    """Implement [`GetMany`][obspec.GetMany] and [`GetManyAsync`][obspec.GetManyAsync]
+    on top of [`Get`][obspec.Get] and [`GetAsync`][obspec.GetAsync].
+
+    At most `max_concurrency` requests are in flight at once. New requests are only
+    started as results are taken from the iterator, so a slow consumer applies
+    backpressure, and at most `max_concurrency` results are held in memory. With
+    `ordered=True`, a slow request holds back later results, but requests continue
+    up to `max_concurrency` ahead of it.
+
+    Synchronous calls use a thread pool; asynchronous calls use the event loop.
+
+    ```py
+    from obspec.transfer import ParallelGetter
+
+    getter = ParallelGetter(store, max_concurrency=256)
+    async for path, result in getter.get_many_async(paths):
+        if isinstance(result, Exception):
+            ...
+    ```
+    """  # noqa: D205
+
+    def __init__(
+        self,
+        client: GetManySource,
+        *,
+        max_concurrency: int = DEFAULT_GET_MANY_CONCURRENCY,
+    ) -> None:
+        """Create a new ParallelGetter.
+
+        Args:
+            client: The client to fetch objects from.
+
+        Keyword Args:
+            max_concurrency: The maximum number of requests in flight at once.
+                Defaults to 64.
+
+        """
+        if max_concurrency < 1:
+            msg = f"max_concurrency must be at least 1, got {max_concurrency}."
+            raise ValueError(msg)
+
+        self.client = client
+        self.max_concurrency = max_concurrency
+
+    def _method(self, name: str) -> None:
+        if not hasattr(self.client, name):
+            msg = f"{type(self.client).__name__} does not implement `{name}`."
+            raise NotSupportedError(msg)
+
+    def _get(self, path: str, options: GetOptions | None) -> Buffer:
+        return self.client.get(path, options=options).buffer()  # type: ignore[union-attr]
+
+    async def _get_async(self, path: str, options: GetOptions | None) -> Buffer:
+        result = await self.client.get_async(path, options=options)  # type: ignore[union-attr]
+        return await result.buffer_async()
+
+    def get_many(
+        self,
+        paths: Iterable[str | tuple[str, GetOptions]],
+        *,
+        ordered: bool = False,
+    ) -> Iterator[tuple[str, Buffer | Exception]]:
+        """Return the bytes stored at many locations, as each request completes.
+
+        Refer to the documentation for [GetMany][obspec.GetMany].
+        """
+        self._method("get")
+        items = iter(paths)
+        window: deque[tuple[str, Future[Buffer]]] = deque()
+        executor = ThreadPoolExecutor(self.max_concurrency)
+        try:
+            while True:
+                while len(window) < self.max_concurrency:
+                    item = next(items, _DONE)
+                    if item is _DONE:
+                        break
+                    path, options = _split(item)  # type: ignore[arg-type]
+                    window.append((path, executor.submit(self._get, path, options)))
+                if not window:
+                    return
+
+                if ordered:
+                    path, future = window.popleft()
+                else:
+                    done, _ = wait([f for _, f in window], return_when=FIRST_COMPLETED)
+                    path, future = next(pair for pair in window if pair[1] in done)
+                    window.remove((path, future))
+                wait([future])
+                yield path, _outcome(future)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    async def get_many_async(
+        self,
+        paths: Iterable[str | tuple[str, GetOptions]]
+        | AsyncIterable[str | tuple[str, GetOptions]],
+        *,
+        ordered: bool = False,
+    ) -> AsyncIterator[tuple[str, Buffer | Exception]]:
+        """Call `get_many` asynchronously.
+
+        Refer to the documentation for [GetManyAsync][obspec.GetManyAsync].
+        """
+        self._method("get_async")
+        items = _aiter(paths)
+        exhausted = False
+        window: deque[tuple[str, asyncio.Future[Buffer]]] = deque()
+        try:
+            while True:
+                while not exhausted and len(window) < self.max_concurrency:
+                    try:
+                        item = await items.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    path, options = _split(item)
+                    window.append(
+                        (path, asyncio.ensure_future(self._get_async(path, options))),
+                    )
+                if not window:
+                    return
+
+                if ordered:
+                    path, future = window.popleft()
+                    await asyncio.wait([future])
+                else:
+                    done, _ = await asyncio.wait(
+                        [f for _, f in window],
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    path, future = next(pair for pair in window if pair[1] in done)
+                    window.remove((path, future))
+                yield path, _outcome(future)
+        finally:
+            for _, future in window:
+                future.cancel()
+            if window:
+                await asyncio.wait([f for _, f in window])
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+from typing import TYPE_CHECKING, Any, Callable, Literal, TypedDict
+
+from obspec._util import gather_or_cancel, is_error
+from obspec.exceptions import NotSupportedError
+
+if sys.version_info >= (3, 10):
+    from typing import TypeAlias
+else:
+    from typing_extensions import TypeAlias
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from obspec import ObjectMeta
+
+DEFAULT_SYNC_CONCURRENCY = 32
+"""The default number of objects transferred concurrently by
+[`sync_prefix_async`][obspec.transfer.sync_prefix_async]."""
+
+DEFAULT_DELETE_BATCH_SIZE = 1000
+"""The default number of paths passed to each `delete_async` call, matching the
+maximum of a single S3 `DeleteObjects` request."""
+
+SyncCompare: TypeAlias = Literal["size", "last_modified", "e_tag"]
+"""How to decide whether an object that exists in both source and destination should
+be transferred again.
+
+- `"size"`: only if the sizes differ.
+- `"last_modified"`: if the sizes differ or the source was modified after the
+  destination.
+- `"e_tag"`: if the sizes or the `e_tag`s differ. `e_tag`s are generally only
+  comparable between objects in the same store.
+"""
+
+
+class SyncStats(TypedDict):
+    """Progress of a [`sync_prefix_async`][obspec.transfer.sync_prefix_async] run."""
+
+    listed: int
+    """The number of source objects listed so far."""
+
+    transferred: int
+    """The number of objects copied to the destination."""
+
+    skipped: int
+    """The number of objects that were already up to date."""
+
+    deleted: int
+    """The number of destination objects deleted because they are not in the
+    source."""
+
+    bytes: int
+    """The total size of the objects transferred."""
+
+
+_Signature: TypeAlias = "tuple[int, str | None, datetime]"
+
+
+def _signature(meta: ObjectMeta) -> _Signature:
+    return (meta["size"], meta["e_tag"], meta["last_modified"])
+
+
+def _needs_transfer(
+    source: _Signature,
+    dest: _Signature | None,
+    compare: SyncCompare,
+) -> bool:
+    if dest is None or source[0] != dest[0]:
+        return True
+    if compare == "e_tag":
+        return source[1] is None or source[1] != dest[1]
+    if compare == "last_modified":
+        return source[2] > dest[2]
+    return False
+
+
+def _relative(prefix: str, path: str) -> str | None:
+    if not prefix:
+        return path
+    if not path.startswith(prefix + "/"):
+        return None
+    return path[len(prefix) + 1 :]
+
+
+def _join(prefix: str, key: str) -> str:
+    return f"{prefix}/{key}" if prefix else key
+
+
+class _Checkpoint:
+    """An append-only log of the objects transferred by an interrupted run.
+
+    Each line records the path and signature of one transferred source object, so a
+    resumed run can skip it as long as the source object has not changed since.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = path
+        self.done: dict[str, tuple[int, str | None, str]] = {}
+        try:
+            with open(path, encoding="utf-8") as f:  # noqa: PTH123
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by the interruption.
+                        continue
+                    self.done[entry["path"]] = (
+                        entry["size"],
+                        entry["e_tag"],
+                        entry["last_modified"],
+                    )
+        except FileNotFoundError:
+            pass
+        self._file = open(path, "a", encoding="utf-8")  # noqa: PTH123, SIM115
+
+    def is_done(self, meta: ObjectMeta) -> bool:
+        entry = self.done.get(meta["path"])
+        return entry is not None and entry == (
+            meta["size"],
+            meta["e_tag"],
+            meta["last_modified"].isoformat(),
+        )
+
+    def record(self, meta: ObjectMeta) -> None:
+        entry = {
+            "path": meta["path"],
+            "size": meta["size"],
+            "e_tag": meta["e_tag"],
+            "last_modified": meta["last_modified"].isoformat(),
+        }
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self, *, remove: bool) -> None:
+        self._file.close()
+        if remove:
+            os.remove(self.path)  # noqa: PTH107
+
+
+async def _list_signatures(client: Any, prefix: str) -> dict[str, _Signature]:  # noqa: ANN401
+    out: dict[str, _Signature] = {}
+    async for chunk in client.list_async(prefix or None):
+        for meta in chunk:
+            key = _relative(prefix, meta["path"])
+            if key is not None:
+                out[key] = _signature(meta)
+    return out
+
+
+async def sync_prefix_async(  # noqa: C901, PLR0913, PLR0915
+    source: Any,  # noqa: ANN401
+    dest: Any,  # noqa: ANN401
+    *,
+    source_prefix: str = "",
+    dest_prefix: str = "",
+    compare: SyncCompare = "last_modified",
+    delete: bool = False,
+    max_concurrency: int = DEFAULT_SYNC_CONCURRENCY,
+    delete_batch_size: int = DEFAULT_DELETE_BATCH_SIZE,
+    checkpoint: str | os.PathLike[str] | None = None,
+    progress: Callable[[SyncStats], None] | None = None,
+) -> SyncStats:
+    """Make the objects under a destination prefix match those under a source prefix.
+
+    Both prefixes are listed with `list_async`. Every source object that is missing
+    from the destination, or differs from it according to `compare`, is transferred
+    to the same relative path under `dest_prefix`. If `source` and `dest` are the same
+    object and it implements `copy_async`, objects are copied server-side; otherwise
+    each object is streamed from `get_async` into `put_async` without being buffered
+    in full, along with its attributes. If `dest` raises
+    [`NotSupportedError`][obspec.exceptions.NotSupportedError] for attributes, as a
+    [`LocalStore`][obspec.store.LocalStore] does, they are dropped.
+
+    The destination listing is held in memory while the source listing is streamed,
+    as obspec does not guarantee that listings are ordered.
+
+    ```py
+    from obspec.transfer import sync_prefix_async
+
+    stats = await sync_prefix_async(
+        s3, gcs, source_prefix="datasets/2024", dest_prefix="mirror/2024", delete=True
+    )
+    ```
+
+    Args:
+        source: The store to copy from. Must implement
+            [`ListAsync`][obspec.ListAsync] and either
+            [`GetAsync`][obspec.GetAsync] or, if it is also `dest`,
+            [`CopyAsync`][obspec.CopyAsync].
+        dest: The store to copy to. Must implement [`ListAsync`][obspec.ListAsync],
+            [`PutAsync`][obspec.PutAsync] (unless `source` is `dest` and implements
+            `CopyAsync`) and, if `delete` is `True`,
+            [`DeleteAsync`][obspec.DeleteAsync].
+
+    Keyword Args:
+        source_prefix: The prefix to copy objects from. Defaults to the whole store.
+        dest_prefix: The prefix to copy objects to. Defaults to the whole store.
+        compare: How to decide whether an existing destination object is up to date.
+            Defaults to `"last_modified"`. See
+            [`SyncCompare`][obspec.transfer.SyncCompare].
+        delete: Whether to delete destination objects that are not in the source.
+            Deletions happen after all transfers have succeeded. Defaults to `False`.
+        max_concurrency: The maximum number of objects transferred at once.
+            Defaults to 32.
+        delete_batch_size: The maximum number of paths deleted per request.
+            Defaults to 1000.
+        checkpoint: A local file recording each transferred object. If a run is
+            interrupted, running it again with the same checkpoint skips objects
+            that were already transferred and have not changed since. The file is
+            removed when the run completes. Defaults to `None`.
+        progress: A callback called with the current
+            [`SyncStats`][obspec.transfer.SyncStats] after each source object is
+            processed and after each batch of deletions.
+
+    Returns:
+        The final statistics of the run.
+
+    """
+    if max_concurrency < 1:
+        msg = f"max_concurrency must be at least 1, got {max_concurrency}."
+        raise ValueError(msg)
+    if delete_batch_size < 1:
+        msg = f"delete_batch_size must be at least 1, got {delete_batch_size}."
+        raise ValueError(msg)
+
+    source_prefix = source_prefix.strip("/")
+    dest_prefix = dest_prefix.strip("/")
+    server_side = source is dest and hasattr(source, "copy_async")
+    if not server_side and not (
+        hasattr(source, "get_async") and hasattr(dest, "put_async")
+    ):
+        msg = "Syncing requires `get_async` on the source and `put_async` on dest."
+        raise NotSupportedError(msg)
+    if delete and not hasattr(dest, "delete_async"):
+        msg = f"{type(dest).__name__} does not implement `delete_async`."
+        raise NotSupportedError(msg)
+
+    stats: SyncStats = {
+        "listed": 0,
+        "transferred": 0,
+        "skipped": 0,
+        "deleted": 0,
+        "bytes": 0,
+    }
+
+    def report() -> None:
+        if progress is not None:
+            progress(stats.copy())
+
+    copy_attributes = True
+
+    async def transfer(meta: ObjectMeta, to: str) -> None:
+        nonlocal copy_attributes
+        if server_side:
+            await source.copy_async(meta["path"], to)
+            return
+
+        result = await source.get_async(meta["path"])
+        attributes = result.attributes if copy_attributes else None
+        if not attributes:
+            await dest.put_async(to, result)
+            return
+        try:
+            await dest.put_async(to, result, attributes=attributes)
+        except Exception as e:
+            if not is_error(e, NotSupportedError):
+                raise
+            # The destination cannot store attributes, such as a LocalStore. Drop
+            # them for this and every later object; the body may have been partly
+            # read, so fetch it again.
+            copy_attributes = False
+            result = await source.get_async(meta["path"])
+            await dest.put_async(to, result)
+
+    existing = await _list_signatures(dest, dest_prefix)
+    log = _Checkpoint(checkpoint) if checkpoint is not None else None
+    queue: asyncio.Queue[tuple[ObjectMeta, str] | None] = asyncio.Queue(
+        maxsize=2 * max_concurrency,
+    )
+
+    async def produce() -> None:
+        async for chunk in source.list_async(source_prefix or None):
+            for meta in chunk:
+                key = _relative(source_prefix, meta["path"])
+                if key is None:
+                    continue
+                stats["listed"] += 1
+                target = existing.pop(key, None)
+                if (log is not None and log.is_done(meta)) or not _needs_transfer(
+                    _signature(meta),
+                    target,
+                    compare,
+                ):
+                    stats["skipped"] += 1
+                    report()
+                    continue
+                await queue.put((meta, _join(dest_prefix, key)))
+
+        for _ in range(max_concurrency):
+            await queue.put(None)
+
+    async def work() -> None:
+        while (item := await queue.get()) is not None:
+            meta, to = item
+            await transfer(meta, to)
+            if log is not None:
+                log.record(meta)
+            stats["transferred"] += 1
+            stats["bytes"] += meta["size"]
+            report()
+
+    try:
+        await gather_or_cancel(produce(), *(work() for _ in range(max_concurrency)))
+        if delete:
+            extras = sorted(_join(dest_prefix, key) for key in existing)
+            for i in range(0, len(extras), delete_batch_size):
+                batch = extras[i : i + delete_batch_size]
+                await dest.delete_async(batch)
+                stats["deleted"] += len(batch)
+                report()
+    except BaseException:
+        if log is not None:
+            log.close(remove=False)
+        raise
+
+    if log is not None:
+        log.close(remove=True)
+    return stats
@@ -0,0 +1,642 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Protocol
+
+from obspec._util import as_memoryview, gather_or_cancel, is_transient
+from obspec.store._common import DEFAULT_CHUNK_SIZE, DEFAULT_MAX_CONCURRENCY
+
+if TYPE_CHECKING:
+    import sys
+    from collections.abc import (
+        AsyncIterable,
+        AsyncIterator,
+        Iterable,
+        Iterator,
+        Sequence,
+    )
+
+    from obspec import Attributes, PutMode, PutResult
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+DEFAULT_MAX_ATTEMPTS = 3
+"""The default number of times each part is attempted before an upload fails."""
+
+DEFAULT_RETRY_BACKOFF = 0.1
+"""The default delay, in seconds, before the first retry of a failed part.
+
+The delay doubles with each further attempt.
+"""
+
+
+class PutMultipart(Protocol):
+    """The part-level primitives a backend supplies to a
+    [`MultipartUploader`][obspec.transfer.MultipartUploader].
+    """  # noqa: D205
+
+    def put_single(
+        self,
+        path: str,
+        data: memoryview,
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+    ) -> PutResult:
+        """Save `data` to `path` in a single request.
+
+        This is used for inputs smaller than one part, for conditional puts and when
+        `use_multipart=False`.
+        """
+        ...
+
+    def create_multipart(
+        self,
+        path: str,
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+    ) -> str:
+        """Start a multipart upload to `path` and return its upload ID."""
+        ...
+
+    def put_part(
+        self,
+        path: str,
+        upload_id: str,
+        part_number: int,
+        data: memoryview,
+    ) -> str:
+        """Upload one part and return the identifier needed to complete the upload.
+
+        Part numbers start at 1. `data` is only valid until this method returns, as
+        its memory is reused for later parts. A part may be uploaded again after a
+        failed attempt.
+        """
+        ...
+
+    def complete_multipart(
+        self,
+        path: str,
+        upload_id: str,
+        parts: Sequence[str],
+    ) -> PutResult:
+        """Complete the upload from the identifiers of every part, in order."""
+        ...
+
+    def abort_multipart(self, path: str, upload_id: str) -> None:
+        """Abort the upload, discarding any parts uploaded so far."""
+        ...
+
+
+class PutMultipartAsync(Protocol):
+    """The async part-level primitives a backend supplies to a
+    [`MultipartUploader`][obspec.transfer.MultipartUploader].
+    """  # noqa: D205
+
+    async def put_single_async(
+        self,
+        path: str,
+        data: memoryview,
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+    ) -> PutResult:
+        """Call `put_single` asynchronously.
+
+        Refer to the documentation for [PutMultipart][obspec.transfer.PutMultipart].
+        """
+        ...
+
+    async def create_multipart_async(
+        self,
+        path: str,
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+    ) -> str:
+        """Call `create_multipart` asynchronously.
+
+        Refer to the documentation for [PutMultipart][obspec.transfer.PutMultipart].
+        """
+        ...
+
+    async def put_part_async(
+        self,
+        path: str,
+        upload_id: str,
+        part_number: int,
+        data: memoryview,
+    ) -> str:
+        """Call `put_part` asynchronously.
+
+        Refer to the documentation for [PutMultipart][obspec.transfer.PutMultipart].
+        """
+        ...
+
+    async def complete_multipart_async(
+        self,
+        path: str,
+        upload_id: str,
+        parts: Sequence[str],
+    ) -> PutResult:
+        """Call `complete_multipart` asynchronously.
+
+        Refer to the documentation for [PutMultipart][obspec.transfer.PutMultipart].
+        """
+        ...
+
+    async def abort_multipart_async(self, path: str, upload_id: str) -> None:
+        """Call `abort_multipart` asynchronously.
+
+        Refer to the documentation for [PutMultipart][obspec.transfer.PutMultipart].
+        """
+        ...
+
+
+class _Source:
+    """Reads any `file` accepted by `Put` as consecutive parts.
+
+    Buffers are sliced without copying; every other input is copied into the buffer
+    passed to `read`.
+    """
+
+    def __init__(self, file: Any) -> None:  # noqa: ANN401
+        self.view: memoryview | None = None
+        self._io: IO[bytes] | None = None
+        self._owned = False
+        self._iter: Iterator[Buffer] | None = None
+        self._aiter: AsyncIterator[Buffer] | None = None
+        self._pending = memoryview(b"")
+        self._offset = 0
+
+        if isinstance(file, Path):
+            self._io = file.open("rb")
+            self._owned = True
+        elif hasattr(file, "read"):
+            self._io = file
+        elif hasattr(file, "__aiter__"):
+            self._aiter = file.__aiter__()
+        else:
+            try:
+                self.view = as_memoryview(file)
+            except TypeError:
+                self._iter = iter(file)
+
+    def close(self) -> None:
+        if self._owned and self._io is not None:
+            self._io.close()
+
+    def slice(self, size: int) -> memoryview:
+        assert self.view is not None  # noqa: S101
+        part = self.view[self._offset : self._offset + size]
+        self._offset += len(part)
+        return part
+
+    def _fill_from_pending(self, buf: memoryview, n: int) -> int:
+        take = min(len(self._pending), len(buf) - n)
+        buf[n : n + take] = self._pending[:take]
+        self._pending = self._pending[take:]
+        return n + take
+
+    def read(self, buf: bytearray) -> memoryview:
+        """Fill `buf` from the input and return the filled part."""
+        view = memoryview(buf)
+        n = 0
+        if self._io is not None:
+            readinto = getattr(self._io, "readinto", None)
+            while n < len(view):
+                if readinto is not None:
+                    got = readinto(view[n:])
+                else:
+                    data = self._io.read(len(view) - n)
+                    got = len(data)
+                    view[n : n + got] = data
+                if not got:
+                    break
+                n += got
+            return view[:n]
+
+        assert self._iter is not None  # noqa: S101
+        while True:
+            n = self._fill_from_pending(view, n)
+            if n == len(view):
+                return view
+            chunk = next(self._iter, None)
+            if chunk is None:
+                return view[:n]
+            self._pending = as_memoryview(chunk)
+
+    async def read_async(self, buf: bytearray) -> memoryview:
+        """Fill `buf` from the input without blocking the event loop."""
+        if self._io is not None:
+            return await asyncio.to_thread(self.read, buf)
+        if self._aiter is None:
+            return self.read(buf)
+
+        view = memoryview(buf)
+        n = 0
+        while True:
+            n = self._fill_from_pending(view, n)
+            if n == len(view):
+                return view
+            try:
+                chunk = await self._aiter.__anext__()
+            except StopAsyncIteration:
+                return view[:n]
+            self._pending = as_memoryview(chunk)
+
+    def read_all(self) -> memoryview:
+        if self.view is not None:
+            return self.slice(len(self.view) - self._offset)
+        if self._io is not None:
+            return memoryview(self._io.read())
+        assert self._iter is not None  # noqa: S101
+        return memoryview(
+            b"".join([bytes(self._pending), *(bytes(c) for c in self._iter)]),
+        )
+
+    async def read_all_async(self) -> memoryview:
+        if self._io is not None:
+            return await asyncio.to_thread(self.read_all)
+        if self._aiter is None:
+            return self.read_all()
+        chunks = [bytes(self._pending)]
+        chunks.extend([bytes(chunk) async for chunk in self._aiter])
+        return memoryview(b"".join(chunks))
+
+
+class _BufferPool:
+    """A free list of part buffers, allocated on first use."""
+
+    def __init__(self, chunk_size: int) -> None:
+        self._chunk_size = chunk_size
+        self._free: list[bytearray] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> bytearray:
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return bytearray(self._chunk_size)
+
+    def put(self, buf: bytearray | None) -> None:
+        if buf is not None:
+            with self._lock:
+                self._free.append(buf)
+
+
+def _is_single(mode: PutMode | None, *, use_multipart: bool | None) -> bool:
+    """Whether the whole input must be sent in one request."""
+    return use_multipart is False or mode not in (None, "overwrite")
+
+
+def _check_args(chunk_size: int, max_concurrency: int) -> None:
+    if chunk_size < 1:
+        msg = f"chunk_size must be at least 1, got {chunk_size}."
+        raise ValueError(msg)
+    if max_concurrency < 1:
+        msg = f"max_concurrency must be at least 1, got {max_concurrency}."
+        raise ValueError(msg)
+
+
+class MultipartUploader:
+    """Implement [`Put`][obspec.Put] and [`PutAsync`][obspec.PutAsync] on top of
+    multipart upload primitives, with bounded memory and parallel parts.
+
+    A backend implements [`PutMultipart`][obspec.transfer.PutMultipart] (or
+    [`PutMultipartAsync`][obspec.transfer.PutMultipartAsync]) and delegates `put` to
+    this class, which accepts every `file` form documented by `Put` and `PutAsync`:
+
+    - The input is split into parts of `chunk_size` bytes. Buffers are sliced
+      without copying; files and iterators are read into a pool of at most
+      `max_concurrency` reusable buffers, so peak memory is
+      `chunk_size * max_concurrency` however large the input is.
+    - Up to `max_concurrency` parts are uploaded at once. The input is read only as
+      fast as parts are uploaded.
+    - A part that fails with a transient error is retried on its own, with
+      exponential backoff, up to `max_attempts` times. Transient errors are those
+      retried by [`is_retryable`][obspec.retry.is_retryable]: connection errors,
+      timeouts and other `OSError`s. Errors that map to a well-known obspec
+      exception, and bugs such as an `AttributeError`, are raised at once.
+    - If the upload fails, it is aborted.
+
+    Inputs shorter than `chunk_size` are sent with a single `put_single` request,
+    as are conditional puts and puts with `use_multipart=False`, which read the
+    whole input into memory.
+
+    ```py
+    from obspec.transfer import MultipartUploader
+
+    class MyStore:
+        def put(self, path, file, **kwargs):
+            return MultipartUploader(self._backend).put(path, file, **kwargs)
+    ```
+    """  # noqa: D205
+
+    def __init__(
+        self,
+        backend: PutMultipart | PutMultipartAsync,
+        *,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+    ) -> None:
+        """Create a new MultipartUploader.
+
+        Args:
+            backend: The multipart upload primitives. `put` requires
+                [`PutMultipart`][obspec.transfer.PutMultipart] and `put_async`
+                requires [`PutMultipartAsync`][obspec.transfer.PutMultipartAsync].
+
+        Keyword Args:
+            max_attempts: The number of times each part is attempted. Defaults to 3.
+            retry_backoff: The delay, in seconds, before the first retry of a part.
+                Defaults to 0.1.
+
+        """
+        if max_attempts < 1:
+            msg = f"max_attempts must be at least 1, got {max_attempts}."
+            raise ValueError(msg)
+        if retry_backoff < 0:
+            msg = f"retry_backoff must not be negative, got {retry_backoff}."
+            raise ValueError(msg)
+
+        self.backend = backend
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+    def _delay(self, attempt: int, error: Exception) -> float:
+        """Return how long to wait before retrying, or re-raise `error`."""
+        if attempt + 1 >= self.max_attempts or not is_transient(error):
+            raise error
+        return self.retry_backoff * 2**attempt
+
+    def _put_part(
+        self,
+        path: str,
+        upload_id: str,
+        part_number: int,
+        data: memoryview,
+    ) -> str:
+        backend: Any = self.backend
+        attempt = 0
+        while True:
+            try:
+                return backend.put_part(path, upload_id, part_number, data)
+            except Exception as e:  # noqa: BLE001, PERF203
+                time.sleep(self._delay(attempt, e))
+                attempt += 1
+
+    async def _put_part_async(
+        self,
+        path: str,
+        upload_id: str,
+        part_number: int,
+        data: memoryview,
+    ) -> str:
+        backend: Any = self.backend
+        attempt = 0
+        while True:
+            try:
+                return await backend.put_part_async(path, upload_id, part_number, data)
+            except Exception as e:  # noqa: BLE001, PERF203
+                await asyncio.sleep(self._delay(attempt, e))
+                attempt += 1
+
+    def put(  # noqa: PLR0913
+        self,
+        path: str,
+        file: IO[bytes] | Path | bytes | Buffer | Iterator[Buffer] | Iterable[Buffer],
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+        use_multipart: bool | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> PutResult:
+        """Save the provided bytes to the specified location.
+
+        Refer to the documentation for [Put][obspec.Put].
+        """
+        _check_args(chunk_size, max_concurrency)
+        backend: Any = self.backend
+        source = _Source(file)
+        try:
+            if _is_single(mode, use_multipart=use_multipart):
+                data = source.read_all()
+                return backend.put_single(
+                    path,
+                    data,
+                    attributes=attributes,
+                    tags=tags,
+                    mode=mode,
+                )
+
+            pool = _BufferPool(chunk_size)
+            buf = None if source.view is not None else pool.get()
+            first = source.slice(chunk_size) if buf is None else source.read(buf)
+            if use_multipart is None and len(first) < chunk_size:
+                return backend.put_single(
+                    path,
+                    first,
+                    attributes=attributes,
+                    tags=tags,
+                    mode=mode,
+                )
+
+            upload_id = backend.create_multipart(path, attributes=attributes, tags=tags)
+            try:
+                parts = self._put_parts(
+                    path,
+                    upload_id,
+                    source,
+                    pool,
+                    (first, buf),
+                    chunk_size=chunk_size,
+                    max_concurrency=max_concurrency,
+                )
+                return backend.complete_multipart(path, upload_id, parts)
+            except BaseException:
+                with contextlib.suppress(Exception):
+                    backend.abort_multipart(path, upload_id)
+                raise
+        finally:
+            source.close()
+
+    def _put_parts(  # noqa: PLR0913
+        self,
+        path: str,
+        upload_id: str,
+        source: _Source,
+        pool: _BufferPool,
+        first: tuple[memoryview, bytearray | None],
+        *,
+        chunk_size: int,
+        max_concurrency: int,
+    ) -> list[str]:
+        slots = threading.Semaphore(max_concurrency - 1)
+        failed = threading.Event()
+
+        def upload(part_number: int, data: memoryview, buf: bytearray | None) -> str:
+            try:
+                return self._put_part(path, upload_id, part_number, data)
+            except BaseException:
+                failed.set()
+                raise
+            finally:
+                pool.put(buf)
+                slots.release()
+
+        futures: list[Future[str]] = []
+        executor = ThreadPoolExecutor(max_concurrency)
+        try:
+            data, buf = first
+            while True:
+                futures.append(executor.submit(upload, len(futures) + 1, data, buf))
+                slots.acquire()
+                if failed.is_set():
+                    break
+                buf = None if source.view is not None else pool.get()
+                data = source.slice(chunk_size) if buf is None else source.read(buf)
+                if not len(data):
+                    break
+            return [future.result() for future in futures]
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    async def put_async(  # noqa: PLR0913
+        self,
+        path: str,
+        file: IO[bytes]
+        | Path
+        | bytes
+        | Buffer
+        | AsyncIterator[Buffer]
+        | AsyncIterable[Buffer]
+        | Iterator[Buffer]
+        | Iterable[Buffer],
+        *,
+        attributes: Attributes | None = None,
+        tags: dict[str, str] | None = None,
+        mode: PutMode | None = None,
+        use_multipart: bool | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> PutResult:
+        """Call `put` asynchronously.
+
+        Refer to the documentation for [PutAsync][obspec.PutAsync].
+        """
+        _check_args(chunk_size, max_concurrency)
+        backend: Any = self.backend
+        source = _Source(file)
+        try:
+            if _is_single(mode, use_multipart=use_multipart):
+                data = await source.read_all_async()
+                return await backend.put_single_async(
+                    path,
+                    data,
+                    attributes=attributes,
+                    tags=tags,
+                    mode=mode,
+                )
+
+            pool = _BufferPool(chunk_size)
+            buf = None if source.view is not None else pool.get()
+            if buf is None:
+                first = source.slice(chunk_size)
+            else:
+                first = await source.read_async(buf)
+            if use_multipart is None and len(first) < chunk_size:
+                return await backend.put_single_async(
+                    path,
+                    first,
+                    attributes=attributes,
+                    tags=tags,
+                    mode=mode,
+                )
+
+            upload_id = await backend.create_multipart_async(
+                path,
+                attributes=attributes,
+                tags=tags,
+            )
+            try:
+                parts = await self._put_parts_async(
+                    path,
+                    upload_id,
+                    source,
+                    pool,
+                    (first, buf),
+                    chunk_size=chunk_size,
+                    max_concurrency=max_concurrency,
+                )
+                return await backend.complete_multipart_async(path, upload_id, parts)
+            except BaseException:
+                with contextlib.suppress(Exception):
+                    await backend.abort_multipart_async(path, upload_id)
+                raise
+        finally:
+            source.close()
+
+    async def _put_parts_async(  # noqa: PLR0913
+        self,
+        path: str,
+        upload_id: str,
+        source: _Source,
+        pool: _BufferPool,
+        first: tuple[memoryview, bytearray | None],
+        *,
+        chunk_size: int,
+        max_concurrency: int,
+    ) -> list[str]:
+        slots = asyncio.Semaphore(max_concurrency - 1)
+        failed = asyncio.Event()
+
+        async def upload(
+            part_number: int,
+            data: memoryview,
+            buf: bytearray | None,
+        ) -> str:
+            try:
+                return await self._put_part_async(path, upload_id, part_number, data)
+            except BaseException:
+                failed.set()
+                raise
+            finally:
+                pool.put(buf)
+                slots.release()
+
+        tasks: list[asyncio.Task[str]] = []
+        try:
+            data, buf = first
+            while True:
+                part_number = len(tasks) + 1
+                tasks.append(asyncio.ensure_future(upload(part_number, data, buf)))
+                await slots.acquire()
+                if failed.is_set():
+                    break
+                if source.view is not None:
+                    data = source.slice(chunk_size)
+                else:
+                    buf = pool.get()
+                    data = await source.read_async(buf)
+                if not len(data):
+                    break
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return await gather_or_cancel(*tasks)
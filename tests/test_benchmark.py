@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from obspec.benchmark import WORKLOADS, main, run_benchmarks
+from obspec.store import MemoryStore
+
+if TYPE_CHECKING:
+    import pytest
+
+
+def test_run_benchmarks():
+    store = MemoryStore()
+    results = run_benchmarks(
+        store,
+        iterations=2,
+        object_size=1024 * 1024,
+        list_objects=100,
+        chunk_sizes=[256 * 1024],
+        max_concurrencies=[2],
+    )
+
+    assert [result["workload"] for result in results] == list(WORKLOADS)
+    for result in results:
+        assert result["operations"] > 0
+        assert result["p50_seconds"] <= result["p99_seconds"]
+    assert results[0]["bytes"] == 2 * 1024 * 1024
+    # Benchmark objects are cleaned up
+    assert len(store) == 0
+
+
+def test_skips_unsupported_workloads():
+    class PutOnly:
+        def put(self, path: str, file: object, **kwargs: object) -> None:
+            pass
+
+    results = run_benchmarks(PutOnly(), iterations=1, object_size=1024)
+    assert {result["workload"] for result in results} == {
+        "put_small",
+        "put_multipart",
+    }
+
+
+def test_main(capsys: pytest.CaptureFixture[str]):
+    main(
+        [
+            "obspec.store:MemoryStore",
+            "--workload",
+            "get_range",
+            "--iterations",
+            "1",
+            "--object-size",
+            "100000",
+        ],
+    )
+    (result,) = json.loads(capsys.readouterr().out)
+    assert result["workload"] == "get_range"
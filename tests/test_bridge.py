@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from obspec.bridge import async_from_sync, shared_loop, sync_from_async
+from obspec.store import MemoryStore
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterator
+
+
+class SyncOnly:
+    """Exposes only the synchronous methods of a store."""
+
+    def __init__(self, store: Any) -> None:  # noqa: ANN401
+        self._store = store
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        if name.endswith("_async"):
+            raise AttributeError(name)
+        return getattr(self._store, name)
+
+
+class AsyncOnly:
+    """Exposes only the asynchronous methods of a store."""
+
+    def __init__(self, store: Any) -> None:  # noqa: ANN401
+        self._store = store
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        if not name.endswith("_async"):
+            raise AttributeError(name)
+        return getattr(self._store, name)
+
+
+def test_async_from_sync():
+    inner = MemoryStore()
+    store = async_from_sync(SyncOnly(inner))
+    threads = set()
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for chunk in (b"ab", b"cd", b"e"):
+            threads.add(threading.current_thread())
+            yield chunk
+
+    async def run() -> None:
+        await store.put_async("a", chunks())
+        assert threads == {threading.current_thread()}
+        assert (await store.head_async("a"))["size"] == 5
+        assert bytes(await store.get_range_async("a", start=1, end=3)) == b"bc"
+        result = await store.get_async("a")
+        assert result.meta["size"] == 5
+        assert b"".join([bytes(c) async for c in result]) == b"abcde"
+        assert bytes(await (await store.get_async("a")).buffer_async()) == b"abcde"
+        await store.copy_async("a", "b")
+        paths = [m["path"] async for chunk in store.list_async() for m in chunk]
+        assert paths == ["a", "b"]
+        await store.delete_async("a")
+
+    asyncio.run(run())
+    assert [m["path"] for chunk in inner.list() for m in chunk] == ["b"]
+    assert store.head("b")["size"] == 5
+
+    # Only counterparts of the wrapped store's methods are derived
+    assert not hasattr(async_from_sync(object()), "get_async")
+    assert not hasattr(store, "not_a_method_async")
+
+
+def test_sync_from_async():
+    inner = MemoryStore()
+    store = sync_from_async(AsyncOnly(inner))
+
+    store.put("a", iter([b"ab", b"cd", b"e"]))
+    assert store.head("a")["size"] == 5
+    assert bytes(store.get_range("a", start=1, end=3)) == b"bc"
+    result = store.get("a")
+    assert result.meta["size"] == 5
+    assert b"".join(bytes(c) for c in result) == b"abcde"
+    assert bytes(store.get("a").buffer()) == b"abcde"
+    store.rename("a", "b")
+    assert [m["path"] for chunk in store.list() for m in chunk] == ["b"]
+
+    assert not hasattr(sync_from_async(object()), "get")
+    assert not hasattr(store, "get_async_async")
+
+
+class ChunkedStore:
+    """Returns results recording each chunk as it is pulled."""
+
+    def __init__(self) -> None:
+        self.pulled: list[int] = []
+        self.closed = threading.Event()
+
+    def _sync_chunks(self) -> Iterator[bytes]:
+        for i in range(100):
+            self.pulled.append(i)
+            yield bytes(10)
+
+    async def _async_chunks(self) -> AsyncIterator[bytes]:
+        try:
+            for i in range(100):
+                self.pulled.append(i)
+                yield bytes(10)
+        finally:
+            self.closed.set()
+
+    def get(self, path: str) -> Any:  # noqa: ANN401, ARG002
+        return type("Result", (), {"__iter__": lambda _: self._sync_chunks()})()
+
+    async def get_async(self, path: str) -> Any:  # noqa: ANN401, ARG002
+        return type("Result", (), {"__aiter__": lambda _: self._async_chunks()})()
+
+
+def test_streams_chunk_by_chunk():
+    inner = ChunkedStore()
+
+    async def first_chunks() -> None:
+        result = await async_from_sync(SyncOnly(inner)).get_async("a")
+        async for _ in result:
+            if len(inner.pulled) == 2:
+                break
+
+    asyncio.run(first_chunks())
+    assert inner.pulled == [0, 1]
+
+    inner.pulled.clear()
+    chunks = iter(sync_from_async(AsyncOnly(inner)).get("a"))
+    next(chunks)
+    next(chunks)
+    assert inner.pulled == [0, 1]
+    chunks.close()  # type: ignore[attr-defined]
+    assert inner.closed.is_set()
+
+
+def test_refuses_to_block_own_loop():
+    store = sync_from_async(AsyncOnly(MemoryStore()))
+
+    async def call() -> None:
+        store.head("a")
+
+    future = asyncio.run_coroutine_threadsafe(call(), shared_loop())
+    with pytest.raises(RuntimeError, match="own event loop"):
+        future.result()
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from obspec.cache import BlockCache, DiskCache, HeadCache
+from obspec.exceptions import NotFoundError
+from obspec.store import MemoryStore
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from obspec import GetOptions, GetResult, ObjectMeta
+
+
+class Client:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.e_tag = "0"
+        self.calls: list[tuple[int, int]] = []
+        self.heads = 0
+
+    def head(self, path: str) -> ObjectMeta:
+        self.heads += 1
+        return {
+            "path": path,
+            "last_modified": datetime.now(timezone.utc),
+            "size": len(self.data),
+            "e_tag": self.e_tag,
+            "version": None,
+        }
+
+    async def head_async(self, path: str) -> ObjectMeta:
+        return self.head(path)
+
+    def get_range(
+        self,
+        path: str,  # noqa: ARG002
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,  # noqa: ARG002
+    ) -> bytes:
+        assert end is not None
+        assert start < len(self.data)
+        self.calls.append((start, end))
+        return self.data[start:end]
+
+    async def get_range_async(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> bytes:
+        return self.get_range(path, start=start, end=end, length=length)
+
+
+DATA = bytes(range(256)) * 4
+
+
+def test_block_cache_fetches_missing_blocks():
+    client = Client(DATA)
+    cache = BlockCache(client, block_size=100)
+
+    assert bytes(cache.get_range("a", start=10, end=20)) == DATA[10:20]
+    assert client.calls == [(0, 100)]
+
+    # The first block is served from the cache, only the next two are fetched
+    assert bytes(cache.get_range("a", start=50, end=250)) == DATA[50:250]
+    assert client.calls == [(0, 100), (100, 300)]
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["size"] == 300
+    assert client.heads == 1
+
+
+def test_block_cache_clamps_to_object_size():
+    client = Client(DATA)
+    cache = BlockCache(client, block_size=100)
+
+    ranges = cache.get_ranges("a", starts=[1000, 0], ends=[2000, 5])
+    assert [bytes(b) for b in ranges] == [DATA[1000:], DATA[:5]]
+    assert client.calls == [(0, 100), (1000, 1100)]
+
+
+def test_block_cache_invalid_ranges():
+    store = MemoryStore()
+    store.put("a", DATA)
+    cache = BlockCache(store, block_size=100)
+    with pytest.raises(ValueError, match="zero-length"):
+        cache.get_range("a", start=10, end=10)
+    with pytest.raises(ValueError, match="out of bounds"):
+        cache.get_ranges("a", starts=[0, 1500], ends=[10, 1600])
+
+    # Without `head`, the end of the object is only found from a short block
+    ranged = SimpleNamespace(
+        get_range=store.get_range,
+        get_range_async=store.get_range_async,
+    )
+    cache = BlockCache(ranged, block_size=100)
+    with pytest.raises(ValueError, match="zero-length"):
+        asyncio.run(cache.get_range_async("a", start=10, end=10))
+    with pytest.raises(ValueError, match="out of bounds"):
+        asyncio.run(cache.get_range_async("a", start=1050, end=1060))
+    cache = BlockCache(ranged, block_size=100)
+    with pytest.raises(ValueError, match="out of bounds"):
+        cache.get_ranges("a", starts=[0, 1050], ends=[10, 1060])
+
+
+def test_block_cache_evicts_lru():
+    client = Client(DATA)
+    cache = BlockCache(client, block_size=100, max_bytes=200)
+
+    cache.get_range("a", start=0, end=300)
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["size"] == 200
+
+    client.calls.clear()
+    cache.get_range("a", start=0, end=10)
+    assert client.calls == [(0, 100)]
+
+
+def test_block_cache_revalidates():
+    client = Client(DATA)
+    cache = BlockCache(client, block_size=100, revalidate_after=0)
+
+    asyncio.run(cache.get_range_async("a", start=0, end=10))
+    client.data = DATA[::-1]
+    client.e_tag = "1"
+    assert (
+        bytes(asyncio.run(cache.get_range_async("a", start=0, end=10)))
+        == (DATA[::-1][:10])
+    )
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_disk_cache(tmp_path: Path):
+    client = Client(DATA)
+    cache = DiskCache(client, tmp_path, block_size=100)
+
+    buffer = cache.get_range("a", start=150, end=250)
+    assert isinstance(buffer, memoryview)
+    assert bytes(buffer) == DATA[150:250]
+    assert client.calls == [(100, 300)]
+
+    # A new cache over the same directory reuses the data on disk
+    client.calls.clear()
+    cache = DiskCache(client, tmp_path, block_size=100)
+    ranges = cache.get_ranges("a", starts=[120, 1000], ends=[200, 1100])
+    assert [bytes(b) for b in ranges] == [DATA[120:200], DATA[1000:]]
+    assert client.calls == [(1000, 1024)]
+    assert cache.stats()["hits"] == 1
+
+
+def test_disk_cache_keyed_by_e_tag(tmp_path: Path):
+    client = Client(DATA)
+    DiskCache(client, tmp_path, block_size=100).get_range("a", start=0, end=10)
+
+    client.data = DATA[::-1]
+    client.e_tag = "1"
+    cache = DiskCache(client, tmp_path, block_size=100)
+    assert bytes(cache.get_range("a", start=0, end=10)) == DATA[::-1][:10]
+
+
+def test_disk_cache_pins_version(tmp_path: Path):
+    store = MemoryStore()
+    store.put("a", DATA)
+    cache = DiskCache(store, tmp_path, block_size=100)
+    assert bytes(cache.get_range("a", start=0, end=10)) == DATA[:10]
+
+    # The cached metadata is stale: the pinned read fails and is retried
+    store.put("a", DATA[::-1])
+    assert bytes(cache.get_range("a", start=500, end=510)) == DATA[::-1][500:510]
+    assert bytes(cache.get_range("a", start=0, end=10)) == DATA[::-1][:10]
+    assert cache.stats()["invalidations"] == 1
+
+    async def run() -> bytes:
+        return bytes(await cache.get_range_async("a", start=900, end=910))
+
+    store.put("a", DATA)
+    assert asyncio.run(run()) == DATA[900:910]
+
+
+def test_disk_cache_invalid_ranges(tmp_path: Path):
+    store = MemoryStore()
+    store.put("a", DATA)
+    cache = DiskCache(store, tmp_path, block_size=100)
+    with pytest.raises(ValueError, match="zero-length"):
+        cache.get_ranges("a", starts=[0, 10], ends=[10, 10])
+    with pytest.raises(ValueError, match="out of bounds"):
+        cache.get_range("a", start=1024, end=1030)
+
+
+def test_disk_cache_evicts(tmp_path: Path):
+    client = Client(DATA)
+    cache = DiskCache(client, tmp_path, block_size=100, max_bytes=0)
+    assert bytes(cache.get_range("a", start=0, end=10)) == DATA[:10]
+    assert cache.stats()["evictions"] == 1
+    assert not list(tmp_path.glob("*.data"))
+
+
+class CountingMemoryStore(MemoryStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.heads = 0
+        self.conditional_gets = 0
+
+    def head(self, path: str) -> ObjectMeta:
+        self.heads += 1
+        return super().head(path)
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> GetResult:
+        if options and "if_none_match" in options:
+            self.conditional_gets += 1
+        return super().get(path, options=options)
+
+
+def test_head_cache():
+    store = CountingMemoryStore()
+    store.put("a", b"abc")
+    cache = HeadCache(store, ttl=60)
+
+    assert cache.head("a")["size"] == 3
+    assert cache.head("a")["size"] == 3
+    assert store.heads == 1
+
+    # Writes through the cache invalidate it
+    cache.put("a", b"abcdef")
+    assert cache.head("a")["size"] == 6
+    assert store.heads == 2
+    cache.rename("a", "b")
+    with pytest.raises(NotFoundError):
+        cache.head("a")
+
+    # Listings fill the cache
+    store.put("dir/x", b"x")
+    store.put("dir/y", b"yy")
+    list(cache.list("dir"))
+    heads = store.heads
+    assert cache.head("dir/y")["size"] == 2
+    assert store.heads == heads
+    assert cache.stats()["entries"] == 2
+
+
+class VersionedStore(MemoryStore):
+    """Serves a smaller old version of every object."""
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> Any:  # noqa: ANN401
+        if options and options.get("version"):
+            meta = self.head(path)
+            return SimpleNamespace(meta={**meta, "size": 1, "version": "old"})
+        return super().get(path, options=options)
+
+
+def test_head_cache_ignores_versioned_gets():
+    store = VersionedStore()
+    store.put("a", b"abc")
+    cache = HeadCache(store, ttl=60)
+
+    assert cache.get("a", options={"version": "old"}).meta["size"] == 1
+    assert cache.stats()["entries"] == 0
+    assert cache.get("a").meta["size"] == 3
+    assert cache.head("a")["size"] == 3
+
+
+def test_head_cache_revalidates():
+    store = CountingMemoryStore()
+    store.put("a", b"abc")
+    cache = HeadCache(store, ttl=0)
+
+    first = cache.head("a")
+    assert cache.head("a") == first
+    assert store.heads == 1
+    assert store.conditional_gets == 1
+    assert cache.stats()["revalidations"] == 1
+
+    # A change made outside the cache is picked up on revalidation
+    store.put("a", b"abcdef")
+    assert cache.head("a")["size"] == 6
+    assert store.conditional_gets == 2
+
+    async def run() -> int:
+        return (await cache.head_async("a"))["size"]
+
+    assert asyncio.run(run()) == 6
+    assert cache.stats()["revalidations"] == 2
+
+
+class ForeignNotModifiedStore(MemoryStore):
+    """Raises its own `NotModifiedError` class, as other packages do."""
+
+    NotModifiedError = type("NotModifiedError", (Exception,), {})
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> GetResult:
+        if options and options.get("if_none_match") == self.head(path)["e_tag"]:
+            raise self.NotModifiedError(path)
+        return super().get(path, options=options)
+
+
+def test_head_cache_revalidates_foreign_errors():
+    store = ForeignNotModifiedStore()
+    store.put("a", b"abc")
+    cache = HeadCache(store, ttl=0)
+
+    first = cache.head("a")
+    assert cache.head("a") == first
+    assert cache.stats()["revalidations"] == 1
+
+
+class RacingStore(MemoryStore):
+    """Runs `during_head` while a `head` request is in flight."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.during_head: Any = None
+
+    def head(self, path: str) -> ObjectMeta:
+        meta = super().head(path)
+        if self.during_head is not None:
+            self.during_head()
+            self.during_head = None
+        return meta
+
+
+def test_head_cache_skips_stale_results():
+    store = RacingStore()
+    store.put("a", b"abc")
+    cache = HeadCache(store, ttl=60)
+
+    # A put that lands while a head is in flight must not be hidden by its result
+    store.during_head = lambda: cache.put("a", b"abcdef")
+    assert cache.head("a")["size"] == 3
+    assert cache.stats()["entries"] == 0
+    assert cache.head("a")["size"] == 6
+
+    store.during_head = cache.invalidate
+    store.put("b", b"")
+    cache.head("b")
+    assert cache.stats()["entries"] == 0
+    cache.head("b")
+    assert cache.stats()["entries"] == 1
+
+
+def test_head_cache_evicts():
+    store = MemoryStore()
+    for i in range(5):
+        store.put(str(i), b"")
+    cache = HeadCache(store, max_entries=2)
+    for i in range(5):
+        cache.head(str(i))
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 3
+    cache.invalidate()
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import gzip
+import io
+import os
+import threading
+import weakref
+import zipfile
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from obspec.exceptions import AlreadyExistsError, NotFoundError, PreconditionError
+from obspec.file import (
+    AsyncObjectReader,
+    AsyncObjectWriter,
+    ObjectReader,
+    ObjectWriter,
+)
+from obspec.store import MemoryStore
+
+if TYPE_CHECKING:
+    import sys
+    from collections.abc import Iterable
+
+    from obspec import PutResult
+
+    if sys.version_info >= (3, 12):
+        from collections.abc import Buffer
+    else:
+        from typing_extensions import Buffer
+
+DATA = os.urandom(1_000_000)
+
+
+class CountingStore(MemoryStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests: list[tuple[int, int]] = []
+
+    def get_range(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> Buffer:
+        buffer = super().get_range(path, start=start, end=end, length=length)
+        self.requests.append((start, start + len(memoryview(buffer))))
+        return buffer
+
+    async def get_range_async(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> Buffer:
+        return self.get_range(path, start=start, end=end, length=length)
+
+
+def test_sequential_reads_grow_readahead():
+    store = CountingStore()
+    store.put("data", DATA)
+
+    with ObjectReader(store, "data", block_size=4096, max_readahead=65536) as f:
+        chunks = iter(lambda: f.read(1000), b"")
+        assert b"".join(chunks) == DATA
+        assert f.read() == b""
+
+    sizes = [end - start for start, end in store.requests]
+    assert sizes[:5] == [4096, 8192, 16384, 32768, 65536]
+    assert len(store.requests) < 25
+
+
+def test_random_access_and_backward_seeks():
+    store = CountingStore()
+    store.put("data", DATA)
+    f = ObjectReader(store, "data", block_size=4096, max_readahead=65536)
+    assert f.size == len(DATA)
+
+    f.seek(-8, io.SEEK_END)
+    assert f.read() == DATA[-8:]
+    f.seek(500_000)
+    assert f.read(100) == DATA[500_000:500_100]
+    # Random reads only fetch the blocks they need
+    assert all(end - start <= 4096 for start, end in store.requests)
+
+    # Backward seeks within cached blocks make no requests
+    n = len(store.requests)
+    f.seek(-10, io.SEEK_CUR)
+    assert f.read(10) == DATA[500_090:500_100]
+    f.seek(len(DATA) - 4)
+    assert f.read(2) == DATA[-4:-2]
+    assert len(store.requests) == n
+
+    # Large reads bypass the cache in one request
+    out = bytearray(200_000)
+    f.seek(10)
+    assert f.readinto(out) == len(out)
+    assert out == DATA[10:200_010]
+    assert store.requests[-1] == (10, 200_010)
+
+    f.close()
+    with pytest.raises(ValueError, match="closed"):
+        f.read()
+
+
+def test_zipfile():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("a.txt", "hello")
+        archive.writestr("b.bin", DATA[:100_000])
+    store = MemoryStore()
+    store.put("archive.zip", buffer.getvalue())
+
+    with ObjectReader(store, "archive.zip") as f, zipfile.ZipFile(f) as archive:
+        assert archive.namelist() == ["a.txt", "b.bin"]
+        assert archive.read("a.txt") == b"hello"
+        assert archive.read("b.bin") == DATA[:100_000]
+
+
+def test_modified_object():
+    store = MemoryStore()
+    store.put("data", DATA)
+    f = ObjectReader(store, "data", size=len(DATA) + 10)
+    f.seek(len(DATA) - 10)
+    with pytest.raises(PreconditionError, match="modified"):
+        f.read()
+
+
+def test_async_reader():
+    store = CountingStore()
+    store.put("data", DATA)
+
+    async def run() -> None:
+        async with await AsyncObjectReader.open(
+            store,
+            "data",
+            block_size=4096,
+            max_readahead=65536,
+        ) as f:
+            assert f.size == len(DATA)
+            assert await f.read(10) == DATA[:10]
+            await f.seek(-5, io.SEEK_END)
+            assert await f.read() == DATA[-5:]
+            await f.seek(0)
+            assert await f.read() == DATA
+            assert f.tell() == len(DATA)
+
+    asyncio.run(run())
+
+
+def exists(store: MemoryStore, path: str) -> bool:
+    try:
+        store.head(path)
+    except NotFoundError:
+        return False
+    return True
+
+
+class StreamingStore(MemoryStore):
+    """Records the chunks passed to `put` as they are consumed."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.chunks: list[int] = []
+        self.consume = threading.Event()
+        self.consume.set()
+
+    def put(self, path: str, file: Any, **kwargs: Any) -> PutResult:  # noqa: ANN401
+        def consume(chunks: Iterable[Any]) -> Iterable[bytes]:
+            for chunk in chunks:
+                self.consume.wait()
+                self.chunks.append(len(chunk))
+                yield bytes(chunk)
+
+        return super().put(path, list(consume(file)), **kwargs)
+
+
+def test_writer_streams_chunks():
+    store = StreamingStore()
+    with ObjectWriter(store, "data", chunk_size=100_000) as f:
+        for i in range(0, len(DATA), 30_000):
+            f.write(DATA[i : i + 30_000])
+        assert f.tell() == len(DATA)
+        assert not exists(store, "data")
+    assert bytes(store.get("data").buffer()) == DATA
+    assert store.chunks == [100_000] * 10
+    assert f.result is not None
+    assert f.result["e_tag"] == store.head("data")["e_tag"]
+
+    with ObjectWriter(store, "data.gz") as f, gzip.GzipFile(fileobj=f, mode="wb") as gz:
+        gz.write(DATA)
+    assert gzip.decompress(store.get("data.gz").buffer()) == DATA
+
+
+def test_writer_blocks_when_pending():
+    store = StreamingStore()
+    store.consume.clear()
+    f = ObjectWriter(store, "data", chunk_size=10, max_pending=1)
+    done = threading.Event()
+
+    def write() -> None:
+        f.write(bytes(100))
+        done.set()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    assert not done.wait(0.2)
+    store.consume.set()
+    thread.join()
+    f.close()
+    assert store.head("data")["size"] == 100
+
+
+def test_writer_commits_atomically():
+    store = MemoryStore()
+    store.put("existing", b"old")
+
+    def fail_while_writing() -> ObjectWriter:
+        with ObjectWriter(store, "partial") as f:
+            f.write(b"abc")
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        fail_while_writing()
+    assert not exists(store, "partial")
+
+    f = ObjectWriter(store, "existing", mode="create")
+    f.write(b"new")
+    with pytest.raises(AlreadyExistsError):
+        f.close()
+    assert f.closed
+
+    e_tag = store.head("existing")["e_tag"]
+    f = ObjectWriter(store, "existing", mode={"e_tag": "stale"})
+    with pytest.raises(PreconditionError):
+        f.close()
+    with ObjectWriter(store, "existing", mode={"e_tag": e_tag}) as f:
+        f.write(b"new")
+    assert bytes(store.get("existing").buffer()) == b"new"
+
+
+def test_abandoned_writer_is_aborted():
+    store = MemoryStore()
+    f = ObjectWriter(store, "abandoned", chunk_size=4)
+    f.write(b"abcdefgh")
+    ref = weakref.ref(f)
+    thread = f._thread  # noqa: SLF001
+    del f
+    gc.collect()
+
+    assert ref() is None
+    thread.join(5)
+    assert not thread.is_alive()
+    assert not exists(store, "abandoned")
+
+
+def test_async_writer():
+    store = MemoryStore()
+    store.put("existing", b"old")
+
+    async def run() -> None:
+        async with AsyncObjectWriter(store, "data", chunk_size=100_000) as f:
+            for i in range(0, len(DATA), 30_000):
+                await f.write(DATA[i : i + 30_000])
+        assert f.result is not None
+
+        async def fail_while_writing() -> None:
+            async with AsyncObjectWriter(store, "partial", chunk_size=1) as f:
+                await f.write(b"abc")
+                raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            await fail_while_writing()
+
+        f = AsyncObjectWriter(store, "existing", mode="create")
+        await f.write(b"new")
+        with pytest.raises(AlreadyExistsError):
+            await f.close()
+
+    asyncio.run(run())
+    assert bytes(store.get("data").buffer()) == DATA
+    assert not exists(store, "partial")
+    assert bytes(store.get("existing").buffer()) == b"old"
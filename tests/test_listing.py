@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import pytest
+
+from obspec.listing import (
+    ColumnarLister,
+    ListingIndex,
+    ObjectMetaColumns,
+    ParallelLister,
+)
+from obspec.store import LocalStore, MemoryStore
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+    from pathlib import Path
+
+    from obspec import ObjectMeta
+
+PATHS = sorted(
+    [
+        f"data/{year}/{month:02}/part-{i}"
+        for year in (2023, 2024)
+        for month in range(1, 13)
+        for i in range(3)
+    ]
+    + ["data/2024.txt", "data/2024-README", "data/README", "other/x"],
+)
+
+
+def _path(meta: ObjectMeta) -> str:
+    return meta["path"]
+
+
+class CountingStore(MemoryStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.list_prefixes: list[str | None] = []
+
+    def list(
+        self,
+        prefix: str | None = None,
+        *,
+        offset: str | None = None,
+    ) -> Iterator[Sequence[ObjectMeta]]:
+        self.list_prefixes.append(prefix)
+        return super().list(prefix, offset=offset)
+
+
+@pytest.fixture
+def store() -> CountingStore:
+    store = CountingStore()
+    for path in PATHS:
+        store.put(path, path.encode())
+    return store
+
+
+def test_list_sharded(store: CountingStore):
+    lister = ParallelLister(store, max_concurrency=4, min_shards=10)
+    paths = [meta["path"] for chunk in lister.list("data") for meta in chunk]
+
+    expected = [path for path in PATHS if path.startswith("data/")]
+    assert sorted(paths) == expected
+    # Two levels of common prefixes were needed to find 10 shards
+    assert len(store.list_prefixes) == 24
+    assert "data/2024/07" in store.list_prefixes
+
+
+def test_list_ordered(store: CountingStore):
+    lister = ParallelLister(store, max_concurrency=3, min_shards=2)
+    paths = [meta["path"] for chunk in lister.list(ordered=True) for meta in chunk]
+    assert paths == PATHS
+
+
+def test_list_ordered_bounded(store: CountingStore, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("obspec.listing._parallel.CHUNK_SIZE", 1)
+    lister = ParallelLister(store, max_concurrency=2, min_shards=20)
+
+    # Only a window of shards ahead of the one being yielded is listed
+    chunks = lister.list("data", ordered=True)
+    next(chunks)
+    assert len(store.list_prefixes) <= 3
+    chunks.close()
+
+    async def run() -> None:
+        store.list_prefixes.clear()
+        chunks = lister.list_async("data", ordered=True)
+        await chunks.__anext__()
+        assert len(store.list_prefixes) <= 3
+        await chunks.aclose()  # type: ignore[attr-defined]
+
+    asyncio.run(run())
+
+
+def test_list_async(store: CountingStore):
+    lister = ParallelLister(store, max_concurrency=4, min_shards=5)
+
+    async def run(*, ordered: bool) -> list[str]:
+        return [
+            meta["path"]
+            async for chunk in lister.list_async("data/2024", ordered=ordered)
+            for meta in chunk
+        ]
+
+    expected = [path for path in PATHS if path.startswith("data/2024/")]
+    assert sorted(asyncio.run(run(ordered=False))) == expected
+    assert asyncio.run(run(ordered=True)) == expected
+
+
+def test_list_without_sharding(store: CountingStore):
+    lister = ParallelLister(store, max_depth=0)
+    paths = [meta["path"] for chunk in lister.list("other") for meta in chunk]
+    assert paths == ["other/x"]
+    assert store.list_prefixes == ["other"]
+
+    store.list_prefixes.clear()
+    paths = [meta["path"] for chunk in lister.list(ordered=True) for meta in chunk]
+    assert paths == PATHS
+    assert store.list_prefixes == [None]
+
+
+@pytest.mark.parametrize(
+    "offset",
+    ["data/2023/07/part-1", "data/2024", "data/2024.txt"],
+)
+def test_list_offset(store: CountingStore, offset: str):
+    lister = ParallelLister(store, max_concurrency=4, min_shards=10)
+    expected = [path for path in PATHS if path > offset]
+
+    paths = [meta["path"] for chunk in lister.list(offset=offset) for meta in chunk]
+    assert sorted(paths) == expected
+    chunks = lister.list(offset=offset, ordered=True)
+    assert [meta["path"] for chunk in chunks for meta in chunk] == expected
+    # Shards entirely before the offset are not listed
+    assert "data/2023/01" not in store.list_prefixes
+
+    async def run() -> list[str]:
+        chunks = lister.list_async(offset=offset, ordered=True)
+        return [meta["path"] async for chunk in chunks for meta in chunk]
+
+    assert asyncio.run(run()) == expected
+
+
+def test_list_errors_and_early_exit(store: CountingStore):
+    class FailingStore(CountingStore):
+        def list(
+            self,
+            prefix: str | None = None,
+            *,
+            offset: str | None = None,
+        ) -> Iterator[Sequence[ObjectMeta]]:
+            if prefix == "data/2023":
+                msg = "listing failed"
+                raise ConnectionError(msg)
+            return super().list(prefix, offset=offset)
+
+    failing = FailingStore()
+    for path in PATHS:
+        failing.put(path, b"")
+    with pytest.raises(ConnectionError):
+        list(ParallelLister(failing, min_shards=2).list("data"))
+
+    # Stopping early does not leave worker threads blocked
+    chunks = ParallelLister(store, max_concurrency=1, min_shards=20).list()
+    next(chunks)
+    chunks.close()
+
+
+def _metas() -> list[ObjectMeta]:
+    return [
+        {
+            "path": path,
+            "last_modified": datetime(2024, 1, 1, tzinfo=timezone.utc)
+            + timedelta(seconds=i, microseconds=i),
+            "size": i * 10,
+            "e_tag": None if i % 3 == 0 else f'"{i}"',
+            "version": "v1" if i == 2 else None,
+        }
+        for i, path in enumerate(["a/1", "a/ü/2", "b/3", "b/4", "c"])
+    ]
+
+
+def test_columns_round_trip():
+    metas = _metas()
+    columns = ObjectMetaColumns.from_metas(metas)
+
+    assert len(columns) == 5
+    assert columns.to_metas() == metas
+    assert list(columns) == metas
+    assert columns[-1] == metas[-1]
+    assert columns.paths() == [meta["path"] for meta in metas]
+    assert list(columns.sizes) == [0, 10, 20, 30, 40]
+    assert columns.path_data == "".join(m["path"] for m in metas).encode()
+    assert columns.path_offsets[-1] == len(columns.path_data)
+
+    assert columns[1:3].to_metas() == metas[1:3]
+    assert (
+        columns.filter([size >= 20 for size in columns.sizes]).to_metas() == (metas[2:])
+    )
+    assert ObjectMetaColumns.concat([columns[:2], columns[2:]]).to_metas() == metas
+    with pytest.raises(IndexError):
+        columns[5]
+
+
+def test_columnar_lister(store: CountingStore):
+    lister = ColumnarLister(ParallelLister(store, min_shards=4), chunk_size=10)
+    chunks = list(lister.list_columnar("data"))
+
+    assert all(isinstance(chunk, ObjectMetaColumns) for chunk in chunks)
+    assert [len(chunk) for chunk in chunks[:-1]] == [10] * (len(chunks) - 1)
+    paths = sorted(path for chunk in chunks for path in chunk.paths())
+    assert paths == [path for path in PATHS if path.startswith("data/")]
+
+    async def run() -> ObjectMetaColumns:
+        lister = ColumnarLister(store, chunk_size=1000)
+        return ObjectMetaColumns.concat(
+            [chunk async for chunk in lister.list_columnar_async("data")],
+        )
+
+    columns = asyncio.run(run())
+    assert sum(columns.sizes) == sum(
+        len(path) for path in PATHS if path.startswith("data/")
+    )
+
+
+def test_native_list_columnar(store: CountingStore, tmp_path: Path):
+    local = LocalStore(tmp_path)
+    for path in PATHS:
+        local.put(path, path.encode())
+    with ListingIndex(":memory:") as index:
+        index.refresh(store)
+        for client in (store, local, index):
+            expected = [meta for chunk in client.list("data") for meta in chunk]
+            chunks = list(client.list_columnar("data", offset="data/2023/12"))
+            expected.sort(key=_path)
+            tail = [meta for meta in expected if meta["path"] > "data/2023/12"]
+            assert sorted(ObjectMetaColumns.concat(chunks), key=_path) == tail
+
+            # ColumnarLister uses the native implementation and only regroups
+            native = SimpleNamespace(list_columnar=client.list_columnar)
+            chunks = list(ColumnarLister(native, chunk_size=7).list_columnar("data"))  # type: ignore[arg-type]
+            assert [len(chunk) for chunk in chunks[:-1]] == [7] * (len(chunks) - 1)
+            got = sorted(ObjectMetaColumns.concat(chunks), key=_path)
+            assert got == expected
+
+            lister = ColumnarLister(client, chunk_size=7)
+
+            async def run(lister: ColumnarLister) -> int:
+                return sum(
+                    [len(chunk) async for chunk in lister.list_columnar_async("data")],
+                )
+
+            assert asyncio.run(run(lister)) == len(expected)
+
+
+def test_columns_to_numpy():
+    np = pytest.importorskip("numpy")
+    columns = ObjectMetaColumns.from_metas(_metas())
+    arrays = columns.to_numpy()
+
+    assert arrays["size"].sum() == 100
+    assert arrays["path"][arrays["size"] > 20].tolist() == ["b/4", "c"]
+    assert arrays["last_modified"][0] == np.datetime64("2024-01-01T00:00:00")
+
+
+def test_columns_to_arrow():
+    pytest.importorskip("pyarrow")
+    metas = _metas()
+    table = ObjectMetaColumns.from_metas(metas).to_arrow()
+
+    assert table.column("path").to_pylist() == [meta["path"] for meta in metas]
+    assert table.column("e_tag").to_pylist() == [meta["e_tag"] for meta in metas]
+    assert table.column("last_modified").to_pylist() == [
+        meta["last_modified"] for meta in metas
+    ]
+
+
+def test_listing_index(store: CountingStore, tmp_path: Path):
+    database = tmp_path / "index.sqlite"
+    with ListingIndex(database) as index:
+        assert index.refreshed_at() is None
+        assert index.refresh(ParallelLister(store, min_shards=4)) == len(PATHS)
+        assert index.refreshed_at() is not None
+        assert len(index) == len(PATHS)
+
+    store.list_prefixes.clear()
+    with ListingIndex(database) as index:
+        for prefix in (None, "data", "data/2024", "data/2024/03/", "missing"):
+            assert [m["path"] for chunk in index.list(prefix) for m in chunk] == [
+                m["path"] for chunk in store.list(prefix) for m in chunk
+            ]
+            assert index.list_with_delimiter(prefix) == store.list_with_delimiter(
+                prefix,
+            )
+        chunks = index.list("data/2024", offset="data/2024/12")
+        assert [meta["path"] for chunk in chunks for meta in chunk] == [
+            "data/2024/12/part-0",
+            "data/2024/12/part-1",
+            "data/2024/12/part-2",
+        ]
+        assert index.list_with_delimiter("data")["common_prefixes"] == [
+            "data/2023",
+            "data/2024",
+        ]
+        # Timestamps round-trip
+        assert next(index.list("other"))[0] == store.head("other/x")
+    # Only the listings used for comparison touched the store
+    assert len(store.list_prefixes) == 5
+
+
+def test_listing_index_incremental(store: CountingStore):
+    with ListingIndex(":memory:") as index:
+        index.refresh(store)
+
+        store.delete("data/2023/01/part-0")
+        store.put("data/2023/01/part-9", b"")
+        store.put("other/y", b"")
+        store.put("zzz", b"")
+
+        # Refreshing a sub-prefix leaves the rest of the index untouched
+        assert index.refresh(store, "data/2023/01") == 3
+        paths = {m["path"] for chunk in index.list() for m in chunk}
+        assert "data/2023/01/part-0" not in paths
+        assert "data/2023/01/part-9" in paths
+        assert "other/y" not in paths
+
+        # Refreshing from an offset only adds later keys
+        assert index.last_path("other") == "other/x"
+        assert index.refresh(store, "other", offset=index.last_path("other")) == 1
+        assert "other/y" in {m["path"] for chunk in index.list() for m in chunk}
+
+        async def refresh() -> int:
+            return await index.refresh_async(store)
+
+        assert asyncio.run(refresh()) == len(store)
+        assert len(index) == len(store)
+
+
+def test_listing_index_chunks():
+    store = MemoryStore()
+    for i in range(2500):
+        store.put(f"k/{i:05}", b"")
+    with ListingIndex(":memory:") as index:
+        index.refresh(store)
+        assert [len(chunk) for chunk in index.list("k")] == [1000, 1000, 500]
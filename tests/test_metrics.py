@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+
+from obspec.exceptions import NotFoundError
+from obspec.metrics import MetricsRegistry, instrument
+from obspec.ranges import RangeCoalescer
+from obspec.store import LocalStore, MemoryStore
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from obspec.metrics import MetricEvent
+
+
+def test_counts_calls_and_bytes():
+    registry = MetricsRegistry()
+    store = instrument(MemoryStore(), registry)
+
+    store.put("a", b"0123456789")
+    assert bytes(store.get_range("a", start=2, end=6)) == b"2345"
+    assert [bytes(b) for b in store.get_ranges("a", starts=[0, 5], ends=[2, 9])] == [
+        b"01",
+        b"5678",
+    ]
+    store.head("a")
+
+    snapshot = registry.snapshot()
+    assert snapshot["put"]["count"] == 1
+    assert snapshot["put"]["bytes"] == 10
+    assert snapshot["get_range"]["bytes"] == 4
+    assert snapshot["get_ranges"]["bytes"] == 6
+    assert snapshot["head"]["count"] == 1
+    assert snapshot["head"]["latency_buckets"][-1] == (float("inf"), 1)
+
+
+class Unseekable:
+    def __init__(self, data: bytes) -> None:
+        self._data = io.BytesIO(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._data.read(size)
+
+
+def test_get_result_bytes_counted_when_streamed(tmp_path: Path):
+    registry = MetricsRegistry()
+    store = instrument(MemoryStore(), registry)
+    store.put("a", [b"abc", b"def"])
+    assert registry.snapshot()["put"]["bytes"] == 6
+
+    # File objects without a file descriptor are measured from their position
+    file = io.BytesIO(b"x" * 100)
+    file.seek(10)
+    store.put("b", file)
+    assert registry.snapshot()["put"]["bytes"] == 96
+
+    # Streams of unknown size are counted as they are read
+    read, write = os.pipe()
+    os.write(write, b"y" * 50)
+    os.close(write)
+    with os.fdopen(read, "rb") as pipe:
+        store.put("c", pipe)
+    assert registry.snapshot()["put"]["bytes"] == 146
+    local = instrument(LocalStore(tmp_path), registry)
+    local.put("d", Unseekable(b"z" * 20))
+    assert registry.snapshot()["put"]["bytes"] == 166
+
+    result = store.get("a")
+    assert result.meta["size"] == 6
+    # Bytes are not counted until the body is read
+    assert registry.snapshot()["get"]["bytes"] == 0
+    assert b"".join(bytes(chunk) for chunk in result) == b"abcdef"
+    assert registry.snapshot()["get"]["bytes"] == 6
+    assert registry.snapshot()["get"]["count"] == 1
+
+
+def test_errors_classified():
+    registry = MetricsRegistry()
+    store = instrument(MemoryStore(), registry)
+
+    with pytest.raises(NotFoundError):
+        store.head("missing")
+
+    stats = registry.snapshot()["head"]
+    assert stats["count"] == 1
+    assert stats["errors"] == {"NotFoundError": 1}
+    assert 'obspec_errors_total{operation="head",error="NotFoundError"} 1' in (
+        registry.openmetrics()
+    )
+
+
+def test_async_and_list():
+    events: list[MetricEvent] = []
+    store = instrument(MemoryStore(), events.append)
+
+    async def run() -> list[str]:
+        await store.put_async("a/1", b"x")
+        await store.put_async("a/2", b"yy")
+        result = await store.get_async("a/2")
+        assert bytes(await result.buffer_async()) == b"yy"
+        return [
+            meta["path"] async for chunk in store.list_async("a/") for meta in chunk
+        ]
+
+    assert asyncio.run(run()) == ["a/1", "a/2"]
+    assert [event["operation"] for event in events] == [
+        "put_async",
+        "put_async",
+        "get_async",
+        "get_async",
+        "list_async",
+    ]
+    # The bytes read from the result are reported separately from the call
+    assert events[3]["seconds"] is None
+    assert events[3]["bytes"] == 2
+
+
+def test_list_reported_when_stopped_early():
+    events: list[MetricEvent] = []
+    store = instrument(MemoryStore(), events.append)
+    store.put("a", b"")
+
+    for _ in store.list():
+        break
+    assert [event["operation"] for event in events] == ["put", "list"]
+    assert events[-1]["error"] is None
+
+    async def run() -> None:
+        listing = store.list_async()
+        async for _ in listing:
+            break
+        await listing.aclose()  # type: ignore[attr-defined]
+
+    asyncio.run(run())
+    assert events[-1]["operation"] == "list_async"
+    assert events[-1]["error"] is None
+
+
+def test_capabilities_preserved():
+    class GetRangeOnly:
+        def get_range(
+            self,
+            path: str,  # noqa: ARG002
+            *,
+            start: int,
+            end: int | None = None,
+            length: int | None = None,  # noqa: ARG002
+        ) -> bytes:
+            assert end is not None
+            return b"0123456789"[start:end]
+
+    registry = MetricsRegistry()
+    store = instrument(GetRangeOnly(), registry)
+    assert not hasattr(store, "get_ranges")
+
+    coalescer = RangeCoalescer(store)
+    assert [
+        bytes(b) for b in coalescer.get_ranges("a", starts=[0, 4], ends=[2, 6])
+    ] == [
+        b"01",
+        b"45",
+    ]
+    assert registry.snapshot()["get_range"]["count"] == 1
+
+
+def test_openmetrics_format():
+    registry = MetricsRegistry(buckets=[0.5])
+    registry({"operation": "get", "seconds": 0.1, "bytes": 3, "error": None})
+    registry({"operation": "get", "seconds": 1.0, "bytes": 0, "error": None})
+
+    assert registry.openmetrics().splitlines() == [
+        "# TYPE obspec_operations counter",
+        'obspec_operations_total{operation="get"} 2',
+        "# TYPE obspec_errors counter",
+        "# TYPE obspec_bytes counter",
+        "# UNIT obspec_bytes bytes",
+        'obspec_bytes_total{operation="get"} 3',
+        "# TYPE obspec_latency_seconds histogram",
+        "# UNIT obspec_latency_seconds seconds",
+        'obspec_latency_seconds_bucket{operation="get",le="0.5"} 1',
+        'obspec_latency_seconds_bucket{operation="get",le="+Inf"} 2',
+        'obspec_latency_seconds_count{operation="get"} 2',
+        'obspec_latency_seconds_sum{operation="get"} 1.1',
+        "# EOF",
+    ]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from obspec.prefetch import Prefetcher
+from obspec.store import MemoryStore
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+DATA = bytes(range(256)) * 16
+
+
+class SlowStore(MemoryStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests: list[tuple[int, int]] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def get_range_async(self, path: str, *, start: int, **kwargs: Any) -> Any:  # noqa: ANN401
+        self.requests.append((start, kwargs["end"]))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            return await super().get_range_async(path, start=start, **kwargs)
+        finally:
+            self.active -= 1
+
+
+def hints(starts: Sequence[int], length: int) -> list[tuple[str, int, int]]:
+    return [("a", start, start + length) for start in starts]
+
+
+def test_prefetch_coalesces():
+    async def run() -> None:
+        store = SlowStore()
+        store.put("a", DATA)
+        async with Prefetcher(store, max_gap=10, max_size=1000) as prefetcher:
+            prefetcher.schedule(hints(range(0, 2000, 200), 100))
+            for start in range(0, 2000, 200):
+                data = await prefetcher.get_range_async("a", start=start, length=100)
+                assert bytes(data) == DATA[start : start + 100]
+
+            assert await prefetcher.get_range_async("a", start=0, end=10) == DATA[:10]
+            assert prefetcher.stats() == {
+                "hits": 10,
+                "misses": 1,
+                "requests": 10,
+                "cancelled": 0,
+                "wasted_bytes": 0,
+            }
+
+        store.requests.clear()
+        async with Prefetcher(store, max_gap=100, max_size=1000) as prefetcher:
+            prefetcher.schedule(hints(range(0, 2000, 200), 100))
+            starts = list(range(0, 2000, 200))
+            buffers = await prefetcher.get_ranges_async(
+                "a",
+                starts=starts,
+                lengths=[100] * 10,
+            )
+            assert [bytes(b) for b in buffers] == [DATA[s : s + 100] for s in starts]
+        assert store.requests == [(0, 900), (1000, 1900)]
+
+    asyncio.run(run())
+
+
+def test_prefetch_budget():
+    async def run() -> None:
+        store = SlowStore()
+        store.put("a", DATA)
+        prefetcher = Prefetcher(store, max_bytes=300, max_concurrency=2, max_gap=0)
+        prefetcher.schedule(hints(range(0, 2000, 101), 100))
+        await asyncio.sleep(0.05)
+        # The budget allows three spans, but only two are requested at once.
+        assert store.requests == [(0, 100), (101, 201), (202, 302)]
+
+        for start in range(0, 2000, 101):
+            data = await prefetcher.get_range_async("a", start=start, length=100)
+            assert bytes(data) == DATA[start : start + 100]
+        assert store.max_active == 2
+        assert prefetcher.stats()["hits"] == 20
+
+    asyncio.run(run())
+
+
+def test_prefetch_cancels_stale_hints():
+    async def run() -> None:
+        store = SlowStore()
+        store.put("a", DATA)
+        prefetcher = Prefetcher(store, max_gap=0)
+        prefetcher.schedule(hints([0, 200, 400, 600], 100))
+
+        # Skipping ahead drops the earlier prefetches.
+        assert (
+            bytes(await prefetcher.get_range_async("a", start=400, end=500))
+            == DATA[400:500]
+        )
+        assert prefetcher.stats()["cancelled"] == 2
+        assert prefetcher.stats()["wasted_bytes"] == 200
+        assert (
+            bytes(await prefetcher.get_range_async("a", start=0, end=100)) == DATA[:100]
+        )
+        assert prefetcher.stats()["misses"] == 1
+
+        # Rescheduling keeps prefetches that are scheduled again.
+        prefetcher.schedule(hints([600, 800], 100))
+        assert prefetcher.stats()["cancelled"] == 2
+        prefetcher.cancel()
+        assert prefetcher.stats()["cancelled"] == 4
+        await asyncio.sleep(0.02)
+        assert store.requests.count((600, 700)) == 1
+
+        with pytest.raises(ValueError, match="zero-length"):
+            prefetcher.schedule([("a", 10, 10)])
+
+    asyncio.run(run())
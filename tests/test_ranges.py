@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from obspec.ranges import ParallelRangeReader, RangeCoalescer, coalesce_ranges
+from obspec.store import MemoryStore
+
+DATA = bytes(range(256)) * 16
+
+
+class RangeClient:
+    def __init__(self) -> None:
+        self.calls: list[tuple[int, int]] = []
+
+    def get_range(
+        self,
+        path: str,  # noqa: ARG002
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,  # noqa: ARG002
+    ) -> bytes:
+        assert end is not None
+        self.calls.append((start, end))
+        return DATA[start:end]
+
+    async def get_range_async(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> bytes:
+        return self.get_range(path, start=start, end=end, length=length)
+
+
+def test_coalesce_ranges():
+    assert coalesce_ranges([0, 10, 100], [5, 20, 110], max_gap=4) == [
+        (0, 5),
+        (10, 20),
+        (100, 110),
+    ]
+    assert coalesce_ranges([0, 10, 100], [5, 20, 110], max_gap=10) == [
+        (0, 20),
+        (100, 110),
+    ]
+    # Overlapping ranges are always merged, even past max_size
+    assert coalesce_ranges([0, 5], [10, 15], max_gap=0, max_size=4) == [(0, 15)]
+    assert coalesce_ranges([0, 10], [5, 15], max_gap=10, max_size=10) == [
+        (0, 5),
+        (10, 15),
+    ]
+    # Zero-length ranges need no request
+    assert coalesce_ranges([3], [3]) == []
+
+
+def test_get_ranges_preserves_order():
+    client = RangeClient()
+    coalescer = RangeCoalescer(client, max_gap=16)
+    starts = [300, 0, 20, 310, 1000]
+    ends = [320, 10, 30, 400, 1000]
+    buffers = coalescer.get_ranges("path", starts=starts, ends=ends)
+
+    assert [bytes(b) for b in buffers] == [DATA[s:e] for s, e in zip(starts, ends)]
+    # The zero-length range is passed through to the client on its own
+    assert client.calls == [(0, 30), (300, 400), (1000, 1000)]
+    assert all(isinstance(b, memoryview) for b in buffers)
+
+
+def test_get_ranges_lengths_async():
+    client = RangeClient()
+    coalescer = RangeCoalescer(client, max_gap=0)
+    buffers = asyncio.run(
+        coalescer.get_ranges_async("path", starts=[10, 0], lengths=[5, 10]),
+    )
+
+    assert [bytes(b) for b in buffers] == [DATA[10:15], DATA[0:10]]
+    assert client.calls == [(0, 15)]
+
+
+def test_get_ranges_invalid():
+    coalescer = RangeCoalescer(RangeClient())
+    with pytest.raises(ValueError, match="must be non-None"):
+        coalescer.get_ranges("path", starts=[0])
+    with pytest.raises(ValueError, match="range starts"):
+        coalescer.get_ranges("path", starts=[0, 1], ends=[1])
+
+
+def test_get_ranges_raises_like_client():
+    store = MemoryStore()
+    store.put("path", DATA[:100])
+    coalescer = RangeCoalescer(store)
+
+    with pytest.raises(ValueError, match="zero-length"):
+        coalescer.get_ranges("path", starts=[0, 10], ends=[10, 10])
+    # The range past the end is merged with the first, which is cut short
+    with pytest.raises(ValueError, match="out of bounds"):
+        asyncio.run(
+            coalescer.get_ranges_async("path", starts=[0, 150], ends=[10, 160]),
+        )
+
+
+class SlowRangeClient:
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls: list[tuple[int, int]] = []
+        self.fail_at: set[int] = set()
+
+    async def get_range_async(
+        self,
+        path: str,  # noqa: ARG002
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,  # noqa: ARG002
+    ) -> bytes:
+        assert end is not None
+        self.calls.append((start, end))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001 if start else 0)
+            if start in self.fail_at:
+                msg = f"Failed to fetch offset {start}."
+                raise ConnectionError(msg)
+        finally:
+            self.in_flight -= 1
+        return DATA[start:end]
+
+
+def test_parallel_range_reader():
+    client = SlowRangeClient()
+    reader = ParallelRangeReader(client, max_concurrency=3, part_size=100)
+    starts = [0, 1000, 50]
+    ends = [1000, 1010, 60]
+    buffers = asyncio.run(reader.get_ranges_async("path", starts=starts, ends=ends))
+
+    assert [bytes(b) for b in buffers] == [DATA[s:e] for s, e in zip(starts, ends)]
+    # The first range is split into ten parts
+    assert len(client.calls) == 12
+    assert client.max_in_flight == 3
+
+
+def test_parallel_range_reader_cancels_on_error():
+    client = SlowRangeClient()
+    client.fail_at = {0}
+    reader = ParallelRangeReader(client, part_size=100)
+
+    async def run() -> None:
+        with pytest.raises(ConnectionError):
+            await reader.get_range_async("path", start=0, end=1000)
+        # No part is left writing into the abandoned output buffer
+        assert client.in_flight == 0
+        with pytest.raises(ConnectionError):
+            await reader.get_ranges_async("path", starts=[0, 100], lengths=[10, 10])
+        assert client.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_parallel_range_reader_truncated():
+    client = SlowRangeClient()
+    reader = ParallelRangeReader(client, part_size=1000)
+    size = len(DATA)
+    buffer = asyncio.run(
+        reader.get_range_async("path", start=size - 1500, end=size + 100),
+    )
+    assert bytes(buffer) == DATA[size - 1500 :]
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import time
+from typing import Any
+
+import pytest
+
+from obspec.exceptions import NotFoundError
+from obspec.retry import RetryPolicy, is_retryable, retrying
+from obspec.store import MemoryStore
+
+
+class FlakyStore(MemoryStore):
+    """Fails the next `failures` calls with a transient error."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.failures = 0
+        self.calls = 0
+
+    def _maybe_fail(self) -> None:
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            msg = "connection reset"
+            raise ConnectionError(msg)
+
+    def head(self, path: str) -> Any:  # noqa: ANN401
+        self._maybe_fail()
+        return super().head(path)
+
+    def put(self, path: str, file: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        self._maybe_fail()
+        return super().put(path, file, **kwargs)
+
+    def list(self, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        self._maybe_fail()
+        return super().list(*args, **kwargs)
+
+    async def get_range_async(self, path: str, **kwargs: Any) -> Any:  # noqa: ANN401
+        self._maybe_fail()
+        return await super().get_range_async(path, **kwargs)
+
+
+# An implementation-defined exception with a well-known name
+ImplementationNotFoundError = type("NotFoundError", (Exception,), {})
+
+
+def test_is_retryable():
+    assert is_retryable(ConnectionError())
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(NotFoundError())
+    assert not is_retryable(ImplementationNotFoundError())
+    assert not is_retryable(ValueError())
+    assert is_retryable(OSError("network unreachable"))
+    assert not is_retryable(PermissionError())
+    assert not is_retryable(FileNotFoundError())
+    assert not is_retryable(AttributeError())
+    assert not is_retryable(KeyError())
+    assert not is_retryable(AssertionError())
+
+
+def test_retries_transient_errors():
+    inner = FlakyStore()
+    inner.put("a", b"abc")
+    policy = RetryPolicy(backoff=0)
+    store = retrying(inner, policy)
+
+    inner.failures = 2
+    assert store.head("a")["size"] == 3
+    assert policy.stats()["retries"] == 2
+
+    inner.failures = 3
+    with pytest.raises(ConnectionError):
+        store.head("a")
+
+    # Replayable inputs are retried from the start
+    inner.failures = 1
+    f = io.BytesIO(b"xyz")
+    store.put("b", f)
+    assert bytes(inner.get("b").buffer()) == b"xyz"
+
+    # Iterators cannot be replayed, so are put once
+    inner.failures = 1
+    with pytest.raises(ConnectionError):
+        store.put("c", iter([b"x"]))
+
+    inner.failures = 1
+    assert [m["path"] for chunk in store.list() for m in chunk] == ["a", "b"]
+
+    # Only methods of the wrapped store are present
+    assert not hasattr(retrying(object()), "head")
+
+
+def test_fails_fast_on_well_known_errors():
+    calls = 0
+
+    class Store:
+        def head(self, path: str) -> Any:  # noqa: ANN401
+            nonlocal calls
+            calls += 1
+            raise ImplementationNotFoundError(path)
+
+    store = retrying(Store(), RetryPolicy(backoff=0))
+    with pytest.raises(ImplementationNotFoundError):
+        store.head("a")
+    assert calls == 1
+
+
+@pytest.mark.parametrize("error", [AttributeError, PermissionError])
+def test_fails_fast_on_bugs_and_permissions(error: type[Exception]):
+    calls = 0
+
+    class Store:
+        def head(self, path: str) -> Any:  # noqa: ANN401
+            nonlocal calls
+            calls += 1
+            raise error(path)
+
+    store = retrying(Store(), RetryPolicy(backoff=0))
+    with pytest.raises(error):
+        store.head("a")
+    assert calls == 1
+
+
+def test_retries_async():
+    inner = FlakyStore()
+    inner.put("a", b"0123456789")
+    policy = RetryPolicy(backoff=0)
+    store = retrying(inner, policy)
+
+    async def run() -> bytes:
+        inner.failures = 2
+        return bytes(await store.get_range_async("a", start=2, end=5))
+
+    assert asyncio.run(run()) == b"234"
+    assert policy.stats()["retries"] == 2
+
+
+def test_hedges_slow_requests():
+    slow = {"first": True}
+
+    class Store:
+        calls = 0
+
+        def head(self, path: str) -> Any:  # noqa: ANN401
+            self.calls += 1
+            if slow["first"]:
+                slow["first"] = False
+                time.sleep(0.5)
+            return {"path": path}
+
+        async def head_async(self, path: str) -> Any:  # noqa: ANN401
+            self.calls += 1
+            if slow["first"]:
+                slow["first"] = False
+                await asyncio.sleep(10)
+            return {"path": path}
+
+    inner = Store()
+    policy = RetryPolicy(hedge_percentile=0.9, hedge_min_samples=5)
+    store = retrying(inner, policy)
+
+    slow["first"] = False
+    for _ in range(5):
+        store.head("a")
+    assert policy.stats()["hedges"] == 0
+
+    slow["first"] = True
+    start = time.perf_counter()
+    assert store.head("a") == {"path": "a"}
+    assert time.perf_counter() - start < 0.4
+    assert policy.stats()["hedges"] == 1
+    assert policy.stats()["hedge_wins"] == 1
+
+    async def run() -> Any:  # noqa: ANN401
+        for _ in range(5):
+            await store.head_async("a")
+        slow["first"] = True
+        return await asyncio.wait_for(store.head_async("a"), 5)
+
+    assert asyncio.run(run()) == {"path": "a"}
+    assert policy.stats()["hedge_wins"] == 2
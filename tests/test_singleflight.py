@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from obspec.exceptions import NotFoundError, NotSupportedError
+from obspec.singleflight import SingleFlight
+from obspec.store import MemoryStore
+
+
+class SlowStore(MemoryStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+        self.release = threading.Event()
+
+    def get_range(
+        self,
+        path: str,
+        *,
+        start: int,
+        end: int | None = None,
+        length: int | None = None,
+    ) -> memoryview:
+        self.calls += 1
+        self.release.wait()
+        return super().get_range(path, start=start, end=end, length=length)
+
+    async def head_async(self, path: str):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return await super().head_async(path)
+
+
+def test_shares_sync_calls():
+    store = SlowStore()
+    store.put("hot", b"0123456789")
+    client = SingleFlight(store)
+
+    with ThreadPoolExecutor(8) as executor:
+        futures = [
+            executor.submit(client.get_range, "hot", start=2, end=6) for _ in range(8)
+        ]
+        # Let every thread join the in-flight call before it completes.
+        while client.stats()["shared"] < 7:
+            time.sleep(0.001)
+        store.release.set()
+        results = [future.result() for future in futures]
+
+    assert store.calls == 1
+    assert all(result is results[0] for result in results)
+    assert bytes(results[0]) == b"2345"
+    assert client.stats() == {"calls": 1, "shared": 7}
+
+    # Calls made after completion are not shared
+    client.get_range("hot", start=2, end=6)
+    assert store.calls == 2
+
+
+def test_shares_async_calls():
+    store = SlowStore()
+    store.put("hot", b"data")
+    client = SingleFlight(store)
+
+    async def run() -> None:
+        tasks = [asyncio.ensure_future(client.head_async("hot")) for _ in range(5)]
+        await asyncio.sleep(0)
+        # Cancelling one waiter does not cancel the shared call
+        tasks[0].cancel()
+        results = await asyncio.gather(*tasks[1:])
+        assert all(meta["size"] == 4 for meta in results)
+
+        different = await asyncio.gather(
+            client.get_async("hot", options={"range": (0, 2)}),
+            client.get_async("hot", options={"range": (0, 2)}),
+            client.get_async("hot", options={"range": (1, 3)}),
+        )
+        assert [bytes(result.buffer()) for result in different] == [
+            b"da",
+            b"da",
+            b"at",
+        ]
+
+    asyncio.run(run())
+    assert store.calls == 1
+    assert client.stats() == {"calls": 3, "shared": 5}
+
+
+def test_errors_are_shared():
+    client = SingleFlight(MemoryStore())
+
+    async def run() -> list[BaseException | object]:
+        return await asyncio.gather(
+            client.head_async("missing"),
+            client.head_async("missing"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, NotFoundError) for result in results)
+    with pytest.raises(NotFoundError):
+        client.head("missing")
+
+    class HeadOnly:
+        def head(self, path: str):  # noqa: ANN202
+            raise NotImplementedError
+
+    with pytest.raises(NotSupportedError):
+        SingleFlight(HeadOnly()).get_range("a", start=0, end=1)
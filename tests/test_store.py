@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from obspec.exceptions import (
+    AlreadyExistsError,
+    InvalidPathError,
+    NotFoundError,
+    NotModifiedError,
+    PreconditionError,
+)
+from obspec.store import HTTPStore, LocalStore, MemoryStore, TieredStore
+from obspec.testing.server import StoreServer
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterator, Sequence
+    from pathlib import Path
+
+    from obspec import GetOptions, GetResult, PutResult
+
+
+@pytest.fixture(params=["local", "memory", "http", "tiered"])
+def store(
+    request: pytest.FixtureRequest,
+    tmp_path: Path,
+) -> Iterator[LocalStore | MemoryStore | HTTPStore | TieredStore]:
+    if request.param == "local":
+        yield LocalStore(tmp_path)
+    elif request.param == "memory":
+        yield MemoryStore()
+    elif request.param == "http":
+        with StoreServer() as server:
+            yield HTTPStore(server.url)
+    else:
+        with TieredStore(MemoryStore(), LocalStore(tmp_path), write_back=True) as store:
+            yield store
+
+
+def test_local_put_get(store: LocalStore | MemoryStore):
+    result = store.put("a/b.txt", b"hello world")
+    resp = store.get("a/b.txt")
+    assert bytes(resp.buffer()) == b"hello world"
+    assert isinstance(resp.buffer(), memoryview)
+    assert resp.meta["e_tag"] == result["e_tag"]
+    assert resp.meta["size"] == 11
+    assert b"".join(resp) == b"hello world"
+
+    assert bytes(store.get_range("a/b.txt", start=6, end=100)) == b"world"
+    assert [
+        bytes(b) for b in store.get_ranges("a/b.txt", starts=[0, 6], lengths=[5, 5])
+    ] == [b"hello", b"world"]
+
+
+def test_local_get_options(store: LocalStore | MemoryStore):
+    e_tag = store.put("a", b"0123456789")["e_tag"]
+    assert e_tag is not None
+
+    assert bytes(store.get("a", options={"range": (2, 4)}).buffer()) == b"23"
+    assert bytes(store.get("a", options={"range": {"offset": 8}}).buffer()) == b"89"
+    assert bytes(store.get("a", options={"range": {"suffix": 3}}).buffer()) == b"789"
+
+    with pytest.raises(NotModifiedError):
+        store.get("a", options={"if_none_match": e_tag})
+    with pytest.raises(PreconditionError):
+        store.get("a", options={"if_match": '"other"'})
+    with pytest.raises(NotFoundError):
+        store.get("missing")
+
+
+def test_local_put_modes(store: LocalStore | MemoryStore, tmp_path: Path):
+    store.put("a", [b"abc", memoryview(b"def")], mode="create")
+    with pytest.raises(AlreadyExistsError):
+        store.put("a", b"new", mode="create")
+    assert bytes(store.get("a").buffer()) == b"abcdef"
+
+    source = tmp_path / "source.bin"
+    source.write_bytes(b"from a path")
+    store.put("b", source)
+    assert bytes(store.get("b").buffer()) == b"from a path"
+
+
+def test_local_invalid_path(tmp_path: Path):
+    with pytest.raises(InvalidPathError):
+        LocalStore(tmp_path).put("../escape", b"")
+
+
+def test_local_list(store: LocalStore | MemoryStore):
+    for path in ["a/1", "a/2", "a/b/3", "ab/4", "c"]:
+        store.put(path, b"x")
+
+    paths = sorted(meta["path"] for chunk in store.list("a") for meta in chunk)
+    assert paths == ["a/1", "a/2", "a/b/3"]
+
+    paths = sorted(meta["path"] for chunk in store.list(offset="a/2") for meta in chunk)
+    assert paths == ["a/b/3", "ab/4", "c"]
+
+    result = store.list_with_delimiter("a")
+    assert result["common_prefixes"] == ["a/b"]
+    assert [meta["path"] for meta in result["objects"]] == ["a/1", "a/2"]
+
+
+def test_local_copy_rename_delete(store: LocalStore | MemoryStore):
+    store.put("a", b"data")
+    store.copy("a", "b")
+    with pytest.raises(AlreadyExistsError):
+        store.copy("a", "b", overwrite=False)
+
+    store.rename("b", "c/d", overwrite=False)
+    assert bytes(store.get("c/d").buffer()) == b"data"
+    with pytest.raises(NotFoundError):
+        store.head("b")
+
+    # Renaming an object onto itself keeps it
+    store.rename("c/d", "c/d")
+    assert bytes(store.get("c/d").buffer()) == b"data"
+    with pytest.raises(AlreadyExistsError):
+        store.rename("c/d", "c/d", overwrite=False)
+    assert bytes(store.get("c/d").buffer()) == b"data"
+
+    store.delete(["a", "c/d"])
+    with pytest.raises(NotFoundError):
+        store.head("a")
+
+
+def test_local_async(store: LocalStore | MemoryStore):
+    async def chunks() -> AsyncIterator[bytes]:
+        yield b"abc"
+        yield b"def"
+
+    async def run() -> bytes:
+        await store.put_async("a", chunks())
+        resp = await store.get_async("a")
+        listed = [chunk async for chunk in store.list_async()]
+        assert [meta["path"] for meta in listed[0]] == ["a"]
+        return bytes(await resp.buffer_async())
+
+    assert asyncio.run(run()) == b"abcdef"
+
+
+def test_memory_update_version():
+    store = MemoryStore()
+    first = store.put("a", b"1")
+    second = store.put("a", b"2", mode={"e_tag": first["e_tag"]})
+    with pytest.raises(PreconditionError):
+        store.put("a", b"3", mode={"e_tag": first["e_tag"]})
+    with pytest.raises(PreconditionError):
+        store.put("missing", b"3", mode={"e_tag": first["e_tag"]})
+
+    assert store.head("a")["e_tag"] == second["e_tag"]
+    assert bytes(store.get("a").buffer()) == b"2"
+
+
+def test_memory_list_chunks():
+    store = MemoryStore()
+    paths = [f"dir/{i:05}" for i in range(2500)]
+    for path in paths:
+        store.put(path, b"")
+    store.put("dir0", b"")
+
+    chunks = list(store.list("dir", offset="dir/00099"))
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 400]
+    assert [meta["path"] for chunk in chunks for meta in chunk] == paths[100:]
+
+    store.put("dir/sub/a", b"")
+    store.put("dir/sub/b", b"")
+    result = store.list_with_delimiter()
+    assert result["common_prefixes"] == ["dir"]
+    assert [meta["path"] for meta in result["objects"]] == ["dir0"]
+    assert store.list_with_delimiter("dir")["common_prefixes"] == ["dir/sub"]
+
+
+class FlakyStore(MemoryStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.fail = False
+
+    def put(self, path: str, file: Any, **kwargs: Any) -> PutResult:  # noqa: ANN401
+        if self.fail:
+            msg = "Slow tier unavailable."
+            raise ConnectionError(msg)
+        return super().put(path, file, **kwargs)
+
+
+class ForeignErrorStore(MemoryStore):
+    """Raises a non-obspec exception for missing objects, as other packages do."""
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> GetResult:
+        if path not in self._objects:
+            raise FileNotFoundError(path)
+        return super().get(path, options=options)
+
+    def delete(self, paths: str | Sequence[str]) -> None:
+        for path in [paths] if isinstance(paths, str) else paths:
+            if path not in self._objects:
+                raise FileNotFoundError(path)
+        super().delete(paths)
+
+
+def test_tiered_foreign_not_found():
+    fast, slow = ForeignErrorStore(), MemoryStore()
+    store = TieredStore(fast, slow)
+    store.put("a", b"data")
+
+    # The fast tier loses its copy behind the store's back
+    MemoryStore.delete(fast, "a")
+    assert bytes(store.get("a").buffer()) == b"data"
+    store.put("b", b"data")
+    MemoryStore.delete(fast, "b")
+    store.delete(["a", "b"])
+    assert len(slow) == 0
+
+
+def test_tiered_promotion():
+    fast, slow = MemoryStore(), MemoryStore()
+    slow.put("a", b"0123456789")
+    slow.put("b", b"0123456789")
+    store = TieredStore(fast, slow, promote_after=2)
+
+    assert bytes(store.get("a").buffer()) == b"0123456789"
+    assert len(fast) == 0
+    assert bytes(store.get("a").buffer()) == b"0123456789"
+    assert bytes(fast.get("a").buffer()) == b"0123456789"
+    assert bytes(store.get_range("a", start=2, end=4)) == b"23"
+    assert store.head("a") == slow.head("a")
+
+    store.get_range("b", start=0, end=1)
+    store.get_range("b", start=0, end=1)
+    store.close()
+    assert bytes(fast.get("b").buffer()) == b"0123456789"
+    assert store.stats()["promotions"] == 2
+    assert store.stats()["fast_hits"] == 1
+    assert store.stats()["slow_reads"] == 4
+
+
+def test_tiered_eviction():
+    fast, slow = MemoryStore(), MemoryStore()
+    store = TieredStore(fast, slow, max_size=10)
+    store.put("a", b"123456")
+    store.put("b", b"123456")
+    assert [meta["path"] for chunk in fast.list() for meta in chunk] == ["b"]
+
+    # The least often read object is evicted, even if it was written last.
+    store.get("b")
+    store.put("c", b"123456")
+    assert [meta["path"] for chunk in fast.list() for meta in chunk] == ["b"]
+    assert bytes(store.get("c").buffer()) == b"123456"
+    assert store.stats()["evictions"] == 2
+    assert store.stats()["size"] == 6
+
+
+def test_tiered_write_back():
+    fast, slow = MemoryStore(), FlakyStore()
+    slow.fail = True
+    with TieredStore(fast, slow, write_back=True) as store:
+        result = store.put("a/b", b"data", attributes={"Content-Type": "text/plain"})
+        assert store.head("a/b")["e_tag"] == result["e_tag"]
+        assert bytes(store.get("a/b").buffer()) == b"data"
+        assert store.list_with_delimiter()["common_prefixes"] == ["a"]
+        assert [meta["path"] for chunk in store.list() for meta in chunk] == ["a/b"]
+        with pytest.raises(ConnectionError):
+            store.flush()
+        assert store.stats()["dirty"] == 1
+        assert store.stats()["flush_errors"] >= 1
+        with pytest.raises(AlreadyExistsError):
+            store.put("a/b", b"new", mode="create")
+
+        slow.fail = False
+        store.put("a/b", b"update", mode={"e_tag": result["e_tag"]})
+        assert store.stats()["dirty"] == 0
+        assert bytes(slow.get("a/b").buffer()) == b"update"
+        assert slow.get("a/b").attributes == {}
+
+        store.put("c", b"data", attributes={"Content-Type": "text/plain"})
+    assert slow.get("c").attributes == {"Content-Type": "text/plain"}
+    assert store.stats()["flushes"] == 2
+
+    store.delete(["a/b", "c"])
+    assert len(fast) == 0
+    assert len(slow) == 0
+
+
+def test_tiered_delete_pending(tmp_path: Path):
+    slow = LocalStore(tmp_path)
+    with TieredStore(MemoryStore(), slow, write_back=True) as store:
+        slow.put("old", b"data")
+        store.put("new", b"data")
+        store.put("old", b"update")
+        store.delete(["new", "old"])
+        with pytest.raises(NotFoundError):
+            store.head("new")
+        store.flush()
+    assert list(slow.list()) == []
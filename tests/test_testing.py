@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import http.client
+import time
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from obspec.exceptions import (
+    AlreadyExistsError,
+    NotFoundError,
+    NotModifiedError,
+    PermissionDeniedError,
+    PreconditionError,
+)
+from obspec.retry import RetryPolicy, retrying
+from obspec.store import HTTPStore, LocalStore, MemoryStore, TieredStore
+from obspec.testing import CHECKS, run_conformance
+from obspec.testing.plugin import StoreConformance
+from obspec.testing.server import StoreServer
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+    from pathlib import Path
+
+    from obspec import GetResult, ListResult, ObjectMeta
+    from obspec.testing import StoreFactory
+
+
+class TestMemoryStore(StoreConformance):
+    rounds = 5
+
+    @pytest.fixture
+    def store_factory(self) -> StoreFactory:
+        return MemoryStore
+
+
+class TestLocalStore(StoreConformance):
+    rounds = 5
+
+    @pytest.fixture
+    def store_factory(self, tmp_path: Path) -> StoreFactory:
+        return lambda: LocalStore(tmp_path)
+
+
+class TestHTTPStore(StoreConformance):
+    rounds = 5
+
+    @pytest.fixture
+    def store_factory(self) -> Iterator[StoreFactory]:
+        with StoreServer() as server:
+            yield lambda: HTTPStore(server.url)
+
+
+class TestTieredStore(StoreConformance):
+    rounds = 5
+
+    @pytest.fixture
+    def store_factory(self, tmp_path: Path) -> StoreFactory:
+        slow = MemoryStore()
+        return lambda: TieredStore(LocalStore(tmp_path), slow, max_size=1000)
+
+
+class TestTieredStoreWriteBack(StoreConformance):
+    rounds = 5
+
+    @pytest.fixture
+    def store_factory(self) -> StoreFactory:
+        slow = MemoryStore()
+        return lambda: TieredStore(MemoryStore(), slow, write_back=True)
+
+
+class InclusiveEndStore(MemoryStore):
+    def get_range(self, path: str, *, start: int, **kwargs: Any) -> Any:  # noqa: ANN401
+        if kwargs.get("end") is not None:
+            kwargs["end"] += 1
+        return super().get_range(path, start=start, **kwargs)
+
+
+class RacyCreateStore(MemoryStore):
+    def put(self, path: str, file: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        if kwargs.get("mode") == "create":
+            del kwargs["mode"]
+            try:
+                self.head(path)
+            except NotFoundError:
+                time.sleep(0.01)
+            else:
+                raise AlreadyExistsError(path)
+        return super().put(path, file, **kwargs)
+
+
+class StrippingStore(MemoryStore):
+    def list_with_delimiter(self, prefix: str | None = None) -> ListResult[Any]:
+        result = super().list_with_delimiter(prefix)
+        strip = len(prefix) + 1 if prefix else 0
+        objects: list[ObjectMeta] = [
+            {**meta, "path": meta["path"][strip:]} for meta in result["objects"]
+        ]
+        return {"common_prefixes": result["common_prefixes"], "objects": objects}
+
+
+def failures(factory: StoreFactory) -> dict[str, str | None]:
+    results = run_conformance(factory, rounds=3)
+    return {r["check"]: r["message"] for r in results if r["status"] == "failed"}
+
+
+def test_detects_violations():
+    failed = failures(InclusiveEndStore)
+    assert list(failed) == ["get_range", "async"]
+    assert "exclusive" in str(failed["get_range"])
+
+    failed = failures(RacyCreateStore)
+    assert list(failed) == ["stress_create"]
+    assert "mode 'create' succeeded" in str(failed["stress_create"])
+
+    failed = failures(StrippingStore)
+    assert list(failed) == ["list_with_delimiter", "async"]
+
+
+def test_skips_missing_protocols():
+    results = run_conformance(object, stress=False)
+    assert [r["check"] for r in results] == [
+        c for c in CHECKS if not c.startswith("stress_")
+    ]
+    assert {r["status"] for r in results} == {"skipped"}
+
+    with pytest.raises(ValueError, match="Unknown checks"):
+        run_conformance(MemoryStore, checks=["nope"])
+
+
+def head_forever(store: HTTPStore) -> None:
+    while True:
+        store.head("a")
+
+
+def test_server_faults():
+    with pytest.raises(ValueError, match="Unknown faults"):
+        StoreServer(faults={"Nope": 1.0})
+
+    with StoreServer(faults={"PermissionDeniedError": 1.0}) as server:
+        store = HTTPStore(server.url)
+        with pytest.raises(PermissionDeniedError):
+            store.head("a")
+        server.faults = {}
+        store.put("a", b"data")
+        server.faults = {"SlowDown": 0.5}
+        with pytest.raises(ConnectionError, match="503"):
+            head_forever(store)
+
+        store = retrying(store, RetryPolicy(max_attempts=20, backoff=0))
+        for i in range(10):
+            store.put(f"a/{i}", b"data")
+        assert bytes(store.get("a/9").buffer()) == b"data"
+        assert server.stats()["faults"] > 0
+
+
+def test_server_conditional_head():
+    with StoreServer() as server:
+        store = HTTPStore(server.url)
+        e_tag = store.put("a", b"data")["e_tag"]
+        assert e_tag is not None
+
+        meta = store.get("a", options={"head": True, "if_match": e_tag}).meta
+        assert meta["size"] == 4
+        with pytest.raises(NotModifiedError):
+            store.get("a", options={"head": True, "if_none_match": e_tag})
+        with pytest.raises(PreconditionError):
+            store.get("a", options={"head": True, "if_match": "nope"})
+
+
+def test_head_reuses_connections():
+    with StoreServer() as server:
+        store = HTTPStore(server.url)
+        store.put("a", b"data")
+        for _ in range(50):
+            assert store.get("a", options={"head": True}).meta["size"] == 4
+        assert store._pool.qsize() == 1  # noqa: SLF001
+
+
+class StaleConnection:
+    """A pooled connection that the server has closed."""
+
+    def __init__(self) -> None:
+        self.methods: list[str] = []
+
+    def request(self, method: str, *_: Any, **__: Any) -> None:  # noqa: ANN401
+        self.methods.append(method)
+
+    def getresponse(self) -> None:
+        raise http.client.RemoteDisconnected
+
+    def close(self) -> None:
+        pass
+
+
+def test_only_idempotent_requests_are_resent():
+    with StoreServer() as server:
+        store = HTTPStore(server.url)
+        store.put("a", b"data")
+        stale = StaleConnection()
+
+        def pool_stale() -> None:
+            while not store._pool.empty():  # noqa: SLF001
+                store._pool.get_nowait()  # noqa: SLF001
+            store._pool.put_nowait(stale)  # type: ignore[arg-type]  # noqa: SLF001
+
+        # A POST is never sent on a pooled connection, in case it has to be resent
+        pool_stale()
+        store.copy("a", "b")
+        assert stale.methods == []
+
+        pool_stale()
+        assert store.head("b")["size"] == 4
+        assert stale.methods == ["HEAD"]
+
+        # Nor is a conditional PUT, which would fail its own precondition if resent
+        stale.methods.clear()
+        pool_stale()
+        e_tag = store.put("c", b"data", mode="create")["e_tag"]
+        pool_stale()
+        store.put("c", b"new", mode={"e_tag": e_tag})
+        assert stale.methods == []
+        pool_stale()
+        store.put("c", b"newer")
+        assert stale.methods == ["PUT"]
+
+
+class CountingStore(MemoryStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.lists = 0
+        self.gets = 0
+
+    def list(self, *args: Any, **kwargs: Any) -> Iterator[Sequence[ObjectMeta]]:  # noqa: ANN401
+        self.lists += 1
+        return super().list(*args, **kwargs)
+
+    def get(self, *args: Any, **kwargs: Any) -> GetResult:  # noqa: ANN401
+        self.gets += 1
+        return super().get(*args, **kwargs)
+
+
+def test_server_pages_listing_once():
+    backend = CountingStore()
+    for i in range(2500):
+        backend.put(f"a/{i:04}", b"")
+    with StoreServer(backend) as server:
+        store = HTTPStore(server.url)
+        paths = [meta["path"] for chunk in store.list("a") for meta in chunk]
+        assert paths == [f"a/{i:04}" for i in range(2500)]
+        assert backend.lists == 1
+
+        # A listing starting at an offset is listed afresh
+        assert len([m for chunk in store.list(offset="a/2000") for m in chunk]) == 499
+        assert backend.lists == 2
+
+
+def test_http_store_does_not_coalesce_ranges():
+    backend = CountingStore()
+    backend.put("a", b"0123456789")
+    with StoreServer(backend) as server:
+        store = HTTPStore(server.url)
+        buffers = store.get_ranges("a", starts=[0, 2, 4], lengths=[2, 2, 2])
+        assert [bytes(b) for b in buffers] == [b"01", b"23", b"45"]
+        assert backend.gets == 3
+
+
+def test_server_throttling():
+    data = b"x" * 100_000
+    with StoreServer(latency=0.05, bandwidth=1_000_000) as server:
+        store = HTTPStore(server.url)
+        start = time.perf_counter()
+        store.put("a", data)
+        assert bytes(store.get("a").buffer()) == data
+        assert time.perf_counter() - start >= 0.25  # 2 * (0.05 + 0.1) seconds
+
+        assert server.stats() == {
+            "requests": 2,
+            "faults": 0,
+            "bytes_received": len(data),
+            "bytes_sent": len(data),
+        }
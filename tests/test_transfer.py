@@ -0,0 +1,504 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import mmap
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from obspec.exceptions import NotFoundError, PreconditionError
+from obspec.store import LocalStore, MemoryStore
+from obspec.transfer import (
+    MultipartUploader,
+    ParallelDownloader,
+    ParallelGetter,
+    sync_prefix_async,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Sequence
+    from pathlib import Path
+
+    from obspec import GetOptions, GetResult, PutResult
+    from obspec.transfer import SyncStats
+
+DATA = os.urandom(100_000)
+
+
+def test_download_to_file(tmp_path: Path):
+    store = MemoryStore()
+    store.put("large.bin", DATA)
+
+    downloader = ParallelDownloader(store, part_size=4096, max_concurrency=4)
+    meta = downloader.download("large.bin", tmp_path / "large.bin")
+
+    assert meta["size"] == len(DATA)
+    assert (tmp_path / "large.bin").read_bytes() == DATA
+
+    # Overwrites and truncates an existing file
+    store.put("small.bin", b"abc")
+    downloader.download("small.bin", tmp_path / "large.bin")
+    assert (tmp_path / "large.bin").read_bytes() == b"abc"
+
+
+def test_download_to_buffers():
+    store = MemoryStore()
+    store.put("large.bin", DATA)
+    store.put("empty.bin", b"")
+    downloader = ParallelDownloader(store, part_size=3000)
+
+    assert bytes(downloader.read("large.bin")) == DATA
+    assert bytes(downloader.read("empty.bin")) == b""
+
+    with mmap.mmap(-1, len(DATA)) as out:
+        downloader.download("large.bin", out)
+        assert out[:] == DATA
+
+    with pytest.raises(ValueError, match="read-only"):
+        downloader.download("large.bin", DATA)
+    with pytest.raises(ValueError, match="need"):
+        downloader.download("large.bin", bytearray(10))
+
+
+def test_download_async(tmp_path: Path):
+    store = MemoryStore()
+    store.put("large.bin", DATA)
+    downloader = ParallelDownloader(store, part_size=4096, max_concurrency=3)
+
+    async def run() -> bytes:
+        await downloader.download_async("large.bin", tmp_path / "out")
+        return bytes(await downloader.read_async("large.bin"))
+
+    assert asyncio.run(run()) == DATA
+    assert (tmp_path / "out").read_bytes() == DATA
+
+
+class ChangingStore(MemoryStore):
+    """Overwrites the object after the first part has been read."""
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> GetResult:
+        result = super().get(path, options=options)
+        if options and "range" in options:
+            super().put(path, DATA[::-1])
+        return result
+
+
+def test_pinned_to_e_tag():
+    store = ChangingStore()
+    store.put("large.bin", DATA)
+    downloader = ParallelDownloader(store, part_size=4096, max_concurrency=1)
+
+    with pytest.raises(PreconditionError):
+        downloader.read("large.bin")
+
+
+def test_get_range_only_checks_meta():
+    store = MemoryStore()
+    store.put("a", DATA)
+
+    class GetRangeOnly:
+        calls = 0
+
+        def head(self, path: str):  # noqa: ANN202
+            return store.head(path)
+
+        def get_range(self, path: str, *, start: int, end: int) -> bytes:
+            self.calls += 1
+            if self.calls == 2:
+                store.put(path, DATA)
+            return DATA[start:end]
+
+    client = GetRangeOnly()
+    downloader = ParallelDownloader(client, part_size=50_000, max_concurrency=1)
+    with pytest.raises(PreconditionError, match="modified"):
+        downloader.read("a")
+    assert bytes(downloader.read("a")) == DATA
+
+
+def test_sync_between_stores(tmp_path: Path):
+    source = MemoryStore()
+    for i in range(20):
+        source.put(
+            f"data/{i:02}",
+            f"object {i}".encode(),
+            attributes={"Content-Type": "text/plain"},
+        )
+    source.put("database/ignored", b"x")
+    # LocalStore does not support attributes, which are dropped
+    dest = LocalStore(tmp_path, mkdir=True)
+    dest.put("mirror/extra", b"extra")
+    dest.put("other", b"kept")
+
+    progress: list[SyncStats] = []
+    stats = asyncio.run(
+        sync_prefix_async(
+            source,
+            dest,
+            source_prefix="data",
+            dest_prefix="mirror/",
+            delete=True,
+            max_concurrency=4,
+            progress=progress.append,
+        ),
+    )
+
+    assert stats == {
+        "listed": 20,
+        "transferred": 20,
+        "skipped": 0,
+        "deleted": 1,
+        "bytes": sum(len(f"object {i}") for i in range(20)),
+    }
+    assert progress[-1] == stats
+    assert sorted(p.name for p in (tmp_path / "mirror").iterdir()) == [
+        f"{i:02}" for i in range(20)
+    ]
+    assert bytes(dest.get("mirror/07").buffer()) == b"object 7"
+    assert (tmp_path / "other").exists()
+
+    # Everything is up to date on a second run
+    stats = asyncio.run(
+        sync_prefix_async(source, dest, source_prefix="data", dest_prefix="mirror"),
+    )
+    assert stats["transferred"] == 0
+    assert stats["skipped"] == 20
+
+    # Attributes are copied to stores that support them
+    other = MemoryStore()
+    asyncio.run(sync_prefix_async(source, other, source_prefix="data"))
+    assert other.get("07").attributes == {"Content-Type": "text/plain"}
+
+
+class NoAttributesStore(MemoryStore):
+    """Rejects attributes with its own `NotSupportedError` class."""
+
+    NotSupportedError = type("NotSupportedError", (Exception,), {})
+
+    async def put_async(self, path: str, file: Any, **kwargs: Any) -> PutResult:  # noqa: ANN401
+        if kwargs.get("attributes"):
+            raise self.NotSupportedError(path)
+        return await super().put_async(path, file, **kwargs)
+
+
+def test_sync_drops_attributes_on_foreign_errors():
+    source = MemoryStore()
+    source.put("a", b"data", attributes={"Content-Type": "text/plain"})
+    dest = NoAttributesStore()
+    stats = asyncio.run(sync_prefix_async(source, dest))
+    assert stats["transferred"] == 1
+    assert bytes(dest.get("a").buffer()) == b"data"
+
+
+def test_sync_within_store_uses_copy():
+    store = MemoryStore()
+    store.put("a/1", b"one")
+    store.put("a/2", b"two")
+
+    stats = asyncio.run(
+        sync_prefix_async(store, store, source_prefix="a", dest_prefix="b"),
+    )
+    assert stats["transferred"] == 2
+    assert bytes(store.get("b/2").buffer()) == b"two"
+
+
+def test_sync_resumes_from_checkpoint(tmp_path: Path):
+    source = MemoryStore()
+    for i in range(10):
+        source.put(f"{i}", b"data")
+
+    class FailingStore(MemoryStore):
+        fail_after: int | None = 5
+
+        async def put_async(self, path: str, file: Any, **kwargs: Any) -> PutResult:  # noqa: ANN401
+            if self.fail_after is not None:
+                if self.fail_after == 0:
+                    msg = "connection reset"
+                    raise ConnectionError(msg)
+                self.fail_after -= 1
+            return await super().put_async(path, file, **kwargs)
+
+    dest = FailingStore()
+    checkpoint = tmp_path / "checkpoint"
+    with pytest.raises(ConnectionError):
+        asyncio.run(
+            sync_prefix_async(
+                source,
+                dest,
+                compare="e_tag",
+                max_concurrency=1,
+                checkpoint=checkpoint,
+            ),
+        )
+    assert len(dest) == 5
+    assert checkpoint.exists()
+
+    dest.fail_after = None
+    stats = asyncio.run(
+        sync_prefix_async(source, dest, compare="e_tag", checkpoint=checkpoint),
+    )
+    # e_tags differ between stores, so only the checkpoint prevents re-transfers
+    assert stats["transferred"] == 5
+    assert stats["skipped"] == 5
+    assert len(dest) == 10
+    assert not checkpoint.exists()
+
+
+class PartStore:
+    """Multipart primitives over a dict, recording how parts are uploaded."""
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.singles = 0
+        self.aborted = 0
+        self.buffers: set[int] = set()
+        self.fail: dict[int, list[Exception]] = {}
+        self.lock = threading.Lock()
+
+    def put_single(self, path: str, data: memoryview, **kwargs: Any) -> PutResult:  # noqa: ANN401, ARG002
+        self.singles += 1
+        self.objects[path] = bytes(data)
+        return {"e_tag": None, "version": None}
+
+    def create_multipart(self, path: str, **kwargs: Any) -> str:  # noqa: ANN401, ARG002
+        upload_id = str(len(self.uploads))
+        self.uploads[upload_id] = {}
+        return upload_id
+
+    def put_part(
+        self,
+        path: str,  # noqa: ARG002
+        upload_id: str,
+        part_number: int,
+        data: memoryview,
+    ) -> str:
+        with self.lock:
+            errors = self.fail.get(part_number)
+            if errors:
+                raise errors.pop()
+            self.buffers.add(id(data.obj))
+        self.uploads[upload_id][part_number] = bytes(data)
+        return str(part_number)
+
+    def complete_multipart(
+        self,
+        path: str,
+        upload_id: str,
+        parts: Sequence[str],
+    ) -> PutResult:
+        uploaded = self.uploads.pop(upload_id)
+        self.objects[path] = b"".join(uploaded[int(part)] for part in parts)
+        return {"e_tag": upload_id, "version": None}
+
+    def abort_multipart(self, path: str, upload_id: str) -> None:  # noqa: ARG002
+        self.aborted += 1
+        del self.uploads[upload_id]
+
+    async def put_single_async(self, *args: Any, **kwargs: Any) -> PutResult:  # noqa: ANN401
+        return self.put_single(*args, **kwargs)
+
+    async def create_multipart_async(self, *args: Any, **kwargs: Any) -> str:  # noqa: ANN401
+        return self.create_multipart(*args, **kwargs)
+
+    async def put_part_async(self, *args: Any) -> str:  # noqa: ANN401
+        await asyncio.sleep(0)
+        return self.put_part(*args)
+
+    async def complete_multipart_async(self, *args: Any) -> PutResult:  # noqa: ANN401
+        return self.complete_multipart(*args)
+
+    async def abort_multipart_async(self, *args: Any) -> None:  # noqa: ANN401
+        self.abort_multipart(*args)
+
+
+def test_multipart_upload(tmp_path: Path):
+    backend = PartStore()
+    uploader = MultipartUploader(backend, retry_backoff=0)
+
+    def chunks() -> Any:  # noqa: ANN401
+        for i in range(0, len(DATA), 777):
+            yield DATA[i : i + 777]
+
+    (tmp_path / "data.bin").write_bytes(DATA)
+    inputs = [DATA, io.BytesIO(DATA), tmp_path / "data.bin", chunks()]
+    for i, file in enumerate(inputs):
+        backend.buffers.clear()
+        uploader.put(str(i), file, chunk_size=4096, max_concurrency=3)
+        assert backend.objects[str(i)] == DATA
+        # Buffers are sliced in place; other inputs reuse a bounded pool of buffers
+        assert len(backend.buffers) <= 3
+    assert backend.singles == 0
+
+    # Small, conditional and non-multipart puts use a single request
+    uploader.put("small", b"abc", chunk_size=4096)
+    uploader.put("create", DATA, mode="create", chunk_size=4096)
+    uploader.put("single", chunks(), use_multipart=False, chunk_size=4096)
+    assert backend.singles == 3
+    assert backend.objects["single"] == DATA
+
+    uploader.put("forced", b"", use_multipart=True)
+    assert backend.singles == 3
+    assert backend.objects["forced"] == b""
+
+
+def test_multipart_upload_retries():
+    backend = PartStore()
+    uploader = MultipartUploader(backend, retry_backoff=0)
+
+    backend.fail[2] = [ConnectionError("reset"), TimeoutError()]
+    uploader.put("a", DATA, chunk_size=4096)
+    assert backend.objects["a"] == DATA
+    assert not backend.fail[2]
+
+    backend.fail[3] = [ConnectionError("reset")] * 3
+    with pytest.raises(ConnectionError):
+        uploader.put("b", DATA, chunk_size=4096)
+    assert backend.aborted == 1
+
+    # Well-known exceptions are not retried
+    backend.fail[1] = [ConnectionError("reset"), NotFoundError("gone")]
+    with pytest.raises(NotFoundError):
+        uploader.put("c", DATA, chunk_size=4096)
+    assert backend.fail[1]
+    assert backend.aborted == 2
+
+    # Nor are bugs
+    backend.fail[1] = [ConnectionError("reset"), AttributeError("bug")]
+    with pytest.raises(AttributeError):
+        uploader.put("d", DATA, chunk_size=4096)
+    assert backend.fail[1]
+    assert backend.aborted == 3
+    assert not backend.uploads
+
+
+def test_multipart_upload_async():
+    backend = PartStore()
+    uploader = MultipartUploader(backend, retry_backoff=0)
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for i in range(0, len(DATA), 5000):
+            yield DATA[i : i + 5000]
+
+    async def run() -> None:
+        await uploader.put_async("a", chunks(), chunk_size=4096, max_concurrency=2)
+        await uploader.put_async("b", io.BytesIO(DATA), chunk_size=4096)
+        backend.fail[5] = [ConnectionError("reset")] * 3
+        with pytest.raises(ConnectionError):
+            await uploader.put_async("c", DATA, chunk_size=4096)
+
+    asyncio.run(run())
+    assert backend.objects["a"] == backend.objects["b"] == DATA
+    assert "c" not in backend.objects
+    assert backend.aborted == 1
+    assert not backend.uploads
+
+
+class DelayStore(MemoryStore):
+    """Delays each get by the number of seconds in its path, tracking concurrency."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+        self.started: list[str] = []
+        self._count_lock = threading.Lock()
+
+    def _enter(self, path: str) -> float:
+        with self._count_lock:
+            self.started.append(path)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        name = path.rsplit("/", 1)[-1]
+        return float(name) if name[0].isdigit() else 0
+
+    def _exit(self) -> None:
+        with self._count_lock:
+            self.active -= 1
+
+    def get(self, path: str, *, options: GetOptions | None = None) -> GetResult:
+        time.sleep(self._enter(path))
+        try:
+            return super().get(path, options=options)
+        finally:
+            self._exit()
+
+    async def get_async(
+        self,
+        path: str,
+        *,
+        options: GetOptions | None = None,
+    ) -> GetResult:
+        await asyncio.sleep(self._enter(path))
+        try:
+            return super().get(path, options=options)
+        finally:
+            self._exit()
+
+
+def delay_store() -> DelayStore:
+    store = DelayStore()
+    for delay in ("0.1", "0.04", "0.02", "0"):
+        store.put(f"d/{delay}", delay.encode())
+    return store
+
+
+def test_get_many_async():
+    store = delay_store()
+    getter = ParallelGetter(store, max_concurrency=2)
+
+    async def collect(*, ordered: bool = False) -> list[tuple[str, Any]]:
+        paths = ["d/0.1", "d/0.04", ("d/0.02", {"range": (2, 4)}), "d/missing"]
+        return [pair async for pair in getter.get_many_async(paths, ordered=ordered)]
+
+    results = asyncio.run(collect(ordered=True))
+    assert [path for path, _ in results] == ["d/0.1", "d/0.04", "d/0.02", "d/missing"]
+    assert [bytes(r) for _, r in results[:3]] == [b"0.1", b"0.04", b"02"]
+    assert isinstance(results[3][1], NotFoundError)
+    assert store.peak == 2
+
+    results = asyncio.run(collect())
+    assert [path for path, _ in results] == ["d/0.04", "d/0.02", "d/missing", "d/0.1"]
+
+
+def test_get_many_backpressure():
+    store = delay_store()
+    getter = ParallelGetter(store, max_concurrency=2)
+    consumed: list[str] = []
+
+    async def paths() -> AsyncIterator[str]:
+        for _ in range(10):
+            yield "d/0"
+
+    async def run() -> None:
+        iterator = getter.get_many_async(paths())
+        async for path, _ in iterator:
+            consumed.append(path)
+            if len(consumed) == 3:
+                break
+        await iterator.aclose()  # type: ignore[attr-defined]
+
+    asyncio.run(run())
+    # Only enough requests to refill the window were made
+    assert len(store.started) == 4
+    assert store.active == 0
+
+
+def test_get_many_sync():
+    store = delay_store()
+    getter = ParallelGetter(store, max_concurrency=3)
+
+    paths = ["d/0.1", "d/0.04", "d/0.02", "d/missing"]
+    results = dict(getter.get_many(paths))
+    assert bytes(results["d/0.04"]) == b"0.04"  # type: ignore[arg-type]
+    assert isinstance(results["d/missing"], NotFoundError)
+    assert store.peak == 3
+
+    ordered = [path for path, _ in getter.get_many(paths, ordered=True)]
+    assert ordered == paths
+
+    with pytest.raises(ValueError, match="at least 1"):
+        ParallelGetter(store, max_concurrency=0)